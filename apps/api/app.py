@@ -8,19 +8,23 @@ Structure:
 - routes/render.py     - Render endpoints (estimate, render, render-stream, cancel)
 - routes/verify.py     - Verification endpoint
 - routes/health.py     - Health check endpoint
+- routes/metrics_route.py - Prometheus metrics endpoint
 - routes/manifest_route.py - GET /api/manifest
 - routes/config_route.py   - GET /api/config (legacy, delegates to manifest)
 - services/openscad.py - OpenSCAD subprocess wrapper
 """
 import logging
 
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, abort, jsonify
 from flask_cors import CORS
 
 from config import Config
 from extensions import limiter
+from manifest import manifest_service
+from middleware.profiling import init_profiling
 from routes.engine.render import render_bp
 from routes.core.health import health_bp
+from routes.core.metrics_route import metrics_bp
 from routes.engine.verify import verify_bp
 from routes.core.config_route import config_bp
 from routes.core.manifest_route import manifest_bp
@@ -29,6 +33,7 @@ from routes.users.onboard import onboard_bp
 from routes.users.admin import admin_bp
 from routes.engine.download import download_bp
 from routes.projects.bom import bom_bp
+from routes.projects.bundle import bundle_bp
 from routes.projects.datasheet import datasheet_bp
 from routes.integrations.analytics import analytics_bp
 from routes.users.user import user_bp
@@ -41,6 +46,8 @@ from routes.integrations.storefront import storefront_bp
 from routes.projects.catalog import catalog_bp
 from routes.core.client_config import client_config_bp
 from services.core.mqtt_telemetry import telemetry_service
+from services.engine.disk_gc import disk_gc
+from utils.route_helpers import safe_join_path, send_precompressed, send_shared_artifact
 
 # Configure logging
 logging.basicConfig(
@@ -52,11 +59,14 @@ logger = logging.getLogger(__name__)
 
 def create_app():
     """Application factory for Flask app."""
-    app = Flask(__name__)
+    # Render outputs are served by serve_static below (precompressed variants,
+    # Cache-Control); Flask's own static route would shadow it
+    app = Flask(__name__, static_folder=None)
     app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50 MB upload limit
-    CORS(app, origins=Config.CORS_ORIGINS)
+    CORS(app, origins=Config.CORS_ORIGINS, expose_headers=["X-Trace-Id", "X-Profile-Id", "X-Profile-Url", "X-Render-Job"])
 
     limiter.init_app(app)
+    init_profiling(app)
 
     # Ensure static directory exists
     Config.STATIC_DIR.mkdir(parents=True, exist_ok=True)
@@ -64,6 +74,7 @@ def create_app():
     # Register blueprints
     app.register_blueprint(render_bp)
     app.register_blueprint(health_bp)
+    app.register_blueprint(metrics_bp)
     app.register_blueprint(verify_bp)
     app.register_blueprint(config_bp)
     app.register_blueprint(manifest_bp)
@@ -72,6 +83,7 @@ def create_app():
     app.register_blueprint(admin_bp)
     app.register_blueprint(download_bp)
     app.register_blueprint(bom_bp)
+    app.register_blueprint(bundle_bp)
     app.register_blueprint(datasheet_bp)
     app.register_blueprint(analytics_bp)
     app.register_blueprint(user_bp)
@@ -87,8 +99,19 @@ def create_app():
     # Static file serving
     @app.route('/static/<path:filename>')
     def serve_static(filename):
-        resp = send_from_directory(str(Config.STATIC_DIR), filename)
-        resp.headers["Cache-Control"] = "public, max-age=3600"
+        path = safe_join_path(str(Config.STATIC_DIR), filename)
+        if path is None:
+            abort(404)
+        if path.is_file():
+            resp = send_precompressed(path)
+        else:
+            # Rendered on another replica: read through the artifact store
+            resp = send_shared_artifact(filename)
+            if resp is None:
+                abort(404)
+        # Presigned redirects expire, so only the file itself is cacheable
+        if resp.status_code == 200:
+            resp.headers["Cache-Control"] = "public, max-age=3600"
         return resp
 
     # Global error handlers
@@ -113,6 +136,12 @@ def create_app():
     # Start the continuous 4D Telemetry Bridge
     telemetry_service.start()
 
+    # Keep render outputs within DISK_GC_BUDGET_BYTES
+    disk_gc.start()
+
+    # Reload edited project.json files as soon as they change (with watchdog)
+    manifest_service.start_watcher()
+
     return app
 
 
@@ -0,0 +1,193 @@
+"""
+ASGI entry point for the Yantra4D API.
+
+Run with ``SERVER_MODE=asgi`` (gunicorn.conf.py then uses uvicorn workers and
+loads ``asgi:app``), or directly with ``uvicorn asgi:app``.
+
+Views stay synchronous Flask code: each request is dispatched on a thread
+pool exactly as ``Flask.wsgi_app`` would, which returns a complete response
+object. Ordinary bodies are then sent chunk by chunk from that pool, but a
+body that is an :class:`AsyncBody` (the SSE endpoints) is iterated on the
+server's event loop, so an open stream holds no thread while it waits and a
+worker can serve as many streams as its loop and file descriptors allow.
+A client disconnect cancels the stream, which kills any render subprocess.
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+
+from app import app as flask_app
+from config import Config
+from services.engine.stream_engine import AsyncBody
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=Config.ASGI_THREADS, thread_name_prefix="asgi-dispatch")
+    return _executor
+
+
+def build_environ(scope: dict, body: bytes) -> dict:
+    """Translate an ASGI HTTP *scope* and request *body* into a WSGI environ."""
+    server = scope.get("server") or ("localhost", 80)
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode().decode("latin-1"),
+        "PATH_INFO": path.encode().decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+        environ["REMOTE_PORT"] = str(scope["client"][1])
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        value = raw_value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _dispatch(environ: dict):
+    """Run the Flask request cycle for *environ* (in a pool thread); return the response.
+
+    Mirrors ``Flask.wsgi_app``: the request context is popped before the
+    body is iterated, just as it is under a WSGI server.
+    """
+    ctx = flask_app.request_context(environ)
+    error = None
+    try:
+        try:
+            ctx.push()
+            response = flask_app.full_dispatch_request()
+        except Exception as e:  # noqa: BLE001 - any error becomes a 500, as in Flask.wsgi_app
+            error = e
+            response = flask_app.handle_exception(e)
+        return response
+    finally:
+        if "werkzeug.debug.preserve_context" in environ:
+            environ["werkzeug.debug.preserve_context"](ctx)
+        if error is not None and flask_app.should_ignore_error(error):
+            error = None
+        ctx.pop(error)
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def _wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _send_async_body(body: AsyncBody, send):
+    async for chunk in body:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        if chunk:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def _stream_async_body(body: AsyncBody, receive, send):
+    """Send *body* from the event loop, cancelling it if the client goes away."""
+    streaming = asyncio.ensure_future(_send_async_body(body, send))
+    disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await asyncio.wait({streaming, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+        if not streaming.done():
+            streaming.cancel()
+            with suppress(asyncio.CancelledError):
+                await streaming
+    if not streaming.cancelled():
+        streaming.result()
+
+
+async def _send_app_iter(response, environ: dict, send):
+    """Send a synchronous body, pulling each chunk on the dispatch pool."""
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    app_iter = response.get_app_iter(environ)
+    chunks = iter(app_iter)
+    done = object()
+    try:
+        while True:
+            chunk = await loop.run_in_executor(executor, next, chunks, done)
+            if chunk is done:
+                break
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        if hasattr(app_iter, "close"):
+            await loop.run_in_executor(executor, app_iter.close)
+
+
+async def _lifespan(receive, send):
+    global _executor
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+                _executor = None
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI application serving the Flask app."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    environ = build_environ(scope, await _read_body(receive))
+    response = await asyncio.get_running_loop().run_in_executor(_get_executor(), _dispatch, environ)
+
+    await send({
+        "type": "http.response.start",
+        "status": response.status_code,
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1"))
+                    for k, v in response.get_wsgi_headers(environ).items()],
+    })
+    if isinstance(response.response, AsyncBody) and scope["method"] != "HEAD":
+        try:
+            await _stream_async_body(response.response, receive, send)
+        finally:
+            response.close()
+    else:
+        await _send_app_iter(response, environ, send)
@@ -0,0 +1,19 @@
+"""Benchmarks for BOM quantity formula evaluation."""
+import pytest
+
+from routes.projects.bom import _safe_eval_formula
+
+PARAMS = {
+    "width_units": 4, "depth_units": 3, "height_units": 6,
+    "enable_magnets": 1, "bp_enable_magnets": 1, "lid_include_magnets": 0,
+    "vertical_chambers": 3, "horizontal_chambers": 2,
+}
+
+
+@pytest.mark.parametrize("formula", [
+    4,
+    "width_units * depth_units",
+    "enable_magnets * 4 + bp_enable_magnets * 4 * width_units * depth_units + lid_include_magnets * 4 * width_units * depth_units",
+], ids=["constant", "product", "magnet_count"])
+def test_safe_eval_formula(benchmark, formula):
+    assert benchmark(_safe_eval_formula, formula, PARAMS) >= 0
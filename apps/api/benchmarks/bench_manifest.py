@@ -0,0 +1,49 @@
+"""Benchmarks for manifest loading, project discovery and SCAD analysis on the real projects/ tree."""
+import pytest
+from conftest import REPO_PROJECTS
+
+from manifest import manifest_service
+from services.core.project_catalog import ProjectCatalog
+from services.core.scad_analyzer import analyze_directory
+
+
+def test_load_manifest_cold(benchmark):
+    def load():
+        manifest_service._manifest_cache.clear()
+        return manifest_service.load_manifest("gridfinity")
+
+    assert benchmark(load).slug == "gridfinity"
+
+
+def test_load_manifest_cached(benchmark):
+    manifest_service.load_manifest("gridfinity")
+    assert benchmark(manifest_service.load_manifest, "gridfinity").slug == "gridfinity"
+
+
+def test_discover_projects(benchmark):
+    projects = benchmark(manifest_service.discover_projects)
+    assert len(projects) > 10
+
+
+def test_catalog_listing_warm(benchmark, monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, "CATALOG_CHECK_INTERVAL_S", 0)  # stat every project each call
+    catalog = ProjectCatalog()
+    body, _ = benchmark(catalog.listing)
+    assert body.count(b'"slug"') > 10
+
+
+def test_analyze_directory_all_projects(benchmark):
+    project_dirs = [d for d in sorted(REPO_PROJECTS.iterdir()) if any(d.glob("*.scad"))]
+
+    def analyze_all():
+        return [analyze_directory(d) for d in project_dirs]
+
+    results = benchmark(analyze_all)
+    assert len(results) == len(project_dirs)
+
+
+@pytest.mark.parametrize("slug", ["gridfinity", "tablaco", "rugged-box"])
+def test_analyze_directory_project(benchmark, slug):
+    result = benchmark(analyze_directory, REPO_PROJECTS / slug)
+    assert result["files"]
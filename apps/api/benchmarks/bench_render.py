@@ -0,0 +1,42 @@
+"""Benchmarks for the per-request render path: parameter validation, command build and cache."""
+from services.engine.openscad import build_openscad_command, validate_params
+from services.engine.render_cache import RenderCache
+
+
+def test_validate_params(benchmark, gridfinity_defaults):
+    result = benchmark(validate_params, gridfinity_defaults, "gridfinity")
+    assert result
+
+
+def test_build_openscad_command(benchmark, gridfinity_defaults):
+    cmd = benchmark(build_openscad_command, "/tmp/out.stl", "/tmp/main.scad", gridfinity_defaults, 1)
+    assert cmd[1:3] == ["-o", "/tmp/out.stl"]
+
+
+def test_render_cache_make_key(benchmark, gridfinity_defaults):
+    key = benchmark(RenderCache._make_key, "gridfinity", "gridfinity.scad", gridfinity_defaults, "cup", "stl")
+    assert len(key) == 64
+
+
+def test_render_cache_get_hit(benchmark, gridfinity_defaults, tmp_path):
+    cache = RenderCache()
+    stl = tmp_path / "cup.stl"
+    stl.write_bytes(b"\x00" * 84)
+    cache.put("gridfinity", "gridfinity.scad", gridfinity_defaults, "cup", "stl", str(stl), 84)
+    entry = benchmark(cache.get, "gridfinity", "gridfinity.scad", gridfinity_defaults, "cup", "stl")
+    assert entry is not None
+
+
+def test_render_cache_get_miss(benchmark, gridfinity_defaults):
+    cache = RenderCache()
+    assert benchmark(cache.get, "gridfinity", "gridfinity.scad", gridfinity_defaults, "cup", "stl") is None
+
+
+def test_render_cache_put_full(benchmark, gridfinity_defaults, tmp_path):
+    """put() on a full cache, which also evicts the least recently used entry."""
+    cache = RenderCache(max_entries=200)
+    stl = tmp_path / "cup.stl"
+    stl.write_bytes(b"\x00" * 84)
+    for i in range(200):
+        cache.put("gridfinity", "gridfinity.scad", {"i": i}, "cup", "stl", str(stl), 84)
+    benchmark(cache.put, "gridfinity", "gridfinity.scad", gridfinity_defaults, "cup", "stl", str(stl), 84)
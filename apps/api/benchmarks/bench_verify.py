@@ -0,0 +1,32 @@
+"""Benchmarks for geometric verification on synthetic meshes of growing size."""
+import contextlib
+import copy
+import io
+import sys
+from pathlib import Path
+
+import pytest
+import trimesh
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tests" / "scripts"))
+
+from verify_design import DEFAULTS, run_verification
+
+CONFIG = copy.deepcopy(DEFAULTS)
+if trimesh.collision.fcl is None:
+    # The collision check needs python-fcl; skip it rather than the whole benchmark
+    for stage in CONFIG["stages"].values():
+        stage.get("checks", {}).pop("collision", None)
+
+
+@pytest.mark.parametrize("subdivisions", [1, 2, 3, 4, 5])
+def test_run_verification(benchmark, subdivisions):
+    mesh = trimesh.creation.icosphere(subdivisions=subdivisions, radius=20)
+    benchmark.extra_info["faces"] = len(mesh.faces)
+
+    def verify():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return run_verification(mesh, CONFIG)
+
+    result = benchmark(verify)
+    assert "stages" in result
@@ -0,0 +1,37 @@
+"""Shared fixtures for API micro-benchmarks.
+
+Unlike tests/, benchmarks run against the real projects/ tree so the numbers
+reflect production manifests and SCAD sources.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+REPO_PROJECTS = Path(__file__).resolve().parents[3] / "projects"
+
+
+@pytest.fixture(autouse=True)
+def _real_projects(tmp_path, monkeypatch):
+    """Point Config at the repository's projects/ and keep writes in tmp_path."""
+    from config import Config
+    monkeypatch.setattr(Config, "PROJECTS_DIR", REPO_PROJECTS)
+    monkeypatch.setattr(Config, "CARTRIDGES_DIRS", [REPO_PROJECTS])
+    monkeypatch.setattr(Config, "MULTI_PROJECT", True)
+    monkeypatch.setattr(Config, "ANALYTICS_DB_PATH", tmp_path / ".analytics.db")
+    monkeypatch.setattr(Config, "CATALOG_INDEX_FILE", tmp_path / ".catalog.json")
+    monkeypatch.setattr(Config, "TRACE_EXPORTER", "none")
+
+    import manifest as manifest_mod
+    manifest_mod.manifest_service._manifest_cache.clear()
+    yield
+    manifest_mod.manifest_service._manifest_cache.clear()
+
+
+@pytest.fixture
+def gridfinity_defaults():
+    """Default parameter values of the gridfinity project (28 parameters)."""
+    from manifest import get_manifest
+    return {p["id"]: p.get("default") for p in get_manifest("gridfinity").parameters}
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dataclasses import dataclass, field
 from pathlib import Path
 
@@ -30,6 +31,8 @@ class AppConfig:
     DEBUG: bool = field(default_factory=lambda: os.getenv("FLASK_DEBUG", "false").lower() == "true")
     PORT: int = field(default_factory=lambda: int(os.getenv("PORT", DEFAULT_API_PORT)))
     HOST: str = field(default_factory=lambda: os.getenv("HOST", "0.0.0.0"))
+    # ASGI mode (SERVER_MODE=asgi): threads per worker dispatching Flask views
+    ASGI_THREADS: int = field(default_factory=lambda: int(os.getenv("ASGI_THREADS", "16")))
     CORS_ORIGINS: list = field(init=False)
 
     # OpenSCAD
@@ -38,9 +41,99 @@ class AppConfig:
         "/Applications/OpenSCAD.app/Contents/MacOS/OpenSCAD"
     ))
 
+    # CadQuery: command prefix that receives "<script> <output> <params_json> <format>"
+    # (default: python services/engine/cq_runner.py)
+    CADQUERY_RUNNER: str = field(default_factory=lambda: os.getenv("CADQUERY_RUNNER", ""))
+
     STL_PREFIX: str = "preview_"
     CADQUERY_ALLOWED_EXPORT_FORMATS: set = field(default_factory=lambda: {'stl', 'step', 'glb', 'gltf', 'obj', 'vrml', 'amf', '3mf'})
 
+    # Render subprocess resource limits (per-tier values live in tiers.json "render_limits")
+    RENDER_LIMITS_ENABLED: bool = field(default_factory=lambda: os.getenv("RENDER_LIMITS_ENABLED", "true").lower() == "true")
+    RENDER_CPU_AFFINITY: str = field(default_factory=lambda: os.getenv("RENDER_CPU_AFFINITY", ""))
+    RENDER_CGROUP_ROOT: str = field(default_factory=lambda: os.getenv("RENDER_CGROUP_ROOT", ""))
+    # Parts of one /api/render-stream request rendered at the same time
+    RENDER_STREAM_CONCURRENCY: int = field(default_factory=lambda: int(os.getenv("RENDER_STREAM_CONCURRENCY", "4")))
+    # Resumable render streams: output lines kept per job for replay, and how long a
+    # finished (or abandoned) job stays re-attachable
+    RENDER_JOB_BUFFER: int = field(default_factory=lambda: int(os.getenv("RENDER_JOB_BUFFER", "1000")))
+    RENDER_JOB_TTL_S: float = field(default_factory=lambda: float(os.getenv("RENDER_JOB_TTL_S", "300")))
+    # Decimated levels of detail written next to rendered STLs (face ratios),
+    # skipped for meshes with fewer than RENDER_LOD_MIN_FACES faces
+    RENDER_LOD_ENABLED: bool = field(default_factory=lambda: os.getenv("RENDER_LOD_ENABLED", "true").lower() == "true")
+    RENDER_LOD_LEVELS: str = field(default_factory=lambda: os.getenv("RENDER_LOD_LEVELS", "0.05,0.25"))
+    RENDER_LOD_MIN_FACES: int = field(default_factory=lambda: int(os.getenv("RENDER_LOD_MIN_FACES", "50000")))
+    # Mesh cleanup after a render: weld vertices within the tolerance (model
+    # units), drop degenerate/duplicate faces, optionally merge coplanar regions
+    RENDER_CLEANUP_ENABLED: bool = field(default_factory=lambda: os.getenv("RENDER_CLEANUP_ENABLED", "true").lower() == "true")
+    RENDER_CLEANUP_TOLERANCE: float = field(default_factory=lambda: float(os.getenv("RENDER_CLEANUP_TOLERANCE", "1e-5")))
+    RENDER_CLEANUP_MERGE_COPLANAR: bool = field(default_factory=lambda: os.getenv("RENDER_CLEANUP_MERGE_COPLANAR", "false").lower() == "true")
+    # Mesh packaging after a render: binary STL, precompressed .gz/.br siblings
+    # and (RENDER_PACKAGE_GLB) a quantized GLB for viewers
+    RENDER_PACKAGE_ENABLED: bool = field(default_factory=lambda: os.getenv("RENDER_PACKAGE_ENABLED", "true").lower() == "true")
+    RENDER_PACKAGE_GLB: bool = field(default_factory=lambda: os.getenv("RENDER_PACKAGE_GLB", "true").lower() == "true")
+    # Static file offload: "x-accel" (nginx X-Accel-Redirect to
+    # STATIC_OFFLOAD_PREFIX + absolute path) or "x-sendfile"; empty serves from Python
+    STATIC_OFFLOAD: str = field(default_factory=lambda: os.getenv("STATIC_OFFLOAD", "").lower())
+    STATIC_OFFLOAD_PREFIX: str = field(default_factory=lambda: os.getenv("STATIC_OFFLOAD_PREFIX", "/_protected"))
+    # Largest part sent inline (base64 "mesh" event) when a stream asks for inline_meshes
+    RENDER_INLINE_MAX_BYTES: int = field(default_factory=lambda: int(os.getenv("RENDER_INLINE_MAX_BYTES", str(256 * 1024))))
+    # Shared artifact pool for render outputs: "local" (ARTIFACT_LOCAL_DIR, e.g. a
+    # volume every replica mounts) or "s3" (S3-compatible, needs boto3); empty
+    # keeps them on this pod. The static folder is the read-through cache.
+    ARTIFACT_STORE: str = field(default_factory=lambda: os.getenv("ARTIFACT_STORE", "").lower())
+    ARTIFACT_LOCAL_DIR: str = field(default_factory=lambda: os.getenv("ARTIFACT_LOCAL_DIR", ""))
+    ARTIFACT_S3_BUCKET: str = field(default_factory=lambda: os.getenv("ARTIFACT_S3_BUCKET", ""))
+    ARTIFACT_S3_PREFIX: str = field(default_factory=lambda: os.getenv("ARTIFACT_S3_PREFIX", "yantra4d/"))
+    ARTIFACT_S3_ENDPOINT_URL: str = field(default_factory=lambda: os.getenv("ARTIFACT_S3_ENDPOINT_URL", ""))
+    ARTIFACT_S3_REGION: str = field(default_factory=lambda: os.getenv("ARTIFACT_S3_REGION", ""))
+    # Downloads of artifacts this pod doesn't have redirect to a presigned URL
+    # (s3) instead of being copied into the static folder first
+    ARTIFACT_REDIRECT: bool = field(default_factory=lambda: os.getenv("ARTIFACT_REDIRECT", "false").lower() == "true")
+    ARTIFACT_PRESIGN_TTL_S: int = field(default_factory=lambda: int(os.getenv("ARTIFACT_PRESIGN_TTL_S", "300")))
+    # Disk GC for render outputs (static folder, exports/ parity outputs): above
+    # HIGH_WATERMARK x BUDGET, least recently used ones are evicted down to
+    # LOW_WATERMARK x BUDGET. A budget of 0 turns it off.
+    DISK_GC_BUDGET_BYTES: int = field(default_factory=lambda: int(os.getenv("DISK_GC_BUDGET_BYTES", str(2 * 1024 ** 3))))
+    DISK_GC_HIGH_WATERMARK: float = field(default_factory=lambda: float(os.getenv("DISK_GC_HIGH_WATERMARK", "0.9")))
+    DISK_GC_LOW_WATERMARK: float = field(default_factory=lambda: float(os.getenv("DISK_GC_LOW_WATERMARK", "0.75")))
+    DISK_GC_INTERVAL_S: float = field(default_factory=lambda: float(os.getenv("DISK_GC_INTERVAL_S", "60")))
+    # Files younger than this are never evicted (they may belong to a render
+    # in another worker, whose jobs this one can't see)
+    DISK_GC_MIN_AGE_S: float = field(default_factory=lambda: float(os.getenv("DISK_GC_MIN_AGE_S", "900")))
+    # Manifest hot reload: a cached project.json is stat'ed at most this often
+    # per project and re-read when it changed; MANIFEST_WATCH also reloads on
+    # file events when the watchdog package is installed
+    MANIFEST_CHECK_INTERVAL_S: float = field(default_factory=lambda: float(os.getenv("MANIFEST_CHECK_INTERVAL_S", "2")))
+    MANIFEST_WATCH: bool = field(default_factory=lambda: os.getenv("MANIFEST_WATCH", "true").lower() == "true")
+    # Project catalog (/api/projects, admin listing): an index persisted to
+    # CATALOG_INDEX_FILE, re-validated by stat at most this often; ?stats=1
+    # counts are re-queried at most every CATALOG_STATS_TTL_S seconds
+    CATALOG_INDEX_FILE: Path = field(init=False)
+    CATALOG_CHECK_INTERVAL_S: float = field(default_factory=lambda: float(os.getenv("CATALOG_CHECK_INTERVAL_S", "5")))
+    CATALOG_STATS_TTL_S: float = field(default_factory=lambda: float(os.getenv("CATALOG_STATS_TTL_S", "60")))
+
+    # SSE framing (utils/sse.py): chunk/output events arriving within the
+    # window (or up to the byte budget) go out as one write; a comment line
+    # keeps idle streams alive; each connection buffers at most SSE_BUFFER_EVENTS
+    SSE_COALESCE_MS: float = field(default_factory=lambda: float(os.getenv("SSE_COALESCE_MS", "50")))
+    SSE_COALESCE_BYTES: int = field(default_factory=lambda: int(os.getenv("SSE_COALESCE_BYTES", "16384")))
+    SSE_HEARTBEAT_S: float = field(default_factory=lambda: float(os.getenv("SSE_HEARTBEAT_S", "15")))
+    SSE_BUFFER_EVENTS: int = field(default_factory=lambda: int(os.getenv("SSE_BUFFER_EVENTS", "512")))
+
+    # Metrics (/api/metrics). When set, scrapers must send this as a Bearer token.
+    METRICS_TOKEN: str = field(default_factory=lambda: os.getenv("METRICS_TOKEN", ""))
+
+    # Tracing: "none" (off), "jsonl" (spans appended to TRACE_FILE, unbounded: for local debugging) or "otlp"
+    TRACE_EXPORTER: str = field(default_factory=lambda: os.getenv("TRACE_EXPORTER", "none").lower())
+    TRACE_FILE: Path = field(init=False)
+    TRACE_OTLP_ENDPOINT: str = field(default_factory=lambda: os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318"))
+
+    # Profiling: admin X-Profile artifacts and the slow-request log (threshold 0 disables)
+    PROFILE_DIR: Path = field(init=False)
+    PROFILE_SAMPLE_INTERVAL_MS: float = field(default_factory=lambda: float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")))
+    SLOW_REQUEST_THRESHOLD_S: float = field(default_factory=lambda: float(os.getenv("SLOW_REQUEST_THRESHOLD_S", "5")))
+
     # Janua Auth
     JANUA_ISSUER: str = field(default_factory=lambda: os.getenv("JANUA_ISSUER", "https://auth.madfam.io"))
     JANUA_JWKS_URL: str = field(init=False)
@@ -116,6 +209,10 @@ class AppConfig:
         self.TIERS_FILE = Path(os.getenv("TIERS_FILE", self.BASE_DIR / "tiers.json"))
         self.JANUA_API_URL = os.getenv("JANUA_API_URL", f"{self.JANUA_ISSUER}/api/v1")
         self.ANALYTICS_DB_PATH = self.PROJECTS_DIR / ".analytics.db"
+        self.TRACE_FILE = Path(os.getenv("TRACE_FILE", self.PROJECTS_DIR / ".traces.jsonl"))
+        # Runtime dumps, kept out of the git-tracked projects tree
+        self.PROFILE_DIR = Path(os.getenv("PROFILE_DIR", Path(tempfile.gettempdir()) / "yantra4d-profiles"))
+        self.CATALOG_INDEX_FILE = Path(os.getenv("CATALOG_INDEX_FILE", self.PROJECTS_DIR / ".catalog.json"))
         self.CORS_ORIGINS = [
             o.strip()
             for o in os.getenv("CORS_ORIGINS", _DEFAULT_CORS_ORIGINS).split(",")
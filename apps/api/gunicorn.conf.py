@@ -0,0 +1,35 @@
+"""
+Gunicorn configuration for the Yantra4D API.
+
+Loaded automatically from the working directory (the Dockerfile runs gunicorn
+from apps/api). Command-line flags still override these defaults.
+
+``SERVER_MODE=asgi`` serves ``asgi:app`` on uvicorn workers, where open SSE
+streams hold no thread; the default ``wsgi`` mode serves ``app:app`` on sync
+workers, each of which is pinned by an open stream.
+"""
+import os
+import shutil
+
+# prometheus_client picks its multiprocess value class at import time, so the
+# directory must be in the environment before the app (and its metrics) load.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/yantra4d-metrics")
+
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi").lower()
+if SERVER_MODE == "asgi":
+    wsgi_app = "asgi:app"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "app:app"
+
+
+def on_starting(server):
+    """Start every master with an empty metrics directory (stale files skew sums)."""
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the aggregated metrics."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -2,14 +2,33 @@
 Project Manifest loader.
 Parses project.json and provides typed accessors for modes, parts, parameters.
 Supports multi-project mode via PROJECTS_DIR.
+
+Loaded manifests are cached per project directory and hot-reloaded: a cached
+project.json is stat'ed at most every ``MANIFEST_CHECK_INTERVAL_S`` seconds
+and re-read only when its mtime, size or inode changed. With ``watchdog``
+(in requirements.txt; ``MANIFEST_WATCH``), file events reload a changed
+manifest in the background as well, before the next request asks for it.
+Without it, stat polling alone picks up changes. Caches derived from a
+manifest subscribe with :meth:`ManifestService.on_change`: the project
+catalog and the render cache.
 """
 import copy
 import json
 import logging
+import os
+import threading
+import time
+from collections.abc import Callable
 from pathlib import Path
 
 from config import Config
 
+try:
+    from watchdog.observers import Observer
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+
 logger = logging.getLogger(__name__)
 
 _manifest_cache: dict[str, "ProjectManifest"] = {}
@@ -153,11 +172,49 @@ def resolve_part_config(base_config: dict, part_id: str) -> dict:
 
 
 
+def file_signature(path: Path) -> tuple[int, int, int] | None:
+    """Return what identifies a version of the file at *path* (None if it is missing)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class _CachedManifest:
+    """A loaded manifest with the file signature it was read at and when that was last checked."""
+
+    def __init__(self, manifest: ProjectManifest, signature, checked_at: float):
+        self.manifest = manifest
+        self.signature = signature
+        self.checked_at = checked_at
+
+
+class _ManifestEventHandler:
+    """watchdog handler: reloads manifests whose project.json changed, watches new project directories."""
+
+    def __init__(self, service: "ManifestService", observer):
+        self._service = service
+        self._observer = observer
+
+    def dispatch(self, event) -> None:
+        if event.is_directory:
+            if event.event_type == "created" and Path(event.src_path).parent in self._service._watch_roots():
+                self._observer.schedule(self, event.src_path, recursive=False)
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and os.path.basename(path) == "project.json":
+                self._service.refresh(Path(path).parent)
+
+
 class ManifestService:
     """Service for managing project manifests."""
 
     def __init__(self):
-        self._manifest_cache: dict[str, "ProjectManifest"] = {}
+        self._manifest_cache: dict[str, _CachedManifest] = {}
+        self._listeners: list[Callable[[Path, ProjectManifest | None], None]] = []
+        self._lock = threading.Lock()
+        self._observer = None
 
     def discover_projects(self) -> list[dict]:
         """Scan all CARTRIDGES_DIRS for projects, return metadata list."""
@@ -175,7 +232,7 @@ class ManifestService:
                         with open(manifest_path, "r") as f:
                             data = json.load(f)
                             
-                        self._validate_manifest_strictness(data, manifest_path)
+                        self.validate_manifest_strictness(data, manifest_path)
                         
                         proj = data.get("project", {})
                         slug = proj.get("slug", child.name)
@@ -201,7 +258,7 @@ class ManifestService:
                     with open(manifest_path, "r") as f:
                         data = json.load(f)
                         
-                    self._validate_manifest_strictness(data, manifest_path)
+                    self.validate_manifest_strictness(data, manifest_path)
                     
                     proj = data.get("project", {})
                     projects.append({
@@ -215,7 +272,7 @@ class ManifestService:
 
         return projects
 
-    def _resolve_project_dir(self, slug: str | None) -> Path:
+    def resolve_project_dir(self, slug: str | None) -> Path:
         """Resolve the project directory for a given slug by searching CARTRIDGES_DIRS."""
         if slug:
             for directory in Config.CARTRIDGES_DIRS:
@@ -231,8 +288,8 @@ class ManifestService:
         # Fallback to SCAD_DIR (single-project mode)
         return Config.SCAD_DIR
 
-    def _validate_manifest_strictness(self, data: dict, manifest_path: Path):
-        """Enforces quality metadata constraints on the loaded manifest."""
+    def validate_manifest_strictness(self, data: dict, manifest_path: Path):
+        """Enforce the quality metadata (thumbnail, tags, difficulty) of project.json *data*; raise RuntimeError if missing."""
         proj = data.get("project", {})
         
         # 1. Thumbnail
@@ -250,14 +307,56 @@ class ManifestService:
             raise RuntimeError(f"Manifest {manifest_path} 'difficulty' must be one of: beginner, intermediate, advanced. Got: {difficulty}")
 
     def load_manifest(self, slug: str | None = None) -> ProjectManifest:
-        """Load and cache the project manifest for a given slug."""
-        project_dir = self._resolve_project_dir(slug)
-        cache_key = str(project_dir)
-
-        if cache_key in self._manifest_cache:
-            return self._manifest_cache[cache_key]
+        """Load and cache the project manifest for a given slug (reloaded when project.json changes)."""
+        project_dir = self.resolve_project_dir(slug)
+        cached = self._manifest_cache.get(str(project_dir))
+        if cached is not None and time.monotonic() - cached.checked_at < Config.MANIFEST_CHECK_INTERVAL_S:
+            return cached.manifest
+        return self._refresh_dir(project_dir)
+
+    def refresh(self, project_dir: Path) -> ProjectManifest | None:
+        """Re-check a cached manifest now, reloading it if project.json changed.
+
+        Returns the current manifest, or None if *project_dir* isn't cached
+        or can't be loaded.
+        """
+        if str(project_dir) not in self._manifest_cache:
+            return None
+        try:
+            return self._refresh_dir(project_dir)
+        except RuntimeError as e:
+            logger.warning(f"Manifest reload failed for {project_dir}: {e}")
+            return None
 
+    def _refresh_dir(self, project_dir: Path) -> ProjectManifest:
+        cache_key = str(project_dir)
         manifest_path = project_dir / "project.json"
+        signature = file_signature(manifest_path)
+        with self._lock:
+            cached = self._manifest_cache.get(cache_key)
+            if cached is not None and signature is not None and signature == cached.signature:
+                cached.checked_at = time.monotonic()
+                return cached.manifest
+
+            try:
+                manifest = self._read(project_dir, manifest_path)
+            except RuntimeError as e:
+                if cached is None or signature is None:
+                    self._manifest_cache.pop(cache_key, None)
+                    raise
+                # Mid-write or broken edit: keep serving the last good version until the file changes again
+                logger.warning(f"Keeping the previous manifest of {project_dir}: {e}")
+                cached.signature = signature
+                cached.checked_at = time.monotonic()
+                return cached.manifest
+
+            self._manifest_cache[cache_key] = _CachedManifest(manifest, signature, time.monotonic())
+        if cached is not None:
+            logger.info(f"Reloaded changed project manifest {manifest_path}")
+            self._notify(project_dir, manifest)
+        return manifest
+
+    def _read(self, project_dir: Path, manifest_path: Path) -> ProjectManifest:
         logger.info(f"Loading project manifest from {manifest_path}")
 
         try:
@@ -270,16 +369,61 @@ class ManifestService:
             logger.error(f"Invalid JSON in manifest {manifest_path}: {e}")
             raise RuntimeError(f"Project manifest contains invalid JSON: {e}")
 
-        self._validate_manifest_strictness(data, manifest_path)
-
-        manifest = ProjectManifest(data, project_dir)
-        self._manifest_cache[cache_key] = manifest
-        return manifest
+        self.validate_manifest_strictness(data, manifest_path)
+        return ProjectManifest(data, project_dir)
 
     def invalidate_cache(self, slug: str | None = None) -> None:
         """Remove a cached manifest so the next load_manifest() re-reads disk."""
-        project_dir = self._resolve_project_dir(slug)
+        project_dir = self.resolve_project_dir(slug)
         self._manifest_cache.pop(str(project_dir), None)
+        # Even if it wasn't cached: callers invalidate after writing the project
+        self._notify(project_dir, None)
+
+    def on_change(self, callback: Callable[[Path, ProjectManifest | None], None]) -> None:
+        """Call ``callback(project_dir, manifest)`` whenever a manifest is reloaded or invalidated.
+
+        *manifest* is the new version, or None after an invalidation (the
+        next load reads it again).
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, project_dir: Path, manifest: ProjectManifest | None) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(project_dir, manifest)
+            except Exception:
+                logger.exception(f"Manifest change listener failed for {project_dir}")
+
+    def _watch_roots(self) -> list[Path]:
+        return [directory for directory in Config.CARTRIDGES_DIRS if directory.is_dir()]
+
+    def start_watcher(self) -> bool:
+        """Reload manifests on file events (needs ``watchdog``); return whether a watcher runs.
+
+        Each cartridge directory and each project directory in it is watched
+        non-recursively, so large project trees cost one watch each.
+        """
+        if not Config.MANIFEST_WATCH or not HAS_WATCHDOG:
+            return False
+        with self._lock:
+            if self._observer is not None:
+                return True
+            observer = Observer()
+            handler = _ManifestEventHandler(self, observer)
+            try:
+                for root in self._watch_roots():
+                    observer.schedule(handler, str(root), recursive=False)
+                    for child in root.iterdir():
+                        if child.is_dir() and not child.name.startswith("."):
+                            observer.schedule(handler, str(child), recursive=False)
+                observer.daemon = True
+                observer.start()
+            except OSError as e:
+                # e.g. the inotify watch limit; the stat checks still apply
+                logger.warning(f"Manifest watcher unavailable, polling only: {e}")
+                return False
+            self._observer = observer
+        return True
 
     def get_manifest(self, slug: str | None = None) -> ProjectManifest:
         """Get the cached manifest (loads on first call)."""
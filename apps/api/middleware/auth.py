@@ -79,6 +79,16 @@ def require_auth(f):
     return decorated
 
 
+def has_role(claims: dict | None, role: str) -> bool:
+    """Return whether token *claims* grant *role* — supports both 'role' string and 'roles' array."""
+    if not claims:
+        return False
+    user_roles = claims.get("roles", [])
+    if isinstance(user_roles, str):
+        user_roles = [user_roles]
+    return role in user_roles or claims.get("role", "") == role
+
+
 def require_role(role: str):
     """Decorator factory: require_auth + check that claims contain the given role."""
     def decorator(f):
@@ -92,15 +102,7 @@ def require_role(role: str):
             if not claims:
                 return error_response("Authentication required", 401)
 
-            # Check role in claims — supports both 'role' string and 'roles' array
-            user_roles = claims.get("roles", [])
-            if isinstance(user_roles, str):
-                user_roles = [user_roles]
-            user_role = claims.get("role", "")
-            if user_role:
-                user_roles.append(user_role)
-
-            if role not in user_roles:
+            if not has_role(claims, role):
                 return error_response("Insufficient permissions", 403)
 
             return f(*args, **kwargs)
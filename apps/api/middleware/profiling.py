@@ -0,0 +1,93 @@
+"""
+Profiling middleware.
+Registers app-wide hooks for admin ``X-Profile`` requests and the slow-request log.
+
+Both stop when the view returns, so streamed responses are profiled and timed
+without their body (see :mod:`services.core.profiling`).
+"""
+import logging
+
+from flask import g, request
+
+from config import Config
+from middleware.auth import require_role
+from services.core.profiling import (
+    PROFILE_KINDS,
+    MemoryProfiler,
+    SamplingProfiler,
+    save_profile,
+    slow_request_watchdog,
+)
+from utils.route_helpers import error_response
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+
+# require_role() wraps views; wrapping a no-op gives the same admin check for a hook
+_admin_gate = require_role("admin")(lambda: None)
+
+
+def _start_profile():
+    kind = request.headers.get(PROFILE_HEADER, "").strip().lower()
+    if not kind:
+        return None
+    if kind not in PROFILE_KINDS:
+        return error_response(f"{PROFILE_HEADER} must be one of: {', '.join(PROFILE_KINDS)}", 400)
+    denied = _admin_gate()
+    if denied is not None:
+        return denied
+
+    if kind == "cpu":
+        g.profiler = SamplingProfiler(interval_s=Config.PROFILE_SAMPLE_INTERVAL_MS / 1000).start()
+    else:
+        profiler = MemoryProfiler()
+        if not profiler.start():
+            g.profile_status = "busy"
+            return None
+        g.profiler = profiler
+    g.profile_kind = kind
+    return None
+
+
+def _finish_profile(response):
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        if g.pop("profile_status", None):
+            response.headers["X-Profile-Status"] = "busy"
+        return response
+
+    profiler.stop()
+    kind = g.pop("profile_kind")
+    summary = profiler.summary()
+    profile_id = save_profile(kind, profiler.folded(), summary, {
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "status_code": response.status_code,
+    })
+    logger.info("Saved %s profile %s for %s %s", kind, profile_id, request.method, request.path)
+    response.headers["X-Profile-Id"] = profile_id
+    response.headers["X-Profile-Url"] = f"/api/admin/profiles/{profile_id}"
+    return response
+
+
+def init_profiling(app):
+    """Install profiling and slow-request hooks on *app*."""
+
+    @app.before_request
+    def _profiling_before():
+        slow_request_watchdog.begin(request.method, request.path)
+        return _start_profile()
+
+    @app.after_request
+    def _profiling_after(response):
+        g.response_status = response.status_code
+        return _finish_profile(response)
+
+    @app.teardown_request
+    def _profiling_teardown(exc):
+        # Stop a profiler left running by an unhandled exception
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.stop()
+        slow_request_watchdog.end(g.get("response_status", 500 if exc else None))
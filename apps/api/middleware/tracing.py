@@ -0,0 +1,72 @@
+"""
+Request tracing middleware.
+Provides a decorator that wraps a route in a root span and returns its trace id.
+"""
+import functools
+
+from flask import make_response, request
+
+from services.core.tracing import (
+    aiterate_in_span,
+    iterate_in_span,
+    start_span,
+    tracing_enabled,
+    use_span,
+)
+from services.engine.stream_engine import AsyncBody
+
+TRACE_ID_HEADER = "X-Trace-Id"
+
+
+def traced_route(name: str):
+    """Decorator: trace the request under a root span called *name*.
+
+    An incoming W3C ``traceparent`` header makes the span a child of the
+    caller's trace. The trace id is returned in the ``X-Trace-Id`` header.
+    Streamed responses keep the span open (and current) until the stream
+    is closed.
+    """
+    def decorator(f):
+        @functools.wraps(f)
+        def decorated(*args, **kwargs):
+            if not tracing_enabled():
+                return f(*args, **kwargs)
+
+            root = start_span(name, traceparent=request.headers.get("traceparent"),
+                              method=request.method, path=request.path)
+            try:
+                with use_span(root):
+                    response = make_response(f(*args, **kwargs))
+            except BaseException as e:
+                root.record_error(e)
+                root.end()
+                raise
+
+            root.set_attribute("status_code", response.status_code)
+            response.headers[TRACE_ID_HEADER] = root.trace_id
+            if isinstance(response.response, AsyncBody):
+                response.response = response.response.map(
+                    lambda events: _aend_after(root, aiterate_in_span(root, events)))
+            elif response.is_streamed:
+                response.response = _end_after(root, iterate_in_span(root, response.response))
+            else:
+                root.end()
+            return response
+        return decorated
+    return decorator
+
+
+def _end_after(root, iterable):
+    try:
+        yield from iterable
+    finally:
+        root.end()
+
+
+async def _aend_after(root, events):
+    try:
+        async for item in events:
+            yield item
+    finally:
+        await events.aclose()
+        root.end()
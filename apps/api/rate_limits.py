@@ -6,6 +6,7 @@ Import these constants instead of using inline strings.
 # Public / high-traffic
 HEALTH = "1000/hour"
 ESTIMATE = "200/hour"
+RENDER_REATTACH = "600/hour"  # resuming a render stream starts no new render
 VERIFY = "50/hour"
 
 # AI
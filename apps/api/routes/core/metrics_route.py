@@ -0,0 +1,32 @@
+"""
+Metrics Blueprint
+Serves GET /api/metrics in the Prometheus text exposition format.
+"""
+import hmac
+
+from flask import Blueprint, Response, request
+
+from config import Config
+from extensions import limiter
+from services.core.metrics import render_latest
+from utils.route_helpers import error_response
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/api/metrics', methods=['GET'])
+@limiter.exempt
+def serve_metrics():
+    """Return render pipeline metrics aggregated across all workers.
+
+    When METRICS_TOKEN is set, scrapers must send it as a Bearer token.
+    """
+    if Config.METRICS_TOKEN:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied, Config.METRICS_TOKEN):
+            return error_response("Authentication required", 401)
+
+    body, content_type = render_latest()
+    resp = Response(body, content_type=content_type)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
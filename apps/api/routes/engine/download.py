@@ -9,7 +9,7 @@ from flask import Blueprint, request, send_file, Response
 from config import Config
 from manifest import get_manifest
 from middleware.auth import optional_auth
-from utils.route_helpers import safe_join_path, error_response
+from utils.route_helpers import safe_join_path, error_response, send_precompressed, send_shared_artifact
 
 logger = logging.getLogger(__name__)
 
@@ -50,7 +50,12 @@ def download_stl(slug: str, filename: str) -> Response | tuple[Response, int]:
     for base_dir in [Config.STATIC_DIR, project_dir / "exports"]:
         safe_path = safe_join_path(str(base_dir), filename)
         if safe_path and safe_path.exists() and safe_path.suffix.lower() == '.stl':
-            return send_file(safe_path, as_attachment=True, download_name=filename)
+            return send_precompressed(safe_path, as_attachment=True, download_name=filename)
+
+    if filename.lower().endswith('.stl'):
+        resp = send_shared_artifact(filename, as_attachment=True, download_name=filename)
+        if resp is not None:
+            return resp
 
     return error_response("File not found", 404)
 
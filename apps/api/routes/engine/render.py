@@ -1,38 +1,59 @@
 """
 Render Blueprint
 Handles /api/estimate, /api/render, /api/render-stream endpoints.
+
+Render streams run as render jobs (services/engine/render_jobs.py): every
+event carries an SSE id ``<job_id>:<seq>``, and a client that reconnects
+with ``Last-Event-ID`` re-attaches to the running job instead of rendering
+again. Only the client that started a job may re-attach to it (see
+``_owns_job``), within the ``RENDER_REATTACH`` rate limit.
 """
+import asyncio
+import base64
+import functools
 import logging
 import os
-import json
+import time
+from contextlib import aclosing
 
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify
 
 from config import Config
 from extensions import limiter
 from manifest import get_manifest
-from middleware.auth import optional_auth
+from middleware.auth import has_role, optional_auth
+from middleware.tracing import traced_route
 from services.core.tier_service import resolve_tier, get_tier_limits, check_feature
 from services.engine.openscad import (
     build_openscad_command,
     run_render as run_openscad_render,
-    stream_render as stream_openscad_render,
+    astream_render as astream_openscad_render,
     cancel_render as cancel_openscad_render,
     validate_params
 )
 from services.engine.cadquery_engine import (
     build_cadquery_command,
     run_render as run_cadquery_render,
-    stream_render as stream_cadquery_render,
+    astream_render as astream_cadquery_render,
     cancel_render as cancel_cadquery_render
 )
+from services.engine.mesh_lod import existing_lods
+from services.engine.mesh_packaging import existing_glb, package_mesh
 from services.engine.render_cache import render_cache
+from services.engine.render_engine import RenderUsage, get_render_limits
+from services.engine.render_jobs import parse_event_id, render_jobs
+from services.engine.render_usage import predict_part_costs, record_usage
+from services.engine.stream_engine import merge
 from utils.route_helpers import cleanup_old_stl_files, error_response, require_json_body
+from utils.sse import SLOW_DROP, sse_response
 from services.core.mqtt_telemetry import telemetry_service, telemetry_queue
+from services.core.metrics import RENDER_QUEUE_DEPTH, TELEMETRY_QUEUE_SIZE, observe_render
+from services.core.tracing import span
 import rate_limits
 import queue
 
 ALLOWED_EXPORT_FORMATS = {'stl', '3mf', 'off', 'step', 'gltf', 'glb'}
+INLINE_MESH_FORMATS = {'stl', 'glb'}  # formats the studio viewer loads from a blob
 PROGRESS_TOTAL = 100  # SSE progress is in the range 0–100
 
 logger = logging.getLogger(__name__)
@@ -67,6 +88,43 @@ def _rate_limit_key() -> str:
     return f"ip:{request.remote_addr}"
 
 
+def _job_owner() -> str:
+    """Return the identity render jobs are bound to: the user, or the client IP when anonymous."""
+    return _rate_limit_key()
+
+
+def _resume_token() -> str | None:
+    """Return the resume token of the request: ``X-Render-Resume-Token``, ``?resume_token=`` or in the JSON body."""
+    token = request.headers.get("X-Render-Resume-Token") or request.args.get("resume_token")
+    if token is None:
+        body = request.get_json(silent=True)
+        token = body.get("resume_token") if isinstance(body, dict) else None
+    return token if isinstance(token, str) else None
+
+
+def _owns_job(job) -> bool:
+    """Return True if the request comes from the client that started render *job*.
+
+    A signed-in user's job needs the same user. An anonymous job needs its
+    resume token (from the ``job`` event), or the same IP address: a mobile
+    client that reconnects from another network keeps its token.
+    """
+    if job.owner and job.owner.startswith("user:"):
+        return job.owner == _job_owner()
+    return job.check_token(_resume_token()) or job.owner == _job_owner()
+
+
+def _resource_exhausted_response(resource: str, message: str):
+    """Return a 422 for renders killed by a resource limit (distinct from render errors)."""
+    logger.warning("Render rejected: %s limit exhausted", resource)
+    return jsonify({
+        "status": "error",
+        "error": message,
+        "error_type": "resource_exhausted",
+        "resource": resource,
+    }), 422
+
+
 def _resolve_render_context(data):
     """Resolve scad_file, parts, and mode_map from payload.
 
@@ -101,7 +159,8 @@ def _resolve_render_context(data):
 
 def _extract_render_payload(data):
     """Extract common render payload fields from request data."""
-    scad_filename, scad_path, parts_to_render, mode_map, static_stl_map = _resolve_render_context(data)
+    with span("manifest.load", project=data.get('project') or "default"):
+        scad_filename, scad_path, parts_to_render, mode_map, static_stl_map = _resolve_render_context(data)
 
     if scad_filename is None:
         return None
@@ -112,9 +171,16 @@ def _extract_render_payload(data):
     if export_format not in ALLOWED_EXPORT_FORMATS:
         export_format = 'stl'
 
-    params = validate_params(data.get('parameters', data), project_slug or None)
+    with span("validate_params"):
+        params = validate_params(data.get('parameters', data), project_slug or None)
+
+    mode_id = data.get('mode')
+    if not mode_id:
+        manifest = get_manifest(project_slug or None)
+        mode_id = next((m["id"] for m in manifest.modes if m["scad_file"] == scad_filename), None)
 
     return {
+        'mode_id': mode_id,
         'scad_filename': scad_filename,
         'scad_path': scad_path,
         'parts': parts_to_render,
@@ -127,6 +193,55 @@ def _extract_render_payload(data):
     }
 
 
+def _engine_denial(engine: str, tier: str, export_format: str):
+    """Return an error response if *tier* may not render with *engine* in *export_format*, else None."""
+    if engine == "cadquery":
+        if not check_feature(tier, "cadquery_engine"):
+            return error_response("CadQuery engine is not available for your tier.", 403)
+        if export_format not in Config.CADQUERY_ALLOWED_EXPORT_FORMATS:
+            return error_response(f"Export format '{export_format}' is not supported by CadQuery engine.", 400)
+    return None
+
+
+def _allows_glb(tier: str) -> bool:
+    """Return whether *tier* gets the packaged GLB of its parts (a premium export format)."""
+    return check_feature(tier, "premium_export")
+
+
+def _render_part(payload: dict, part: str, engine: str, limits, output_path: str, glb: bool = False):
+    """Render one cache-missing part to *output_path*, then package and cache it.
+
+    *glb* packages a GLB too. Returns ``(result, packaged)``: the engine's
+    render result and :func:`package_mesh`'s summary (None if the render failed).
+    """
+    params = payload['params']
+    scad_path = payload['scad_path']
+    # Inject continuous telemetry temporal state into static parameters
+    # using a conventional topic structure based on the project slug
+    project_topic = f"yantra4d/telemetry/projects/{payload['project_slug']}"
+    with span("telemetry.inject"):
+        computed_params = telemetry_service.inject_telemetry_to_params(params, project_topic)
+
+    with span("render.subprocess", part=part, engine=engine):
+        if engine == "cadquery":
+            cmd = build_cadquery_command(output_path, scad_path, computed_params, payload['export_format'])
+            result = run_cadquery_render(cmd, scad_path=scad_path, limits=limits)
+        else:
+            render_mode = payload['mode_map'].get(part, 0)
+            cmd = build_openscad_command(output_path, scad_path, params, render_mode)
+            result = run_openscad_render(cmd, scad_path=scad_path, limits=limits)
+    if not result[0]:
+        return result, None
+
+    with span("artifact.store", part=part):
+        with span("artifact.package", part=part):
+            packaged = package_mesh(output_path, glb=glb)
+        render_cache.put(payload['project_slug'], payload['scad_filename'], params, part, payload['export_format'],
+                         output_path, packaged["size_bytes"], lods=packaged["lods"], glb=packaged["glb"],
+                         cleanup=packaged["cleanup"])
+    return result, packaged
+
+
 @render_bp.route('/api/estimate', methods=['POST'])
 @optional_auth
 @limiter.limit(rate_limits.ESTIMATE)
@@ -165,6 +280,7 @@ def estimate_render_time():
 
 
 @render_bp.route('/api/render', methods=['POST'])
+@traced_route("render")
 @optional_auth
 @limiter.limit(_get_tiered_limit, key_func=_rate_limit_key)
 @require_json_body
@@ -185,20 +301,33 @@ def render_stl():
     stl_prefix = payload['stl_prefix']
     export_format = payload['export_format']
     params = payload['params']
-    scad_path = payload['scad_path']
-    mode_map = payload['mode_map']
     static_stl_map = payload.get('static_stl_map', {})
     project_slug = payload['project_slug']
+    limits = get_render_limits(tier)
+    allow_glb = _allows_glb(tier)
 
     generated_parts = []
     combined_log = ""
     cache_hits = 0
     cache_total = 0
+    engine = get_manifest(project_slug).engine
+
+    # Parts of this request not finished yet (exported as render queue depth)
+    queued_parts = len(parts_to_render)
+    RENDER_QUEUE_DEPTH.inc(queued_parts)
+    # Keep the disk GC off this request's outputs until it returns
+    pin_id = render_jobs.pin(
+        os.path.join(STATIC_FOLDER, f"{stl_prefix}{part}.{export_format}") for part in parts_to_render)
 
-    cleanup_old_stl_files(parts_to_render, STATIC_FOLDER, stl_prefix, export_format)
+    def _part_finished(part, cache, started):
+        nonlocal queued_parts
+        observe_render(engine, project_slug, part, cache, time.perf_counter() - started)
+        queued_parts -= 1
+        RENDER_QUEUE_DEPTH.dec()
 
     try:
         for part in parts_to_render:
+            part_started = time.perf_counter()
             # Skip OpenSCAD rendering for parts with pre-existing static STLs
             if part in static_stl_map:
                 static_path = static_stl_map[part]
@@ -213,6 +342,7 @@ def render_stl():
                         "url": f"/api/projects/{project_slug}/parts/{static_path.name}",
                         "size_bytes": size_bytes
                     })
+                    _part_finished(part, "static", part_started)
                     continue
 
             output_filename = f"{stl_prefix}{part}.{export_format}"
@@ -220,61 +350,77 @@ def render_stl():
             cache_total += 1
 
             # Check render cache
-            cached = render_cache.get(project_slug, payload['scad_filename'], params, part, export_format)
+            with span("cache.lookup", part=part) as lookup_span:
+                cached = render_cache.get(project_slug, payload['scad_filename'], params, part, export_format)
+                if lookup_span:
+                    lookup_span.set_attribute("hit", bool(cached))
             if cached:
                 cache_hits += 1
                 combined_log += f"[{part}] cache HIT\n"
-                generated_parts.append({
+                part_entry = {
                     "type": part,
                     "url": f"/static/{output_filename}",
                     "size_bytes": cached["size_bytes"]
-                })
+                }
+                lods = existing_lods(cached.get("lods"), STATIC_FOLDER)
+                if lods:
+                    part_entry["lods"] = lods
+                glb = existing_glb(cached.get("glb"), STATIC_FOLDER) if allow_glb else None
+                if glb:
+                    part_entry["glb"] = glb
+                if cached.get("cleanup"):
+                    part_entry["cleanup"] = cached["cleanup"]
+                generated_parts.append(part_entry)
+                _part_finished(part, "hit", part_started)
                 continue
 
-            manifest = get_manifest(project_slug)
-            engine = manifest.engine
+            # Only a cache miss replaces the previous output; deleting it up
+            # front would invalidate the cache entry we just looked up
+            cleanup_old_stl_files([part], STATIC_FOLDER, stl_prefix, export_format)
 
-            if engine == "cadquery":
-                if not check_feature(tier, "cadquery_engine"):
-                    return error_response("CadQuery engine is not available for your tier.", 403)
-                if export_format not in Config.CADQUERY_ALLOWED_EXPORT_FORMATS:
-                    return error_response(f"Export format '{export_format}' is not supported by CadQuery engine.", 400)
+            denied = _engine_denial(engine, tier, export_format)
+            if denied:
+                return denied
 
-            # Inject continuous telemetry temporal state into static parameters
-            # using a conventional topic structure based on the project slug
-            project_topic = f"yantra4d/telemetry/projects/{project_slug}"
-            computed_params = telemetry_service.inject_telemetry_to_params(params, project_topic)
-
-            if engine == "cadquery":
-                cmd = build_cadquery_command(output_path, scad_path, computed_params, export_format)
-                success, stderr = run_cadquery_render(cmd, scad_path=scad_path)
-            else:
-                render_mode = mode_map.get(part, 0)
-                cmd = build_openscad_command(output_path, scad_path, params, render_mode)
-                success, stderr = run_openscad_render(cmd, scad_path=scad_path)
+            result, packaged = _render_part(payload, part, engine, limits, output_path, glb=allow_glb)
+            success, stderr = result
 
             if not success:
+                exhausted = getattr(result, "exhausted", None)
+                if exhausted:
+                    return _resource_exhausted_response(exhausted, stderr)
                 return error_response(stderr)
 
             combined_log += f"[{part}] {stderr}\n"
-            try:
-                size_bytes = os.path.getsize(output_path)
-            except OSError:
-                size_bytes = None
+            size_bytes, lods, glb, cleanup = (packaged["size_bytes"], packaged["lods"], packaged["glb"],
+                                              packaged["cleanup"])
+            if cleanup:
+                combined_log += f"[{part}] cleanup: {cleanup['faces_before']} -> {cleanup['faces_after']} faces\n"
 
-            render_cache.put(project_slug, payload['scad_filename'], params, part, export_format, output_path, size_bytes)
-
-            generated_parts.append({
+            part_entry = {
                 "type": part,
                 "url": f"/static/{output_filename}",
                 "size_bytes": size_bytes
+            }
+            if lods:
+                part_entry["lods"] = lods
+            if glb:
+                part_entry["glb"] = glb
+            if cleanup:
+                part_entry["cleanup"] = cleanup
+            usage = getattr(result, "usage", None)
+            if usage is not None:
+                part_entry["usage"] = usage.as_dict()
+                record_usage(project_slug, payload['mode_id'], part, engine, usage)
+            generated_parts.append(part_entry)
+            _part_finished(part, "miss", part_started)
+
+        with span("response.serialize"):
+            resp = jsonify({
+                "status": "success",
+                "parts": generated_parts,
+                "log": combined_log
             })
-
-        resp = jsonify({
-            "status": "success",
-            "parts": generated_parts,
-            "log": combined_log
-        })
         for k, v in _make_rate_limit_headers(tier).items():
             resp.headers[k] = v
         resp.headers["X-Cache"] = "HIT" if (cache_total > 0 and cache_hits == cache_total) else "MISS"
@@ -284,14 +430,75 @@ def render_stl():
     except Exception as e:
         logger.warning(f"Unexpected error during render: {type(e).__name__}: {e}")
         return error_response(str(e))
+    finally:
+        RENDER_QUEUE_DEPTH.dec(queued_parts)
+        render_jobs.unpin(pin_id)
+
+
+def _read_mesh_event(part: str, path: str, size_bytes: int | None) -> dict | None:
+    """Return a ``mesh`` event carrying *path* base64-encoded, or None if it is too large to inline."""
+    mesh_format = os.path.splitext(path)[1].lstrip('.').lower()
+    if mesh_format not in INLINE_MESH_FORMATS or size_bytes is None or size_bytes > Config.RENDER_INLINE_MAX_BYTES:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(Config.RENDER_INLINE_MAX_BYTES + 1)
+    except OSError:
+        return None
+    if len(data) > Config.RENDER_INLINE_MAX_BYTES:
+        return None
+    return {'event': 'mesh', 'part': part, 'format': mesh_format, 'encoding': 'base64',
+            'size_bytes': len(data), 'data': base64.b64encode(data).decode('ascii')}
+
+
+def _job_response(job, after: int = 0):
+    """Stream the events of render *job* after sequence number *after* as SSE."""
+    async def stream():
+        async with aclosing(job.subscribe(after)) as events:
+            async for seq, event in events:
+                yield f"{job.id}:{seq}", event
+
+    # Output lines are only a log; a client that can't keep up loses some of them
+    resp = sse_response("render", stream(), slow_consumer=SLOW_DROP)
+    resp.headers["X-Render-Job"] = job.id
+    return resp
+
+
+def _reattach_job():
+    """Return ``(job, seq)`` for a live job named by the Last-Event-ID header, else ``(None, 0)``."""
+    job_id, seq = parse_event_id(request.headers.get("Last-Event-ID"))
+    job = render_jobs.get(job_id) if job_id else None
+    return (job, seq) if job else (None, 0)
+
+
+def _is_reattach() -> bool:
+    """Whether the request re-attaches to a job of its own (limited by RENDER_REATTACH, not the tier)."""
+    job = _reattach_job()[0]
+    return job is not None and _owns_job(job)
+
+
+def _is_new_render() -> bool:
+    return not _is_reattach()
 
 
 @render_bp.route('/api/render-stream', methods=['POST'])
+@traced_route("render_stream")
 @optional_auth
-@limiter.limit(_get_tiered_limit, key_func=_rate_limit_key)
+@limiter.limit(_get_tiered_limit, key_func=_rate_limit_key, exempt_when=_is_reattach)
+@limiter.limit(rate_limits.RENDER_REATTACH, key_func=_rate_limit_key, exempt_when=_is_new_render)
 @require_json_body
 def render_stl_stream():
-    """Stream render progress via Server-Sent Events (SSE)."""
+    """Stream render progress via Server-Sent Events (SSE).
+
+    A request with a ``Last-Event-ID`` of a job that is still known resumes
+    that job's stream after the given event instead of starting a render.
+    """
+    job, after = _reattach_job()
+    if job is not None:
+        if not _owns_job(job):
+            return error_response("Render job belongs to another client", 403)
+        return _job_response(job, after)
+
     data = request.json
     payload = _extract_render_payload(data)
     logger.debug(f"Render stream payload: mode={data.get('mode')}, parts={payload['parts'] if payload else 'None'}")
@@ -312,94 +519,259 @@ def render_stl_stream():
     mode_map = payload['mode_map']
     static_stl_map = payload.get('static_stl_map', {})
     project_slug = payload['project_slug']
+    limits = get_render_limits(tier)
+    allow_glb = _allows_glb(tier)
 
     num_parts = len(parts_to_render)
-    num_parts = len(parts_to_render)
-
-    cleanup_old_stl_files(parts_to_render, STATIC_FOLDER, stl_prefix, export_format)
-
-    def generate():
-        generated_parts = []
-
-        for i, part in enumerate(parts_to_render):
-            # Handle static STL parts — emit part_done immediately
-            if part in static_stl_map:
-                static_path = static_stl_map[part]
-                if static_path.is_file():
-                    try:
-                        size_bytes = os.path.getsize(static_path)
-                    except OSError:
-                        size_bytes = None
-                    part_url = f"/api/projects/{project_slug}/parts/{static_path.name}"
-                    generated_parts.append({
-                        "type": part,
-                        "url": part_url,
-                        "size_bytes": size_bytes
-                    })
-                    progress = ((i + 1) / num_parts) * 100
-                    yield f"data: {json.dumps({'event': 'part_done', 'part': part, 'progress': progress, 'part_index': i, 'total_parts': num_parts})}\n\n"
-                    continue
-
-            output_filename = f"{stl_prefix}{part}.{export_format}"
-            output_path = os.path.join(STATIC_FOLDER, output_filename)
-
-            part_base = (i / num_parts) * PROGRESS_TOTAL
-            part_weight = PROGRESS_TOTAL / num_parts
-
-            manifest = get_manifest(project_slug)
-            engine = manifest.engine
-
-            project_topic = f"yantra4d/telemetry/projects/{project_slug}"
+    part_index = {part: i for i, part in enumerate(parts_to_render)}
+    # Opt-in: small meshes follow their part_done inline, saving a fetch per part
+    inline_meshes = bool(data.get('inline_meshes'))
+
+    # Static and cached parts are sent first; the rest render concurrently.
+    # Filled in by _plan() off the event loop: a lookup may restore the
+    # render from the artifact store.
+    ready = {}
+    misses = []
+    costs = {}
+    total_cost = 0
+
+    def _plan():
+        ready = {}
+        for part in parts_to_render:
+            static_path = static_stl_map.get(part)
+            if static_path is not None and static_path.is_file():
+                try:
+                    size_bytes = os.path.getsize(static_path)
+                except OSError:
+                    size_bytes = None
+                ready[part] = ("static", {
+                    "type": part,
+                    "url": f"/api/projects/{project_slug}/parts/{static_path.name}",
+                    "size_bytes": size_bytes
+                }, str(static_path))
+                continue
+            with span("cache.lookup", part=part) as lookup_span:
+                cached = render_cache.get(project_slug, payload['scad_filename'], params, part, export_format)
+                if lookup_span:
+                    lookup_span.set_attribute("hit", bool(cached))
+            if cached:
+                entry = {
+                    "type": part,
+                    "url": f"/static/{stl_prefix}{part}.{export_format}",
+                    "size_bytes": cached["size_bytes"]
+                }
+                lods = existing_lods(cached.get("lods"), STATIC_FOLDER)
+                if lods:
+                    entry["lods"] = lods
+                glb = existing_glb(cached.get("glb"), STATIC_FOLDER) if allow_glb else None
+                if glb:
+                    entry["glb"] = glb
+                if cached.get("cleanup"):
+                    entry["cleanup"] = cached["cleanup"]
+                ready[part] = ("hit", entry, os.path.join(STATIC_FOLDER, f"{stl_prefix}{part}.{export_format}"))
+        misses = [part for part in parts_to_render if part not in ready]
+        cleanup_old_stl_files(misses, STATIC_FOLDER, stl_prefix, export_format)
+
+        # Overall progress weights each rendered part by its predicted wall time;
+        # the most expensive parts start first so the slowest one isn't queued last
+        costs = predict_part_costs(project_slug, payload['mode_id'], misses)
+        misses.sort(key=lambda part: -costs[part])
+        total_cost = sum(costs.values())
+        return ready, misses, costs, total_cost
+
+    # Parts of this stream not finished yet (exported as render queue depth)
+    queued_parts = num_parts
+    part_started = {}
+
+    generated = {}
+
+    async def generate():
+        nonlocal ready, misses, costs, total_cost
+        ready, misses, costs, total_cost = await asyncio.to_thread(_plan)
+        engine = get_manifest(project_slug).engine
+        RENDER_QUEUE_DEPTH.inc(queued_parts)
+        parts = _generate_parts(engine)
+        try:
+            async for event in parts:
+                yield event
+        finally:
+            await parts.aclose()
+            RENDER_QUEUE_DEPTH.dec(queued_parts)
+
+    def _part_finished(part, engine, cache, started):
+        nonlocal queued_parts
+        observe_render(engine, project_slug, part, cache, time.perf_counter() - started)
+        queued_parts -= 1
+        RENDER_QUEUE_DEPTH.dec()
+
+    async def _mesh(part, path):
+        """Return the inline ``mesh`` event for *part* (marking its entry), or None."""
+        if not inline_meshes:
+            return None
+        event = await asyncio.to_thread(_read_mesh_event, part, path, generated[part]["size_bytes"])
+        if event is not None:
+            generated[part] = {**generated[part], "inline": True}
+        return event
+
+    def _start_part(part, engine):
+        """Return the engine event stream of one cache-missing part."""
+        part_started[part] = time.perf_counter()
+        output_path = os.path.join(STATIC_FOLDER, f"{stl_prefix}{part}.{export_format}")
+        project_topic = f"yantra4d/telemetry/projects/{project_slug}"
+        with span("telemetry.inject"):
             computed_params = telemetry_service.inject_telemetry_to_params(params, project_topic)
-
-            if engine == "cadquery":
-                cmd = build_cadquery_command(output_path, scad_path, computed_params, export_format)
-                stream_gen = stream_cadquery_render(cmd, part, part_base, part_weight, i, num_parts, scad_path=scad_path)
+        # Engines report each part's own progress (0–100); it is weighted below
+        if engine == "cadquery":
+            cmd = build_cadquery_command(output_path, scad_path, computed_params, export_format)
+            return astream_cadquery_render(cmd, part, 0, PROGRESS_TOTAL, part_index[part], num_parts,
+                                           scad_path=scad_path, limits=limits)
+        cmd = build_openscad_command(output_path, scad_path, params, mode_map.get(part, 0))
+        return astream_openscad_render(cmd, part, 0, PROGRESS_TOTAL, part_index[part], num_parts,
+                                       scad_path=scad_path, limits=limits)
+
+    async def _generate_parts(engine):
+        started = time.perf_counter()
+        part_progress = {part: 0 for part in misses}
+        overall = 0
+
+        def _overall():
+            nonlocal overall
+            if total_cost:
+                done = PROGRESS_TOTAL * sum(costs[p] * part_progress[p] for p in misses) / total_cost
             else:
-                render_mode = mode_map.get(part, 0)
-                cmd = build_openscad_command(output_path, scad_path, params, render_mode)
-                stream_gen = stream_openscad_render(cmd, part, part_base, part_weight, i, num_parts, scad_path=scad_path)
+                done = PROGRESS_TOTAL
+            # Never step backwards, whatever order the parts report in
+            overall = max(overall, round(done))
+            return overall
 
-            for event_data in stream_gen:
-                yield f"data: {event_data}\n\n"
-                try:
-                    event = json.loads(event_data)
-                except json.JSONDecodeError:
-                    logger.warning(f"Malformed SSE event data: {event_data!r}")
-                    continue
-                if event.get('event') == 'part_done':
-                    try:
-                        size_bytes = os.path.getsize(output_path)
-                    except OSError:
-                        size_bytes = None
-                    generated_parts.append({
+        yield {'event': 'plan', 'parts': [
+            {'part': part, 'cache': ready[part][0] if part in ready else 'miss',
+             'predicted_s': round(costs[part], 3) if part in costs else 0}
+            for part in parts_to_render
+        ], 'concurrency': Config.RENDER_STREAM_CONCURRENCY}
+
+        for part in parts_to_render:
+            if part in ready:
+                cache, entry, path = ready[part]
+                generated[part] = entry
+                _part_finished(part, engine, cache, started)
+                yield {'event': 'part_done', 'part': part, 'cache': cache, 'progress': _overall(),
+                       'part_index': part_index[part], 'total_parts': num_parts}
+                mesh = await _mesh(part, path)
+                if mesh:
+                    yield mesh
+
+        factories = [functools.partial(_start_part, part, engine) for part in misses]
+        async with aclosing(merge(factories, Config.RENDER_STREAM_CONCURRENCY)) as events:
+            async for event in events:
+                part = event.get('part')
+                if 'progress' in event and part in part_progress:
+                    part_progress[part] = event['progress'] / PROGRESS_TOTAL
+                    event = {**event, 'part_progress': event['progress'], 'progress': _overall()}
+
+                if event['event'] == 'part_done':
+                    output_filename = f"{stl_prefix}{part}.{export_format}"
+                    output_path = os.path.join(STATIC_FOLDER, output_filename)
+                    with span("artifact.store", part=part):
+                        with span("artifact.package", part=part):
+                            packaged = await asyncio.to_thread(package_mesh, output_path, glb=allow_glb)
+                        size_bytes, lods, glb, cleanup = (packaged["size_bytes"], packaged["lods"], packaged["glb"],
+                                                          packaged["cleanup"])
+                        # Publishing to the artifact store copies or uploads the files
+                        await asyncio.to_thread(render_cache.put, project_slug, payload['scad_filename'], params,
+                                                part, export_format, output_path, size_bytes, lods=lods, glb=glb,
+                                                cleanup=cleanup)
+                    part_entry = {
                         "type": part,
                         "url": f"/static/{output_filename}",
                         "size_bytes": size_bytes
-                    })
-
-            # Check if any live telemetry events occurred during this render tick to stream down
-            while not telemetry_queue.empty():
-                try:
-                    telemetry_event = telemetry_queue.get_nowait()
-                    if telemetry_event['topic'] == project_topic:
-                        yield f"data: {json.dumps({'event': 'telemetry_update', 'payload': telemetry_event['payload']})}\n\n"
-                except queue.Empty:
-                    break
-
-        yield f"data: {json.dumps({'event': 'complete', 'parts': generated_parts, 'progress': 100})}\n\n"
-
-    return Response(generate(), mimetype='text/event-stream')
+                    }
+                    if lods:
+                        part_entry["lods"] = lods
+                    if glb:
+                        part_entry["glb"] = glb
+                    if cleanup:
+                        part_entry["cleanup"] = cleanup
+                    if event.get('usage'):
+                        part_entry["usage"] = event['usage']
+                        await asyncio.to_thread(record_usage, project_slug, payload['mode_id'], part, engine,
+                                                RenderUsage(**event['usage']))
+                    generated[part] = part_entry
+                    _part_finished(part, engine, "miss", part_started[part])
+                    event = {**event, 'part_index': part_index[part], 'total_parts': num_parts}
+                    if lods:
+                        event['lods'] = lods
+                    if glb:
+                        event['glb'] = glb
+                    if cleanup:
+                        event['cleanup'] = cleanup
+                yield event
+
+                if event['event'] == 'part_done':
+                    mesh = await _mesh(part, output_path)
+                    if mesh:
+                        yield mesh
+                    # Forward live telemetry events that arrived during this render
+                    project_topic = f"yantra4d/telemetry/projects/{project_slug}"
+                    while not telemetry_queue.empty():
+                        try:
+                            telemetry_event = telemetry_queue.get_nowait()
+                            if telemetry_event['topic'] == project_topic:
+                                yield {'event': 'telemetry_update', 'payload': telemetry_event['payload']}
+                        except queue.Empty:
+                            break
+                    TELEMETRY_QUEUE_SIZE.set(telemetry_queue.qsize())
+
+        generated_parts = [generated[part] for part in parts_to_render if part in generated]
+        yield {'event': 'complete', 'parts': generated_parts, 'progress': 100}
+
+    # The render runs as a job that outlives this connection
+    outputs = [os.path.join(STATIC_FOLDER, f"{stl_prefix}{part}.{export_format}") for part in parts_to_render]
+    return _job_response(render_jobs.create(generate(), files=outputs, owner=_job_owner()))
+
+
+@render_bp.route('/api/render-stream/<job_id>', methods=['GET'])
+@traced_route("render_stream_resume")
+@optional_auth
+@limiter.limit(rate_limits.RENDER_REATTACH, key_func=_rate_limit_key)
+def resume_render_stream(job_id):
+    """Re-attach to a render stream of this client, replaying events after ``Last-Event-ID`` (or ``?after=``)."""
+    job = render_jobs.get(job_id)
+    if job is None:
+        return error_response("Render job not found", 404)
+    if not _owns_job(job):
+        return error_response("Render job belongs to another client", 403)
+    header_job, after = parse_event_id(request.headers.get("Last-Event-ID"))
+    if header_job != job_id:
+        after = request.args.get('after', 0, type=int)
+    return _job_response(job, max(0, after))
 
 
 @render_bp.route('/api/render-cancel', methods=['POST'])
 @optional_auth
 def cancel_render_endpoint():
-    """Cancel the active render process."""
-    # Try cancelling both just in case
-    cancelled_scad = cancel_openscad_render()
-    cancelled_cq = cancel_cadquery_render()
-    cancelled = cancelled_scad or cancelled_cq
+    """Cancel a render job, named by the ``X-Render-Job`` header or ``job_id`` in the body.
+
+    Only the client that started a job may cancel it, and only its render
+    processes are stopped. Without a job id every active render process is
+    cancelled, which needs the admin role.
+    """
+    body = request.get_json(silent=True) or {}
+    job_id = request.headers.get("X-Render-Job") or body.get("job_id")
+    if job_id:
+        job = render_jobs.get(job_id)
+        if job is None:
+            return error_response("Render job not found", 404)
+        if not _owns_job(job):
+            return error_response("Render job belongs to another client", 403)
+        cancelled = job.cancel()
+    else:
+        if Config.AUTH_ENABLED and not has_role(getattr(request, "auth_claims", None), "admin"):
+            return error_response("Cancelling every render requires the admin role; pass the render job id", 403)
+        # Try cancelling both just in case
+        cancelled_scad = cancel_openscad_render()
+        cancelled_cq = cancel_cadquery_render()
+        cancelled = cancelled_scad or cancelled_cq
 
     return jsonify({
         "status": "cancelled" if cancelled else "no_active_render",
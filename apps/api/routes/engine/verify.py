@@ -6,6 +6,7 @@ import json
 import logging
 import subprocess
 import sys
+import time
 
 from flask import Blueprint, request, jsonify
 
@@ -14,6 +15,7 @@ from extensions import limiter
 import rate_limits
 from manifest import get_manifest, resolve_part_config
 from middleware.auth import require_auth
+from services.core.metrics import VERIFY_DURATION
 from utils.route_helpers import safe_join_path
 
 logger = logging.getLogger(__name__)
@@ -71,6 +73,8 @@ def verify_design():
 
         logger.info(f"Verifying {part}: {' '.join(cmd[:3])}...")
 
+        verify_started = time.perf_counter()
+        outcome = "error"
         try:
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
             output = result.stdout + result.stderr
@@ -87,9 +91,11 @@ def verify_design():
                 structured = {"passed": result.returncode == 0}
 
             results.append(f"--- {part} ---\n{text_output.strip()}")
-            if not structured.get("passed", False):
+            outcome = "passed" if structured.get("passed", False) else "failed"
+            if outcome == "failed":
                 all_passed = False
         except subprocess.TimeoutExpired:
+            outcome = "timeout"
             logger.error(f"Verification timed out for {part}")
             results.append(f"--- {part} ---\n[ERROR] Verification timed out\n")
             all_passed = False
@@ -97,6 +103,9 @@ def verify_design():
             logger.error(f"Verification failed for {part}: {e}")
             results.append(f"--- {part} ---\n[ERROR] {str(e)}\n")
             all_passed = False
+        finally:
+            VERIFY_DURATION.labels(project=project_slug or "default", result=outcome).observe(
+                time.perf_counter() - verify_started)
 
     combined = "\n".join(results)
     return jsonify({
@@ -1,21 +1,22 @@
 """
 AI Chat Blueprint — session creation and SSE streaming chat.
 """
-import json
 import logging
+from contextlib import aclosing
 
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify
 
 from config import Config
 from extensions import limiter
 import rate_limits
 from middleware.auth import require_tier
 from utils.route_helpers import error_response, require_json_body
+from utils.sse import sse_response
 from services.core.tier_service import resolve_tier, get_tier_limits
 from services.ai.ai_session import create_session, get_session
-from services.ai.ai_configurator import stream_response as stream_configurator
-from services.ai.ai_code_editor import stream_response as stream_code_editor
-from services.ai.ai_synthesizer import stream_synthesis_response
+from services.ai.ai_configurator import astream_response as astream_configurator
+from services.ai.ai_code_editor import astream_response as astream_code_editor
+from services.ai.ai_synthesizer import astream_synthesis_response
 
 logger = logging.getLogger(__name__)
 
@@ -96,22 +97,23 @@ def chat_stream():
     except Exception:
         return error_response("Project manifest not found", 404)
 
-    def generate():
+    async def generate():
         try:
             if session["mode"] == "configurator":
                 current_params = data.get("current_params") or {}
-                events = stream_configurator(session_id, message, manifest, current_params)
+                events = astream_configurator(session_id, message, manifest, current_params)
             else:
                 file_contents = data.get("file_contents") or {}
-                events = stream_code_editor(session_id, message, manifest, file_contents)
+                events = astream_code_editor(session_id, message, manifest, file_contents)
 
-            for event in events:
-                yield f"data: {json.dumps(event)}\n\n"
+            async with aclosing(events):
+                async for event in events:
+                    yield event
         except Exception as e:
             logger.error("AI stream error: %s", e)
-            yield f"data: {json.dumps({'event': 'error', 'error': str(e)})}\n\n"
+            yield {'event': 'error', 'error': str(e)}
 
-    return Response(generate(), mimetype="text/event-stream")
+    return sse_response("ai_chat", generate())
 
 @ai_bp.route("/api/ai/synthesize", methods=["POST"])
 @require_tier("pro")
@@ -135,13 +137,14 @@ def synthesize_project():
     session_id = str(uuid.uuid4())
     create_session("synthesis", "synthesizer", session_id)
 
-    def generate():
+    async def generate():
         try:
-            events = stream_synthesis_response(session_id, prompt)
-            for event in events:
-                yield f"data: {json.dumps(event)}\n\n"
+            events = astream_synthesis_response(session_id, prompt)
+            async with aclosing(events):
+                async for event in events:
+                    yield event
         except Exception as e:
             logger.error("Synthesis stream error: %s", e)
-            yield f"data: {json.dumps({'event': 'error', 'error': str(e)})}\n\n"
+            yield {'event': 'error', 'error': str(e)}
 
-    return Response(generate(), mimetype="text/event-stream")
+    return sse_response("ai_synthesize", generate())
@@ -12,6 +12,7 @@ from contextlib import contextmanager
 from flask import Blueprint, request, jsonify, Response
 
 from config import Config
+from services.core.metrics import time_analytics_write
 
 analytics_bp = Blueprint("analytics", __name__)
 logger = logging.getLogger(__name__)
@@ -43,6 +44,8 @@ def _init_db():
         """)
         conn.execute("CREATE INDEX IF NOT EXISTS idx_events_project ON events(project)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_events_type ON events(event_type)")
+        # Covers the 30-day per-project counts of GET /api/projects?stats=1
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_created ON events(created_at, project, event_type)")
 
 
 _init_db()
@@ -74,7 +77,7 @@ def track_event() -> tuple[Response, int]:
             if isinstance(v, str) and len(v) > 200:
                 event_data[k] = v[:200]
 
-    with get_db() as conn:
+    with time_analytics_write("events"), get_db() as conn:
         conn.execute(
             "INSERT INTO events (project, event_type, event_data, created_at) VALUES (?, ?, ?, ?)",
             (project, event_type, json.dumps(event_data) if event_data else None, time.time()),
@@ -77,6 +77,38 @@ def _load_manifest(slug: str):
         return json.load(f)
 
 
+def bom_rows(hardware: list[dict], params: dict) -> list[dict]:
+    """Return the BOM rows of *hardware* items with quantities evaluated for *params*."""
+    rows = []
+    for item in hardware:
+        try:
+            qty = _safe_eval_formula(item["quantity_formula"], params)
+        except Exception:
+            qty = item["quantity_formula"]
+
+        label = item.get("label", item["id"])
+        if isinstance(label, dict):
+            label = label.get("en", label.get("es", item["id"]))
+
+        rows.append({
+            "id": item["id"],
+            "label": label,
+            "quantity": qty,
+            "unit": item.get("unit", "pcs"),
+            "supplier_url": item.get("supplier_url", ""),
+        })
+    return rows
+
+
+def bom_csv(rows: list[dict]) -> str:
+    """Return BOM *rows* as CSV text."""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=["id", "label", "quantity", "unit", "supplier_url"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+
 @bom_bp.route("/api/projects/<slug>/bom", methods=["GET"])
 def get_bom(slug: str) -> Response | tuple[Response, int]:
     """Return BOM as JSON or CSV based on Accept header / format query param."""
@@ -100,33 +132,12 @@ def get_bom(slug: str) -> Response | tuple[Response, int]:
         else:
             params[p["id"]] = p.get("default", 0)
 
-    rows = []
-    for item in hardware:
-        try:
-            qty = _safe_eval_formula(item["quantity_formula"], params)
-        except Exception:
-            qty = item["quantity_formula"]
-
-        label = item.get("label", item["id"])
-        if isinstance(label, dict):
-            label = label.get("en", label.get("es", item["id"]))
-
-        rows.append({
-            "id": item["id"],
-            "label": label,
-            "quantity": qty,
-            "unit": item.get("unit", "pcs"),
-            "supplier_url": item.get("supplier_url", ""),
-        })
+    rows = bom_rows(hardware, params)
 
     fmt = request.args.get("format", "json")
     if fmt == "csv" or "text/csv" in (request.headers.get("Accept") or ""):
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=["id", "label", "quantity", "unit", "supplier_url"])
-        writer.writeheader()
-        writer.writerows(rows)
         return Response(
-            output.getvalue(),
+            bom_csv(rows),
             mimetype="text/csv",
             headers={"Content-Disposition": f"attachment; filename={slug}_bom.csv"},
         )
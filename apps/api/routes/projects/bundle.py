@@ -0,0 +1,271 @@
+"""
+Bundle Blueprint
+Whole-mode downloads, for one parameter set:
+
+- /api/projects/<slug>/bundle: every part of a mode as a ZIP, built while it
+  is sent (see :mod:`utils.zip_stream`), without a temp file;
+- /api/projects/<slug>/scene: the parts assembled into one GLB or 3MF (see
+  :mod:`services.engine.scene_export`).
+
+Parts missing from the render cache are rendered first (concurrently, up to
+``RENDER_STREAM_CONCURRENCY`` at a time), so a failed render is reported as
+a normal error instead of a truncated download.
+"""
+import contextvars
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from flask import Blueprint, Response, request
+
+from config import Config
+from extensions import limiter
+from manifest import get_manifest
+from middleware.auth import optional_auth
+from middleware.tracing import traced_route
+from routes.engine import render as render_routes
+from routes.engine.download import _check_access
+from routes.projects.bom import bom_csv, bom_rows
+from routes.projects.datasheet import build_datasheet
+from services.core.metrics import observe_render
+from services.core.tier_service import check_feature, get_tier_limits, resolve_tier
+from services.core.tracing import span
+from services.engine.render_engine import get_render_limits
+from services.engine.render_usage import record_usage
+from services.engine.scene_export import (
+    SCENE_FORMATS,
+    remove_scenes,
+    scene_key,
+    write_scene,
+)
+from utils.route_helpers import (
+    cleanup_old_stl_files,
+    error_response,
+    send_precompressed,
+)
+from utils.zip_stream import stream_zip
+
+logger = logging.getLogger(__name__)
+
+bundle_bp = Blueprint("bundle", __name__)
+
+# Extra documents that can be added with ?include=
+BUNDLE_EXTRAS = {"bom", "datasheet"}
+
+
+def _render_missing(payload: dict, missing: dict[str, str], engine: str, tier: str):
+    """Render the *missing* parts (``{part: output path}``) concurrently; return an error response or None."""
+    limits = get_render_limits(tier)
+    glb = render_routes._allows_glb(tier)
+    workers = max(1, min(Config.RENDER_STREAM_CONCURRENCY, len(missing)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Each worker runs in a copy of the request's context (tracing spans)
+        futures = {
+            part: (time.perf_counter(), pool.submit(contextvars.copy_context().run, render_routes._render_part,
+                                                    payload, part, engine, limits, path, glb))
+            for part, path in missing.items()
+        }
+        outcomes = {part: (started, future.result()) for part, (started, future) in futures.items()}
+
+    for part, (started, (result, _packaged)) in outcomes.items():
+        success, stderr = result
+        if not success:
+            exhausted = getattr(result, "exhausted", None)
+            if exhausted:
+                return render_routes._resource_exhausted_response(exhausted, stderr)
+            return error_response(stderr)
+        observe_render(engine, payload['project_slug'], part, "miss", time.perf_counter() - started)
+        usage = getattr(result, "usage", None)
+        if usage is not None:
+            record_usage(payload['project_slug'], payload['mode_id'], part, engine, usage)
+    return None
+
+
+def _mode_files(slug: str, manifest, tier: str, export_format: str):
+    """Resolve the parts of the requested mode, rendering the uncached ones.
+
+    Returns ``(payload, files, None)`` with ``files`` mapping each part to its
+    file, or ``(None, None, error response)``.
+    """
+    param_ids = {p["id"] for p in manifest.parameters}
+    payload = render_routes._extract_render_payload({
+        "project": slug,
+        "mode": request.args.get("mode") or manifest.modes[0]["id"],
+        "export_format": export_format,
+        "parameters": {key: value for key, value in request.args.items() if key in param_ids},
+    })
+    if payload is None:
+        return None, None, error_response(f"Unknown mode: {request.args.get('mode')}", 400)
+
+    export_format = payload['export_format']
+    if export_format in {'step', 'gltf', 'glb', '3mf'} and not check_feature(tier, "premium_export"):
+        return None, None, error_response(f"Export format '{export_format}' requires Pro tier or above.", 403)
+
+    static_folder = render_routes.STATIC_FOLDER
+    engine = manifest.engine
+    files, missing = {}, {}
+    for part in payload['parts']:
+        started = time.perf_counter()
+        static_path = payload['static_stl_map'].get(part)
+        if static_path is not None and static_path.is_file():
+            files[part] = str(static_path)
+            observe_render(engine, slug, part, "static", time.perf_counter() - started)
+            continue
+        output_path = os.path.join(static_folder, f"{payload['stl_prefix']}{part}.{export_format}")
+        files[part] = output_path
+        if render_routes.render_cache.get(slug, payload['scad_filename'], payload['params'], part, export_format):
+            observe_render(engine, slug, part, "hit", time.perf_counter() - started)
+        else:
+            missing[part] = output_path
+
+    if missing:
+        denied = render_routes._engine_denial(engine, tier, export_format)
+        if denied:
+            return None, None, denied
+        try:
+            # The cached parts must outlive the renders of the missing ones
+            with render_routes.render_jobs.pinned(files.values()):
+                cleanup_old_stl_files(list(missing), static_folder, payload['stl_prefix'], export_format)
+                failed = _render_missing(payload, missing, engine, tier)
+        except OSError as e:
+            return None, None, error_response(str(e))
+        if failed:
+            return None, None, failed
+    return payload, files, None
+
+
+def _load_project(slug: str):
+    """Return ``(manifest, claims, None)`` for a project the caller may download, or ``(None, None, error)``."""
+    try:
+        manifest = get_manifest(slug)
+    except RuntimeError:
+        return None, None, error_response(f"Project '{slug}' not found", 404)
+    claims = getattr(request, "auth_claims", None)
+    denied = _check_access(manifest._data, "download_stl", claims)
+    if denied:
+        return None, None, denied
+    return manifest, claims, None
+
+
+def _part_params(manifest, payload: dict) -> dict:
+    """Return the validated parameter values with the manifest defaults filled in."""
+    return {p["id"]: payload['params'].get(p["id"], p.get("default", 0)) for p in manifest.parameters}
+
+
+@bundle_bp.route("/api/projects/<slug>/bundle", methods=["GET"])
+@traced_route("bundle")
+@optional_auth
+@limiter.limit(render_routes._get_tiered_limit, key_func=render_routes._rate_limit_key)
+def download_bundle(slug: str) -> Response | tuple[Response, int]:
+    """Download every part of a mode as a ZIP, rendering uncached parts first.
+
+    Query: ``mode`` (default: first mode), ``format`` (export format, default
+    ``stl``), ``include`` (comma-separated ``bom``, ``datasheet``), ``lang``
+    (datasheet language) and parameter values by id.
+    """
+    manifest, claims, denied = _load_project(slug)
+    if denied:
+        return denied
+
+    include = {item.strip() for item in request.args.get("include", "").split(",") if item.strip()}
+    if include - BUNDLE_EXTRAS:
+        return error_response(f"Unknown include: {', '.join(sorted(include - BUNDLE_EXTRAS))}", 400)
+
+    payload, files, failed = _mode_files(slug, manifest, resolve_tier(claims), request.args.get("format", "stl"))
+    if failed:
+        return failed
+
+    # Open every file now: a concurrent re-render replaces files by name,
+    # and an open file keeps its content until the archive is sent
+    entries: list = []
+    try:
+        with ExitStack() as stack:
+            for part, path in files.items():
+                entries.append((f"{part}{os.path.splitext(path)[1]}", stack.enter_context(open(path, "rb"))))
+            # Closed when the response is, not when this block exits
+            handles = stack.pop_all()
+    except OSError as e:
+        return error_response(f"Part file unavailable: {e}")
+
+    params = _part_params(manifest, payload)
+    hardware = (manifest._data.get("bom") or {}).get("hardware")
+    if "bom" in include and hardware:
+        entries.append(("bom.csv", bom_csv(bom_rows(hardware, params)).encode("utf-8")))
+    if "datasheet" in include:
+        document, ext = build_datasheet(manifest._data, params, request.args.get("lang", "en"))
+        entries.append((f"datasheet.{ext}", document))
+
+    resp = Response(stream_zip(entries), mimetype="application/zip")
+    resp.headers["Content-Disposition"] = f"attachment; filename={slug}_{payload['mode_id']}.zip"
+    resp.call_on_close(handles.close)
+    return resp
+
+
+@bundle_bp.route("/api/projects/<slug>/scene", methods=["GET"])
+@traced_route("scene")
+@optional_auth
+@limiter.limit(render_routes._get_tiered_limit, key_func=render_routes._rate_limit_key)
+def download_scene(slug: str) -> Response | tuple[Response, int]:
+    """Download the parts of a mode assembled into one GLB or 3MF.
+
+    Query: ``mode`` (default: first mode), ``format`` (``glb`` or ``3mf``,
+    default ``glb``) and parameter values by id. Parts are composed from
+    their STL renders with their ``default_color`` and ``transform``.
+    """
+    manifest, claims, denied = _load_project(slug)
+    if denied:
+        return denied
+
+    fmt = request.args.get("format", "glb")
+    if fmt not in SCENE_FORMATS:
+        return error_response(f"Unsupported scene format: {fmt}", 400)
+    tier = resolve_tier(claims)
+    # Both are premium exports, as in /api/render-stream; 3MF also follows the tier's export formats
+    if not check_feature(tier, "premium_export"):
+        return error_response(f"Export format '{fmt}' requires Pro tier or above.", 403)
+    if fmt != "glb" and fmt not in get_tier_limits(tier).get("export_formats", []):
+        return error_response(f"Export format '{fmt}' is not available for your tier.", 403)
+
+    payload, files, failed = _mode_files(slug, manifest, tier, "stl")
+    if failed:
+        return failed
+
+    part_defs = {p["id"]: p for p in manifest._data.get("parts", [])}
+    parts = []
+    for part, path in files.items():
+        definition = part_defs.get(part, {})
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError as e:
+            return error_response(f"Part file unavailable: {e}")
+        if part in payload['static_stl_map']:
+            source = path
+        else:
+            source = render_routes.render_cache.key(slug, payload['scad_filename'], payload['params'], part, "stl")
+        parts.append({
+            "name": part,
+            "path": path,
+            "key": f"{source}@{mtime_ns}",
+            "color": definition.get("default_color"),
+            "transform": definition.get("transform"),
+        })
+
+    key = scene_key(fmt, parts)
+    prefix = f"{payload['stl_prefix']}scene_{payload['mode_id']}_"
+    out = os.path.join(render_routes.STATIC_FOLDER, f"{prefix}{key[:16]}.{fmt}")
+    hit = os.path.isfile(out)
+    if not hit:
+        # One scene per project, mode and format is kept
+        remove_scenes(render_routes.STATIC_FOLDER, prefix, fmt)
+        try:
+            with span("scene.compose", parts=len(parts), format=fmt):
+                write_scene(parts, fmt, out)
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Scene export failed for %s: %s", slug, e)
+            return error_response(f"Scene export failed: {e}")
+
+    resp = send_precompressed(out, as_attachment=True, download_name=f"{slug}_{payload['mode_id']}.{fmt}")
+    resp.headers["X-Cache"] = "HIT" if hit else "MISS"
+    return resp
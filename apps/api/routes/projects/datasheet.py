@@ -148,6 +148,13 @@ def _generate_html(manifest: dict, params: dict, lang: str = "en") -> str:
     return out
 
 
+def build_datasheet(manifest: dict, params: dict, lang: str = "en") -> tuple[bytes, str]:
+    """Return the datasheet and its file extension: PDF if reportlab is available, else HTML."""
+    if HAS_REPORTLAB:
+        return _generate_pdf(manifest, params, lang), "pdf"
+    return _generate_html(manifest, params, lang).encode("utf-8"), "html"
+
+
 @datasheet_bp.route("/api/projects/<slug>/datasheet", methods=["GET"])
 def generate_datasheet(slug: str) -> Response | tuple[Response, int]:
     """Generate a project datasheet as PDF (if reportlab available) or HTML."""
@@ -7,19 +7,22 @@ import json
 import logging
 import os
 import sqlite3
+import threading
 import time
 
 import re
 import shutil
 
-from flask import Blueprint, jsonify, send_from_directory, abort, request, make_response
+from flask import Blueprint, jsonify, abort, request, make_response
 
 from config import Config
 from extensions import limiter
 import rate_limits
-from manifest import discover_projects, get_manifest, invalidate_cache
+from manifest import get_manifest, invalidate_cache
 from middleware.auth import optional_auth, require_tier
-from utils.route_helpers import error_response
+from services.core.project_catalog import project_catalog
+from services.core.project_search import FACETS, project_search
+from utils.route_helpers import error_response, send_precompressed
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +32,14 @@ ANALYTICS_DB = str(Config.ANALYTICS_DB_PATH)
 
 SLUG_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{1,48}[a-z0-9]$")
 
+SEARCH_MAX_LIMIT = 100
+
+_stats_lock = threading.Lock()
+# (fetched at, stats by slug), refreshed every CATALOG_STATS_TTL_S
+_stats_cache: tuple[float, dict] | None = None
+# ((listing ETag, stats fetched at), body, ETag) of the ?stats=1 listing
+_stats_listing_cache: tuple[tuple, bytes, str] | None = None
+
 
 def _get_project_stats():
     """Fetch aggregate event counts per project from analytics DB."""
@@ -56,26 +67,81 @@ def _get_project_stats():
         return {}
 
 
-@projects_bp.route('/api/projects', methods=['GET'])
-def list_projects():
-    """Return list of available projects with optional analytics counts."""
-    projects = discover_projects()
-    include_stats = request.args.get("stats") == "1"
-    if include_stats:
-        stats = _get_project_stats()
+def _cached_project_stats() -> tuple[float, dict]:
+    """Return ``(fetched_at, stats)``, querying the analytics DB at most every CATALOG_STATS_TTL_S."""
+    global _stats_cache
+    with _stats_lock:
+        now = time.monotonic()
+        if _stats_cache is None or now - _stats_cache[0] >= Config.CATALOG_STATS_TTL_S:
+            _stats_cache = (now, _get_project_stats())
+        return _stats_cache
+
+
+def _stats_listing() -> tuple[bytes, str]:
+    """Return the serialized listing with analytics counts and its ETag."""
+    global _stats_listing_cache
+    body, etag = project_catalog.listing()
+    fetched_at, stats = _cached_project_stats()
+    cached = _stats_listing_cache
+    if cached is None or cached[0] != (etag, fetched_at):
+        projects = json.loads(body)
         for p in projects:
-            slug = p.get("slug", "")
-            project_stats = stats.get(slug, {})
+            project_stats = stats.get(p["slug"], {})
             p["stats"] = {
                 "renders": project_stats.get("render", 0),
                 "exports": project_stats.get("export", 0),
                 "preset_applies": project_stats.get("preset_apply", 0),
             }
-    resp = jsonify(projects)
+        stats_body = json.dumps(projects).encode()
+        cached = ((etag, fetched_at), stats_body, hashlib.md5(stats_body).hexdigest())
+        _stats_listing_cache = cached
+    return cached[1], cached[2]
+
+
+@projects_bp.route('/api/projects', methods=['GET'])
+def list_projects():
+    """Return list of available projects with optional analytics counts, from the project catalog."""
+    if request.args.get("stats") == "1":
+        body, etag = _stats_listing()
+    else:
+        body, etag = project_catalog.listing()
+
+    if request.if_none_match and etag in request.if_none_match:
+        resp = make_response("", 304)
+    else:
+        resp = make_response(body)
+        resp.headers["Content-Type"] = "application/json"
     resp.headers["Cache-Control"] = "public, max-age=300"
+    resp.set_etag(etag)
     return resp
 
 
+@projects_bp.route('/api/projects/search', methods=['GET'])
+def search_projects():
+    """
+    Search projects by text, with facet counts.
+
+    Query params:
+      q           — words to find (prefixes match) in names, descriptions,
+                    tags, difficulty, engine and parameter labels
+      tag         — only projects with this tag (repeatable: all must match)
+      difficulty  — only projects of this difficulty (repeatable: any)
+      engine      — only projects on this engine (repeatable: any)
+      limit       — page size (default 20, at most 100)
+      offset      — results to skip (default 0)
+    """
+    try:
+        limit = int(request.args.get("limit", 20))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return error_response("limit and offset must be integers", 400)
+    if not 1 <= limit <= SEARCH_MAX_LIMIT or offset < 0:
+        return error_response(f"limit must be 1-{SEARCH_MAX_LIMIT} and offset at least 0", 400)
+
+    filters = {facet: request.args.getlist("tag" if facet == "tags" else facet) for facet in FACETS}
+    return jsonify(project_search.search(request.args.get("q", ""), filters, limit, offset))
+
+
 @projects_bp.route('/api/projects/<slug>/manifest', methods=['GET'])
 def get_project_manifest(slug):
     """Return full manifest for a specific project."""
@@ -135,7 +201,7 @@ def serve_static_part(slug, filename):
         abort(403)
     if not requested.is_file():
         abort(404)
-    resp = send_from_directory(str(parts_dir), filename)
+    resp = send_precompressed(requested)
     resp.headers["Cache-Control"] = "public, max-age=86400"
     return resp
 
@@ -176,6 +242,7 @@ def fork_project(slug):
         with open(dest_dir / "project.meta.json", "w") as f:
             json.dump(meta, f, indent=2)
             f.write("\n")
+        project_catalog.invalidate()
     except Exception as e:
         # Clean up partial copy
         if dest_dir.exists():
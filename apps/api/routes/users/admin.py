@@ -7,11 +7,14 @@ import logging
 import os
 from pathlib import Path
 
-from flask import Blueprint, jsonify, request, Response
+from flask import Blueprint, jsonify, request, Response, send_file
 
 from config import Config
-from manifest import discover_projects, get_manifest
+from manifest import get_manifest
 from middleware.auth import require_role, optional_auth
+from services.core.profiling import get_profile_path, list_profiles, slow_request_watchdog
+from services.core.project_catalog import project_catalog
+from services.engine.render_usage import summarize_usage
 from utils.route_helpers import error_response
 
 admin_bp = Blueprint('admin', __name__)
@@ -34,51 +37,6 @@ def _save_raw_manifest(slug: str, data: dict) -> None:
     p.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n")
 
 
-def _enrich_project(proj):
-    """Add computed metadata to a project dict."""
-    project_dir = Config.PROJECTS_DIR / proj["slug"]
-    manifest_path = project_dir / "project.json"
-
-    proj["has_manifest"] = manifest_path.exists()
-    proj["modified_at"] = (
-        os.path.getmtime(manifest_path) if manifest_path.exists() else None
-    )
-
-    scad_files = list(project_dir.glob("*.scad"))
-    proj["scad_file_count"] = len(scad_files)
-
-    exports_dir = project_dir / "exports"
-    proj["has_exports"] = (
-        exports_dir.is_dir() and any(exports_dir.glob("*.stl"))
-    )
-
-    if proj["has_manifest"]:
-        try:
-            m = get_manifest(proj["slug"])
-            proj["mode_count"] = len(m.modes)
-            proj["parameter_count"] = len(m.parameters)
-            proj["estimate_constants"] = m.estimate_constants
-        except Exception:
-            proj["mode_count"] = 0
-            proj["parameter_count"] = 0
-            proj["estimate_constants"] = None
-
-        # Expose admin-managed flags from raw manifest
-        raw = _load_raw_manifest(proj["slug"]) or {}
-        project_obj = raw.get("project", {})
-        proj["is_demo"] = project_obj.get("is_demo", False)
-        ho = project_obj.get("hyperobject", {})
-        proj["is_hyperobject"] = ho.get("is_hyperobject", False)
-    else:
-        proj["mode_count"] = 0
-        proj["parameter_count"] = 0
-        proj["estimate_constants"] = None
-        proj["is_demo"] = False
-        proj["is_hyperobject"] = False
-
-    return proj
-
-
 @admin_bp.route('/api/admin/projects', methods=['GET'])
 @optional_auth
 def admin_list_projects() -> Response:
@@ -88,8 +46,7 @@ def admin_list_projects() -> Response:
     - Admins: See all projects.
     - Public/Anonymous: See only demos and hyperobjects (excluding 'tablaco').
     """
-    projects = discover_projects()
-    enriched = [_enrich_project(p) for p in projects]
+    enriched = project_catalog.projects()
 
     # Check if user is admin
     is_admin = False
@@ -142,13 +99,10 @@ def admin_project_detail(slug: str) -> Response | tuple[Response, int]:
     if not project_dir.is_dir() or not manifest_path.exists():
         return jsonify({"status": "error", "error": f"Project '{slug}' not found"}), 404
 
-    projects = discover_projects()
-    proj = next((p for p in projects if p["slug"] == slug), None)
+    proj = project_catalog.get(slug)
     if not proj:
         return jsonify({"status": "error", "error": f"Project '{slug}' not found"}), 404
 
-    proj = _enrich_project(proj)
-
     # SCAD files with sizes
     scad_files = []
     for f in sorted(project_dir.glob("*.scad")):
@@ -219,11 +173,67 @@ def patch_project_flags(slug: str) -> Response | tuple[Response, int]:
     except OSError as exc:
         logger.exception("Failed to write project.json for %s", slug)
         return error_response(f"Failed to save: {exc}", 500)
+    project_catalog.invalidate()
 
     logger.info("Admin updated flags for %s: %s", slug, changed)
     return jsonify({"slug": slug, "updated": changed})
 
 
+@admin_bp.route('/api/admin/render-usage', methods=['GET'])
+@require_role("admin")
+def admin_render_usage() -> Response | tuple[Response, int]:
+    """
+    Return per-project, per-mode render resource usage with percentiles.
+
+    Query params:
+      days     — look-back window (default 30)
+      project  — restrict to one project slug
+    """
+    try:
+        days = int(request.args.get("days", 30))
+    except ValueError:
+        return error_response("days must be an integer", 400)
+
+    groups = summarize_usage(days, request.args.get("project") or None)
+    return jsonify({"period_days": days, "groups": groups})
+
+
+@admin_bp.route('/api/admin/profiles', methods=['GET'])
+@require_role("admin")
+def admin_list_profiles() -> Response:
+    """List saved X-Profile captures, newest first."""
+    return jsonify({"profiles": list_profiles()})
+
+
+@admin_bp.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+@require_role("admin")
+def admin_download_profile(profile_id: str) -> Response | tuple[Response, int]:
+    """
+    Download a saved profile.
+
+    Query params:
+      format — "folded" (default; flamegraph.pl / speedscope input) or "json" (summary)
+    """
+    fmt = request.args.get("format", "folded")
+    if fmt not in ("folded", "json"):
+        return error_response("format must be 'folded' or 'json'", 400)
+    path = get_profile_path(profile_id, f".{fmt}")
+    if path is None:
+        return error_response("Profile not found", 404)
+    mimetype = "application/json" if fmt == "json" else "text/plain"
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=path.name)
+
+
+@admin_bp.route('/api/admin/slow-requests', methods=['GET'])
+@require_role("admin")
+def admin_slow_requests() -> Response:
+    """Return the most recent slow requests seen by this worker, with stack samples."""
+    return jsonify({
+        "threshold_s": Config.SLOW_REQUEST_THRESHOLD_S,
+        "requests": list(reversed(slow_request_watchdog.recent)),
+    })
+
+
 @admin_bp.route('/api/admin/projects/tablaco/public-link', methods=['GET'])
 @require_role("admin")
 def tablaco_public_link() -> Response:
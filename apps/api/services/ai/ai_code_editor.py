@@ -6,9 +6,10 @@ Uses search/replace for content-addressed editing robust to multi-turn changes.
 import json
 import logging
 import re
-from typing import Iterator
+from collections.abc import AsyncIterator, Iterator
+from contextlib import aclosing
 
-from services.ai.ai_provider import stream_chat
+from services.ai.ai_provider import astream_chat, stream_chat
 from services.ai.ai_session import append_message, get_messages
 
 logger = logging.getLogger(__name__)
@@ -81,21 +82,46 @@ def parse_edits(raw: str, file_contents: dict[str, str]) -> dict:
     return {"explanation": explanation, "edits": validated}
 
 
-def stream_response(session_id: str, message: str, manifest: dict, file_contents: dict[str, str]) -> Iterator[dict]:
-    """Yield SSE events: chunk (text), edits (validated), done."""
+def _start_turn(session_id: str, message: str, manifest: dict,
+                file_contents: dict[str, str]) -> tuple[list[dict], str]:
     system = build_code_editor_prompt(manifest, file_contents)
     append_message(session_id, "user", message)
-    messages = get_messages(session_id)
+    return get_messages(session_id), system
+
+
+def _finish_turn(session_id: str, full_text: str, file_contents: dict[str, str]) -> list[dict]:
+    append_message(session_id, "assistant", full_text)
+
+    events = []
+    parsed = parse_edits(full_text, file_contents)
+    if parsed["edits"]:
+        events.append({"event": "edits", "edits": parsed["edits"]})
+    events.append({"event": "done"})
+    return events
+
+
+def stream_response(session_id: str, message: str, manifest: dict, file_contents: dict[str, str]) -> Iterator[dict]:
+    """Yield SSE events: chunk (text), edits (validated), done."""
+    messages, system = _start_turn(session_id, message, manifest, file_contents)
 
     full_text = ""
     for chunk in stream_chat(messages, system=system):
         full_text += chunk
         yield {"event": "chunk", "text": chunk}
 
-    append_message(session_id, "assistant", full_text)
+    yield from _finish_turn(session_id, full_text, file_contents)
 
-    parsed = parse_edits(full_text, file_contents)
-    if parsed["edits"]:
-        yield {"event": "edits", "edits": parsed["edits"]}
 
-    yield {"event": "done"}
+async def astream_response(session_id: str, message: str, manifest: dict,
+                           file_contents: dict[str, str]) -> AsyncIterator[dict]:
+    """Async :func:`stream_response`."""
+    messages, system = _start_turn(session_id, message, manifest, file_contents)
+
+    full_text = ""
+    async with aclosing(astream_chat(messages, system=system)) as chunks:
+        async for chunk in chunks:
+            full_text += chunk
+            yield {"event": "chunk", "text": chunk}
+
+    for event in _finish_turn(session_id, full_text, file_contents):
+        yield event
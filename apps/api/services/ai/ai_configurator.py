@@ -6,9 +6,10 @@ Maps user intent to manifest parameter adjustments with validation.
 import json
 import logging
 import re
-from typing import Iterator
+from collections.abc import AsyncIterator, Iterator
+from contextlib import aclosing
 
-from services.ai.ai_provider import stream_chat
+from services.ai.ai_provider import astream_chat, stream_chat
 from services.ai.ai_session import append_message, get_messages
 
 logger = logging.getLogger(__name__)
@@ -120,21 +121,45 @@ def parse_response(raw: str, manifest: dict) -> dict:
     return result
 
 
-def stream_response(session_id: str, message: str, manifest: dict, current_params: dict) -> Iterator[dict]:
-    """Yield SSE events: chunk (text), params (validated changes), done."""
+def _start_turn(session_id: str, message: str, manifest: dict, current_params: dict) -> tuple[list[dict], str]:
     system = build_configurator_prompt(manifest, current_params)
     append_message(session_id, "user", message)
-    messages = get_messages(session_id)
+    return get_messages(session_id), system
+
+
+def _finish_turn(session_id: str, full_text: str, manifest: dict) -> list[dict]:
+    append_message(session_id, "assistant", full_text)
+
+    events = []
+    parsed = parse_response(full_text, manifest)
+    if parsed["parameter_changes"]:
+        events.append({"event": "params", "changes": parsed["parameter_changes"]})
+    events.append({"event": "done"})
+    return events
+
+
+def stream_response(session_id: str, message: str, manifest: dict, current_params: dict) -> Iterator[dict]:
+    """Yield SSE events: chunk (text), params (validated changes), done."""
+    messages, system = _start_turn(session_id, message, manifest, current_params)
 
     full_text = ""
     for chunk in stream_chat(messages, system=system):
         full_text += chunk
         yield {"event": "chunk", "text": chunk}
 
-    append_message(session_id, "assistant", full_text)
+    yield from _finish_turn(session_id, full_text, manifest)
 
-    parsed = parse_response(full_text, manifest)
-    if parsed["parameter_changes"]:
-        yield {"event": "params", "changes": parsed["parameter_changes"]}
 
-    yield {"event": "done"}
+async def astream_response(session_id: str, message: str, manifest: dict,
+                           current_params: dict) -> AsyncIterator[dict]:
+    """Async :func:`stream_response`."""
+    messages, system = _start_turn(session_id, message, manifest, current_params)
+
+    full_text = ""
+    async with aclosing(astream_chat(messages, system=system)) as chunks:
+        async for chunk in chunks:
+            full_text += chunk
+            yield {"event": "chunk", "text": chunk}
+
+    for event in _finish_turn(session_id, full_text, manifest):
+        yield event
@@ -4,7 +4,8 @@ Dual LLM provider abstraction (Anthropic + OpenAI).
 Pure functions matching project convention. Supports streaming and non-streaming.
 """
 import logging
-from typing import Iterator
+from collections.abc import AsyncIterator, Iterator
+from contextlib import aclosing
 
 from config import Config
 
@@ -37,6 +38,22 @@ def stream_chat(messages: list[dict], system: str = "", max_tokens: int | None =
         raise ValueError(f"Unknown AI provider: {provider}")
 
 
+async def astream_chat(messages: list[dict], system: str = "", max_tokens: int | None = None) -> AsyncIterator[str]:
+    """Async :func:`stream_chat` using the providers' async clients (no thread per stream)."""
+    max_tokens = max_tokens or Config.AI_MAX_TOKENS
+    provider = get_provider()
+
+    if provider == "anthropic":
+        chunks = _astream_anthropic(messages, system, max_tokens)
+    elif provider == "openai":
+        chunks = _astream_openai(messages, system, max_tokens)
+    else:
+        raise ValueError(f"Unknown AI provider: {provider}")
+    async with aclosing(chunks):
+        async for text in chunks:
+            yield text
+
+
 def complete_chat(messages: list[dict], system: str = "", max_tokens: int | None = None) -> str:
     """Non-streaming completion. Returns full text response."""
     return "".join(stream_chat(messages, system, max_tokens))
@@ -75,3 +92,38 @@ def _stream_openai(messages: list[dict], system: str, max_tokens: int) -> Iterat
         delta = chunk.choices[0].delta if chunk.choices else None
         if delta and delta.content:
             yield delta.content
+
+
+async def _astream_anthropic(messages: list[dict], system: str, max_tokens: int) -> AsyncIterator[str]:
+    import anthropic
+
+    client = anthropic.AsyncAnthropic(api_key=Config.AI_API_KEY)
+    async with client.messages.stream(
+        model=_get_model(),
+        max_tokens=max_tokens,
+        system=system,
+        messages=messages,
+    ) as stream:
+        async for text in stream.text_stream:
+            yield text
+
+
+async def _astream_openai(messages: list[dict], system: str, max_tokens: int) -> AsyncIterator[str]:
+    import openai
+
+    client = openai.AsyncOpenAI(api_key=Config.AI_API_KEY)
+    oai_messages = []
+    if system:
+        oai_messages.append({"role": "system", "content": system})
+    oai_messages.extend(messages)
+
+    response = await client.chat.completions.create(
+        model=_get_model(),
+        max_tokens=max_tokens,
+        messages=oai_messages,
+        stream=True,
+    )
+    async for chunk in response:
+        delta = chunk.choices[0].delta if chunk.choices else None
+        if delta and delta.content:
+            yield delta.content
@@ -8,9 +8,10 @@ with the required project.json manifest bounds and CDG interfaces.
 import json
 import logging
 import re
-from typing import Iterator
+from collections.abc import AsyncIterator, Iterator
+from contextlib import aclosing
 
-from services.ai.ai_provider import stream_chat
+from services.ai.ai_provider import astream_chat, stream_chat
 from services.ai.ai_session import append_message, get_messages
 
 logger = logging.getLogger(__name__)
@@ -76,19 +77,16 @@ def parse_synthesis(raw: str) -> dict:
     explanation = re.sub(r"```json\s*\n?.*?\n?```", "", raw, flags=re.DOTALL).strip()
     return {"explanation": explanation, "cartridge": validated}
 
-def stream_synthesis_response(session_id: str, message: str) -> Iterator[dict]:
-    """Yield SSE events for project synthesis."""
+def _start_turn(session_id: str, message: str) -> tuple[list[dict], str]:
     system = build_synthesis_prompt()
     append_message(session_id, "user", message)
-    messages = get_messages(session_id)
+    return get_messages(session_id), system
 
-    full_text = ""
-    for chunk in stream_chat(messages, system=system):
-        full_text += chunk
-        yield {"event": "chunk", "text": chunk}
 
+def _finish_turn(session_id: str, full_text: str) -> list[dict]:
     append_message(session_id, "assistant", full_text)
 
+    events = []
     parsed = parse_synthesis(full_text)
     if parsed["cartridge"]:
         # Save to disk to create the Yantra4D Cartridge structure
@@ -122,6 +120,33 @@ def stream_synthesis_response(session_id: str, message: str) -> Iterator[dict]:
                 f.write(content)
 
         # Notify UI of success and the slug to redirect to
-        yield {"event": "cartridge", "cartridge": cartridge, "slug": slug}
+        events.append({"event": "cartridge", "cartridge": cartridge, "slug": slug})
+
+    events.append({"event": "done"})
+    return events
+
+
+def stream_synthesis_response(session_id: str, message: str) -> Iterator[dict]:
+    """Yield SSE events for project synthesis."""
+    messages, system = _start_turn(session_id, message)
+
+    full_text = ""
+    for chunk in stream_chat(messages, system=system):
+        full_text += chunk
+        yield {"event": "chunk", "text": chunk}
+
+    yield from _finish_turn(session_id, full_text)
+
+
+async def astream_synthesis_response(session_id: str, message: str) -> AsyncIterator[dict]:
+    """Async :func:`stream_synthesis_response`."""
+    messages, system = _start_turn(session_id, message)
+
+    full_text = ""
+    async with aclosing(astream_chat(messages, system=system)) as chunks:
+        async for chunk in chunks:
+            full_text += chunk
+            yield {"event": "chunk", "text": chunk}
 
-    yield {"event": "done"}
+    for event in _finish_turn(session_id, full_text):
+        yield event
@@ -0,0 +1,232 @@
+"""
+Prometheus metrics for the render pipeline.
+
+All metrics live in the default prometheus_client registry. Under gunicorn,
+``PROMETHEUS_MULTIPROC_DIR`` (set in gunicorn.conf.py before the app is
+imported) switches prometheus_client to its multiprocess mode so every
+worker writes to shared files and /api/metrics aggregates them. Gauges use
+``livesum`` so values from dead workers drop out.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+logger = logging.getLogger(__name__)
+
+# Renders range from sub-second cache hits to multi-minute CGAL runs
+RENDER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+VERIFY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+WRITE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+GC_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+RENDER_DURATION = Histogram(
+    "yantra4d_render_duration_seconds",
+    "Time to produce one part, by engine, project, part and cache result",
+    ["engine", "project", "part", "cache"],
+    buckets=RENDER_BUCKETS,
+)
+RENDER_CACHE_REQUESTS = Counter(
+    "yantra4d_render_cache_requests",
+    "Render cache lookups by result",
+    ["result"],
+)
+RENDER_QUEUE_DEPTH = Gauge(
+    "yantra4d_render_queue_depth",
+    "Parts accepted by in-flight render requests that have not finished yet",
+    multiprocess_mode="livesum",
+)
+RENDER_SUBPROCESSES = Gauge(
+    "yantra4d_render_subprocesses_active",
+    "Running OpenSCAD/CadQuery subprocesses",
+    multiprocess_mode="livesum",
+)
+SSE_CONNECTIONS = Gauge(
+    "yantra4d_sse_connections",
+    "Open Server-Sent Events streams",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+)
+SSE_EVENTS = Counter(
+    "yantra4d_sse_events",
+    "Events sent on Server-Sent Events streams, before coalescing",
+    ["endpoint"],
+)
+SSE_WRITES = Counter(
+    "yantra4d_sse_writes",
+    "Writes to Server-Sent Events streams (each carries one or more coalesced events)",
+    ["endpoint"],
+)
+SSE_EVENTS_DROPPED = Counter(
+    "yantra4d_sse_events_dropped",
+    "Events dropped because an SSE client read too slowly",
+    ["endpoint"],
+)
+VERIFY_DURATION = Histogram(
+    "yantra4d_verify_duration_seconds",
+    "Duration of one part verification run",
+    ["project", "result"],
+    buckets=VERIFY_BUCKETS,
+)
+ANALYTICS_WRITE_SECONDS = Histogram(
+    "yantra4d_analytics_write_seconds",
+    "Latency of analytics SQLite writes",
+    ["table"],
+    buckets=WRITE_BUCKETS,
+)
+TELEMETRY_QUEUE_SIZE = Gauge(
+    "yantra4d_mqtt_telemetry_queue_size",
+    "Pending MQTT telemetry events waiting for an SSE stream",
+    multiprocess_mode="livesum",
+)
+
+# Disk GC: the sweeping worker sets the gauges, so the most recent value wins
+DISK_GC_USAGE = Gauge(
+    "yantra4d_disk_gc_usage_bytes",
+    "Bytes of render outputs on disk, as counted by the last disk GC sweep",
+    multiprocess_mode="mostrecent",
+)
+DISK_GC_BUDGET = Gauge(
+    "yantra4d_disk_gc_budget_bytes",
+    "Byte budget of the disk GC",
+    multiprocess_mode="mostrecent",
+)
+DISK_GC_SWEEPS = Counter(
+    "yantra4d_disk_gc_sweeps",
+    "Disk GC sweeps by result (idle: under the high watermark)",
+    ["result"],
+)
+DISK_GC_SWEEP_SECONDS = Histogram(
+    "yantra4d_disk_gc_sweep_seconds",
+    "Duration of one disk GC sweep",
+    buckets=GC_BUCKETS,
+)
+DISK_GC_EVICTED_FILES = Counter(
+    "yantra4d_disk_gc_evicted_files",
+    "Files deleted by the disk GC",
+)
+DISK_GC_EVICTED_BYTES = Counter(
+    "yantra4d_disk_gc_evicted_bytes",
+    "Bytes freed by the disk GC",
+)
+DISK_GC_SKIPPED = Counter(
+    "yantra4d_disk_gc_skipped",
+    "Artifacts the disk GC would have evicted but kept, by reason",
+    ["reason"],
+)
+
+
+def observe_render(engine: str, project: str, part: str, cache: str, seconds: float) -> None:
+    """Record one part render. *cache* is ``hit``, ``miss`` or ``static``."""
+    RENDER_DURATION.labels(engine=engine, project=project or "default", part=part, cache=cache).observe(seconds)
+    if cache in ("hit", "miss"):
+        RENDER_CACHE_REQUESTS.labels(result=cache).inc()
+
+
+@contextmanager
+def time_analytics_write(table: str):
+    """Context manager timing an analytics DB write."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ANALYTICS_WRITE_SECONDS.labels(table=table).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def track_subprocess():
+    """Count a render subprocess as active for the duration of the block."""
+    RENDER_SUBPROCESSES.inc()
+    try:
+        yield
+    finally:
+        RENDER_SUBPROCESSES.dec()
+
+
+def track_sse(endpoint: str, events):
+    """Wrap an SSE generator (sync or async) so it is counted as an open connection while consumed."""
+    if hasattr(events, "__aiter__"):
+        return _track_async_sse(endpoint, events)
+    return _track_sse(endpoint, events)
+
+
+def _track_sse(endpoint: str, events):
+    SSE_CONNECTIONS.labels(endpoint=endpoint).inc()
+    try:
+        yield from events
+    finally:
+        SSE_CONNECTIONS.labels(endpoint=endpoint).dec()
+
+
+async def _track_async_sse(endpoint: str, events):
+    SSE_CONNECTIONS.labels(endpoint=endpoint).inc()
+    try:
+        async for event in events:
+            yield event
+    finally:
+        await events.aclose()
+        SSE_CONNECTIONS.labels(endpoint=endpoint).dec()
+
+
+class _CacheHitRatioCollector:
+    """Derives ``yantra4d_render_cache_hit_ratio`` from the aggregated cache counters."""
+
+    def __init__(self, source):
+        self._source = source
+
+    def collect(self):
+        hits = total = 0.0
+        for metric in self._source.collect():
+            if metric.name != "yantra4d_render_cache_requests":
+                continue
+            for sample in metric.samples:
+                if not sample.name.endswith("_total"):
+                    continue
+                total += sample.value
+                if sample.labels.get("result") == "hit":
+                    hits += sample.value
+        gauge = GaugeMetricFamily(
+            "yantra4d_render_cache_hit_ratio",
+            "Fraction of render cache lookups served from cache since start",
+        )
+        gauge.add_metric([], hits / total if total else 0.0)
+        yield gauge
+
+
+def _build_registry():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        source = CollectorRegistry()
+        MultiProcessCollector(source)
+    else:
+        source = REGISTRY
+    registry = CollectorRegistry()
+    registry.register(_Forward(source))
+    registry.register(_CacheHitRatioCollector(source))
+    return registry
+
+
+class _Forward:
+    """Re-exposes every metric of *source* inside another registry."""
+
+    def __init__(self, source):
+        self._source = source
+
+    def collect(self):
+        return self._source.collect()
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Return ``(body, content_type)`` for a Prometheus scrape."""
+    return generate_latest(_build_registry()), CONTENT_TYPE_LATEST
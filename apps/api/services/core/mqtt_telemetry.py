@@ -10,6 +10,8 @@ import threading
 import paho.mqtt.client as mqtt
 from queue import Queue
 
+from services.core.metrics import TELEMETRY_QUEUE_SIZE
+
 logger = logging.getLogger(__name__)
 
 MQTT_DEFAULT_PORT = 1883  # IANA-standard MQTT port
@@ -102,6 +104,7 @@ class MqttTelemetryService:
             
             # Push payload to the global queue for the SSE routes
             telemetry_queue.put({"topic": topic, "payload": payload})
+            TELEMETRY_QUEUE_SIZE.set(telemetry_queue.qsize())
 
         except Exception as e:
             logger.error(f"Failed to process incoming MQTT payload: {e}")
@@ -0,0 +1,292 @@
+"""
+On-demand request profiling and slow-request capture.
+
+- SamplingProfiler: samples one thread's Python stack at a fixed interval and
+  aggregates the samples as folded stacks (``frame;frame;frame count``), the
+  input format of flamegraph.pl, inferno and speedscope.
+- MemoryProfiler: tracemalloc snapshot diff around a block, folded by
+  allocation traceback and weighted by bytes.
+- SlowRequestWatchdog: one background thread that samples the stacks of
+  requests running longer than a threshold so they can be logged.
+
+Profiles are saved under ``Config.PROFILE_DIR`` as ``<id>.folded`` plus a
+``<id>.json`` summary.
+
+A request profile and a slow-request entry end when the view returns, in the
+after-request and teardown hooks. For streamed responses (SSE renders, bundle
+downloads) they cover only the view function, not the body where the time is
+spent: stream bodies run afterwards, mostly on the stream event loop thread.
+"""
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, deque
+from pathlib import Path
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+PROFILE_KINDS = ("cpu", "mem")
+MAX_STACK_DEPTH = 64
+TRACEMALLOC_FRAMES = 25
+MAX_SAVED_PROFILES = 200
+SLOW_STACK_SAMPLES = 5  # watchdog wakeups per threshold period
+SLOW_LOG_SIZE = 100
+
+_PROFILE_ID_RE = re.compile(r"^(cpu|mem)-[0-9a-f]{12}$")
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def fold_stack(frame) -> str:
+    """Return *frame*'s stack root-first as ``a;b;c``."""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def render_folded(counts: Counter) -> str:
+    """Serialize folded stack counts, heaviest first."""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+class SamplingProfiler:
+    """Samples the stack of *thread_id* every *interval_s* from a helper thread."""
+
+    def __init__(self, thread_id: int | None = None, interval_s: float = 0.005):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval_s = interval_s
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration_s = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        self._thread.join()
+        self.duration_s = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            self.counts[fold_stack(frame)] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return render_folded(self.counts)
+
+    def summary(self) -> dict:
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval_s * 1000,
+            "duration_ms": round(self.duration_s * 1000, 3),
+            "top_stacks": [{"stack": s, "samples": c} for s, c in self.counts.most_common(10)],
+        }
+
+
+class MemoryProfiler:
+    """Records allocations made during a block with tracemalloc.
+
+    tracemalloc is process-global, so only one memory profile can run at a
+    time; :meth:`start` returns False when another one is active.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self._before = None
+        self._owns_tracing = False
+        self.stats = []
+        self.peak_bytes = None
+        self.duration_s = 0.0
+        self._started_at = 0.0
+
+    def start(self) -> bool:
+        if not self._lock.acquire(blocking=False):
+            return False
+        self._owns_tracing = not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._before = tracemalloc.take_snapshot()
+        self._started_at = time.perf_counter()
+        return True
+
+    def stop(self) -> "MemoryProfiler":
+        try:
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            self.peak_bytes = peak
+            self.stats = [s for s in after.compare_to(self._before, "traceback") if s.size_diff > 0]
+            self.duration_s = time.perf_counter() - self._started_at
+        finally:
+            if self._owns_tracing:
+                tracemalloc.stop()
+            self._lock.release()
+        return self
+
+    def folded(self) -> str:
+        counts: Counter = Counter()
+        for stat in self.stats:
+            frames = reversed(stat.traceback)  # oldest call first
+            stack = ";".join(f"{Path(f.filename).name}:{f.lineno}" for f in frames)
+            counts[stack] += stat.size_diff
+        return render_folded(counts)
+
+    def summary(self) -> dict:
+        top = sorted(self.stats, key=lambda s: s.size_diff, reverse=True)[:10]
+        return {
+            "allocated_bytes": sum(s.size_diff for s in self.stats),
+            "peak_traced_bytes": self.peak_bytes,
+            "duration_ms": round(self.duration_s * 1000, 3),
+            "top_allocations": [
+                {"location": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                 "size_bytes": s.size_diff, "count": s.count_diff}
+                for s in top
+            ],
+        }
+
+
+# ── Saved profiles ─────────────────────────────────────────
+
+
+def save_profile(kind: str, folded: str, summary: dict, request_info: dict) -> str:
+    """Write a profile to PROFILE_DIR and return its id."""
+    profile_dir = Path(Config.PROFILE_DIR)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    profile_id = f"{kind}-{uuid.uuid4().hex[:12]}"
+    (profile_dir / f"{profile_id}.folded").write_text(folded)
+    meta = {"id": profile_id, "kind": kind, "created_at": time.time(), **request_info, **summary}
+    (profile_dir / f"{profile_id}.json").write_text(json.dumps(meta, indent=2))
+    _prune_profiles(profile_dir)
+    return profile_id
+
+
+def _prune_profiles(profile_dir: Path) -> None:
+    metas = sorted(profile_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for meta in metas[:-MAX_SAVED_PROFILES]:
+        meta.unlink(missing_ok=True)
+        meta.with_suffix(".folded").unlink(missing_ok=True)
+
+
+def list_profiles() -> list[dict]:
+    """Return saved profile summaries, newest first."""
+    profile_dir = Path(Config.PROFILE_DIR)
+    if not profile_dir.is_dir():
+        return []
+    profiles = []
+    for meta in profile_dir.glob("*.json"):
+        try:
+            data = json.loads(meta.read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        profiles.append({k: data.get(k) for k in ("id", "kind", "created_at", "method", "path", "status_code", "duration_ms")})
+    return sorted(profiles, key=lambda p: p["created_at"] or 0, reverse=True)
+
+
+def get_profile_path(profile_id: str, suffix: str = ".folded") -> Path | None:
+    """Return the file of a saved profile, or None for unknown/invalid ids."""
+    if not _PROFILE_ID_RE.match(profile_id):
+        return None
+    path = Path(Config.PROFILE_DIR) / f"{profile_id}{suffix}"
+    return path if path.is_file() else None
+
+
+# ── Slow requests ──────────────────────────────────────────
+
+
+class SlowRequestWatchdog:
+    """Samples stacks of in-flight requests that exceed ``threshold_s``.
+
+    Requests register on start and unregister on finish; the watchdog thread
+    only wakes every ``threshold_s / SLOW_STACK_SAMPLES`` seconds, so fast
+    requests cost two dict operations.
+    """
+
+    def __init__(self):
+        self._active: dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.recent: deque = deque(maxlen=SLOW_LOG_SIZE)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="slow-request-watchdog", daemon=True)
+            self._thread.start()
+
+    def begin(self, method: str, path: str) -> None:
+        threshold = Config.SLOW_REQUEST_THRESHOLD_S
+        if threshold <= 0:
+            return
+        with self._lock:
+            self._active[threading.get_ident()] = {
+                "method": method, "path": path, "started": time.perf_counter(),
+                "threshold": threshold, "stacks": Counter(),
+            }
+            self._ensure_thread()
+
+    def end(self, status_code: int | None = None) -> dict | None:
+        """Unregister the calling thread's request; return its log entry if it was slow."""
+        with self._lock:
+            entry = self._active.pop(threading.get_ident(), None)
+        if entry is None:
+            return None
+        duration = time.perf_counter() - entry["started"]
+        if duration < entry["threshold"]:
+            return None
+        record = {
+            "method": entry["method"],
+            "path": entry["path"],
+            "status_code": status_code,
+            "duration_ms": round(duration * 1000, 1),
+            "at": time.time(),
+            "stacks": [{"stack": s, "samples": c} for s, c in entry["stacks"].most_common()],
+        }
+        self.recent.append(record)
+        logger.warning(
+            "Slow request %s %s took %.0f ms (status %s); stack samples:\n%s",
+            record["method"], record["path"], record["duration_ms"], status_code,
+            render_folded(entry["stacks"]) or "(none captured)",
+        )
+        return record
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                interval = min(e["threshold"] for e in self._active.values()) / SLOW_STACK_SAMPLES
+            time.sleep(interval)
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, entry in self._active.items():
+                    # Start a little early so requests just over the threshold get samples too
+                    if now - entry["started"] < entry["threshold"] * 0.8:
+                        continue
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        entry["stacks"][fold_stack(frame)] += 1
+
+
+slow_request_watchdog = SlowRequestWatchdog()
@@ -0,0 +1,268 @@
+"""
+Project Catalog
+Index of the projects in ``CARTRIDGES_DIRS`` behind ``/api/projects`` and the
+admin listing, so that a listing doesn't re-read every project.json.
+
+Each entry holds what the listings show of one project (its discovery
+metadata and the admin counts and flags) with the signature of the files it
+was computed from: project.json, the project directory (its ``.scad`` files)
+and ``exports/``. The index is re-validated by stat at most every
+``CATALOG_CHECK_INTERVAL_S`` seconds, and right away after a manifest is
+reloaded or invalidated (see :meth:`ManifestService.on_change`); only changed
+projects are read again. It is persisted to ``CATALOG_INDEX_FILE``, so a new
+worker starts from it instead of parsing every manifest.
+
+The public listing is kept serialized, with its ETag. Entries also carry the
+fields project search indexes (see :mod:`services.core.project_search`).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from config import Config
+from manifest import file_signature, manifest_service
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+# Fields of an entry in the public listing (GET /api/projects)
+LISTING_FIELDS = ("slug", "name", "version", "description")
+
+
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def project_signature(project_dir: Path) -> list | None:
+    """Return what identifies the indexed state of *project_dir* (None without a project.json)."""
+    manifest = file_signature(project_dir / "project.json")
+    if manifest is None:
+        return None
+    return [*manifest, _mtime_ns(project_dir), _mtime_ns(project_dir / "exports")]
+
+
+def build_entry(project_dir: Path, data: dict, fallback: bool = False) -> dict:
+    """Return the catalog entry of the project in *project_dir*, whose project.json is *data*.
+
+    *fallback* is the single-project ``SCAD_DIR``, with its own defaults.
+    """
+    proj = data.get("project", {})
+    if fallback:
+        slug, name = proj.get("slug", "default"), proj.get("name", "Default Project")
+    else:
+        slug, name = proj.get("slug", project_dir.name), proj.get("name", project_dir.name)
+    try:
+        mode_count, parameter_count = len(data["modes"]), len(data["parameters"])
+        estimate_constants = data["estimate_constants"]
+    except (KeyError, TypeError):
+        mode_count, parameter_count, estimate_constants = 0, 0, None
+    exports_dir = project_dir / "exports"
+    return {
+        "slug": slug,
+        "name": name,
+        "version": proj.get("version", "0.0.0"),
+        "description": proj.get("description", ""),
+        "has_manifest": True,
+        "modified_at": os.path.getmtime(project_dir / "project.json"),
+        "scad_file_count": len(list(project_dir.glob("*.scad"))),
+        "has_exports": exports_dir.is_dir() and any(exports_dir.glob("*.stl")),
+        "mode_count": mode_count,
+        "parameter_count": parameter_count,
+        "estimate_constants": estimate_constants,
+        "is_demo": proj.get("is_demo", False),
+        "is_hyperobject": proj.get("hyperobject", {}).get("is_hyperobject", False),
+    }
+
+
+def _label_texts(label) -> list[str]:
+    """Return the strings of a label: plain, or one per language."""
+    if isinstance(label, str):
+        return [label]
+    if isinstance(label, dict):
+        return [text for text in label.values() if isinstance(text, str)]
+    return []
+
+
+def search_fields(data: dict) -> dict:
+    """Return the fields of project.json *data* that project search indexes beyond the listing."""
+    proj = data.get("project", {})
+    parameters = data.get("parameters")
+    labels = []
+    for parameter in parameters if isinstance(parameters, list) else []:
+        if isinstance(parameter, dict):
+            labels += _label_texts(parameter.get("label"))
+    return {
+        "tags": proj.get("tags", []),
+        "difficulty": proj.get("difficulty"),
+        "engine": proj.get("engine", "openscad"),
+        "parameter_labels": labels,
+    }
+
+
+class ProjectCatalog:
+    """The index, its serialized public listing, and their upkeep."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._settings: tuple | None = None
+        # project dir -> {"signature", "fallback", "entry", "search"} (entry None: invalid manifest)
+        self._indexed: dict[str, dict] = {}
+        self._projects: list[dict] = []
+        self._search: dict[str, dict] = {}
+        self._body = b"[]"
+        self._etag = hashlib.md5(self._body).hexdigest()
+        self._checked_at = 0.0
+        self._dirty = True
+        self.version = 0
+        manifest_service.on_change(lambda project_dir, manifest: self.invalidate())
+
+    def invalidate(self) -> None:
+        """Re-validate the index on the next access (after this process wrote a project)."""
+        self._dirty = True
+
+    def projects(self) -> list[dict]:
+        """Return the entries, in discovery order (copies; first slug wins)."""
+        return [dict(entry) for entry in self._current()]
+
+    def get(self, slug: str) -> dict | None:
+        """Return a copy of the entry of *slug*, or None."""
+        return next((dict(entry) for entry in self._current() if entry["slug"] == slug), None)
+
+    def listing(self) -> tuple[bytes, str]:
+        """Return the serialized public listing and its ETag."""
+        self._current()
+        return self._body, self._etag
+
+    def refresh(self) -> int:
+        """Re-validate the index if it is due; return its version (bumped on every change)."""
+        self._current()
+        return self.version
+
+    def search_documents(self) -> tuple[int, dict[str, dict]]:
+        """Return the catalog version and, by slug, the listed fields plus :func:`search_fields` of each project."""
+        self._current()
+        with self._lock:
+            return self.version, {
+                p["slug"]: {**{key: p[key] for key in LISTING_FIELDS}, **self._search[p["slug"]]}
+                for p in self._projects
+            }
+
+    def _roots(self) -> list[str]:
+        return [str(directory) for directory in Config.CARTRIDGES_DIRS] + [str(Config.SCAD_DIR)]
+
+    def _current(self) -> list[dict]:
+        settings = (tuple(Config.CARTRIDGES_DIRS), Config.SCAD_DIR, Config.CATALOG_INDEX_FILE)
+        with self._lock:
+            if settings != self._settings:
+                self._settings = settings
+                self._indexed = self._load_index()
+                self._dirty = True
+            if self._dirty or time.monotonic() - self._checked_at >= Config.CATALOG_CHECK_INTERVAL_S:
+                # Cleared first: an invalidation during the scan triggers another
+                self._dirty = False
+                self._scan()
+                self._checked_at = time.monotonic()
+            return self._projects
+
+    def _index(self, project_dir: Path, fallback: bool = False) -> dict | None:
+        """Return the index record of *project_dir*, reading project.json only if it changed."""
+        signature = project_signature(project_dir)
+        if signature is None:
+            return None
+        known = self._indexed.get(str(project_dir))
+        if known is not None and known["signature"] == signature and known["fallback"] == fallback:
+            return known
+        manifest_path = project_dir / "project.json"
+        try:
+            with open(manifest_path) as f:
+                data = json.load(f)
+            manifest_service.validate_manifest_strictness(data, manifest_path)
+            entry = build_entry(project_dir, data, fallback)
+            search = search_fields(data)
+        except (OSError, json.JSONDecodeError, KeyError, RuntimeError) as e:
+            # Indexed as invalid, so it is reported once per version of the file
+            logger.warning(f"Skipping invalid project at {project_dir}: {e}")
+            entry = search = None
+        return {"signature": signature, "fallback": fallback, "entry": entry, "search": search}
+
+    def _scan(self) -> None:
+        indexed: dict[str, dict] = {}
+        projects: list[dict] = []
+        search: dict[str, dict] = {}
+        seen_slugs = set()
+        for directory in Config.CARTRIDGES_DIRS:
+            if not directory.is_dir():
+                continue
+            for child in sorted(directory.iterdir()):
+                if not child.is_dir():
+                    continue
+                record = self._index(child)
+                if record is None:
+                    continue
+                indexed[str(child)] = record
+                entry = record["entry"]
+                if entry is not None and entry["slug"] not in seen_slugs:
+                    projects.append(entry)
+                    search[entry["slug"]] = record["search"]
+                    seen_slugs.add(entry["slug"])
+
+        # Fallback: single-project mode via SCAD_DIR
+        if not projects:
+            record = self._index(Config.SCAD_DIR, fallback=True)
+            if record is not None:
+                indexed[str(Config.SCAD_DIR)] = record
+                if record["entry"] is not None:
+                    projects.append(record["entry"])
+                    search[record["entry"]["slug"]] = record["search"]
+
+        if indexed != self._indexed:
+            self._indexed = indexed
+            self._save_index()
+        if projects != self._projects or search != self._search:
+            self._projects = projects
+            self._search = search
+            self._body = json.dumps([{key: p[key] for key in LISTING_FIELDS} for p in projects]).encode()
+            self._etag = hashlib.md5(self._body).hexdigest()
+            self.version += 1
+
+    def _load_index(self) -> dict[str, dict]:
+        try:
+            with open(Config.CATALOG_INDEX_FILE) as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable project catalog {Config.CATALOG_INDEX_FILE}: {e}")
+            return {}
+        if saved.get("version") != INDEX_VERSION or saved.get("roots") != self._roots():
+            return {}
+        return saved.get("projects", {})
+
+    def _save_index(self) -> None:
+        path = Path(Config.CATALOG_INDEX_FILE)
+        saved = {"version": INDEX_VERSION, "roots": self._roots(), "projects": self._indexed}
+        try:
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".catalog-", suffix=".tmp")
+        except OSError as e:
+            logger.warning(f"Project catalog not persisted to {path}: {e}")
+            return
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(saved, f)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            Path(tmp).unlink(missing_ok=True)
+            logger.warning(f"Project catalog not persisted to {path}: {e}")
+
+
+# Singleton instance
+project_catalog = ProjectCatalog()
@@ -0,0 +1,199 @@
+"""
+Project Search
+In-memory inverted index over the project catalog, behind
+``/api/projects/search``: full-text search of names, descriptions (every
+language), tags, difficulty, engine and parameter labels, with prefix
+matching, ranking and facet counts.
+
+Text is folded to lowercase without accents (``diametro`` finds
+``Diámetro``) and split into alphanumeric terms. A term's weight in a project
+is the sum of the ``FIELD_WEIGHTS`` of the fields it occurs in. A query term
+matches the indexed terms it is a prefix of, an exact match at full weight and
+a longer term at ``PREFIX_FACTOR`` of it; every query term must match.
+Results are ranked by the sum over query terms of weight times inverse
+document frequency, ties in catalog order.
+
+The index follows the catalog (see :mod:`services.core.project_catalog`):
+when the catalog's version changes, only projects whose documents changed are
+re-indexed.
+"""
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from services.core.project_catalog import (
+    LISTING_FIELDS,
+    ProjectCatalog,
+    project_catalog,
+)
+
+FIELD_WEIGHTS = {
+    "name": 8.0,
+    "tags": 4.0,
+    "difficulty": 3.0,
+    "engine": 3.0,
+    "description": 2.0,
+    "parameter_labels": 1.0,
+}
+PREFIX_FACTOR = 0.5
+
+# Fields with facet counts (and filters), each a string or a list of strings
+FACETS = ("tags", "difficulty", "engine")
+
+_TERM = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """Return *text* lowercased, without accents."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: str) -> list[str]:
+    """Return the search terms of *text*."""
+    return _TERM.findall(fold(text))
+
+
+def _texts(value) -> list[str]:
+    """Return the strings of a field: a string, a list of them, or one per language."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [text for text in value.values() if isinstance(text, str)]
+    if isinstance(value, list):
+        return [text for item in value for text in _texts(item)]
+    return []
+
+
+def document_terms(document: dict) -> dict[str, float]:
+    """Return the weight of each term of a project's search *document*."""
+    weights: dict[str, float] = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in {term for text in _texts(document.get(field)) for term in tokenize(text)}:
+            weights[term] = weights.get(term, 0.0) + weight
+    return weights
+
+
+class ProjectSearchIndex:
+    """Inverted index of the projects in a :class:`ProjectCatalog`."""
+
+    def __init__(self, catalog: ProjectCatalog):
+        self._catalog = catalog
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        # slug -> search document, in catalog order
+        self._documents: dict[str, dict] = {}
+        self._doc_terms: dict[str, dict[str, float]] = {}
+        # term -> {slug: weight}, and the terms sorted for prefix lookups
+        self._postings: dict[str, dict[str, float]] = {}
+        self._vocabulary: list[str] = []
+
+    def sync(self) -> set[str]:
+        """Catch up with the catalog; return the slugs that were (re-)indexed or dropped."""
+        if self._catalog.refresh() == self._version:
+            return set()
+        version, documents = self._catalog.search_documents()
+        with self._lock:
+            changed = {slug for slug in self._documents.keys() | documents.keys()
+                       if self._documents.get(slug) != documents.get(slug)}
+            for slug in changed:
+                self._remove(slug)
+                if slug in documents:
+                    self._add(slug, documents[slug])
+            self._documents = documents
+            self._version = version
+        return changed
+
+    def _add(self, slug: str, document: dict) -> None:
+        weights = document_terms(document)
+        self._doc_terms[slug] = weights
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._vocabulary, term)
+            postings[slug] = weight
+
+    def _remove(self, slug: str) -> None:
+        for term in self._doc_terms.pop(slug, {}):
+            postings = self._postings[term]
+            del postings[slug]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+
+    def _match(self, query_term: str) -> dict[str, float]:
+        """Return the score of each project with a term starting with *query_term* (its best such term)."""
+        scores: dict[str, float] = {}
+        count = len(self._documents)
+        i = bisect.bisect_left(self._vocabulary, query_term)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(query_term):
+            term = self._vocabulary[i]
+            postings = self._postings[term]
+            factor = (1.0 if term == query_term else PREFIX_FACTOR) * math.log(1 + count / len(postings))
+            for slug, weight in postings.items():
+                scores[slug] = max(scores.get(slug, 0.0), weight * factor)
+            i += 1
+        return scores
+
+    def search(self, query: str = "", filters: dict[str, list[str]] | None = None,
+               limit: int = 20, offset: int = 0) -> dict:
+        """Return the projects matching *query* and *filters*, best first, with facet counts.
+
+        *filters* maps facets to accepted values: a project passes with any
+        of the values of ``difficulty``/``engine`` and all of those of
+        ``tags``. Facet counts are over every match, not only the page.
+        """
+        self.sync()
+        filters = {facet: {fold(v) for v in values} for facet, values in (filters or {}).items() if values}
+        with self._lock:
+            scores: dict[str, float] | None = None
+            for query_term in dict.fromkeys(tokenize(query)):
+                matched = self._match(query_term)
+                scores = matched if scores is None else {
+                    slug: score + matched[slug] for slug, score in scores.items() if slug in matched
+                }
+            hits = [slug for slug in self._documents
+                    if (scores is None or slug in scores) and self._passes(self._documents[slug], filters)]
+            if scores is not None:
+                hits.sort(key=lambda slug: -scores[slug])
+
+            facets = {facet: Counter() for facet in FACETS}
+            for slug in hits:
+                for facet in FACETS:
+                    facets[facet].update(set(_texts(self._documents[slug].get(facet))))
+
+            results = []
+            for slug in hits[offset:offset + limit]:
+                document = self._documents[slug]
+                result = {key: document[key] for key in LISTING_FIELDS}
+                result.update({facet: document.get(facet) for facet in FACETS})
+                result["score"] = round(scores[slug], 4) if scores is not None else None
+                results.append(result)
+
+        return {
+            "query": query,
+            "total": len(hits),
+            "results": results,
+            "facets": {
+                facet: [{"value": value, "count": n} for value, n in sorted(counts.items(), key=lambda c: (-c[1], c[0]))]
+                for facet, counts in facets.items()
+            },
+        }
+
+    @staticmethod
+    def _passes(document: dict, filters: dict[str, set[str]]) -> bool:
+        for facet, accepted in filters.items():
+            values = {fold(value) for value in _texts(document.get(facet))}
+            if facet == "tags" and not accepted <= values:
+                return False
+            if facet != "tags" and not accepted & values:
+                return False
+        return True
+
+
+# Singleton instance
+project_search = ProjectSearchIndex(project_catalog)
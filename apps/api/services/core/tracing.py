@@ -0,0 +1,380 @@
+"""
+Lightweight request tracing.
+
+Spans are timed stages of a request (manifest load, parameter validation,
+cache lookup, render subprocess, ...). Each finished span is handed to the
+exporter selected by ``Config.TRACE_EXPORTER``:
+
+- ``none`` (default): tracing disabled
+- ``jsonl``: one JSON object per span appended to ``Config.TRACE_FILE``
+  from a background thread; the file is never rotated, so it is meant for
+  local debugging
+- ``otlp``: batched OTLP/HTTP JSON posts to ``Config.TRACE_OTLP_ENDPOINT``
+
+Trace context crosses process boundaries in the W3C ``traceparent`` format:
+incoming HTTP ``traceparent`` headers are honoured and render subprocesses
+receive a ``TRACEPARENT`` environment variable.
+"""
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_ENV = "TRACEPARENT"
+TRACE_FILE_ENV = "YANTRA4D_TRACE_FILE"
+SERVICE_NAME = "yantra4d-api"
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """One timed stage of a trace. Call :meth:`end` exactly once."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    @property
+    def duration_ms(self) -> float | None:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        exporter = get_exporter()
+        if exporter is not None:
+            try:
+                exporter.export(self)
+            except (TypeError, ValueError) as e:  # tracing must never break a request
+                logger.warning("Failed to export span %s: %s", self.name, e)
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def as_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3) if self.end_ns is not None else None,
+            "attributes": self.attributes,
+            "error": self.error,
+            "service": SERVICE_NAME,
+            "pid": os.getpid(),
+        }
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str] | None:
+    """Return ``(trace_id, parent_span_id)`` from a W3C traceparent, or None."""
+    if not value:
+        return None
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2)
+
+
+def tracing_enabled() -> bool:
+    return Config.TRACE_EXPORTER != "none"
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def start_span(name: str, parent: Span | None = None, traceparent: str | None = None, **attributes) -> Span:
+    """Create a span without activating it.
+
+    The parent is *parent*, else the span of *traceparent*, else the current
+    span; with none of those a new trace is started.
+    """
+    parent = parent or current_span()
+    remote = parse_traceparent(traceparent) if parent is None else None
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    elif remote is not None:
+        trace_id, parent_id = remote
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+    return Span(name=name, trace_id=trace_id, span_id=secrets.token_hex(8),
+                parent_id=parent_id, attributes=dict(attributes))
+
+
+@contextmanager
+def use_span(span: Span | None):
+    """Make *span* the current span for the block without ending it."""
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the block as a child of the current span.
+
+    Exceptions are recorded on the span and re-raised.
+    """
+    if not tracing_enabled():
+        yield None
+        return
+    s = start_span(name, **attributes)
+    try:
+        with use_span(s):
+            yield s
+    except BaseException as e:
+        s.record_error(e)
+        raise
+    finally:
+        s.end()
+
+
+def iterate_in_span(s: Span | None, iterable):
+    """Yield from *iterable* with *s* current while each item is produced.
+
+    Streamed responses are consumed after the view returns, so the request
+    span has to be re-activated around every step of the generator.
+    """
+    iterator = iter(iterable)
+    try:
+        while True:
+            with use_span(s):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            with use_span(s):
+                close()
+
+
+async def aiterate_in_span(s: Span | None, aiterable):
+    """Async counterpart of :func:`iterate_in_span`."""
+    iterator = aiterable.__aiter__()
+    try:
+        while True:
+            with use_span(s):
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+            yield item
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            with use_span(s):
+                await aclose()
+
+
+def propagation_env(env: dict | None, s: Span | None = None) -> dict | None:
+    """Add the trace context of *s* (default: current span) to a child process *env*.
+
+    *env* is modified in place and returned; ``None`` (inherit the parent
+    environment) becomes a copy of ``os.environ`` when there is context to add.
+    """
+    s = s or current_span()
+    if s is not None and tracing_enabled():
+        env = dict(os.environ) if env is None else env
+        env[TRACEPARENT_ENV] = s.traceparent()
+        if Config.TRACE_EXPORTER == "jsonl":
+            env[TRACE_FILE_ENV] = str(Config.TRACE_FILE)
+    return env
+
+
+# ── Exporters ──────────────────────────────────────────────
+
+
+class JsonlExporter:
+    """Appends one JSON line per span to a file (safe across workers via O_APPEND).
+
+    Spans end on request threads and on the stream event loop, so
+    :meth:`export` only queues the line; a background thread appends
+    whatever has queued up in one write.
+    """
+
+    MAX_QUEUE = 10_000
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._queue: queue.Queue = queue.Queue(maxsize=self.MAX_QUEUE)
+        self._thread = threading.Thread(target=self._run, name="jsonl-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, s: Span) -> None:
+        try:
+            self._queue.put_nowait(json.dumps(s.as_dict(), default=str) + "\n")
+        except queue.Full:
+            logger.warning("JSONL export queue full, dropping span %s", s.name)
+
+    def flush(self) -> None:
+        """Block until every span exported so far is written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Stop the writer thread once the queued spans are written."""
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            lines = [self._queue.get()]
+            while lines[-1] is not None:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write("".join(line for line in lines if line is not None))
+            finally:
+                for _ in lines:
+                    self._queue.task_done()
+            if lines[-1] is None:
+                return
+
+    def _write(self, data: str) -> None:
+        if not data:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+        except OSError as e:
+            logger.warning("JSONL export to %s failed: %s", self.path, e)
+
+
+class OtlpHttpExporter:
+    """Batches spans and posts them as OTLP/HTTP JSON from a background thread."""
+
+    BATCH_SIZE = 256
+    FLUSH_INTERVAL_S = 2.0
+    MAX_QUEUE = 10_000
+
+    def __init__(self, endpoint: str):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self._queue: queue.Queue = queue.Queue(maxsize=self.MAX_QUEUE)
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, s: Span) -> None:
+        try:
+            self._queue.put_nowait(s)
+        except queue.Full:
+            logger.warning("OTLP export queue full, dropping span %s", s.name)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.FLUSH_INTERVAL_S
+            while len(batch) < self.BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._post(batch)
+
+    def _post(self, batch: list[Span]) -> None:
+        import requests
+        try:
+            requests.post(self.url, json=otlp_payload(batch), timeout=5)
+        except requests.RequestException as e:
+            logger.warning("OTLP export to %s failed: %s", self.url, e)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: list[Span]) -> dict:
+    """Encode *spans* as an OTLP ExportTraceServiceRequest (JSON mapping)."""
+    encoded = []
+    for s in spans:
+        item = {
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        encoded.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "yantra4d"}, "spans": encoded}],
+    }]}
+
+
+_exporter = None
+_exporter_key = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    """Return the exporter for the current Config, rebuilding it if Config changed."""
+    global _exporter, _exporter_key
+    kind = Config.TRACE_EXPORTER
+    if kind == "jsonl":
+        key = (kind, str(Config.TRACE_FILE))
+    elif kind == "otlp":
+        key = (kind, Config.TRACE_OTLP_ENDPOINT)
+    else:
+        return None
+    with _exporter_lock:
+        if key != _exporter_key:
+            if isinstance(_exporter, JsonlExporter):
+                _exporter.close()
+            _exporter = JsonlExporter(key[1]) if kind == "jsonl" else OtlpHttpExporter(key[1])
+            _exporter_key = key
+        return _exporter
+
+
+def flush_spans() -> None:
+    """Block until the spans ended so far are in the JSONL file (OTLP posts are not awaited)."""
+    exporter = get_exporter()
+    if isinstance(exporter, JsonlExporter):
+        exporter.flush()
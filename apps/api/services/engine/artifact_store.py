@@ -0,0 +1,312 @@
+"""
+Artifact Store
+Shared pool for render outputs, so that every replica (and a restarted pod)
+can use renders made elsewhere.
+
+``ARTIFACT_STORE`` selects the backend:
+
+- ``local``: a directory (``ARTIFACT_LOCAL_DIR``), typically a volume that
+  every replica mounts;
+- ``s3``: a bucket on any S3-compatible service (``ARTIFACT_S3_*``), through
+  the optional ``boto3`` package.
+
+Layout of the pool:
+
+- ``renders/<cache key>/<file>``: a render's output and the files packaging
+  wrote for it;
+- ``renders/<cache key>.json``: its render cache entry, written last, so a
+  visible entry is complete;
+- ``latest/<file>``: the cache key that last wrote each served file name.
+
+The static folder stays the working copy. Renders are written there and
+published to the pool, and other replicas restore them into their own
+static folder when they need them (read-through).
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from config import Config
+from services.engine.mesh_packaging import COMPRESSED_SUFFIXES
+
+try:
+    import boto3
+    from botocore.exceptions import BotoCoreError, ClientError
+    HAS_BOTO3 = True
+    # What a store operation raises when the backend or the network fails
+    STORE_ERRORS = (OSError, ValueError, BotoCoreError, ClientError)
+except ImportError:
+    HAS_BOTO3 = False
+    STORE_ERRORS = (OSError, ValueError)
+
+logger = logging.getLogger(__name__)
+
+RENDERS_PREFIX = "renders/"
+LATEST_PREFIX = "latest/"
+
+# Error codes S3-compatible services use for a missing object
+_MISSING_CODES = {"NoSuchKey", "NotFound", "404"}
+
+
+def _replace_from(write, dest: str) -> None:
+    """Call ``write(tmp_path)`` for a temp file next to *dest*, then move it into place."""
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest) or ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        # mkstemp creates owner-only files; static files are read by the front server too
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, dest)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class ArtifactStore(ABC):
+    """A flat namespace of objects addressed by ``/``-separated keys."""
+
+    @abstractmethod
+    def put_file(self, key: str, path: str) -> None:
+        """Store the local file at *path* under *key*, streaming it."""
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes) -> None:
+        """Store *data* under *key*."""
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> bytes | None:
+        """Return the object at *key*, or None if there is none."""
+
+    @abstractmethod
+    def fetch(self, key: str, dest: str) -> bool:
+        """Copy the object at *key* to the local file *dest*; return False if there is none."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the object at *key* (if any)."""
+
+    def url(self, key: str, download_name: str | None = None) -> str | None:
+        """Return a URL clients can download *key* from directly, or None if the backend has none."""
+        return None
+
+
+class LocalArtifactStore(ArtifactStore):
+    """Objects as files under a root directory (e.g. a volume shared by all replicas)."""
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Invalid artifact key: {key}")
+        return path
+
+    def put_file(self, key: str, path: str) -> None:
+        _replace_from(lambda tmp: shutil.copyfile(path, tmp), str(self._path(key)))
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        _replace_from(lambda tmp: Path(tmp).write_bytes(data), str(self._path(key)))
+
+    def get_bytes(self, key: str) -> bytes | None:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def fetch(self, key: str, dest: str) -> bool:
+        src = self._path(key)
+        if not src.is_file():
+            return False
+        try:
+            _replace_from(lambda tmp: shutil.copyfile(src, tmp), dest)
+        except FileNotFoundError:
+            # Replaced between the check and the copy
+            return False
+        return True
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+
+class S3ArtifactStore(ArtifactStore):
+    """Objects in a bucket of an S3-compatible service, under an optional key prefix."""
+
+    def __init__(self, bucket: str, prefix: str = "", client=None, presign_ttl: int = 300):
+        if client is None:
+            client = boto3.client("s3", endpoint_url=Config.ARTIFACT_S3_ENDPOINT_URL or None,
+                                  region_name=Config.ARTIFACT_S3_REGION or None)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.presign_ttl = presign_ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    @staticmethod
+    def _is_missing(error: Exception) -> bool:
+        code = (getattr(error, "response", None) or {}).get("Error", {}).get("Code")
+        return code in _MISSING_CODES
+
+    def put_file(self, key: str, path: str) -> None:
+        # Managed transfer: multipart for large files, never read into memory whole
+        self.client.upload_file(path, self.bucket, self._key(key))
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def get_bytes(self, key: str) -> bytes | None:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+        except Exception as e:
+            if self._is_missing(e):
+                return None
+            raise
+
+    def fetch(self, key: str, dest: str) -> bool:
+        try:
+            _replace_from(lambda tmp: self.client.download_file(self.bucket, self._key(key), tmp), dest)
+        except Exception as e:
+            if self._is_missing(e):
+                return False
+            raise
+        return True
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def url(self, key: str, download_name: str | None = None) -> str | None:
+        params = {"Bucket": self.bucket, "Key": self._key(key)}
+        if download_name:
+            params["ResponseContentDisposition"] = f'attachment; filename="{download_name}"'
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=self.presign_ttl)
+
+
+_configured: tuple[tuple, ArtifactStore | None] = ((), None)
+
+
+def _build_store(kind: str, local_dir: str, bucket: str, prefix: str) -> ArtifactStore | None:
+    if kind == "local":
+        if not local_dir:
+            logger.error("ARTIFACT_STORE=local needs ARTIFACT_LOCAL_DIR; artifacts stay on this pod")
+            return None
+        return LocalArtifactStore(local_dir)
+    if kind == "s3":
+        if not HAS_BOTO3:
+            logger.error("ARTIFACT_STORE=s3 needs the boto3 package; artifacts stay on this pod")
+            return None
+        if not bucket:
+            logger.error("ARTIFACT_STORE=s3 needs ARTIFACT_S3_BUCKET; artifacts stay on this pod")
+            return None
+        return S3ArtifactStore(bucket, prefix, presign_ttl=Config.ARTIFACT_PRESIGN_TTL_S)
+    if kind:
+        logger.error("Unknown ARTIFACT_STORE %r; artifacts stay on this pod", kind)
+    return None
+
+
+def get_artifact_store() -> ArtifactStore | None:
+    """Return the configured store, or None when artifacts only live on this pod's disk."""
+    global _configured
+    settings = (Config.ARTIFACT_STORE, Config.ARTIFACT_LOCAL_DIR, Config.ARTIFACT_S3_BUCKET, Config.ARTIFACT_S3_PREFIX)
+    if _configured[0] != settings:
+        _configured = (settings, _build_store(*settings))
+    return _configured[1]
+
+
+def render_files(entry: dict, static_dir: str) -> list[str]:
+    """Return the file names in *static_dir* that make up the render cache *entry*.
+
+    The first is the output itself; then the LODs, the GLB and the
+    precompressed siblings of each, as far as they exist.
+    """
+    served = [os.path.basename(entry["path"])]
+    served += [os.path.basename(lod["url"]) for lod in entry.get("lods") or []]
+    if entry.get("glb"):
+        served.append(os.path.basename(entry["glb"]["url"]))
+    names = []
+    for name in served:
+        names += [name] + [name + suffix for suffix in COMPRESSED_SUFFIXES.values()]
+    return [name for name in names if os.path.isfile(os.path.join(static_dir, name))]
+
+
+def publish_render(store: ArtifactStore, key: str, entry: dict) -> None:
+    """Upload the render cached under *key* (its files, then its entry) to *store*."""
+    static_dir = os.path.dirname(entry["path"])
+    files = render_files(entry, static_dir)
+    if not files:
+        return
+    for name in files:
+        store.put_file(f"{RENDERS_PREFIX}{key}/{name}", os.path.join(static_dir, name))
+    shared = {field: entry.get(field) for field in ("size_bytes", "lods", "glb", "cleanup")}
+    shared.update(file=files[0], files=files, published_at=entry.get("ts", time.time()))
+    store.put_bytes(f"{RENDERS_PREFIX}{key}.json", json.dumps(shared).encode())
+    # Point each served name (not the compressed siblings) at this render
+    pointer = json.dumps({"key": key}).encode()
+    for name in files:
+        if not name.endswith(tuple(COMPRESSED_SUFFIXES.values())):
+            store.put_bytes(f"{LATEST_PREFIX}{name}", pointer)
+
+
+def _published(store: ArtifactStore, key: str, max_age: float | None) -> dict | None:
+    """Return the shared entry of *key*, if published less than *max_age* seconds ago."""
+    raw = store.get_bytes(f"{RENDERS_PREFIX}{key}.json")
+    if raw is None:
+        return None
+    shared = json.loads(raw)
+    published_at = shared.get("published_at", 0.0)
+    if max_age is not None and time.time() - published_at > max_age:
+        return None
+    return shared
+
+
+def restore_render(store: ArtifactStore, key: str, static_dir: str, max_age: float | None = None) -> dict | None:
+    """Copy the render published under *key* into *static_dir*; return its cache entry.
+
+    The entry has the same fields as a local one, with ``path`` in
+    *static_dir*, plus ``published_at``. Returns None if *store* has no
+    (complete) render for *key*, or only one published more than *max_age*
+    seconds ago.
+    """
+    shared = _published(store, key, max_age)
+    if shared is None:
+        return None
+    for name in shared["files"]:
+        if not store.fetch(f"{RENDERS_PREFIX}{key}/{name}", os.path.join(static_dir, name)):
+            return None
+    entry = {field: shared.get(field) for field in ("size_bytes", "lods", "glb", "cleanup")}
+    entry["path"] = os.path.join(static_dir, shared["file"])
+    entry["published_at"] = shared.get("published_at", 0.0)
+    return entry
+
+
+def latest_key(store: ArtifactStore, name: str) -> str | None:
+    """Return the cache key of the render that last wrote the served file *name*."""
+    raw = store.get_bytes(f"{LATEST_PREFIX}{name}")
+    return json.loads(raw)["key"] if raw is not None else None
+
+
+def restore_static(store: ArtifactStore, name: str, static_dir: str, max_age: float | None = None) -> bool:
+    """Restore the render that last wrote *name* into *static_dir*; return True if *name* is now there.
+
+    Like :func:`restore_render`, a render published more than *max_age* seconds ago is not restored.
+    """
+    key = latest_key(store, name)
+    if key is None or restore_render(store, key, static_dir, max_age) is None:
+        return False
+    return os.path.isfile(os.path.join(static_dir, name))
+
+
+def static_url(store: ArtifactStore, name: str, download_name: str | None = None,
+               max_age: float | None = None) -> str | None:
+    """Return a direct download URL for the latest render of *name*, if the backend has one (and it is fresh)."""
+    key = latest_key(store, name)
+    if key is None or _published(store, key, max_age) is None:
+        return None
+    return store.url(f"{RENDERS_PREFIX}{key}/{name}", download_name)
@@ -4,12 +4,20 @@ Handles executing Python CadQuery scripts via a subprocess.
 """
 import logging
 import os
-import subprocess
+import shlex
 import json
-import threading
 
 from config import Config
-from services.engine.render_engine import RENDER_TIMEOUT_S, ProcessManager
+from services.core.metrics import RENDER_SUBPROCESSES
+from services.core.tracing import propagation_env, start_span
+from services.engine.render_engine import (
+    ProcessManager,
+    RenderLimits,
+    RenderResult,
+    exhaustion_message,
+    run_limited,
+)
+from services.engine.stream_engine import StreamedProcess, iterate
 
 logger = logging.getLogger(__name__)
 
@@ -25,123 +33,147 @@ def _cadquery_env():
 
 
 def build_cadquery_command(output_path: str, script_path: str, params: dict, export_format: str) -> list:
-    """Build Python command to run the CadQuery wrapper script."""
-    runner_script = os.path.join(os.path.dirname(__file__), 'cq_runner.py')
+    """Build Python command to run the CadQuery wrapper script.
+
+    ``Config.CADQUERY_RUNNER`` replaces the default ``python cq_runner.py``
+    prefix, e.g. with the fake engine used for load testing.
+    """
+    if Config.CADQUERY_RUNNER:
+        runner = shlex.split(Config.CADQUERY_RUNNER)
+    else:
+        runner = ["python", os.path.join(os.path.dirname(__file__), 'cq_runner.py')]
 
     # Pass parameters as a JSON string to the runner
     params_json = json.dumps(params)
 
     cmd = [
-        "python", runner_script,
+        *runner,
         script_path, output_path, params_json, export_format
     ]
     return cmd
 
 
-def run_render(cmd: list, scad_path: str | None = None) -> tuple[bool, str]:
-    """Execute CadQuery render synchronously. Returns (success, stderr/stdout)."""
+def run_render(cmd: list, scad_path: str | None = None, limits: RenderLimits | None = None) -> tuple[bool, str]:
+    """Execute CadQuery render synchronously. Returns (success, stderr/stdout).
+
+    The returned :class:`RenderResult` also carries the subprocess' resource
+    ``usage`` and, when the render was killed by one of *limits*, ``exhausted``.
+    """
+    limits = limits or RenderLimits()
     logger.info(f"Running CadQuery: {' '.join(cmd)}")
-    try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=RENDER_TIMEOUT_S, env=_cadquery_env())
-        return True, result.stdout + result.stderr
-    except subprocess.TimeoutExpired:
-        logger.error("CadQuery render timed out after %ds", RENDER_TIMEOUT_S)
-        return False, f"Render timed out after {RENDER_TIMEOUT_S} seconds"
-    except subprocess.CalledProcessError as e:
-        logger.error(f"CadQuery failed: {e.stdout}\n{e.stderr}")
-        return False, e.stdout + e.stderr
+    outcome = run_limited(cmd, env=_cadquery_env(), limits=limits, merge_stderr=True)
+    output = outcome.stdout
 
+    if outcome.exhausted:
+        logger.error("CadQuery render exhausted %s limit (code %s)", outcome.exhausted, outcome.returncode)
+        return RenderResult(False, exhaustion_message(outcome.exhausted, limits), outcome.exhausted, outcome.usage)
+    if outcome.returncode != 0:
+        logger.error(f"CadQuery failed: {output}")
+        return RenderResult(False, output, usage=outcome.usage)
+    return RenderResult(True, output, usage=outcome.usage)
 
-def stream_render(cmd: list, part: str, part_base: float, part_weight: float, index: int, total: int, scad_path: str | None = None):
+
+async def astream_render(cmd: list, part: str, part_base: float, part_weight: float, index: int, total: int,
+                         scad_path: str | None = None, limits: RenderLimits | None = None):
     """
-    Generator that streams CadQuery progress as SSE events.
+    Async generator that streams CadQuery progress as event dicts.
+    Runs on the shared stream loop (see services.engine.stream_engine).
     """
+    limits = limits or RenderLimits()
     # Simply report start and end with some basic streaming
-    yield json.dumps({
+    yield {
         'event': 'part_start',
         'part': part,
         'progress': round(part_base),
         'index': index,
         'total': total
-    })
+    }
 
+    proc_span = start_span("subprocess.stream", part=part, executable=os.path.basename(str(cmd[0])))
     try:
-        process = _cq_process_manager.start(
-            subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=_cadquery_env())
-        )
-        kill_timer = threading.Timer(RENDER_TIMEOUT_S, lambda: process.kill())
-        kill_timer.start()
+        stream = await StreamedProcess.spawn(cmd, env=propagation_env(_cadquery_env(), proc_span),
+                                             limits=limits, merge_stderr=True)
     except Exception as e:
         logger.exception("Failed to start CadQuery process")
-        yield json.dumps({
+        proc_span.record_error(e)
+        proc_span.end()
+        yield {
             'event': 'error',
             'part': part,
             'message': f'Internal Process Error: {str(e)}'
-        })
+        }
         return
 
+    _cq_process_manager.start(stream.process)
+    lines = stream.lines()
+    RENDER_SUBPROCESSES.inc()
+    proc_span.set_attribute("pid", stream.pid)
     try:
-        import queue
-        q = queue.Queue()
-        
-        def reader(stream):
-            for line_val in iter(stream.readline, ''):
-                q.put(line_val)
-            q.put(None)
-            
-        t = threading.Thread(target=reader, args=(process.stdout,))
-        t.daemon = True
-        t.start()
-
         lines_read = 0
-        while True:
-            try:
-                line = q.get(timeout=10.0)
-                if line is None:
-                    break
-                    
-                line = line.strip()
-                if not line:
-                    continue
-
-                lines_read += 1
-                # Fake progress based on output lines (since we don't have exact phases)
-                progress_incr = min(80, lines_read * 5)
-                overall_progress = part_base + (progress_incr / 100) * part_weight
-
-                yield json.dumps({
-                    'event': 'output',
-                    'part': part,
-                    'line': line,
-                    'progress': round(overall_progress)
-                })
-            except queue.Empty:
-                yield json.dumps({
+        async for line in lines:
+            if line is None:
+                yield {
                     'event': 'ping',
                     'part': part,
                     'message': 'keep-alive'
-                })
-
-        process.wait()
+                }
+                continue
+
+            lines_read += 1
+            # Fake progress based on output lines (since we don't have exact phases)
+            progress_incr = min(80, lines_read * 5)
+            overall_progress = part_base + (progress_incr / 100) * part_weight
+
+            yield {
+                'event': 'output',
+                'part': part,
+                'line': line,
+                'progress': round(overall_progress)
+            }
+
+        usage = stream.usage.as_dict() if stream.usage else None
+        proc_span.attributes.update(returncode=stream.returncode, **(usage or {}))
     finally:
-        kill_timer.cancel()
-        _cq_process_manager.clear()
+        await lines.aclose()
+        RENDER_SUBPROCESSES.dec()
+        proc_span.end()
+        _cq_process_manager.clear(stream.process)
 
-    if process.returncode == 0:
+    if stream.returncode == 0:
         final_progress = part_base + part_weight
-        yield json.dumps({
+        yield {
             'event': 'part_done',
             'part': part,
-            'progress': round(final_progress)
-        })
-        return True
+            'progress': round(final_progress),
+            'usage': usage
+        }
+    elif stream.exhausted:
+        logger.error("CadQuery render exhausted %s limit (code %s)", stream.exhausted, stream.returncode)
+        yield {
+            'event': 'error',
+            'part': part,
+            'reason': 'resource_exhausted',
+            'resource': stream.exhausted,
+            'message': exhaustion_message(stream.exhausted, limits),
+            'usage': usage
+        }
     else:
-        yield json.dumps({
+        yield {
             'event': 'error',
             'part': part,
-            'message': f'Render failed with code {process.returncode}'
-        })
-        return False
+            'message': f'Render failed with code {stream.returncode}',
+            'usage': usage
+        }
+
+
+def stream_render(cmd: list, part: str, part_base: float, part_weight: float, index: int, total: int,
+                  scad_path: str | None = None, limits: RenderLimits | None = None):
+    """
+    Generator that streams CadQuery progress as event dicts.
+    The render itself runs on the shared stream loop; see :func:`astream_render`.
+    """
+    yield from iterate(astream_render(cmd, part, part_base, part_weight, index, total,
+                                      scad_path=scad_path, limits=limits))
 
 
 def cancel_render():
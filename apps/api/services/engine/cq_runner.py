@@ -1,9 +1,46 @@
-import sys
 import json
 import logging
+import os
+import secrets
+import sys
+import time
+from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
+
+@contextmanager
+def _trace_span(name):
+    """Append a child span of the API's TRACEPARENT to YANTRA4D_TRACE_FILE.
+
+    The runner executes outside the API package, so this mirrors the JSONL
+    span format of services.core.tracing instead of importing it.
+    """
+    traceparent = os.environ.get("TRACEPARENT", "")
+    trace_file = os.environ.get("YANTRA4D_TRACE_FILE")
+    parts = traceparent.split("-")
+    start_ns = time.time_ns()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if trace_file and len(parts) == 4:
+            end_ns = time.time_ns()
+            span = {
+                "trace_id": parts[1], "span_id": secrets.token_hex(8), "parent_id": parts[2],
+                "name": name, "start_ns": start_ns, "end_ns": end_ns,
+                "duration_ms": round((end_ns - start_ns) / 1e6, 3), "attributes": {},
+                "error": error, "service": "yantra4d-cq-runner", "pid": os.getpid(),
+            }
+            try:
+                with open(trace_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(span) + "\n")
+            except OSError:
+                pass
+
 def run_cadquery_script(script_path, output_path, params_json, export_format):
     try:
         import cadquery as cq
@@ -30,7 +67,8 @@ def run_cadquery_script(script_path, output_path, params_json, export_format):
         sys.argv = [script_path, "--params", params_json, "--out", output_path]
 
         # Execute the script. The script should assign the final shape to an 'assembly', 'result', or 'part' variable.
-        exec(script_content, exec_globals)
+        with _trace_span("cadquery.exec"):
+            exec(script_content, exec_globals)
         
         # Find the result
         result = None
@@ -54,36 +92,36 @@ def run_cadquery_script(script_path, output_path, params_json, export_format):
         
         is_gltf_or_glb = export_format.upper() in ["GLTF", "GLB"]
 
-        if is_gltf_or_glb:
-            import tempfile
-            import os
-            try:
-                import cascadio
-            except ImportError:
-                print("Error: cascadio library is missing. Cannot export high-quality GLB.")
-                sys.exit(1)
+        with _trace_span("cadquery.export"):
+            if is_gltf_or_glb:
+                import tempfile
+                try:
+                    import cascadio
+                except ImportError:
+                    print("Error: cascadio library is missing. Cannot export high-quality GLB.")
+                    sys.exit(1)
             
-            # Export to a temporary STEP file first
-            with tempfile.NamedTemporaryFile(suffix=".step", delete=False) as tmp:
-                temp_step_path = tmp.name
+                # Export to a temporary STEP file first
+                with tempfile.NamedTemporaryFile(suffix=".step", delete=False) as tmp:
+                    temp_step_path = tmp.name
                 
-            try:
-                if isinstance(result, cq.Assembly):
-                    result.save(temp_step_path, "STEP")
-                else:
-                    cq.exporters.export(result, temp_step_path, "STEP")
+                try:
+                    if isinstance(result, cq.Assembly):
+                        result.save(temp_step_path, "STEP")
+                    else:
+                        cq.exporters.export(result, temp_step_path, "STEP")
                     
-                print("Transcoding STEP to GLB via cascadio...")
-                # cascadio creates a far superior, optimized binary GLB mesh
-                cascadio.step_to_glb(temp_step_path, output_path)
-            finally:
-                if os.path.exists(temp_step_path):
-                    os.remove(temp_step_path)
+                    print("Transcoding STEP to GLB via cascadio...")
+                    # cascadio creates a far superior, optimized binary GLB mesh
+                    cascadio.step_to_glb(temp_step_path, output_path)
+                finally:
+                    if os.path.exists(temp_step_path):
+                        os.remove(temp_step_path)
                     
-        elif isinstance(result, cq.Assembly):
-            result.save(output_path, export_format.upper())
-        else:
-            cq.exporters.export(result, output_path, export_format.upper())
+            elif isinstance(result, cq.Assembly):
+                result.save(output_path, export_format.upper())
+            else:
+                cq.exporters.export(result, output_path, export_format.upper())
             
         print("Rendering complete.")
 
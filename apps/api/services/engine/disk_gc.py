@@ -0,0 +1,221 @@
+"""
+Disk Garbage Collector
+Keeps the files renders leave on disk within a byte budget
+(``DISK_GC_BUDGET_BYTES``): everything in the static folder (render outputs
+and their packaging, ``head_`` renders, scenes) and the parity outputs that
+``scripts/qa/verify_parity.py`` writes to each project's ``exports/``.
+
+A background thread sweeps every ``DISK_GC_INTERVAL_S`` seconds. Above the
+high watermark, artifacts are evicted least recently used first until usage
+is under the low watermark. An artifact is a file together with the files
+derived from it (LODs, GLB, precompressed siblings). It was last used at its
+latest file mtime/atime or render cache hit, whichever is newer. Artifacts of
+in-flight render jobs and pinned renders (see :mod:`render_jobs`) are kept,
+and so is anything younger than ``DISK_GC_MIN_AGE_S``.
+
+Workers sweep one at a time (a lock file per static folder). Each only knows
+its own jobs and cache hits; the minimum age protects renders running in the
+others. An evicted render is a cache miss afterwards, or is restored from the
+artifact store when one is configured.
+"""
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from config import Config
+from services.core.metrics import (
+    DISK_GC_BUDGET,
+    DISK_GC_EVICTED_BYTES,
+    DISK_GC_EVICTED_FILES,
+    DISK_GC_SKIPPED,
+    DISK_GC_SWEEP_SECONDS,
+    DISK_GC_SWEEPS,
+    DISK_GC_USAGE,
+)
+from services.engine.render_cache import render_cache
+from services.engine.render_jobs import render_jobs
+
+logger = logging.getLogger(__name__)
+
+# Parity outputs written to <project>/exports/ by scripts/qa/verify_parity.py
+PARITY_PATTERNS = ("*_scad.stl", "*_cq.stl")
+
+
+@dataclass
+class Artifact:
+    """A file and the files derived from it, evicted together."""
+
+    key: str
+    paths: list[str] = field(default_factory=list)
+    size: int = 0
+    mtime: float = 0.0
+    used: float = 0.0
+
+
+def artifact_key(path: str) -> str:
+    """Return the artifact *path* belongs to: its directory and its name up to the first dot.
+
+    ``p_preview_main.stl``, ``p_preview_main.lod5.stl``,
+    ``p_preview_main.q.glb`` and their ``.gz``/``.br`` siblings share a key.
+    """
+    folder, name = os.path.split(path)
+    return os.path.join(folder, name.split(".", 1)[0])
+
+
+def candidate_files(static_dir: Path, projects_dir: Path) -> list[str]:
+    """Return the files the GC manages (dotfiles excluded)."""
+    files = []
+    try:
+        with os.scandir(static_dir) as entries:
+            files += [e.path for e in entries if e.is_file(follow_symlinks=False) and not e.name.startswith(".")]
+    except FileNotFoundError:
+        pass
+    if projects_dir.is_dir():
+        for exports in projects_dir.glob("*/exports"):
+            for pattern in PARITY_PATTERNS:
+                files += [str(p) for p in exports.glob(pattern) if p.is_file()]
+    return files
+
+
+def scan_artifacts(files: list[str], last_used: dict[str, float]) -> list[Artifact]:
+    """Group *files* into artifacts, with sizes and last use (*last_used*: cache hits by path)."""
+    artifacts: dict[str, Artifact] = {}
+    for path in files:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        key = artifact_key(path)
+        artifact = artifacts.setdefault(key, Artifact(key))
+        artifact.paths.append(path)
+        artifact.size += st.st_size
+        artifact.mtime = max(artifact.mtime, st.st_mtime)
+        artifact.used = max(artifact.used, st.st_mtime, st.st_atime, last_used.get(path, 0.0))
+    return list(artifacts.values())
+
+
+def _evict(artifact: Artifact) -> tuple[int, int]:
+    """Delete the files of *artifact*; return ``(files, bytes)`` removed."""
+    removed = freed = 0
+    for path in artifact.paths:
+        try:
+            size = os.stat(path).st_size
+            os.unlink(path)
+        except OSError:
+            continue
+        removed += 1
+        freed += size
+    return removed, freed
+
+
+def sweep(now: float | None = None) -> dict:
+    """Evict least recently used artifacts if usage is above the high watermark; return the sweep's stats."""
+    now = time.time() if now is None else now
+    budget = Config.DISK_GC_BUDGET_BYTES
+    files = candidate_files(Config.STATIC_DIR, Config.PROJECTS_DIR)
+    artifacts = scan_artifacts(files, render_cache.last_used())
+    usage = sum(a.size for a in artifacts)
+    stats = {"usage_bytes": usage, "budget_bytes": budget, "artifacts": len(artifacts), "evicted_files": 0,
+             "evicted_bytes": 0, "skipped_in_flight": 0, "skipped_recent": 0}
+
+    if usage > budget * Config.DISK_GC_HIGH_WATERMARK:
+        target = budget * Config.DISK_GC_LOW_WATERMARK
+        in_flight = {artifact_key(path) for path in render_jobs.in_flight_files()}
+        for artifact in sorted(artifacts, key=lambda a: a.used):
+            if usage <= target:
+                break
+            if artifact.key in in_flight:
+                stats["skipped_in_flight"] += 1
+                continue
+            if now - artifact.mtime < Config.DISK_GC_MIN_AGE_S:
+                stats["skipped_recent"] += 1
+                continue
+            removed, freed = _evict(artifact)
+            usage -= freed
+            stats["evicted_files"] += removed
+            stats["evicted_bytes"] += freed
+        if usage > target:
+            logger.warning("Disk GC could not get under %d bytes: %d in use (%d kept in flight, %d too recent)",
+                           target, usage, stats["skipped_in_flight"], stats["skipped_recent"])
+        else:
+            logger.info("Disk GC evicted %d files (%d bytes); %d bytes in use",
+                        stats["evicted_files"], stats["evicted_bytes"], usage)
+    stats["usage_bytes"] = usage
+    return stats
+
+
+def _record(stats: dict, seconds: float) -> None:
+    DISK_GC_USAGE.set(stats["usage_bytes"])
+    DISK_GC_BUDGET.set(stats["budget_bytes"])
+    DISK_GC_SWEEP_SECONDS.observe(seconds)
+    DISK_GC_SWEEPS.labels(result="evicted" if stats["evicted_files"] else "idle").inc()
+    DISK_GC_EVICTED_FILES.inc(stats["evicted_files"])
+    DISK_GC_EVICTED_BYTES.inc(stats["evicted_bytes"])
+    DISK_GC_SKIPPED.labels(reason="in_flight").inc(stats["skipped_in_flight"])
+    DISK_GC_SKIPPED.labels(reason="recent").inc(stats["skipped_recent"])
+
+
+@contextmanager
+def _exclusive():
+    """Yield True if this process holds the sweep lock of the static folder, False if another does."""
+    digest = hashlib.sha256(str(Path(Config.STATIC_DIR).resolve()).encode()).hexdigest()[:16]
+    with open(os.path.join(tempfile.gettempdir(), f"yantra4d-disk-gc-{digest}.lock"), "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class DiskGarbageCollector:
+    """Background thread running :func:`sweep` every ``DISK_GC_INTERVAL_S`` seconds."""
+
+    def __init__(self):
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.last: dict | None = None
+
+    def start(self) -> None:
+        """Start the sweeping thread (once per process); a budget of 0 disables it."""
+        if Config.DISK_GC_BUDGET_BYTES <= 0:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="disk-gc", daemon=True)
+                self._thread.start()
+
+    def run_once(self) -> dict | None:
+        """Sweep now; return the stats, or None if another worker is sweeping or the sweep failed."""
+        started = time.perf_counter()
+        try:
+            with _exclusive() as acquired:
+                if not acquired:
+                    return None
+                stats = sweep()
+        except Exception:
+            logger.exception("Disk GC sweep failed")
+            DISK_GC_SWEEPS.labels(result="error").inc()
+            return None
+        _record(stats, time.perf_counter() - started)
+        self.last = stats
+        return stats
+
+    def _run(self):
+        while True:
+            time.sleep(Config.DISK_GC_INTERVAL_S)
+            if Config.DISK_GC_BUDGET_BYTES > 0:
+                self.run_once()
+
+
+disk_gc = DiskGarbageCollector()
@@ -0,0 +1,225 @@
+"""
+Mesh Cleanup
+Removes the redundancy engines leave in rendered meshes before they are
+packaged and cached:
+
+- vertices within ``RENDER_CLEANUP_TOLERANCE`` of each other are welded;
+- zero-area and duplicate faces are removed, with the vertices left unused;
+- with ``RENDER_CLEANUP_MERGE_COPLANAR``, vertices that can be removed
+  without changing the surface (inside a flat region, or in the middle of a
+  straight crease) are collapsed onto a neighbour, so flat regions are
+  covered by fewer triangles.
+
+Every step works on whole numpy arrays. The cleaned mesh is written back in
+place, so the part's URL and cache entry don't change.
+"""
+import logging
+import os
+
+import numpy as np
+import trimesh
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Output formats that are cleaned
+CLEANUP_FORMATS = {"stl"}
+
+# Faces whose normals differ by less than this are treated as coplanar
+COPLANAR_ANGLE_DEG = 0.05
+# Vertex collapses are applied in rounds of non-interfering vertices
+MERGE_PASSES = 64
+
+
+def _unique_rows(rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(first, inverse)``: the first index of each distinct row, and each row's group."""
+    order = np.lexsort(rows.T[::-1])
+    ordered = rows[order]
+    distinct = np.ones(len(rows), dtype=bool)
+    distinct[1:] = np.any(ordered[1:] != ordered[:-1], axis=1)
+    inverse = np.empty(len(rows), dtype=np.int64)
+    inverse[order] = np.cumsum(distinct) - 1
+    return order[distinct], inverse
+
+
+def weld_vertices(vertices: np.ndarray, faces: np.ndarray, tolerance: float) -> tuple[np.ndarray, np.ndarray]:
+    """Merge vertices that round to the same point on a *tolerance* grid."""
+    if len(vertices) == 0:
+        return vertices, faces
+    grid = np.round(vertices / tolerance).astype(np.int64)
+    first, inverse = _unique_rows(grid)
+    return vertices[first], inverse[faces]
+
+
+def remove_degenerate_faces(vertices: np.ndarray, faces: np.ndarray, tolerance: float) -> np.ndarray:
+    """Drop faces with a repeated vertex or an area below ``tolerance²``."""
+    distinct = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])
+    corners = vertices[faces]
+    doubled_area = np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1)
+    return faces[distinct & (doubled_area > 2 * tolerance ** 2)]
+
+
+def remove_duplicate_faces(faces: np.ndarray) -> np.ndarray:
+    """Drop faces over the same three vertices as an earlier face (in either winding)."""
+    if len(faces) == 0:
+        return faces
+    first, _ = _unique_rows(np.sort(faces, axis=1))
+    return faces[np.sort(first)]
+
+
+def remove_unreferenced_vertices(vertices: np.ndarray, faces: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Drop vertices no face uses and renumber the faces."""
+    used, inverse = np.unique(faces, return_inverse=True)
+    return vertices[used], inverse.reshape(faces.shape)
+
+
+def _group_offsets(counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """For groups of *counts* items, return each item's group and its index within the group."""
+    group = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    return group, np.arange(len(group)) - starts[group]
+
+
+def merge_coplanar(vertices: np.ndarray, faces: np.ndarray, tolerance: float,
+                   angle_deg: float = COPLANAR_ANGLE_DEG, passes: int = MERGE_PASSES) -> np.ndarray:
+    """Collapse vertices whose removal keeps every remaining face in its plane; return the faces.
+
+    A vertex *v* inside a closed manifold fan is collapsed onto a neighbour
+    *u* when *v* and *u* share exactly the two neighbours across their edge
+    (so no non-manifold edge appears) and each face around *v* keeps its
+    normal within *angle_deg* once *v* is replaced by *u*. Each pass
+    collapses a set of vertices at least three edges apart, which cannot
+    interfere with each other.
+    """
+    cos_tol = np.cos(np.radians(angle_deg))
+    rng = np.random.default_rng(0)
+    n = len(vertices)
+    for _ in range(passes):
+        if len(faces) == 0:
+            break
+        corners = vertices[faces]
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-30)[:, None]
+
+        # Undirected edges with their face counts, and adjacency grouped by vertex
+        half = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+        keys, edge_faces = np.unique(half.min(axis=1) * n + half.max(axis=1), return_counts=True)
+        e_lo, e_hi = keys // n, keys % n
+        src, dst = np.concatenate([e_lo, e_hi]), np.concatenate([e_hi, e_lo])
+        order = np.argsort(src, kind="stable")
+        src, dst = src[order], dst[order]
+        degree = np.bincount(src, minlength=n)
+        adjacency_start = np.cumsum(degree) - degree
+
+        # Corners grouped by vertex: the faces around each vertex
+        corner_order = np.argsort(faces.ravel(), kind="stable")
+        incident = np.bincount(faces.ravel(), minlength=n)
+        incident_start = np.cumsum(incident) - incident
+
+        # Only the centre of a closed manifold fan can be removed
+        removable = (degree == incident) & (incident >= 3)
+        removable[e_lo[edge_faces != 2]] = False
+        removable[e_hi[edge_faces != 2]] = False
+        pick = removable[src]
+        pv, pu = src[pick], dst[pick]
+        if len(pv) == 0:
+            break
+
+        # Link condition: v and u have exactly two common neighbours
+        pair, k = _group_offsets(degree[pv])
+        w = dst[adjacency_start[pv][pair] + k]
+        wu = np.minimum(w, pu[pair]) * n + np.maximum(w, pu[pair])
+        found = keys[np.minimum(np.searchsorted(keys, wu), len(keys) - 1)] == wu
+        link_ok = np.bincount(pair, weights=found, minlength=len(pv)) == 2
+
+        # Every face around v not containing u keeps its plane and orientation
+        pair, k = _group_offsets(incident[pv])
+        corner = corner_order[incident_start[pv][pair] + k]
+        face, position = corner // 3, corner % 3
+        moved = faces[face].copy()
+        target = pu[pair]
+        removed = (moved == target[:, None]).any(axis=1)
+        moved[np.arange(len(moved)), position] = target
+        c = vertices[moved]
+        new_normals = np.cross(c[:, 1] - c[:, 0], c[:, 2] - c[:, 0])
+        length = np.linalg.norm(new_normals, axis=1)
+        ok = removed | ((length > 2 * tolerance ** 2)
+                        & (np.einsum("ij,ij->i", new_normals, normals[face]) >= cos_tol * length))
+        planar_ok = np.bincount(pair, weights=~ok, minlength=len(pv)) == 0
+
+        valid = link_ok & planar_ok
+        chosen, first = np.unique(pv[valid], return_index=True)
+        if len(chosen) == 0:
+            break
+        targets = np.full(n, -1, dtype=np.int64)
+        targets[chosen] = pu[valid][first]
+
+        # Keep the chosen vertices that outrank every other within two edges
+        priority = np.full(n, -1.0)
+        priority[chosen] = rng.random(len(chosen))
+        best = priority.copy()
+        np.maximum.at(best, src, priority[dst])
+        keep = (targets >= 0) & (best == priority)
+        keep[src[(targets[src] >= 0) & (best[dst] != priority[src])]] = False
+        if not keep.any():
+            break
+        targets[~keep] = -1
+
+        mapped = np.where(targets[faces] >= 0, targets[faces], faces)
+        faces = mapped[(mapped[:, 0] != mapped[:, 1]) & (mapped[:, 1] != mapped[:, 2]) & (mapped[:, 0] != mapped[:, 2])]
+    return faces
+
+
+def clean_mesh(mesh: trimesh.Trimesh, tolerance: float | None = None,
+               coplanar: bool | None = None) -> trimesh.Trimesh:
+    """Return *mesh* welded, without degenerate/duplicate faces and (optionally) coplanar-merged."""
+    tolerance = Config.RENDER_CLEANUP_TOLERANCE if tolerance is None else tolerance
+    coplanar = Config.RENDER_CLEANUP_MERGE_COPLANAR if coplanar is None else coplanar
+    vertices = np.asarray(mesh.vertices, dtype=np.float64)
+    faces = np.asarray(mesh.faces, dtype=np.int64)
+    vertices, faces = weld_vertices(vertices, faces, tolerance)
+    faces = remove_duplicate_faces(remove_degenerate_faces(vertices, faces, tolerance))
+    if coplanar:
+        faces = merge_coplanar(vertices, faces, tolerance)
+    vertices, faces = remove_unreferenced_vertices(vertices, faces)
+    return trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+
+
+def cleanup_mesh(mesh: trimesh.Trimesh) -> tuple[trimesh.Trimesh, dict] | None:
+    """Return the cleaned *mesh* and ``{faces_before, faces_after}``, or None if no faces would be left."""
+    if len(mesh.faces) == 0:
+        return None
+    cleaned = clean_mesh(mesh)
+    stats = {"faces_before": len(mesh.faces), "faces_after": len(cleaned.faces)}
+    if stats["faces_after"] == 0:
+        return None
+    return cleaned, stats
+
+
+def cleanup_file(path: str) -> dict | None:
+    """Clean the mesh at *path* in place; return ``{faces_before, faces_after}``.
+
+    Returns None when cleanup is disabled, the format isn't supported or the
+    mesh can't be read (logged); the file is then left as it was.
+    """
+    ext = os.path.splitext(path)[1].lstrip(".").lower()
+    if not Config.RENDER_CLEANUP_ENABLED or ext not in CLEANUP_FORMATS:
+        return None
+    try:
+        # Opened here: given a missing path, trimesh parses the string as file content
+        with open(path, "rb") as f:
+            mesh = trimesh.load(f, file_type=ext, force="mesh", process=False)
+        result = cleanup_mesh(mesh)
+        if result is None:
+            return None
+        cleaned, stats = result
+        # STL stores every face's corners, so only removed faces change it
+        if stats["faces_after"] != stats["faces_before"]:
+            tmp = f"{path}.tmp"
+            cleaned.export(tmp, file_type=ext)
+            os.replace(tmp, path)
+        return stats
+    except (OSError, ValueError, IndexError) as e:
+        logger.warning("Mesh cleanup failed for %s: %s", path, e)
+        return None
@@ -0,0 +1,147 @@
+"""
+Mesh Levels of Detail
+Writes decimated copies of a rendered mesh next to it so viewers can paint a
+coarse version while the full mesh downloads.
+
+Each level keeps a fraction of the faces (``RENDER_LOD_LEVELS``, e.g. 5% and
+25%) and is written as ``<name>.lod<percent>.stl``. Decimation is
+quadric, through ``fast_simplification`` (the backend trimesh uses), which
+requirements.txt installs. The grid clustering below is only a fallback
+for environments without it, such as a platform it has no wheel for or a
+checkout run without the requirements: vertices are clustered on a grid
+sized for the target face count, which needs nothing beyond numpy but
+keeps less of the shape. ``HAS_QUADRIC`` tells which one is in use.
+"""
+import importlib.util
+import logging
+import os
+from contextlib import suppress
+from pathlib import Path
+
+import numpy as np
+import trimesh
+
+from config import Config
+
+# trimesh's quadric decimation imports fast_simplification on use
+HAS_QUADRIC = importlib.util.find_spec("fast_simplification") is not None
+
+logger = logging.getLogger(__name__)
+
+# Output formats LODs are produced for
+LOD_FORMATS = {"stl"}
+
+# Grid refinements tried by the clustering fallback to approach the target
+CLUSTER_PASSES = 3
+
+
+def lod_levels() -> list[float]:
+    """Return the configured face ratios, smallest first, ignoring invalid values."""
+    levels = set()
+    for raw in Config.RENDER_LOD_LEVELS.split(","):
+        try:
+            ratio = float(raw)
+        except ValueError:
+            continue
+        if 0 < ratio < 1:
+            levels.add(ratio)
+    return sorted(levels)
+
+
+def lod_path(path: str, ratio: float) -> str:
+    """Return the file name of *path*'s level of detail keeping *ratio* of its faces."""
+    base, ext = os.path.splitext(path)
+    return f"{base}.lod{round(ratio * 100):g}{ext}"
+
+
+def remove_lods(path: str) -> None:
+    """Delete the LOD files of *path* (their mesh is about to be replaced)."""
+    p = Path(path)
+    for old in p.parent.glob(f"{p.stem}.lod*{p.suffix}"):
+        with suppress(OSError):
+            old.unlink()
+
+
+def cluster_vertices(mesh: trimesh.Trimesh, target_faces: int) -> trimesh.Trimesh:
+    """Decimate *mesh* to roughly *target_faces* by merging the vertices in each grid cell."""
+    # A surface of area A tessellated at edge length h has about 2A/h² faces
+    cell = float(np.sqrt(2 * mesh.area / max(target_faces, 1)))
+    result = mesh
+    for _ in range(CLUSTER_PASSES):
+        if cell <= 0:
+            break
+        grid = np.floor((mesh.vertices - mesh.bounds[0]) / cell).astype(np.int64)
+        dims = grid.max(axis=0) + 1
+        # One integer per cell: 1-D unique is much faster than row-wise
+        keys = (grid[:, 0] * dims[1] + grid[:, 1]) * dims[2] + grid[:, 2]
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        vertices = np.column_stack([np.bincount(inverse, weights=mesh.vertices[:, axis]) for axis in range(3)])
+        vertices /= counts[:, None]
+        faces = inverse[mesh.faces]
+        # Drop faces collapsed to an edge or point, and duplicates
+        faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])]
+        ordered = np.sort(faces, axis=1)
+        order = np.lexsort(ordered.T[::-1])
+        ordered = ordered[order]
+        distinct = np.ones(len(order), dtype=bool)
+        distinct[1:] = np.any(ordered[1:] != ordered[:-1], axis=1)
+        faces = faces[np.sort(order[distinct])]
+        result = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+        # Refine the cell once more if the estimate was far off
+        ratio = len(result.faces) / target_faces
+        if 0.8 <= ratio <= 1.25:
+            break
+        cell *= float(np.sqrt(ratio))
+    return result
+
+
+def decimate(mesh: trimesh.Trimesh, target_faces: int) -> trimesh.Trimesh:
+    """Return *mesh* reduced to about *target_faces* faces."""
+    if HAS_QUADRIC:
+        return mesh.simplify_quadric_decimation(face_count=target_faces)
+    return cluster_vertices(mesh, target_faces)
+
+
+def generate_lods(path: str, url_prefix: str = "/static/", mesh: trimesh.Trimesh | None = None) -> list[dict]:
+    """Write the LOD files of the mesh at *path*; return ``[{ratio, url, faces, size_bytes}]``.
+
+    *mesh* is the mesh of *path* when the caller already has it loaded.
+    Returns an empty list when LODs are disabled, the format isn't supported
+    or the mesh is already small (fewer than ``RENDER_LOD_MIN_FACES`` faces).
+    Failures are logged and yield no LODs; the full mesh is always usable.
+    """
+    remove_lods(path)
+    ext = os.path.splitext(path)[1].lstrip(".").lower()
+    if not Config.RENDER_LOD_ENABLED or ext not in LOD_FORMATS:
+        return []
+    try:
+        if mesh is None:
+            # Opened here: given a missing path, trimesh parses the string as file content
+            with open(path, "rb") as f:
+                mesh = trimesh.load(f, file_type=ext, force="mesh", process=False)
+        total = len(mesh.faces)
+        if total < Config.RENDER_LOD_MIN_FACES:
+            return []
+        lods = []
+        for ratio in lod_levels():
+            reduced = decimate(mesh, max(4, int(total * ratio)))
+            out = lod_path(path, ratio)
+            tmp = f"{out}.tmp"
+            reduced.export(tmp, file_type=ext)
+            os.replace(tmp, out)
+            lods.append({
+                "ratio": ratio,
+                "url": f"{url_prefix}{os.path.basename(out)}",
+                "faces": len(reduced.faces),
+                "size_bytes": os.path.getsize(out),
+            })
+        return lods
+    except (OSError, ValueError, IndexError, ImportError) as e:
+        logger.warning("LOD generation failed for %s: %s", path, e)
+        return []
+
+
+def existing_lods(lods: list[dict] | None, static_folder: str) -> list[dict]:
+    """Return the entries of *lods* whose files are still present in *static_folder*."""
+    return [lod for lod in lods or []
+            if os.path.isfile(os.path.join(static_folder, os.path.basename(lod["url"])))]
@@ -0,0 +1,346 @@
+"""
+Mesh Packaging
+Post-render stage that prepares a rendered mesh for transport.
+
+- ASCII STL (what OpenSCAD writes) is rewritten as binary STL in place,
+  which is about 5x smaller and much faster to parse.
+- The mesh is cleaned up (see :mod:`mesh_cleanup`).
+- Decimated levels of detail are written (see :mod:`mesh_lod`).
+- A compact GLB is written next to STL outputs (``<name>.q.glb``): indexed
+  vertices, 16-bit positions and 8-bit normals under ``KHR_mesh_quantization``,
+  with the dequantization in the node transform.
+- Every artifact gets precompressed siblings (``.gz``, plus ``.br`` when the
+  optional ``brotli`` package is installed) that static routes serve with
+  the matching ``Content-Encoding`` (see ``utils.route_helpers.send_precompressed``).
+
+The STL is parsed once: cleanup, LODs and the GLB work on that mesh in
+memory, and the STL is rewritten at most once (binary, cleaned).
+
+Draco/meshopt need native encoders this service doesn't ship; quantization
+plus gzip gets most of their size win on CAD meshes without them.
+"""
+import gzip
+import json
+import logging
+import os
+import struct
+from contextlib import suppress
+from pathlib import Path
+
+import numpy as np
+import trimesh
+
+from config import Config
+from services.engine.mesh_cleanup import cleanup_mesh
+from services.engine.mesh_lod import generate_lods, remove_lods
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+logger = logging.getLogger(__name__)
+
+# Precompressed sibling suffixes, keyed by Content-Encoding
+COMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9
+# A variant is only kept if it saves at least this fraction of the bytes
+MIN_SAVING = 0.1
+
+GLB_SUFFIX = ".q.glb"
+
+# glTF constants
+_BYTE, _SHORT, _UNSIGNED_SHORT, _UNSIGNED_INT = 5120, 5122, 5123, 5125
+_ARRAY_BUFFER, _ELEMENT_ARRAY_BUFFER = 34962, 34963
+_QUANT_MAX = 32767
+
+
+def is_ascii_stl(path: str) -> bool:
+    """Return True if the file at *path* is an ASCII STL (not one whose header says "solid")."""
+    with open(path, "rb") as f:
+        header = f.read(84)
+    if not header.lstrip().startswith(b"solid"):
+        return False
+    # Binary STLs may start with "solid" too; their size gives them away
+    if len(header) == 84:
+        (count,) = struct.unpack_from("<I", header, 80)
+        if os.path.getsize(path) == 84 + 50 * count:
+            return False
+    return True
+
+
+def load_stl(path: str) -> trimesh.Trimesh | None:
+    """Return the mesh of the STL at *path* as stored (no vertex merging), or None if it has no faces."""
+    # Opened here: given a missing path, trimesh parses the string as file content
+    with open(path, "rb") as f:
+        mesh = trimesh.load(f, file_type="stl", force="mesh", process=False)
+    return mesh if len(mesh.faces) else None
+
+
+def _write_stl(mesh: trimesh.Trimesh, path: str) -> None:
+    """Replace the file at *path* with *mesh* as binary STL."""
+    tmp = f"{path}.tmp"
+    mesh.export(tmp, file_type="stl")
+    os.replace(tmp, path)
+
+
+def normalize_stl(path: str) -> bool:
+    """Rewrite an ASCII STL at *path* as binary STL; return True if it was rewritten."""
+    if not is_ascii_stl(path):
+        return False
+    mesh = load_stl(path)
+    if mesh is None:
+        return False
+    _write_stl(mesh, path)
+    return True
+
+
+def compressed_path(path: str, encoding: str) -> str:
+    """Return the precompressed sibling of *path* for *encoding* ("gzip" or "br")."""
+    return f"{path}{COMPRESSED_SUFFIXES[encoding]}"
+
+
+def glb_path(path: str) -> str:
+    """Return the file name of the quantized GLB written for the mesh at *path*."""
+    return f"{os.path.splitext(path)[0]}{GLB_SUFFIX}"
+
+
+def remove_packaged(path: str) -> None:
+    """Delete everything packaging wrote for *path* (its mesh is about to be replaced)."""
+    remove_lods(path)
+    p = Path(path)
+    stale = [Path(glb_path(path))]
+    stale += [p.with_name(p.name + suffix) for suffix in COMPRESSED_SUFFIXES.values()]
+    stale += list(p.parent.glob(f"{p.stem}.lod*{p.suffix}.*"))
+    stale += [Path(glb_path(path) + suffix) for suffix in COMPRESSED_SUFFIXES.values()]
+    for old in stale:
+        with suppress(OSError):
+            old.unlink()
+
+
+def precompress(path: str) -> list[str]:
+    """Write the compressed siblings of *path*; return the encodings written."""
+    data = Path(path).read_bytes()
+    encoders = {"gzip": lambda raw: gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)}
+    if HAS_BROTLI:
+        encoders["br"] = lambda raw: brotli.compress(raw, quality=BROTLI_QUALITY)
+    written = []
+    for encoding, encode in encoders.items():
+        out = compressed_path(path, encoding)
+        packed = encode(data)
+        if len(packed) > len(data) * (1 - MIN_SAVING):
+            continue
+        tmp = f"{out}.tmp"
+        Path(tmp).write_bytes(packed)
+        os.replace(tmp, out)
+        written.append(encoding)
+    return written
+
+
+def _pad(data: bytes, fill: bytes = b"\0") -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+def _quantize(mesh: trimesh.Trimesh) -> tuple[np.ndarray, np.ndarray, np.ndarray, float, np.ndarray]:
+    """Return ``(positions, normals, faces, scale, center)`` of *mesh* quantized for glTF.
+
+    Faces share a vertex only where their (8-bit) normals agree, so they keep
+    the flat shading of the STL. Positions are quantized over a cube around
+    the mesh; *scale* and *center* map them back.
+    """
+    face_normals = np.round(np.clip(mesh.face_normals, -1, 1) * 127).astype(np.int64) + 128
+    corner_normals = np.repeat(face_normals, 3, axis=0)
+    # One integer per (vertex, normal) corner: vertex index above 24 bits of normal
+    keys = (np.asarray(mesh.faces, dtype=np.int64).ravel() << 24) | (corner_normals[:, 0] << 16) \
+        | (corner_normals[:, 1] << 8) | corner_normals[:, 2]
+    keys, inverse = np.unique(keys, return_inverse=True)
+    vertices = np.asarray(mesh.vertices, dtype=np.float64)[keys >> 24]
+    faces = inverse.reshape(-1, 3)
+    lo, hi = vertices.min(axis=0), vertices.max(axis=0)
+    center = (lo + hi) / 2
+    scale = float((hi - lo).max() / 2 / _QUANT_MAX) or 1.0
+
+    # Attributes are padded to 4-byte strides, as glTF requires
+    positions = np.zeros((len(vertices), 4), dtype="<i2")
+    positions[:, :3] = np.round((vertices - center) / scale)
+    normals = np.zeros((len(vertices), 4), dtype="i1")
+    normals[:, :3] = np.column_stack([(keys >> shift) & 0xFF for shift in (16, 8, 0)]) - 128
+    return positions, normals, faces, scale, center
+
+
+def encode_glb_scene(parts: list[dict], root: dict | None = None) -> bytes:
+    """Return a GLB with one quantized mesh node per entry of *parts*.
+
+    Each part is ``{name, mesh}`` with optional ``color`` (linear RGBA base
+    color) and ``matrix`` (4x4 placement). A part with a matrix becomes a
+    node carrying it, with the mesh node as its child. With *root* (node
+    properties such as ``name`` or ``rotation``), the part nodes are its
+    children.
+    """
+    nodes, meshes, materials, accessors, views = [], [], [], [], []
+    blob = b""
+
+    def add_view(data: bytes, stride: int | None, target: int) -> int:
+        nonlocal blob
+        view = {"buffer": 0, "byteOffset": len(blob), "byteLength": len(data), "target": target}
+        if stride:
+            view["byteStride"] = stride
+        views.append(view)
+        blob += _pad(data)
+        return len(views) - 1
+
+    top = []
+    for part in parts:
+        positions, normals, faces, scale, center = _quantize(part["mesh"])
+        count = len(positions)
+        index_type = _UNSIGNED_SHORT if count < 65535 else _UNSIGNED_INT
+        indices = faces.astype("<u2" if index_type == _UNSIGNED_SHORT else "<u4").tobytes()
+        first = len(accessors)
+        accessors += [
+            {"bufferView": add_view(positions.tobytes(), 8, _ARRAY_BUFFER), "componentType": _SHORT,
+             "count": count, "type": "VEC3",
+             "min": positions[:, :3].min(axis=0).tolist(), "max": positions[:, :3].max(axis=0).tolist()},
+            {"bufferView": add_view(normals.tobytes(), 4, _ARRAY_BUFFER), "componentType": _BYTE,
+             "normalized": True, "count": count, "type": "VEC3"},
+            {"bufferView": add_view(indices, None, _ELEMENT_ARRAY_BUFFER), "componentType": index_type,
+             "count": int(faces.size), "type": "SCALAR"},
+        ]
+        materials.append({"name": part["name"], "pbrMetallicRoughness": {
+            "baseColorFactor": list(part.get("color") or [0.8, 0.8, 0.8, 1.0]),
+            "metallicFactor": 0.0, "roughnessFactor": 0.6}})
+        meshes.append({"name": part["name"], "primitives": [{
+            "attributes": {"POSITION": first, "NORMAL": first + 1}, "indices": first + 2,
+            "material": len(materials) - 1,
+        }]})
+        nodes.append({"mesh": len(meshes) - 1, "name": part["name"], "scale": [scale] * 3,
+                      "translation": center.tolist()})
+        if part.get("matrix") is not None:
+            # glTF matrices are column-major
+            matrix = np.asarray(part["matrix"], dtype=np.float64).T.ravel().tolist()
+            nodes.append({"name": part["name"], "matrix": matrix, "children": [len(nodes) - 1]})
+        top.append(len(nodes) - 1)
+    if root is not None:
+        nodes.append({**root, "children": top})
+        top = [len(nodes) - 1]
+
+    gltf = {
+        "asset": {"version": "2.0", "generator": "yantra4d"},
+        "extensionsUsed": ["KHR_mesh_quantization"],
+        "extensionsRequired": ["KHR_mesh_quantization"],
+        "scene": 0,
+        "scenes": [{"nodes": top}],
+        "nodes": nodes,
+        "meshes": meshes,
+        "materials": materials,
+        "accessors": accessors,
+        "bufferViews": views,
+        "buffers": [{"byteLength": len(blob)}],
+    }
+    json_chunk = _pad(json.dumps(gltf, separators=(",", ":")).encode(), b" ")
+    length = 12 + 8 + len(json_chunk) + 8 + len(blob)
+    return b"".join([
+        struct.pack("<4sII", b"glTF", 2, length),
+        struct.pack("<I4s", len(json_chunk), b"JSON"), json_chunk,
+        struct.pack("<I4s", len(blob), b"BIN\0"), blob,
+    ])
+
+
+def encode_quantized_glb(mesh: trimesh.Trimesh, name: str = "mesh") -> bytes:
+    """Return *mesh* as a GLB with int16 positions and int8 normals (``KHR_mesh_quantization``).
+
+    The node's uniform scale and translation map the quantized positions back.
+    """
+    return encode_glb_scene([{"name": name, "mesh": mesh}])
+
+
+def write_quantized_glb(path: str, url_prefix: str = "/static/",
+                        mesh: trimesh.Trimesh | None = None) -> dict | None:
+    """Write the quantized GLB of the STL at *path*; return ``{url, size_bytes}``.
+
+    *mesh* is the mesh of *path*, with its vertices welded, when the caller has it loaded.
+    """
+    if mesh is None:
+        mesh = trimesh.load(path, file_type="stl", force="mesh")
+    if len(mesh.faces) == 0:
+        return None
+    out = glb_path(path)
+    tmp = f"{out}.tmp"
+    Path(tmp).write_bytes(encode_quantized_glb(mesh, name=Path(path).stem))
+    os.replace(tmp, out)
+    return {"url": f"{url_prefix}{os.path.basename(out)}", "size_bytes": os.path.getsize(out)}
+
+
+def package_mesh(path: str, url_prefix: str = "/static/", glb: bool = True) -> dict:
+    """Package the freshly rendered mesh at *path*; return ``{size_bytes, lods, glb, cleanup}``.
+
+    ``size_bytes`` is the size after normalization and cleanup, ``cleanup``
+    the face counts before and after cleanup (or None). The GLB is only
+    written with *glb* (it is a premium export format). Each step fails on its
+    own (logged) without affecting the others; the rendered file is always
+    served as is.
+    """
+    remove_packaged(path)
+    is_stl = os.path.splitext(path)[1].lower() == ".stl"
+    mesh = None
+    if is_stl:
+        try:
+            mesh = load_stl(path)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read rendered mesh %s: %s", path, e)
+
+    cleanup = welded = None
+    if mesh is not None:
+        # Normalization: ASCII is rewritten as binary
+        rewrite = Config.RENDER_PACKAGE_ENABLED and is_ascii_stl(path)
+        if Config.RENDER_CLEANUP_ENABLED:
+            try:
+                cleaned = cleanup_mesh(mesh)
+            except (ValueError, IndexError) as e:
+                logger.warning("Mesh cleanup failed for %s: %s", path, e)
+                cleaned = None
+            if cleaned is not None:
+                welded, cleanup = cleaned
+                # STL stores every face's corners, so only removed faces change it
+                rewrite = rewrite or cleanup["faces_after"] != cleanup["faces_before"]
+                mesh = welded
+        if rewrite:
+            try:
+                _write_stl(mesh, path)
+            except (OSError, ValueError) as e:
+                logger.warning("Rewriting %s failed: %s", path, e)
+
+    lods = generate_lods(path, url_prefix, mesh) if mesh is not None or not is_stl else []
+    packaged_glb = None
+    if mesh is not None and glb and Config.RENDER_PACKAGE_ENABLED and Config.RENDER_PACKAGE_GLB:
+        try:
+            # The GLB shares vertices between faces: weld them if cleanup didn't
+            if welded is None:
+                welded = trimesh.Trimesh(vertices=mesh.vertices, faces=mesh.faces)
+            packaged_glb = write_quantized_glb(path, url_prefix, welded)
+        except (OSError, ValueError) as e:
+            logger.warning("GLB packaging failed for %s: %s", path, e)
+
+    if Config.RENDER_PACKAGE_ENABLED:
+        artifacts = [path] + [os.path.join(os.path.dirname(path), os.path.basename(lod["url"])) for lod in lods]
+        if packaged_glb:
+            artifacts.append(glb_path(path))
+        for artifact in artifacts:
+            try:
+                precompress(artifact)
+            except OSError as e:
+                logger.warning("Precompression failed for %s: %s", artifact, e)
+
+    try:
+        size_bytes = os.path.getsize(path)
+    except OSError:
+        size_bytes = None
+    return {"size_bytes": size_bytes, "lods": lods, "glb": packaged_glb, "cleanup": cleanup}
+
+
+def existing_glb(glb: dict | None, static_folder: str) -> dict | None:
+    """Return *glb* if its file is still present in *static_folder*."""
+    if glb and os.path.isfile(os.path.join(static_folder, os.path.basename(glb["url"]))):
+        return glb
+    return None
@@ -5,15 +5,22 @@ Handles all OpenSCAD subprocess interactions.
 import logging
 import os
 import re
-import subprocess
-import json
 import tempfile
-import threading
+import time
 from pathlib import Path
 
 from config import Config
 from manifest import get_manifest
-from services.engine.render_engine import RENDER_TIMEOUT_S, ProcessManager
+from services.core.metrics import RENDER_SUBPROCESSES
+from services.core.tracing import propagation_env, start_span
+from services.engine.render_engine import (
+    ProcessManager,
+    RenderLimits,
+    RenderResult,
+    exhaustion_message,
+    run_limited,
+)
+from services.engine.stream_engine import StreamedProcess, iterate
 
 logger = logging.getLogger(__name__)
 
@@ -108,7 +115,7 @@ def validate_params(params: dict, project_slug: str | None = None) -> dict:
     """
     manifest = get_manifest(project_slug)
     param_defs = {p["id"]: p for p in manifest.parameters}
-    pass_through_keys = {"mode", "scad_file", "parameters"}
+    pass_through_keys = {"mode", "scad_file", "parameters", "inline_meshes"}
     cleaned = {}
 
     for key, value in params.items():
@@ -223,120 +230,137 @@ def _sanitize_cmd_for_log(cmd: list) -> str:
     return " ".join(sanitized)
 
 
-def run_render(cmd: list, scad_path: str | None = None) -> tuple[bool, str]:
-    """Execute OpenSCAD render synchronously. Returns (success, stderr)."""
+def run_render(cmd: list, scad_path: str | None = None, limits: RenderLimits | None = None) -> tuple[bool, str]:
+    """Execute OpenSCAD render synchronously. Returns (success, stderr).
+
+    The returned :class:`RenderResult` also carries the subprocess' resource
+    ``usage`` and, when the render was killed by one of *limits*, ``exhausted``.
+    """
+    limits = limits or RenderLimits()
     logger.info(f"Running OpenSCAD: {_sanitize_cmd_for_log(cmd)}")
-    try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=RENDER_TIMEOUT_S, env=_openscad_env(scad_path))
-        return True, result.stderr
-    except subprocess.TimeoutExpired:
-        logger.error("OpenSCAD render timed out after %ds", RENDER_TIMEOUT_S)
-        return False, f"Render timed out after {RENDER_TIMEOUT_S} seconds"
-    except subprocess.CalledProcessError as e:
-        logger.error(f"OpenSCAD failed: {e.stderr}")
-        return False, e.stderr
+    outcome = run_limited(cmd, env=_openscad_env(scad_path), limits=limits)
+    output = outcome.stderr
 
+    if outcome.exhausted:
+        logger.error("OpenSCAD render exhausted %s limit (code %s)", outcome.exhausted, outcome.returncode)
+        return RenderResult(False, exhaustion_message(outcome.exhausted, limits), outcome.exhausted, outcome.usage)
+    if outcome.returncode != 0:
+        logger.error(f"OpenSCAD failed: {output}")
+        return RenderResult(False, output, usage=outcome.usage)
+    return RenderResult(True, output, usage=outcome.usage)
 
-def stream_render(cmd: list, part: str, part_base: float, part_weight: float, index: int, total: int, scad_path: str | None = None):
+
+async def astream_render(cmd: list, part: str, part_base: float, part_weight: float, index: int, total: int,
+                         scad_path: str | None = None, limits: RenderLimits | None = None):
     """
-    Generator that streams OpenSCAD progress as SSE events.
-    Yields JSON-formatted SSE data strings.
+    Async generator that streams OpenSCAD progress as event dicts.
+    Runs on the shared stream loop (see services.engine.stream_engine).
     """
+    limits = limits or RenderLimits()
     current_phase_progress = PHASE_WEIGHTS['start']
 
     # Send part start event
     initial_progress = part_base + (PHASE_WEIGHTS['start'] / 100) * part_weight
-    yield json.dumps({
+    yield {
         'event': 'part_start',
         'part': part,
         'progress': round(initial_progress),
         'index': index,
         'total': total
-    })
+    }
 
+    proc_span = start_span("subprocess.stream", part=part, executable=os.path.basename(str(cmd[0])))
     try:
-        # Run with Popen to stream stderr
         logger.info(f"Streaming OpenSCAD (CWD: {os.getcwd()}): {_sanitize_cmd_for_log(cmd)}")
-        process = _process_manager.start(
-            subprocess.Popen(cmd, stderr=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=_openscad_env(scad_path))
-        )
-
-        kill_timer = threading.Timer(RENDER_TIMEOUT_S, lambda: process.kill())
-        kill_timer.start()
+        stream = await StreamedProcess.spawn(cmd, env=propagation_env(_openscad_env(scad_path), proc_span),
+                                             limits=limits)
     except Exception as e:
         logger.exception("Failed to start OpenSCAD process")
-        yield json.dumps({
+        proc_span.record_error(e)
+        proc_span.end()
+        yield {
             'event': 'error',
             'part': part,
             'message': f'Internal Process Error: {str(e)}'
-        })
+        }
         return
 
+    _process_manager.start(stream.process)
+    lines = stream.lines()
+    RENDER_SUBPROCESSES.inc()
+    proc_span.set_attribute("pid", stream.pid)
     try:
-        import queue
-        q = queue.Queue()
-        
-        def reader(stream):
-            for line_val in iter(stream.readline, ''):
-                q.put(line_val)
-            q.put(None)
-            
-        t = threading.Thread(target=reader, args=(process.stderr,))
-        t.daemon = True
-        t.start()
-
-        while True:
-            try:
-                line = q.get(timeout=10.0)
-                if line is None:
-                    break
-                    
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Detect phase transitions
-                detected_phase = get_phase_from_line(line)
-                if detected_phase and detected_phase in PHASE_ORDER:
-                    phase_idx = PHASE_ORDER.index(detected_phase)
-                    current_phase_progress = sum(PHASE_WEIGHTS.get(p, 0) for p in PHASE_ORDER[:phase_idx + 1])
-
-                # Calculate overall progress
-                overall_progress = part_base + (current_phase_progress / 100) * part_weight
-
-                yield json.dumps({
-                    'event': 'output',
-                    'part': part,
-                    'line': line,
-                    'progress': round(overall_progress)
-                })
-            except queue.Empty:
-                yield json.dumps({
+        async for line in lines:
+            if line is None:
+                yield {
                     'event': 'ping',
                     'part': part,
                     'message': 'keep-alive'
-                })
+                }
+                continue
 
-        process.wait()
+            # Detect phase transitions
+            detected_phase = get_phase_from_line(line)
+            if detected_phase and detected_phase in PHASE_ORDER:
+                # Offset of each phase transition, e.g. phase.cgal_ms
+                proc_span.attributes.setdefault(
+                    f"phase.{detected_phase}_ms", round((time.monotonic() - stream.started_at) * 1000, 1))
+                phase_idx = PHASE_ORDER.index(detected_phase)
+                current_phase_progress = sum(PHASE_WEIGHTS.get(p, 0) for p in PHASE_ORDER[:phase_idx + 1])
+
+            # Calculate overall progress
+            overall_progress = part_base + (current_phase_progress / 100) * part_weight
+
+            yield {
+                'event': 'output',
+                'part': part,
+                'line': line,
+                'progress': round(overall_progress)
+            }
+
+        usage = stream.usage.as_dict() if stream.usage else None
+        proc_span.attributes.update(returncode=stream.returncode, **(usage or {}))
     finally:
-        kill_timer.cancel()
-        _process_manager.clear()
+        await lines.aclose()
+        RENDER_SUBPROCESSES.dec()
+        proc_span.end()
+        _process_manager.clear(stream.process)
 
-    if process.returncode == 0:
+    if stream.returncode == 0:
         final_progress = part_base + part_weight
-        yield json.dumps({
-            'event': 'part_done', 
-            'part': part, 
-            'progress': round(final_progress)
-        })
-        return True
+        yield {
+            'event': 'part_done',
+            'part': part,
+            'progress': round(final_progress),
+            'usage': usage
+        }
+    elif stream.exhausted:
+        logger.error("OpenSCAD render exhausted %s limit (code %s)", stream.exhausted, stream.returncode)
+        yield {
+            'event': 'error',
+            'part': part,
+            'reason': 'resource_exhausted',
+            'resource': stream.exhausted,
+            'message': exhaustion_message(stream.exhausted, limits),
+            'usage': usage
+        }
     else:
-        yield json.dumps({
+        yield {
             'event': 'error',
             'part': part,
-            'message': f'Render failed with code {process.returncode}'
-        })
-        return False
+            'message': f'Render failed with code {stream.returncode}',
+            'usage': usage
+        }
+
+
+def stream_render(cmd: list, part: str, part_base: float, part_weight: float, index: int, total: int,
+                  scad_path: str | None = None, limits: RenderLimits | None = None):
+    """
+    Generator that streams OpenSCAD progress as event dicts.
+    The render itself runs on the shared stream loop; see :func:`astream_render`.
+    """
+    yield from iterate(astream_render(cmd, part, part_base, part_weight, index, total,
+                                      scad_path=scad_path, limits=limits))
 
 
 def cancel_render():
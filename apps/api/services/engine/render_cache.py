@@ -2,17 +2,112 @@
 Render Result Cache
 In-memory LRU cache for OpenSCAD render results, keyed by parameter hash.
 Avoids redundant compilations when the same parameters are requested again.
+
+Keys also hold the source version of the project: a hash of the content of
+its project.json, ``.scad`` and ``.py`` files (see :class:`SourceVersions`).
+A ``git pull`` or deploy that changes the geometry therefore changes the
+keys, on every replica and across restarts. Files outside the project (such
+as ``libs/``) are not part of it; the TTL bounds how long a change there
+goes unnoticed.
+
+With an artifact store configured (see :mod:`artifact_store`), entries are
+also published to the shared pool, and a local miss is looked up there
+before the caller renders: a render made by any replica is a hit on all.
+Renders in the pool are restored only within the TTL of their publication.
+
+A project's entries are dropped, and its source version re-computed, as
+soon as its manifest is reloaded or invalidated (see
+:meth:`ManifestService.on_change`). Other replicas, and this one after a
+restart, see the new version in their keys, so an edit is never served
+stale from the store either.
 """
 import hashlib
 import json
+import logging
 import os
 import threading
 import time
 from collections import OrderedDict
+from contextlib import suppress
+from pathlib import Path
+
+from config import Config
+from manifest import ProjectManifest, manifest_service
+from services.engine.artifact_store import (
+    STORE_ERRORS,
+    get_artifact_store,
+    publish_render,
+    restore_render,
+)
 
 DEFAULT_TTL = int(os.getenv("RENDER_CACHE_TTL", "3600"))
 DEFAULT_MAX_ENTRIES = int(os.getenv("RENDER_CACHE_MAX_ENTRIES", "200"))
 
+logger = logging.getLogger(__name__)
+
+# Files of a project whose content its renders depend on, besides project.json
+SOURCE_SUFFIXES = (".scad", ".py")
+
+
+def source_files(project_dir: Path) -> list[Path]:
+    """Return the files of *project_dir* that make up its source version, in a stable order."""
+    files = [project_dir / "project.json"]
+    for root, dirs, names in os.walk(project_dir):
+        # Render outputs and hidden directories (.git, caches) are not sources
+        dirs[:] = sorted(d for d in dirs if d != "exports" and not d.startswith("."))
+        files += [Path(root) / name for name in sorted(names) if name.endswith(SOURCE_SUFFIXES)]
+    return files
+
+
+class SourceVersions:
+    """Content hash of each project's sources, re-validated by stat at most every ``MANIFEST_CHECK_INTERVAL_S``.
+
+    The hash covers contents and relative paths only, so every replica
+    computes the same version for the same checkout. Files are read again
+    only when their mtime or size changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # project dir -> (checked at, stat signature, version)
+        self._known: dict[str, tuple[float, list, str]] = {}
+
+    def get(self, project_dir: Path) -> str:
+        """Return the source version of *project_dir*."""
+        with self._lock:
+            known = self._known.get(str(project_dir))
+        if known is not None and time.monotonic() - known[0] < Config.MANIFEST_CHECK_INTERVAL_S:
+            return known[2]
+        signature = []
+        for path in source_files(project_dir):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            signature.append((str(path.relative_to(project_dir)), st.st_mtime_ns, st.st_size))
+        if known is not None and known[1] == signature:
+            version = known[2]
+        else:
+            version = self._hash(project_dir, signature)
+        with self._lock:
+            self._known[str(project_dir)] = (time.monotonic(), signature, version)
+        return version
+
+    def forget(self, project_dir: Path) -> None:
+        """Re-validate *project_dir* on the next lookup."""
+        with self._lock:
+            self._known.pop(str(project_dir), None)
+
+    @staticmethod
+    def _hash(project_dir: Path, signature: list) -> str:
+        digest = hashlib.sha256()
+        for relative, _, _ in signature:
+            digest.update(relative.encode() + b"\0")
+            with suppress(OSError):
+                digest.update((project_dir / relative).read_bytes())
+            digest.update(b"\0")
+        return digest.hexdigest()[:16]
+
 
 class RenderCache:
     """Thread-safe LRU cache for render output file paths."""
@@ -22,21 +117,38 @@ class RenderCache:
         self._lock = threading.Lock()
         self._ttl = ttl
         self._max_entries = max_entries
+        self._sources = SourceVersions()
+        manifest_service.on_change(self._on_manifest_change)
 
     @staticmethod
-    def _make_key(project: str, scad_file: str, params: dict, part: str, export_format: str) -> str:
+    def _make_key(project: str, scad_file: str, params: dict, part: str, export_format: str,
+                  source: str = "") -> str:
         raw = json.dumps({
             "project": project,
             "scad_file": scad_file,
             "params": params,
             "part": part,
             "format": export_format,
+            "source": source,
         }, sort_keys=True)
         return hashlib.sha256(raw.encode()).hexdigest()
 
+    def key(self, project: str, scad_file: str, params: dict, part: str, export_format: str) -> str:
+        """Return the cache key of a render (the same in every process with the same sources)."""
+        source = self._sources.get(manifest_service.resolve_project_dir(project or None))
+        return self._make_key(project, scad_file, params, part, export_format, source)
+
     def get(self, project: str, scad_file: str, params: dict, part: str, export_format: str) -> dict | None:
         """Return cached entry if valid, else None."""
-        key = self._make_key(project, scad_file, params, part, export_format)
+        key = self.key(project, scad_file, params, part, export_format)
+        entry = self._get_local(key)
+        if entry is None:
+            store = get_artifact_store()
+            if store is not None:
+                entry = self._restore(store, key, project)
+        return entry
+
+    def _get_local(self, key: str) -> dict | None:
         with self._lock:
             entry = self._cache.get(key)
             if entry is None:
@@ -44,20 +156,86 @@ class RenderCache:
             if time.time() - entry["ts"] > self._ttl:
                 self._cache.pop(key, None)
                 return None
-            if not os.path.isfile(entry["path"]):
+            try:
+                mtime_ns = os.stat(entry["path"]).st_mtime_ns
+            except OSError:
+                self._cache.pop(key, None)
+                return None
+            # Outputs are written to a fixed per-part filename, so a newer
+            # render with other parameters may have replaced this file.
+            if entry.get("mtime_ns") is not None and mtime_ns != entry["mtime_ns"]:
                 self._cache.pop(key, None)
                 return None
             # Move to end (most recently used)
             self._cache.move_to_end(key)
+            entry["used"] = time.time()
             return entry
 
-    def put(self, project: str, scad_file: str, params: dict, part: str, export_format: str, path: str, size_bytes: int | None):
-        key = self._make_key(project, scad_file, params, part, export_format)
+    def _restore(self, store, key: str, project: str) -> dict | None:
+        """Copy the render published under *key* into the static folder and cache it locally."""
+        try:
+            restored = restore_render(store, key, str(Config.STATIC_DIR), max_age=self._ttl)
+        except STORE_ERRORS as e:
+            logger.warning("Artifact store lookup failed for %s: %s", key, e)
+            return None
+        if restored is None:
+            return None
+        # It expires when the published render would have
+        return self._put_local(key, project, restored["path"], restored["size_bytes"], restored["lods"],
+                               restored["glb"], restored["cleanup"], ts=restored["published_at"])
+
+    def _put_local(self, key: str, project: str, path: str, size_bytes: int | None, lods: list[dict] | None,
+                   glb: dict | None, cleanup: dict | None, ts: float | None = None) -> dict:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        now = time.time()
+        entry = {"project": project, "path": path, "size_bytes": size_bytes, "ts": ts or now, "used": now,
+                 "mtime_ns": mtime_ns, "lods": lods or [], "glb": glb, "cleanup": cleanup}
         with self._lock:
-            self._cache[key] = {"path": path, "size_bytes": size_bytes, "ts": time.time()}
+            self._cache[key] = entry
             self._cache.move_to_end(key)
             while len(self._cache) > self._max_entries:
                 self._cache.popitem(last=False)
+        return entry
+
+    def put(self, project: str, scad_file: str, params: dict, part: str, export_format: str, path: str, size_bytes: int | None,
+            lods: list[dict] | None = None, glb: dict | None = None, cleanup: dict | None = None):
+        key = self.key(project, scad_file, params, part, export_format)
+        entry = self._put_local(key, project, path, size_bytes, lods, glb, cleanup)
+        store = get_artifact_store()
+        if store is not None:
+            # A failed upload only costs other replicas a render
+            try:
+                publish_render(store, key, entry)
+            except STORE_ERRORS as e:
+                logger.warning("Artifact store upload failed for %s: %s", path, e)
+
+    def invalidate_project(self, project: str) -> int:
+        """Drop the local entries of *project*; return the count dropped."""
+        with self._lock:
+            stale = [key for key, entry in self._cache.items() if entry["project"] == project]
+            for key in stale:
+                del self._cache[key]
+        return len(stale)
+
+    def _on_manifest_change(self, project_dir: Path, manifest: ProjectManifest | None) -> None:
+        # Renders are keyed by the requested slug: the directory name, or none for SCAD_DIR
+        projects = {project_dir.name}
+        if manifest is not None:
+            projects.add(manifest.slug)
+        if project_dir == Config.SCAD_DIR:
+            projects.add("")
+        self._sources.forget(project_dir)
+        dropped = sum(self.invalidate_project(project) for project in projects)
+        if dropped:
+            logger.info("Dropped %d cached renders of %s after a manifest change", dropped, project_dir)
+
+    def last_used(self) -> dict[str, float]:
+        """Return the time of the last hit (or put) of each cached output path."""
+        with self._lock:
+            return {entry["path"]: entry["used"] for entry in self._cache.values()}
 
 
 # Module-level singleton
@@ -1,21 +1,357 @@
 """
 Shared Render Engine Utilities
 Provides common process management for OpenSCAD and CadQuery render engines.
-Both engines share: RENDER_TIMEOUT_S, active-process tracking, and cancel logic.
+Both engines share: RENDER_TIMEOUT_S, active-process tracking, cancel logic,
+and per-tier resource limits applied to every render subprocess.
 """
 import logging
+import os
+import resource
+import selectors
+import signal
 import subprocess
+import sys
 import threading
+import time
+import uuid
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from pathlib import Path
 
-import os
+from config import Config
+from services.core.metrics import track_subprocess
+from services.core.tier_service import get_tier_limits
+from services.core.tracing import propagation_env, span
 
 logger = logging.getLogger(__name__)
 
 RENDER_TIMEOUT_S = int(os.getenv("RENDER_TIMEOUT_S", 300))
 
+# Extra seconds between the soft RLIMIT_CPU (SIGXCPU) and the hard limit (SIGKILL)
+CPU_HARD_LIMIT_GRACE_S = 5
+
+# Exhausted-resource identifiers reported to clients
+RESOURCE_MEMORY = "memory"
+RESOURCE_CPU = "cpu"
+RESOURCE_WALL_CLOCK = "wall_clock"
+
+# Output fragments emitted by OpenSCAD (C++) and CadQuery (Python) on allocation failure
+_MEMORY_ERROR_MARKERS = ("std::bad_alloc", "MemoryError", "Cannot allocate memory", "out of memory")
+
+
+@dataclass(frozen=True)
+class RenderLimits:
+    """Resource ceilings applied to a single render subprocess.
+
+    ``None`` disables the corresponding limit. ``wall_seconds`` is enforced by
+    the parent (timeout / kill timer); everything else is applied to the child
+    by the parent right after spawning it (see :meth:`apply`).
+    """
+
+    memory_mb: int | None = None
+    cpu_seconds: int | None = None
+    wall_seconds: int = RENDER_TIMEOUT_S
+    nice: int = 0
+    cpu_affinity: tuple[int, ...] | None = None
+
+    def apply(self, pid: int, cgroup: "RenderCgroup | None" = None) -> None:
+        """Apply these limits to the freshly spawned process *pid*, from the parent.
+
+        Nothing runs in the forked child: a ``preexec_fn`` can deadlock after
+        fork in a threaded server. The child runs unrestricted only for the
+        moment between spawn and this call, while it loads its executable.
+        """
+        # Join the cgroup first so everything below is already accounted there
+        if cgroup is not None:
+            try:
+                with open(cgroup.procs_path, "w") as f:
+                    f.write(str(pid))
+            except OSError as e:
+                logger.warning("Could not move render %s into cgroup %s: %s", pid, cgroup.path, e)
+        try:
+            if self.memory_mb:
+                memory_bytes = self.memory_mb * 1024 * 1024
+                resource.prlimit(pid, resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+            if self.cpu_seconds:
+                resource.prlimit(pid, resource.RLIMIT_CPU,
+                                 (self.cpu_seconds, self.cpu_seconds + CPU_HARD_LIMIT_GRACE_S))
+            if self.nice:
+                os.setpriority(os.PRIO_PROCESS, pid, os.getpriority(os.PRIO_PROCESS, 0) + self.nice)
+            if self.cpu_affinity and hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(pid, set(self.cpu_affinity))
+        except ProcessLookupError:
+            # Already exited (and not reaped yet): there is nothing left to limit
+            pass
+        except OSError as e:
+            logger.warning("Could not apply render limits to %s: %s", pid, e)
+
+
+def _parse_cpu_list(spec: str) -> tuple[int, ...] | None:
+    """Parse a Linux-style CPU list (``"0-3,6"``) into a tuple of CPU ids."""
+    cpus: set[int] = set()
+    for chunk in spec.split(","):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        try:
+            if "-" in chunk:
+                lo, hi = chunk.split("-", 1)
+                cpus.update(range(int(lo), int(hi) + 1))
+            else:
+                cpus.add(int(chunk))
+        except ValueError:
+            logger.warning("Ignoring invalid RENDER_CPU_AFFINITY entry: %r", chunk)
+    return tuple(sorted(cpus)) or None
+
+
+def get_render_limits(tier: str | None = None) -> RenderLimits:
+    """Resolve the render resource limits for *tier* from tiers.json.
+
+    Deployment-wide settings (CPU affinity) come from Config, and
+    ``RENDER_TIMEOUT_S`` is the wall-clock limit of tiers without
+    ``wall_seconds``. When ``RENDER_LIMITS_ENABLED`` is false only the
+    ``RENDER_TIMEOUT_S`` wall-clock timeout applies.
+    """
+    affinity = _parse_cpu_list(Config.RENDER_CPU_AFFINITY) if Config.RENDER_CPU_AFFINITY else None
+    if not Config.RENDER_LIMITS_ENABLED:
+        return RenderLimits(cpu_affinity=affinity)
+
+    cfg = get_tier_limits(tier or "guest").get("render_limits", {})
+    return RenderLimits(
+        memory_mb=cfg.get("memory_mb"),
+        cpu_seconds=cfg.get("cpu_seconds"),
+        wall_seconds=int(cfg.get("wall_seconds", RENDER_TIMEOUT_S)),
+        nice=int(cfg.get("nice", 0)),
+        cpu_affinity=affinity,
+    )
+
+
+class RenderCgroup:
+    """A transient cgroup v2 sub-group holding one render subprocess.
+
+    Created under ``Config.RENDER_CGROUP_ROOT`` (a delegated, writable cgroup
+    with the ``memory``/``cpu`` controllers enabled). Unlike RLIMIT_AS, the
+    cgroup ``memory.max`` bounds resident memory, and ``memory.events`` tells
+    us whether the kernel OOM-killed the render.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    @property
+    def procs_path(self) -> str:
+        return str(self.path / "cgroup.procs")
+
+    @classmethod
+    def create(cls, limits: RenderLimits) -> "RenderCgroup | None":
+        """Create a sub-group for one render, or return None if cgroups are unavailable."""
+        root = Config.RENDER_CGROUP_ROOT
+        if not root:
+            return None
+        root_path = Path(root)
+        if not (root_path / "cgroup.controllers").is_file() or not os.access(root_path, os.W_OK):
+            logger.debug("cgroup v2 root %s not available; skipping render cgroup", root)
+            return None
+
+        path = root_path / f"render-{uuid.uuid4().hex[:12]}"
+        try:
+            path.mkdir()
+            if limits.memory_mb:
+                (path / "memory.max").write_text(str(limits.memory_mb * 1024 * 1024))
+                (path / "memory.swap.max").write_text("0")
+        except OSError as e:
+            logger.warning("Failed to set up render cgroup %s: %s", path, e)
+            cls(path).remove()
+            return None
+        return cls(path)
+
+    def oom_killed(self) -> bool:
+        """Return True if the kernel OOM killer fired inside this cgroup."""
+        try:
+            for line in (self.path / "memory.events").read_text().splitlines():
+                key, _, value = line.partition(" ")
+                if key == "oom_kill" and int(value) > 0:
+                    return True
+        except (OSError, ValueError):
+            pass
+        return False
+
+    def remove(self) -> None:
+        with suppress(OSError):
+            self.path.rmdir()
+
+
+def classify_exhaustion(returncode: int | None, output: str, limits: RenderLimits,
+                        cgroup: RenderCgroup | None = None, usage: "RenderUsage | None" = None) -> str | None:
+    """Return the exhausted resource for a failed render, or None for ordinary render errors.
+
+    SIGKILL counts as the CPU limit only when *usage* shows the CPU time
+    reached the hard ``RLIMIT_CPU``: cancels and timeouts kill with it too.
+    """
+    if cgroup is not None and cgroup.oom_killed():
+        return RESOURCE_MEMORY
+    if limits.cpu_seconds and returncode == -signal.SIGXCPU:
+        return RESOURCE_CPU
+    if limits.cpu_seconds and returncode == -signal.SIGKILL and usage is not None \
+            and usage.user_cpu_s + usage.sys_cpu_s >= limits.cpu_seconds + CPU_HARD_LIMIT_GRACE_S:
+        return RESOURCE_CPU
+    if limits.memory_mb and output and any(m in output for m in _MEMORY_ERROR_MARKERS):
+        return RESOURCE_MEMORY
+    return None
+
+
+def exhaustion_message(resource_name: str, limits: RenderLimits) -> str:
+    """Human-readable message for a render killed by a resource limit."""
+    if resource_name == RESOURCE_MEMORY:
+        return f"Render exceeded the memory limit ({limits.memory_mb} MB)"
+    if resource_name == RESOURCE_CPU:
+        return f"Render exceeded the CPU time limit ({limits.cpu_seconds} s)"
+    return f"Render timed out after {limits.wall_seconds} seconds"
+
+
+@dataclass(frozen=True)
+class RenderUsage:
+    """Resources consumed by one render subprocess (from ``os.wait4``)."""
+
+    user_cpu_s: float
+    sys_cpu_s: float
+    max_rss_kb: int
+    wall_s: float
+
+    @classmethod
+    def from_rusage(cls, ru, wall_s: float) -> "RenderUsage":
+        # ru_maxrss is KiB on Linux but bytes on macOS
+        max_rss_kb = ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+        return cls(
+            user_cpu_s=round(ru.ru_utime, 3),
+            sys_cpu_s=round(ru.ru_stime, 3),
+            max_rss_kb=int(max_rss_kb),
+            wall_s=round(wall_s, 3),
+        )
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class RenderResult(tuple):
+    """``(success, log)`` pair returned by the engines' ``run_render``.
+
+    Unpacks like a plain 2-tuple; ``exhausted`` names the resource limit that
+    killed the render (``None`` for success or an ordinary render error) and
+    ``usage`` holds the subprocess' :class:`RenderUsage` when it ran.
+    """
+
+    def __new__(cls, success: bool, log: str, exhausted: str | None = None, usage: RenderUsage | None = None):
+        obj = super().__new__(cls, (success, log))
+        obj.exhausted = exhausted
+        obj.usage = usage
+        return obj
+
+
+@dataclass
+class ProcessOutcome:
+    """Exit status, captured output and accounting for a finished subprocess."""
+
+    returncode: int
+    stdout: str
+    stderr: str
+    usage: RenderUsage | None
+    exhausted: str | None = None
+
+
+def reap_process(process: subprocess.Popen, started_at: float) -> RenderUsage:
+    """Wait for *process* with ``os.wait4`` and return its resource usage.
+
+    Sets ``process.returncode`` so Popen never tries to reap the pid again.
+    *started_at* is the ``time.monotonic()`` value taken before spawning.
+    When someone else reaped the pid first (e.g. ``ProcessManager.cancel``
+    polling it), falls back to Popen's ``returncode`` with zero CPU and RSS.
+    """
+    try:
+        _, status, ru = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        process.wait()
+        return RenderUsage(0.0, 0.0, 0, round(time.monotonic() - started_at, 3))
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return RenderUsage.from_rusage(ru, time.monotonic() - started_at)
+
+
+def _drain_pipes(process: subprocess.Popen) -> tuple[bytes, bytes]:
+    """Read stdout and stderr of *process* to EOF without deadlocking on either."""
+    buffers = {process.stdout: [], process.stderr: []}
+    with selectors.DefaultSelector() as sel:
+        for stream in buffers:
+            if stream is not None:
+                sel.register(stream, selectors.EVENT_READ)
+        while sel.get_map():
+            for key, _ in sel.select():
+                chunk = os.read(key.fd, 65536)
+                if chunk:
+                    buffers[key.fileobj].append(chunk)
+                else:
+                    sel.unregister(key.fileobj)
+                    key.fileobj.close()
+    return b"".join(buffers[process.stdout]), b"".join(buffers[process.stderr])
+
+
+def run_limited(cmd: list, env: dict, limits: RenderLimits, merge_stderr: bool = False) -> ProcessOutcome:
+    """Run *cmd* to completion under *limits*, capturing output and rusage.
+
+    The wall-clock limit is enforced by a kill timer; CPU/memory limits are
+    applied to the child right after it is spawned. ``exhausted`` is set on the outcome when a limit
+    killed the process.
+    """
+    cgroup = RenderCgroup.create(limits)
+    started_at = time.monotonic()
+    try:
+        with span("subprocess.spawn", executable=os.path.basename(str(cmd[0]))) as spawn_span:
+            process = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT if merge_stderr else subprocess.PIPE,
+                env=propagation_env(env),
+            )
+            limits.apply(process.pid, cgroup)
+            if spawn_span:
+                spawn_span.set_attribute("pid", process.pid)
+        timed_out = threading.Event()
+
+        def _on_timeout():
+            timed_out.set()
+            process.kill()
+
+        kill_timer = threading.Timer(limits.wall_seconds, _on_timeout)
+        kill_timer.start()
+        try:
+            with track_subprocess(), span("subprocess.wait", pid=process.pid) as wait_span:
+                stdout, stderr = _drain_pipes(process)
+                usage = reap_process(process, started_at)
+                if wait_span:
+                    wait_span.attributes.update(returncode=process.returncode, **usage.as_dict())
+        finally:
+            kill_timer.cancel()
+
+        outcome = ProcessOutcome(
+            returncode=process.returncode,
+            stdout=stdout.decode(errors="replace"),
+            stderr=stderr.decode(errors="replace"),
+            usage=usage,
+        )
+        if timed_out.is_set():
+            outcome.exhausted = RESOURCE_WALL_CLOCK
+        elif outcome.returncode != 0:
+            outcome.exhausted = classify_exhaustion(
+                outcome.returncode, outcome.stdout + outcome.stderr, limits, cgroup, usage)
+        return outcome
+    finally:
+        if cgroup:
+            cgroup.remove()
+
 
 class ProcessManager:
-    """Thread-safe tracker for a single active render subprocess.
+    """Thread-safe tracker for the active render subprocesses.
+
+    A streamed render may run several parts at once, so every started
+    process is tracked until it is cleared.
 
     Usage:
         pm = ProcessManager()
@@ -25,36 +361,40 @@ class ProcessManager:
     """
 
     def __init__(self):
-        self._active_process: subprocess.Popen | None = None
+        self._active: set[subprocess.Popen] = set()
         self._lock = threading.Lock()
 
     def start(self, process: subprocess.Popen) -> subprocess.Popen:
-        """Register *process* as the current active render and return it."""
+        """Register *process* as an active render and return it."""
         with self._lock:
-            self._active_process = process
+            self._active.add(process)
         return process
 
-    def clear(self) -> None:
-        """Deregister the active process (call after it finishes)."""
+    def clear(self, process: subprocess.Popen | None = None) -> None:
+        """Deregister *process* (call after it finishes), or every process when None."""
         with self._lock:
-            self._active_process = None
+            if process is None:
+                self._active.clear()
+            else:
+                self._active.discard(process)
 
     def cancel(self) -> bool:
-        """Terminate the active process if one is running.
+        """Terminate the active processes that are still running.
 
         Returns True if a process was cancelled, False if none was active.
         """
         with self._lock:
-            proc = self._active_process
-            if proc is None or proc.poll() is not None:
-                return False
-            logger.info("Cancelling active render process (pid=%s)", proc.pid)
-            proc.terminate()
-
-        try:
-            proc.wait(timeout=3)
-        except subprocess.TimeoutExpired:
-            proc.kill()
+            running = [proc for proc in self._active if proc.poll() is None]
+            for proc in running:
+                logger.info("Cancelling active render process (pid=%s)", proc.pid)
+                proc.terminate()
+        if not running:
+            return False
 
-        self.clear()
+        for proc in running:
+            try:
+                proc.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            self.clear(proc)
         return True
@@ -0,0 +1,255 @@
+"""
+Render Jobs
+Keeps streamed renders running independently of the connection that
+started them, so a client that drops can re-attach and replay what it missed.
+
+A job wraps the async generator of a render stream. It starts on the
+event loop of its first subscriber (the stream loop under WSGI, the
+server's loop under ASGI) and runs as its own task from then on: a
+subscriber going away detaches without cancelling it. Every event gets a
+sequence number and is kept, so a subscriber can resume after any sequence
+number it has seen. Only ``LOSSY_EVENTS`` (output lines, telemetry) share a
+bounded buffer; a burst of them never evicts the events that carry results
+(``part_done``, ``mesh``, ``complete``...), of which a render has a few per part.
+
+A job is bound to the client that started it (its ``owner``). Its first
+event, ``job``, carries a random ``resume_token``: presenting it proves the
+client started the job, even from another IP address.
+
+Jobs live in the memory of one worker process; re-attaching needs the
+request to reach the same worker (sticky sessions, or a single worker).
+
+The registry also knows which output files are in use: those of unfinished
+jobs, and those pinned by renders that run inside their request. The disk
+GC (:mod:`disk_gc`) leaves them alone.
+"""
+import asyncio
+import bisect
+import itertools
+import logging
+import secrets
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Iterable
+from contextlib import aclosing, contextmanager
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Events a subscriber may miss if it falls behind; the others are all kept
+LOSSY_EVENTS = frozenset({'output', 'telemetry_update'})
+
+
+class RenderJob:
+    """One render stream, buffered and shared by any number of subscribers."""
+
+    def __init__(self, events, buffer_size: int, files: Iterable[str] = (), owner: str | None = None):
+        self.id = uuid.uuid4().hex
+        # Output paths the render writes or serves
+        self.files = frozenset(files)
+        # Who started the job (e.g. ``user:<sub>``); only they may re-attach or cancel
+        self.owner = owner
+        self.resume_token = secrets.token_urlsafe(16)
+        self.created_at = time.monotonic()
+        self.finished_at: float | None = None
+        self.detached_at: float | None = self.created_at
+        self.subscribers = 0
+        self._events = events
+        # (seq, event) of the last buffer_size lossy events, and of every other event
+        self._lossy: deque = deque(maxlen=buffer_size)
+        self._kept: list = []
+        self._kept_seqs: list[int] = []
+        self._evicted = 0
+        self._last_seq = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._changed: asyncio.Event | None = None
+        self._append({'event': 'job', 'job_id': self.id, 'resume_token': self.resume_token})
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def check_token(self, token: str | None) -> bool:
+        """Return True if *token* is this job's resume token."""
+        return bool(token) and secrets.compare_digest(token.encode(), self.resume_token.encode())
+
+    def _start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._changed = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        try:
+            async with aclosing(self._events) as events:
+                async for event in events:
+                    self._append(event)
+        except asyncio.CancelledError:
+            self._append({'event': 'error', 'message': 'Render job cancelled'})
+        except Exception as e:
+            logger.exception("Render job %s failed", self.id)
+            self._append({'event': 'error', 'message': str(e)})
+        finally:
+            self.finished_at = time.monotonic()
+            self._notify()
+
+    def _append(self, event: dict):
+        self._last_seq += 1
+        if event.get('event') in LOSSY_EVENTS:
+            if len(self._lossy) == self._lossy.maxlen:
+                self._evicted += 1
+            self._lossy.append((self._last_seq, event))
+        else:
+            self._kept.append((self._last_seq, event))
+            self._kept_seqs.append(self._last_seq)
+        self._notify()
+
+    def _notify(self):
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    def events_after(self, seq: int) -> tuple[int, list]:
+        """Return ``(missed, [(seq, event), ...])`` for the buffered events after *seq*.
+
+        ``missed`` counts lossy events after *seq* that already fell out of the buffer.
+        """
+        kept_through = bisect.bisect_right(self._kept_seqs, seq)
+        items = self._kept[kept_through:] + [item for item in self._lossy if item[0] > seq]
+        items.sort(key=lambda item: item[0])
+        # Sequence numbers are dense: those up to seq not kept are lossy
+        lossy_through = min(seq, self._last_seq) - kept_through
+        return max(0, self._evicted - lossy_through), items
+
+    async def subscribe(self, after: int = 0):
+        """Yield ``(seq, event)`` for every event after sequence number *after*, live.
+
+        Ends when the job has finished and everything has been sent. Closing
+        the subscription detaches it; the job keeps running.
+        """
+        self._start()
+        self.subscribers += 1
+        self.detached_at = None
+        seq = after
+        try:
+            while True:
+                changed = self._changed
+                missed, items = self.events_after(seq)
+                if missed:
+                    # Resuming after the gap skips the lost events, not the kept ones among them
+                    seq = items[0][0] - 1 if items else self._last_seq
+                    yield seq, {'event': 'replay_gap', 'missed': missed}
+                for seq, event in items:
+                    yield seq, event
+                if self.done and seq >= self._last_seq:
+                    return
+                if not items and not missed:
+                    await changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0:
+                self.detached_at = time.monotonic()
+
+    def cancel(self) -> bool:
+        """Cancel the job from any thread; its render processes are killed as the task unwinds.
+
+        Returns True if the job was running.
+        """
+        if self._task is not None and not self._task.done():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+            return True
+        return False
+
+
+class RenderJobRegistry:
+    """Process-wide table of render jobs, pruned ``RENDER_JOB_TTL_S`` after they finish or are abandoned."""
+
+    def __init__(self):
+        self._jobs: dict[str, RenderJob] = {}
+        self._pins: dict[int, frozenset[str]] = {}
+        self._pin_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(self, events, files: Iterable[str] = (), owner: str | None = None) -> RenderJob:
+        """Register a job for the async generator *events* (started by its first subscriber).
+
+        *files* are the output paths the job uses; they count as in use until it finishes.
+        *owner* identifies the client that started it.
+        """
+        job = RenderJob(events, Config.RENDER_JOB_BUFFER, files, owner)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> RenderJob | None:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        now = time.monotonic()
+        ttl = Config.RENDER_JOB_TTL_S
+        for job_id, job in list(self._jobs.items()):
+            if job.done and now - job.finished_at > ttl:
+                del self._jobs[job_id]
+            elif not job.done and job.subscribers == 0 and job.detached_at and now - job.detached_at > ttl:
+                # Nobody came back for it: stop rendering (or drop a job that never started)
+                logger.info("Abandoning render job %s", job_id)
+                job.cancel()
+                del self._jobs[job_id]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def pin(self, files: Iterable[str]) -> int:
+        """Mark *files* as in use by a render outside a job; returns the id for :meth:`unpin`."""
+        with self._lock:
+            pin_id = next(self._pin_ids)
+            self._pins[pin_id] = frozenset(files)
+        return pin_id
+
+    def unpin(self, pin_id: int) -> None:
+        with self._lock:
+            self._pins.pop(pin_id, None)
+
+    @contextmanager
+    def pinned(self, files: Iterable[str]):
+        """Keep *files* marked as in use for the duration of the block."""
+        pin_id = self.pin(files)
+        try:
+            yield
+        finally:
+            self.unpin(pin_id)
+
+    def in_flight_files(self) -> set[str]:
+        """Return the output paths of unfinished jobs and pinned renders."""
+        with self._lock:
+            files = set().union(*self._pins.values())
+            for job in self._jobs.values():
+                if not job.done:
+                    files |= job.files
+        return files
+
+
+render_jobs = RenderJobRegistry()
+
+
+def parse_event_id(event_id: str | None) -> tuple[str | None, int]:
+    """Split an SSE event id ``<job_id>:<seq>`` into ``(job_id, seq)``; ``(None, 0)`` if malformed."""
+    if not event_id or ":" not in event_id:
+        return None, 0
+    job_id, _, seq = event_id.strip().rpartition(":")
+    try:
+        return job_id or None, max(0, int(seq))
+    except ValueError:
+        return None, 0
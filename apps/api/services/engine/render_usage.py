@@ -0,0 +1,158 @@
+"""
+Render Usage Accounting
+Persists per-render resource usage (CPU time, peak RSS, wall time) in the
+analytics SQLite DB and aggregates it per project and mode for node sizing.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from config import Config
+from services.core.metrics import time_analytics_write
+from services.engine.render_engine import RenderUsage
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+USAGE_METRICS = ("wall_s", "user_cpu_s", "sys_cpu_s", "cpu_s", "max_rss_kb")
+
+# Most recent renders per part used to predict its cost
+PREDICTION_SAMPLES = 20
+# Predicted wall time (s) of a part when nothing about the mode has been recorded
+DEFAULT_PART_COST_S = 1.0
+
+_initialized_paths: set[str] = set()
+_init_lock = threading.Lock()
+
+
+@contextmanager
+def _get_db():
+    db_path = str(Config.ANALYTICS_DB_PATH)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        if db_path not in _initialized_paths:
+            with _init_lock:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS render_usage (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        project TEXT NOT NULL,
+                        mode TEXT,
+                        part TEXT,
+                        engine TEXT,
+                        user_cpu_s REAL,
+                        sys_cpu_s REAL,
+                        max_rss_kb INTEGER,
+                        wall_s REAL,
+                        created_at REAL NOT NULL
+                    )
+                """)
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_render_usage_project ON render_usage(project, mode)"
+                )
+                _initialized_paths.add(db_path)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def record_usage(project: str, mode: str | None, part: str, engine: str, usage: RenderUsage) -> None:
+    """Log and persist the resource usage of one rendered part.
+
+    Accounting must never fail a render, so storage errors are only logged.
+    """
+    logger.info(
+        "Render usage %s/%s/%s (%s): user=%.3fs sys=%.3fs max_rss=%dKiB wall=%.3fs",
+        project, mode, part, engine, usage.user_cpu_s, usage.sys_cpu_s, usage.max_rss_kb, usage.wall_s,
+    )
+    try:
+        with time_analytics_write("render_usage"), _get_db() as conn:
+            conn.execute(
+                "INSERT INTO render_usage (project, mode, part, engine, user_cpu_s, sys_cpu_s, max_rss_kb, wall_s, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (project, mode, part, engine, usage.user_cpu_s, usage.sys_cpu_s, usage.max_rss_kb, usage.wall_s, time.time()),
+            )
+    except sqlite3.Error as e:
+        logger.warning("Failed to record render usage: %s", e)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # ceil without float drift
+    return sorted_values[int(rank) - 1]
+
+
+def _summarize(values: list[float]) -> dict:
+    values = sorted(values)
+    summary = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+    summary["max"] = values[-1] if values else None
+    summary["mean"] = round(sum(values) / len(values), 3) if values else None
+    return summary
+
+
+def summarize_usage(days: int = 30, project: str | None = None) -> list[dict]:
+    """Aggregate recorded usage per (project, mode) with percentiles.
+
+    Each group reports ``count`` and a ``{p50, p95, p99, max, mean}`` summary
+    for every metric in USAGE_METRICS (``cpu_s`` is user + sys).
+    """
+    since = time.time() - days * 86400
+    query = ("SELECT project, mode, user_cpu_s, sys_cpu_s, max_rss_kb, wall_s "
+             "FROM render_usage WHERE created_at > ?")
+    args: list = [since]
+    if project:
+        query += " AND project = ?"
+        args.append(project)
+
+    groups: dict[tuple, dict[str, list]] = {}
+    with _get_db() as conn:
+        for row in conn.execute(query, args):
+            series = groups.setdefault((row["project"], row["mode"]), {m: [] for m in USAGE_METRICS})
+            series["wall_s"].append(row["wall_s"])
+            series["user_cpu_s"].append(row["user_cpu_s"])
+            series["sys_cpu_s"].append(row["sys_cpu_s"])
+            series["cpu_s"].append(round(row["user_cpu_s"] + row["sys_cpu_s"], 3))
+            series["max_rss_kb"].append(row["max_rss_kb"])
+
+    result = []
+    for (proj, mode), series in sorted(groups.items(), key=lambda kv: (kv[0][0], kv[0][1] or "")):
+        entry = {"project": proj, "mode": mode, "count": len(series["wall_s"])}
+        for metric in USAGE_METRICS:
+            entry[metric] = _summarize(series[metric])
+        result.append(entry)
+    return result
+
+
+def predict_part_costs(project: str, mode: str | None, parts: list[str]) -> dict[str, float]:
+    """Predict the wall time of rendering each of *parts* from recorded usage.
+
+    A part's cost is the median wall time of its last PREDICTION_SAMPLES
+    renders in this project and mode. Parts without history get the mean of
+    the known parts, or DEFAULT_PART_COST_S when none are known. Storage
+    errors fall back to the defaults, since predictions only weight progress.
+    """
+    if not parts:
+        return {}
+    samples: dict[str, list[float]] = {}
+    try:
+        with _get_db() as conn:
+            rows = conn.execute(
+                f"SELECT part, wall_s FROM render_usage WHERE project = ? AND mode IS ? "
+                f"AND part IN ({','.join('?' * len(parts))}) ORDER BY created_at DESC",
+                [project, mode, *parts],
+            )
+            for row in rows:
+                part_samples = samples.setdefault(row["part"], [])
+                if len(part_samples) < PREDICTION_SAMPLES and row["wall_s"] is not None:
+                    part_samples.append(row["wall_s"])
+    except sqlite3.Error as e:
+        logger.warning("Failed to read render usage: %s", e)
+
+    known = {part: percentile(sorted(values), 50) for part, values in samples.items() if values}
+    fallback = sum(known.values()) / len(known) if known else DEFAULT_PART_COST_S
+    return {part: max(known.get(part, fallback), 0.001) for part in parts}
@@ -0,0 +1,183 @@
+"""
+Assembled Scene Export
+Composes the rendered parts of a mode into one file: a multi-node GLB or a
+multi-object 3MF, with each part's name, color (``default_color``) and
+placement (the optional part ``transform`` in the manifest).
+
+Parts render in place in the model's Z-up millimetre coordinates, so the
+placement is usually the identity. 3MF shares those coordinates. The GLB
+nests the parts under an ``assembly`` node that rotates them into glTF's
+Y-up frame.
+
+Scenes are cached on disk under a key derived from the parts' render cache
+keys (see :func:`scene_key`), so an unchanged assembly is composed once.
+"""
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+import trimesh
+
+from services.engine.mesh_packaging import (
+    encode_glb_scene,
+    precompress,
+    remove_packaged,
+)
+
+SCENE_FORMATS = {"glb", "3mf"}
+DEFAULT_COLOR = "#cccccc"
+
+# Rotation of -90° about X: Z-up model coordinates to glTF's Y-up
+_Z_UP_TO_Y_UP = [-0.7071067811865476, 0.0, 0.0, 0.7071067811865476]
+
+_3MF_CORE = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
+_3MF_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '</Types>'
+)
+_3MF_RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    '</Relationships>'
+)
+
+
+def parse_color(value: str | None) -> tuple[int, int, int]:
+    """Return the 8-bit RGB of a ``#rgb`` or ``#rrggbb`` color (``DEFAULT_COLOR`` if invalid)."""
+    digits = (value or "").lstrip("#")
+    if len(digits) == 3:
+        digits = "".join(c * 2 for c in digits)
+    try:
+        if len(digits) != 6:
+            raise ValueError(value)
+        return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+    except ValueError:
+        return parse_color(DEFAULT_COLOR)
+
+
+def part_matrix(transform: dict | None) -> np.ndarray:
+    """Return the 4x4 placement of a part ``transform`` (``{translate, rotate}``).
+
+    ``rotate`` is in degrees about X, then Y, then Z, as OpenSCAD's
+    ``rotate([x, y, z])``; ``translate`` is applied after it.
+    """
+    transform = transform or {}
+    ax, ay, az = np.radians(transform.get("rotate") or [0, 0, 0])
+    matrix = (trimesh.transformations.rotation_matrix(az, [0, 0, 1])
+              @ trimesh.transformations.rotation_matrix(ay, [0, 1, 0])
+              @ trimesh.transformations.rotation_matrix(ax, [1, 0, 0]))
+    matrix[:3, 3] = transform.get("translate") or [0, 0, 0]
+    return matrix
+
+
+def scene_key(fmt: str, parts: list[dict]) -> str:
+    """Return the cache key of a scene of *parts* (``{name, key, color, transform}``) in *fmt*.
+
+    ``key`` identifies the part's mesh: its render cache key (or static file
+    path) together with the file's mtime.
+    """
+    raw = json.dumps({
+        "format": fmt,
+        "parts": [[p["name"], p["key"], p.get("color"), p.get("transform")] for p in parts],
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _srgb_to_linear(rgb: tuple[int, int, int]) -> list[float]:
+    c = np.asarray(rgb, dtype=np.float64) / 255
+    return np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4).tolist()
+
+
+def _load(path: str) -> trimesh.Trimesh:
+    ext = os.path.splitext(path)[1].lstrip(".").lower()
+    return trimesh.load(path, file_type=ext, force="mesh")
+
+
+def encode_3mf(parts: list[dict], out) -> None:
+    """Write a 3MF package of *parts* (``{name, mesh, color?, transform?}``) to *out* (path or file)."""
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<model unit="millimeter" xml:lang="en-US" xmlns="{_3MF_CORE}">',
+        '<resources>',
+        '<basematerials id="1">',
+    ]
+    for part in parts:
+        r, g, b = parse_color(part.get("color"))
+        color = f"#{r:02X}{g:02X}{b:02X}FF"
+        lines.append(f'<base name={quoteattr(part["name"])} displaycolor="{color}"/>')
+    lines.append('</basematerials>')
+    for index, part in enumerate(parts):
+        mesh = part["mesh"]
+        lines.append(f'<object id="{index + 2}" type="model" name={quoteattr(part["name"])} pid="1" pindex="{index}">')
+        lines.append('<mesh><vertices>')
+        lines.extend(f'<vertex x="{x:.6g}" y="{y:.6g}" z="{z:.6g}"/>' for x, y, z in mesh.vertices.tolist())
+        lines.append('</vertices><triangles>')
+        lines.extend(f'<triangle v1="{a}" v2="{b}" v3="{c}"/>' for a, b, c in mesh.faces.tolist())
+        lines.append('</triangles></mesh></object>')
+    lines.append('</resources><build>')
+    for index, part in enumerate(parts):
+        # 3MF transforms are the first three columns of the 4x4, row by row
+        matrix = part_matrix(part.get("transform"))[:3, :].T
+        values = " ".join(f"{v:.9g}" for v in matrix.ravel())
+        lines.append(f'<item objectid="{index + 2}" transform="{values}"/>')
+    lines.append('</build></model>')
+
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", _3MF_CONTENT_TYPES)
+        package.writestr("_rels/.rels", _3MF_RELS)
+        package.writestr("3D/3dmodel.model", "\n".join(lines))
+
+
+def encode_scene_glb(parts: list[dict]) -> bytes:
+    """Return a GLB of *parts* (``{name, mesh, color?, transform?}``) under a Y-up ``assembly`` node."""
+    nodes = [{
+        "name": part["name"],
+        "mesh": part["mesh"],
+        "color": _srgb_to_linear(parse_color(part.get("color"))) + [1.0],
+        "matrix": part_matrix(part["transform"]) if part.get("transform") else None,
+    } for part in parts]
+    return encode_glb_scene(nodes, root={"name": "assembly", "rotation": _Z_UP_TO_Y_UP})
+
+
+def remove_scenes(folder: str, prefix: str, fmt: str) -> None:
+    """Delete the *fmt* scenes in *folder* whose names start with *prefix*, with their siblings."""
+    for old in Path(folder).glob(f"{glob.escape(prefix)}*.{fmt}"):
+        remove_packaged(str(old))
+        old.unlink(missing_ok=True)
+
+
+def write_scene(parts: list[dict], fmt: str, out: str) -> int:
+    """Compose the meshes at the ``path`` of each of *parts* into *out*; return its size in bytes.
+
+    Each part is ``{name, path, color?, transform?}``. The file is written
+    atomically; a GLB also gets its precompressed siblings.
+    """
+    loaded = [{**part, "mesh": _load(part["path"])} for part in parts]
+    remove_packaged(out)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(out), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if fmt == "glb":
+                f.write(encode_scene_glb(loaded))
+            else:
+                encode_3mf(loaded, f)
+        # mkstemp creates owner-only files; static files are read by the front server too
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, out)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    if fmt == "glb":
+        precompress(out)
+    return os.path.getsize(out)
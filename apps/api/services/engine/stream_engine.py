@@ -0,0 +1,302 @@
+"""
+Streaming Render Engine
+Runs the output pipes, kill timers and exits of streaming renders on one
+asyncio event loop per worker process.
+
+A streaming render used to cost a reader thread, a queue and a kill timer
+thread. Here every render is a coroutine on the shared loop thread: output
+is read with non-blocking pipe transports, the wall-clock limit is a
+``call_later`` handle and exit is detected through a pidfd, so one thread
+multiplexes any number of concurrent renders.
+
+Engines expose async generators of event dicts; :func:`iterate` bridges
+them to the synchronous generators a WSGI response consumes. Closing the
+synchronous generator (client disconnect) closes the async generator,
+which kills the subprocess. Streaming routes return an :class:`AsyncBody`, which
+the ASGI adapter (``asgi.py``) consumes directly on its own event loop.
+"""
+import asyncio
+import logging
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+
+from services.engine.render_engine import (
+    RESOURCE_WALL_CLOCK,
+    RenderCgroup,
+    RenderLimits,
+    RenderUsage,
+    classify_exhaustion,
+    reap_process,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds of silence after which a keep-alive (``None``) is yielded
+KEEPALIVE_S = 10.0
+
+# Longest output line passed on; longer lines are skipped
+MAX_LINE_BYTES = 1024 * 1024
+
+# Output lines kept to recognise allocation failures
+RECENT_LINES = 20
+
+# Items :func:`merge` buffers ahead of its consumer
+MERGE_BUFFER = 64
+
+
+class StreamLoop:
+    """Lazily started event loop running in a daemon thread."""
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # A forked worker inherits the object but not the thread
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever,
+                                                name="render-stream-loop", daemon=True)
+                self._thread.start()
+            return self._loop
+
+
+stream_loop = StreamLoop()
+
+
+def iterate(agen):
+    """Run the async generator *agen* on the stream loop; yield its items here.
+
+    Each item is pulled on demand, so the generator never runs ahead of the
+    consumer and the calling thread only blocks while waiting for the next
+    event. Closing this generator closes *agen* on the loop.
+    """
+    loop = stream_loop.get_loop()
+    finished = False
+    try:
+        while True:
+            try:
+                item = asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                finished = True
+                return
+            except BaseException:
+                finished = True
+                raise
+            yield item
+    finally:
+        if not finished:
+            asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+
+class AsyncBody:
+    """Response body backed by an async generator.
+
+    Under WSGI the body is iterated synchronously and the generator runs on
+    the stream loop. The ASGI adapter iterates it with ``async for`` on the
+    server's loop, so an open stream holds no thread.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self._iterator = None
+
+    def __iter__(self):
+        self._iterator = iterate(self.events)
+        return self._iterator
+
+    def close(self):
+        """Close a synchronous iteration (WSGI servers close the body when the client goes away)."""
+        if self._iterator is not None:
+            self._iterator.close()
+
+    def __aiter__(self):
+        return self.events.__aiter__()
+
+    def map(self, wrap) -> "AsyncBody":
+        """Return a body whose generator is ``wrap(events)``."""
+        return AsyncBody(wrap(self.events))
+
+
+async def merge(factories, concurrency: int):
+    """Yield the items of several async generators as they arrive.
+
+    *factories* are zero-argument callables returning async generators; at
+    most *concurrency* of them run at once, started in the given order. An
+    exception from any generator is re-raised here once its earlier items
+    are consumed. Closing (or cancelling) the merged generator closes every
+    running generator, which kills their subprocesses.
+    """
+    items: asyncio.Queue = asyncio.Queue(maxsize=MERGE_BUFFER)
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def pump(factory):
+        try:
+            async with slots:
+                stream = factory()
+                try:
+                    async for item in stream:
+                        await items.put((False, item))
+                finally:
+                    await stream.aclose()
+        finally:
+            # The consumer awaits the task for its outcome; once it cancelled us it is gone
+            task = asyncio.current_task()
+            if not task.cancelling():
+                await items.put((True, task))
+
+    tasks = [asyncio.ensure_future(pump(factory)) for factory in factories]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            finished, value = await items.get()
+            if not finished:
+                yield value
+                continue
+            remaining -= 1
+            await value  # re-raises the generator's exception
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _wait_exit(process: subprocess.Popen, started_at: float) -> RenderUsage:
+    """Wait for *process* to exit without blocking the loop; return its usage.
+
+    Linux pidfds make the exit a readable event; elsewhere ``wait4`` runs in
+    the default executor (see :func:`reap_process` for a pid reaped elsewhere).
+    """
+    loop = asyncio.get_running_loop()
+    pidfd = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except OSError:
+            pidfd = None
+    try:
+        if pidfd is not None:
+            exited = loop.create_future()
+            loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+            try:
+                await exited
+            finally:
+                loop.remove_reader(pidfd)
+            return reap_process(process, started_at)
+        return await loop.run_in_executor(None, reap_process, process, started_at)
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+class StreamedProcess:
+    """A render subprocess whose output is read line by line on the stream loop.
+
+    After :meth:`lines` is exhausted, ``returncode``, ``usage`` and
+    ``exhausted`` describe how the process ended.
+    """
+
+    def __init__(self, process: subprocess.Popen, limits: RenderLimits,
+                 cgroup: RenderCgroup | None, started_at: float):
+        self.process = process
+        self.limits = limits
+        self.cgroup = cgroup
+        self.started_at = started_at
+        self.usage: RenderUsage | None = None
+        self.exhausted: str | None = None
+        self.timed_out = False
+        self.recent_lines: deque = deque(maxlen=RECENT_LINES)
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    @property
+    def returncode(self) -> int | None:
+        return self.process.returncode
+
+    @classmethod
+    async def spawn(cls, cmd: list, env: dict | None, limits: RenderLimits,
+                    merge_stderr: bool = False) -> "StreamedProcess":
+        """Start *cmd* under *limits*, streaming stderr (or stdout+stderr when *merge_stderr*).
+
+        The spawn and applying the limits run in the default executor so a
+        slow spawn never stalls the other streams.
+        """
+        cgroup = RenderCgroup.create(limits)
+        started_at = time.monotonic()
+
+        def start():
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE if merge_stderr else subprocess.DEVNULL,
+                stderr=subprocess.STDOUT if merge_stderr else subprocess.PIPE,
+                env=env,
+            )
+            limits.apply(process.pid, cgroup)
+            return process
+
+        try:
+            process = await asyncio.get_running_loop().run_in_executor(None, start)
+        except BaseException:
+            if cgroup:
+                cgroup.remove()
+            raise
+        return cls(process, limits, cgroup, started_at)
+
+    def _on_timeout(self):
+        self.timed_out = True
+        self.process.kill()
+
+    async def lines(self, keepalive_s: float = KEEPALIVE_S):
+        """Yield stripped, non-empty output lines; ``None`` after *keepalive_s* of silence.
+
+        The process is reaped once its output ends. If the consumer stops
+        early (or is cancelled) the process is killed and reaped.
+        """
+        loop = asyncio.get_running_loop()
+        pipe = self.process.stdout if self.process.stdout is not None else self.process.stderr
+        reader = asyncio.StreamReader(limit=MAX_LINE_BYTES, loop=loop)
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader, loop=loop), pipe)
+        kill_handle = loop.call_later(self.limits.wall_seconds, self._on_timeout)
+        finished = False
+        try:
+            while True:
+                try:
+                    raw = await asyncio.wait_for(reader.readline(), keepalive_s)
+                except TimeoutError:
+                    yield None
+                    continue
+                except ValueError:  # line longer than MAX_LINE_BYTES, already discarded
+                    continue
+                if not raw:
+                    break
+                line = raw.decode(errors="replace").strip()
+                if line:
+                    self.recent_lines.append(line)
+                    yield line
+            self.usage = await _wait_exit(self.process, self.started_at)
+            finished = True
+        finally:
+            kill_handle.cancel()
+            transport.close()
+            if not finished and self.process.returncode is None:
+                self.process.kill()
+                await asyncio.shield(_wait_exit(self.process, self.started_at))
+            self._finish()
+
+    def _finish(self):
+        try:
+            if self.timed_out:
+                self.exhausted = RESOURCE_WALL_CLOCK
+            elif self.process.returncode:
+                self.exhausted = classify_exhaustion(
+                    self.process.returncode, "\n".join(self.recent_lines), self.limits, self.cgroup, self.usage)
+        finally:
+            if self.cgroup:
+                self.cgroup.remove()
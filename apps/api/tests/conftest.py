@@ -18,6 +18,11 @@ def _isolate_config(tmp_path, monkeypatch):
     monkeypatch.setattr(Config, "AUTH_ENABLED", False)
     monkeypatch.setattr(Config, "LIBS_DIR", tmp_path / "libs")
     monkeypatch.setattr(Config, "OPENSCADPATH", str(tmp_path / "libs"))
+    monkeypatch.setattr(Config, "ANALYTICS_DB_PATH", tmp_path / ".analytics.db")
+    monkeypatch.setattr(Config, "TRACE_EXPORTER", "jsonl")
+    monkeypatch.setattr(Config, "TRACE_FILE", tmp_path / ".traces.jsonl")
+    monkeypatch.setattr(Config, "PROFILE_DIR", tmp_path / ".profiles")
+    monkeypatch.setattr(Config, "CATALOG_INDEX_FILE", tmp_path / ".catalog.json")
 
     import manifest as manifest_mod
     manifest_mod.manifest_service._manifest_cache.clear()
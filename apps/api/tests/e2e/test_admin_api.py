@@ -68,6 +68,14 @@ class TestAdminAPI:
         assert proj["parameter_count"] == 1
         assert "modified_at" in proj
 
+    def test_flag_change_listed_immediately(self, client, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "CATALOG_CHECK_INTERVAL_S", 3600)
+        assert client.get("/api/admin/projects").get_json()[0]["is_demo"] is False
+        res = client.patch("/api/admin/projects/test-project/flags", json={"is_demo": True})
+        assert res.status_code == 200
+        assert client.get("/api/admin/projects").get_json()[0]["is_demo"] is True
+
     def test_project_detail(self, client):
         res = client.get("/api/admin/projects/test-project")
         assert res.status_code == 200
@@ -80,3 +88,73 @@ class TestAdminAPI:
     def test_project_detail_nonexistent(self, client):
         res = client.get("/api/admin/projects/nonexistent")
         assert res.status_code == 404
+
+
+class TestRenderUsageAPI:
+    def test_render_usage_summary(self, client):
+        from services.engine.render_engine import RenderUsage
+        from services.engine.render_usage import record_usage
+        record_usage("test-project", "single", "main", "openscad",
+                     RenderUsage(user_cpu_s=1.0, sys_cpu_s=0.5, max_rss_kb=2048, wall_s=2.0))
+
+        res = client.get("/api/admin/render-usage?days=7")
+        assert res.status_code == 200
+        data = res.get_json()
+        assert data["period_days"] == 7
+        assert data["groups"][0]["project"] == "test-project"
+        assert data["groups"][0]["max_rss_kb"]["p95"] == 2048
+
+    def test_render_usage_bad_days(self, client):
+        res = client.get("/api/admin/render-usage?days=abc")
+        assert res.status_code == 400
+
+
+class TestProfilingAPI:
+    def test_cpu_profile_roundtrip(self, client):
+        res = client.get("/api/admin/projects", headers={"X-Profile": "cpu"})
+        assert res.status_code == 200
+        profile_id = res.headers["X-Profile-Id"]
+        assert profile_id.startswith("cpu-")
+        assert res.headers["X-Profile-Url"] == f"/api/admin/profiles/{profile_id}"
+
+        listing = client.get("/api/admin/profiles").get_json()["profiles"]
+        assert listing[0]["id"] == profile_id
+        assert listing[0]["path"] == "/api/admin/projects"
+
+        folded = client.get(f"/api/admin/profiles/{profile_id}")
+        assert folded.status_code == 200
+        assert folded.mimetype == "text/plain"
+        summary = client.get(f"/api/admin/profiles/{profile_id}?format=json").get_json()
+        assert summary["kind"] == "cpu"
+        assert summary["status_code"] == 200
+
+    def test_mem_profile(self, client):
+        res = client.get("/api/admin/projects", headers={"X-Profile": "mem"})
+        profile_id = res.headers["X-Profile-Id"]
+        summary = client.get(f"/api/admin/profiles/{profile_id}?format=json").get_json()
+        assert summary["kind"] == "mem"
+        assert summary["allocated_bytes"] >= 0
+
+    def test_invalid_profile_kind(self, client):
+        res = client.get("/api/admin/projects", headers={"X-Profile": "gpu"})
+        assert res.status_code == 400
+
+    def test_profile_requires_admin(self, client):
+        claims = {"sub": "user1", "iss": "https://auth.madfam.io", "roles": ["user"], "exp": 9999999999}
+        with patch("config.Config.AUTH_ENABLED", True), \
+             patch("middleware.auth.decode_token", return_value=claims):
+            res = client.get("/api/health", headers={"X-Profile": "cpu", "Authorization": "Bearer t"})
+        assert res.status_code == 403
+        assert "X-Profile-Id" not in res.headers
+
+    def test_unknown_profile(self, client):
+        assert client.get("/api/admin/profiles/cpu-000000000000").status_code == 404
+        assert client.get("/api/admin/profiles/../../etc").status_code == 404
+
+    def test_slow_requests(self, client, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "SLOW_REQUEST_THRESHOLD_S", 0.0001)
+        client.get("/api/admin/projects")
+        data = client.get("/api/admin/slow-requests").get_json()
+        assert data["requests"][0]["path"] == "/api/admin/projects"
+        assert data["requests"][0]["duration_ms"] > 0
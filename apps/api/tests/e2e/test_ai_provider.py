@@ -1,13 +1,14 @@
-"""Tests for AI provider abstraction (get_provider, complete_chat, stream_chat)."""
+"""Tests for AI provider abstraction (get_provider, complete_chat, stream_chat, astream_chat)."""
+import asyncio
 import sys
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 
 import pytest
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from services.ai.ai_provider import get_provider, _get_model, stream_chat, complete_chat
+from services.ai.ai_provider import get_provider, _get_model, stream_chat, astream_chat, complete_chat
 
 
 class TestGetProvider:
@@ -91,6 +92,63 @@ class TestStreamChat:
         assert result == ["Hi", " there"]
 
 
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+def _collect(agen):
+    async def run():
+        return [item async for item in agen]
+    return asyncio.run(run())
+
+
+class TestAstreamChat:
+    def test_unknown_provider_raises(self):
+        with patch("services.ai.ai_provider.Config") as mock_cfg:
+            mock_cfg.AI_PROVIDER = "unknown"
+            mock_cfg.AI_MAX_TOKENS = 100
+            with pytest.raises(ValueError, match="Unknown AI provider"):
+                _collect(astream_chat([{"role": "user", "content": "hi"}]))
+
+    def test_anthropic_provider_streams(self):
+        mock_anthropic = MagicMock()
+        mock_stream_ctx = MagicMock()
+        mock_stream_ctx.__aenter__ = AsyncMock(return_value=mock_stream_ctx)
+        mock_stream_ctx.__aexit__ = AsyncMock(return_value=False)
+        mock_stream_ctx.text_stream = _aiter(["Hello", " world"])
+        mock_anthropic.AsyncAnthropic.return_value.messages.stream.return_value = mock_stream_ctx
+
+        with patch("services.ai.ai_provider.Config") as mock_cfg:
+            mock_cfg.AI_PROVIDER = "anthropic"
+            mock_cfg.AI_MAX_TOKENS = 100
+            mock_cfg.AI_API_KEY = "test-key"
+            mock_cfg.AI_MODEL = "test-model"
+
+            with patch.dict("sys.modules", {"anthropic": mock_anthropic}):
+                result = _collect(astream_chat([{"role": "user", "content": "hi"}]))
+
+        assert result == ["Hello", " world"]
+
+    def test_openai_provider_streams(self):
+        mock_openai = MagicMock()
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = "Hi"
+        mock_openai.AsyncOpenAI.return_value.chat.completions.create = AsyncMock(return_value=_aiter([chunk]))
+
+        with patch("services.ai.ai_provider.Config") as mock_cfg:
+            mock_cfg.AI_PROVIDER = "openai"
+            mock_cfg.AI_MAX_TOKENS = 100
+            mock_cfg.AI_API_KEY = "test-key"
+            mock_cfg.AI_MODEL = "test-model"
+
+            with patch.dict("sys.modules", {"openai": mock_openai}):
+                result = _collect(astream_chat([{"role": "user", "content": "hi"}]))
+
+        assert result == ["Hi"]
+
+
 class TestCompleteChat:
     def test_joins_stream_chunks(self):
         with patch("services.ai.ai_provider.stream_chat", return_value=iter(["a", "b", "c"])):
@@ -0,0 +1,125 @@
+"""Tests for renders shared between replicas through the artifact store."""
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import trimesh
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """Switch the app to a fresh static folder and render cache, as another pod would have."""
+    import routes.engine.render as render_mod
+    from config import Config
+    from services.engine.render_cache import RenderCache
+
+    def switch(name: str) -> Path:
+        static_dir = tmp_path / name
+        static_dir.mkdir()
+        monkeypatch.setattr(Config, "STATIC_DIR", static_dir)
+        monkeypatch.setattr(render_mod, "STATIC_FOLDER", str(static_dir))
+        monkeypatch.setattr(render_mod, "render_cache", RenderCache())
+        return static_dir
+
+    return switch
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, replica):
+    from config import Config
+    monkeypatch.setattr(Config, "PROJECTS_DIR", tmp_path)
+    monkeypatch.setattr(Config, "ARTIFACT_STORE", "local")
+    monkeypatch.setattr(Config, "ARTIFACT_LOCAL_DIR", str(tmp_path / "pool"))
+    replica("static_a")
+
+    project_dir = tmp_path / "shared-test"
+    project_dir.mkdir()
+    manifest = {
+        "project": {"thumbnail": "thumb.png", "tags": ["test"], "difficulty": "beginner", "name": "Shared Test",
+                    "slug": "shared-test", "version": "1.0.0"},
+        "modes": [{"id": "single", "scad_file": "main.scad", "label": {"en": "Single"}, "parts": ["main"],
+                   "estimate": {"base_units": 1}}],
+        "parts": [{"id": "main", "render_mode": 0, "label": {"en": "Main"}, "default_color": "#ffffff"}],
+        "parameters": [{"id": "rows", "type": "slider", "default": 3, "min": 1, "max": 20, "label": {"en": "Rows"}}],
+        "estimate_constants": {"base_time": 5, "per_unit": 2, "per_part": 8},
+    }
+    (project_dir / "project.json").write_text(json.dumps(manifest))
+    (project_dir / "main.scad").write_text("cube(10);")
+
+    from app import create_app
+    flask_app = create_app()
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def engine():
+    """Mock OpenSCAD: writes a box to the output path."""
+    def run(cmd, **kwargs):
+        trimesh.creation.box().export(cmd[0])
+        return True, "Render complete"
+
+    with patch("routes.engine.render.build_openscad_command", side_effect=lambda out, *a: [out]), \
+            patch("routes.engine.render.run_openscad_render", side_effect=run) as mock_run:
+        yield mock_run
+
+
+def _render(client, rows=3):
+    res = client.post("/api/render", json={"mode": "single", "project": "shared-test", "parameters": {"rows": rows}})
+    assert res.status_code == 200, res.get_data(as_text=True)
+    return res
+
+
+class TestSharedRenders:
+    def test_render_is_a_hit_on_another_replica(self, client, engine, replica):
+        first = _render(client)
+        assert first.headers["X-Cache"] == "MISS"
+
+        static_b = replica("static_b")
+        second = _render(client)
+        assert second.headers["X-Cache"] == "HIT"
+        assert engine.call_count == 1
+        assert second.get_json()["parts"][0]["size_bytes"] == first.get_json()["parts"][0]["size_bytes"]
+        assert (static_b / "shared-test_preview_main.stl").is_file()
+
+        # Other parameters are still rendered
+        assert _render(client, rows=4).headers["X-Cache"] == "MISS"
+        assert engine.call_count == 2
+
+    def test_static_file_reads_through(self, client, engine, replica):
+        url = _render(client).get_json()["parts"][0]["url"]
+        original = client.get(url).data
+
+        static_b = replica("static_b")
+        res = client.get(url)
+        assert res.status_code == 200
+        assert res.data == original
+        assert res.headers["Cache-Control"] == "public, max-age=3600"
+        assert (static_b / url.rsplit("/", 1)[1]).is_file()
+
+    def test_unknown_static_file_is_404(self, client):
+        assert client.get("/static/shared-test_preview_other.stl").status_code == 404
+
+    def test_redirects_to_presigned_url(self, client, engine, replica, monkeypatch):
+        from config import Config
+        from services.engine.artifact_store import LocalArtifactStore
+        url = _render(client).get_json()["parts"][0]["url"]
+        name = url.rsplit("/", 1)[1]
+
+        replica("static_b")
+        monkeypatch.setattr(Config, "ARTIFACT_REDIRECT", True)
+        monkeypatch.setattr(LocalArtifactStore, "url", lambda self, key, download_name=None: f"https://cdn.test/{key}")
+        res = client.get(url)
+        assert res.status_code == 302
+        assert res.headers["Location"].startswith("https://cdn.test/renders/")
+        assert res.headers["Location"].endswith(f"/{name}")
+        assert "Cache-Control" not in res.headers or "max-age=3600" not in res.headers["Cache-Control"]
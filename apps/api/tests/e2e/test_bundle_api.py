@@ -0,0 +1,169 @@
+"""Tests for whole-mode downloads: ZIP bundles and assembled scenes."""
+import io
+import json
+import sys
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import trimesh
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, "PROJECTS_DIR", tmp_path)
+    static_dir = tmp_path / "static"
+    static_dir.mkdir()
+    monkeypatch.setattr(Config, "STATIC_DIR", static_dir)
+
+    import routes.engine.render as render_mod
+    from services.engine.render_cache import RenderCache
+    monkeypatch.setattr(render_mod, "STATIC_FOLDER", str(static_dir))
+    monkeypatch.setattr(render_mod, "render_cache", RenderCache())
+
+    project_dir = tmp_path / "bundle-test"
+    project_dir.mkdir()
+    manifest = {
+        "project": {"thumbnail": "thumb.png", "tags": ["test"], "difficulty": "beginner", "name": "Bundle Test",
+                    "slug": "bundle-test", "version": "1.0.0"},
+        "modes": [
+            {"id": "single", "scad_file": "main.scad", "label": {"en": "Single"}, "parts": ["main"],
+             "estimate": {"base_units": 1}},
+            {"id": "grid", "scad_file": "main.scad", "label": {"en": "Grid"}, "parts": ["grid_a", "grid_b"],
+             "estimate": {"base_units": 1}},
+        ],
+        "parts": [
+            {"id": "main", "render_mode": 0, "label": {"en": "Main"}, "default_color": "#ffffff"},
+            {"id": "grid_a", "render_mode": 0, "label": {"en": "Grid A"}, "default_color": "#ffffff"},
+            {"id": "grid_b", "render_mode": 1, "label": {"en": "Grid B"}, "default_color": "#ff0000",
+             "transform": {"translate": [0, 0, 20]}},
+        ],
+        "parameters": [{"id": "rows", "type": "slider", "default": 3, "min": 1, "max": 20, "label": {"en": "Rows"}}],
+        "bom": {"hardware": [{"id": "screws", "label": {"en": "Screws"}, "quantity_formula": "rows * 4"}]},
+        "estimate_constants": {"base_time": 5, "per_unit": 2, "per_part": 8},
+    }
+    (project_dir / "project.json").write_text(json.dumps(manifest))
+    (project_dir / "main.scad").write_text("cube(10);")
+
+    from app import create_app
+    flask_app = create_app()
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def engine():
+    """Mock OpenSCAD: writes a box to the output path."""
+    def run(cmd, **kwargs):
+        trimesh.creation.box().export(cmd[0])
+        return True, "Render complete"
+
+    with patch("routes.engine.render.build_openscad_command", side_effect=lambda out, *a: [out]), \
+            patch("routes.engine.render.run_openscad_render", side_effect=run) as mock_run:
+        yield mock_run
+
+
+def _zip(res) -> zipfile.ZipFile:
+    assert res.status_code == 200, res.get_data(as_text=True)
+    assert res.mimetype == "application/zip"
+    return zipfile.ZipFile(io.BytesIO(res.data))
+
+
+class TestBundle:
+    def test_renders_missing_parts_and_streams_zip(self, client, engine):
+        res = client.get("/api/projects/bundle-test/bundle?mode=grid&rows=5")
+        assert res.headers["Content-Disposition"] == "attachment; filename=bundle-test_grid.zip"
+        archive = _zip(res)
+        assert archive.namelist() == ["grid_a.stl", "grid_b.stl"]
+        assert archive.testzip() is None
+        assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in archive.infolist())
+        assert len(trimesh.load(io.BytesIO(archive.read("grid_a.stl")), file_type="stl").faces) == 12
+        assert engine.call_count == 2
+
+        # Cached parts are bundled without rendering again
+        again = _zip(client.get("/api/projects/bundle-test/bundle?mode=grid&rows=5"))
+        assert again.read("grid_b.stl") == archive.read("grid_b.stl")
+        assert engine.call_count == 2
+
+    def test_default_mode_and_extras(self, client, engine):
+        archive = _zip(client.get("/api/projects/bundle-test/bundle?rows=2&include=bom,datasheet"))
+        names = archive.namelist()
+        assert names[:2] == ["main.stl", "bom.csv"]
+        assert "screws,Screws,8.0,pcs" in archive.read("bom.csv").decode()
+        assert names[2] in ("datasheet.pdf", "datasheet.html")
+
+    def test_render_failure_is_an_error_not_a_zip(self, client, engine):
+        engine.side_effect = lambda cmd, **kwargs: (False, "OpenSCAD error: syntax error")
+        res = client.get("/api/projects/bundle-test/bundle?mode=grid")
+        assert res.status_code == 500
+        assert res.get_json()["error"] == "OpenSCAD error: syntax error"
+
+    def test_bad_requests(self, client, engine):
+        assert client.get("/api/projects/bundle-test/bundle?mode=nope").status_code == 400
+        assert client.get("/api/projects/bundle-test/bundle?include=photos").status_code == 400
+        assert client.get("/api/projects/bundle-test/bundle?format=3mf").status_code == 403
+        assert client.get("/api/projects/missing/bundle").status_code == 404
+        assert engine.call_count == 0
+
+    def test_access_control(self, client, engine, tmp_path):
+        path = tmp_path / "bundle-test" / "project.json"
+        manifest = json.loads(path.read_text())
+        manifest["access_control"] = {"download_stl": "authenticated"}
+        path.write_text(json.dumps(manifest))
+        from manifest import invalidate_cache
+        invalidate_cache("bundle-test")
+        assert client.get("/api/projects/bundle-test/bundle").status_code == 401
+
+
+class TestScene:
+    @pytest.fixture(autouse=True)
+    def pro_tier(self, monkeypatch):
+        monkeypatch.setattr("routes.projects.bundle.resolve_tier", lambda claims: "pro")
+
+    def test_glb_composed_once_per_part_set(self, client, engine):
+        res = client.get("/api/projects/bundle-test/scene?mode=grid&rows=4")
+        assert res.status_code == 200, res.get_data(as_text=True)
+        assert res.headers["X-Cache"] == "MISS"
+        assert res.headers["Content-Disposition"] == "attachment; filename=bundle-test_grid.glb"
+        scene = trimesh.load(io.BytesIO(res.data), file_type="glb")
+        assert sorted(scene.geometry) == ["grid_a", "grid_b"]
+        # grid_b is lifted by 20 along Z, which is glTF's Y
+        assert abs(scene.bounds[1][1] - 20.5) < 1e-3
+
+        again = client.get("/api/projects/bundle-test/scene?mode=grid&rows=4")
+        assert again.headers["X-Cache"] == "HIT"
+        assert again.data == res.data
+        assert engine.call_count == 2
+
+        # Other parameters re-render the parts, so the scene is composed again
+        other = client.get("/api/projects/bundle-test/scene?mode=grid&rows=5")
+        assert other.headers["X-Cache"] == "MISS"
+        assert engine.call_count == 4
+        from config import Config
+        assert len(list(Config.STATIC_DIR.glob("bundle-test_*scene_grid_*.glb"))) == 1
+
+    def test_3mf(self, client, engine):
+        res = client.get("/api/projects/bundle-test/scene?mode=grid&format=3mf")
+        assert res.status_code == 200
+        package = zipfile.ZipFile(io.BytesIO(res.data))
+        model = package.read("3D/3dmodel.model").decode()
+        assert 'name="grid_b"' in model and 'displaycolor="#FF0000FF"' in model
+
+    @pytest.mark.parametrize("tier", ["guest", "basic"])
+    def test_free_tiers_rejected(self, client, engine, monkeypatch, tier):
+        monkeypatch.setattr("routes.projects.bundle.resolve_tier", lambda claims: tier)
+        assert client.get("/api/projects/bundle-test/scene?format=stl").status_code == 400
+        res = client.get("/api/projects/bundle-test/scene")
+        assert res.status_code == 403
+        assert "requires Pro tier" in res.get_json()["error"]
+        assert client.get("/api/projects/bundle-test/scene?format=3mf").status_code == 403
+        assert engine.call_count == 0
@@ -81,6 +81,53 @@ class TestStlDownload:
         assert resp.status_code == 404
 
 
+
+class TestStaticOffload:
+    def test_x_accel_download(self, client, tmp_projects, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "STATIC_OFFLOAD", "x-accel")
+        resp = client.get("/api/projects/test-project/download/stl/test.stl", headers={"Range": "bytes=0-3"})
+        assert resp.status_code == 200
+        assert resp.data == b""
+        path = (tmp_projects / "test-project" / "exports" / "test.stl").resolve()
+        assert resp.headers["X-Accel-Redirect"] == f"/_protected{path}"
+        assert resp.headers["Content-Type"] == "model/stl"
+        assert resp.headers["Content-Disposition"] == "attachment; filename=test.stl"
+        # Conditional and range requests are left to the front server
+        assert "ETag" not in resp.headers and "Content-Range" not in resp.headers
+
+    def test_x_accel_static_uses_prefix_and_quotes(self, client, tmp_projects, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "STATIC_OFFLOAD", "x-accel")
+        monkeypatch.setattr(Config, "STATIC_OFFLOAD_PREFIX", "/internal/")
+        (tmp_projects / "static" / "a b.stl").write_bytes(b"x")
+        resp = client.get("/static/a%20b.stl")
+        assert resp.headers["X-Accel-Redirect"].startswith("/internal/")
+        assert resp.headers["X-Accel-Redirect"].endswith("/static/a%20b.stl")
+        assert resp.headers["Cache-Control"] == "public, max-age=3600"
+        assert "Accept-Encoding" in resp.headers["Vary"]
+
+    def test_x_sendfile_picks_precompressed_sibling(self, client, tmp_projects, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "STATIC_OFFLOAD", "x-sendfile")
+        static = tmp_projects / "static"
+        (static / "p.stl").write_bytes(b"mesh")
+        (static / "p.stl.gz").write_bytes(b"packed")
+        resp = client.get("/static/p.stl", headers={"Accept-Encoding": "gzip"})
+        assert resp.data == b""
+        assert resp.headers["X-Sendfile"] == str((static / "p.stl.gz").resolve())
+        assert resp.headers["Content-Encoding"] == "gzip"
+        resp = client.get("/static/p.stl")
+        assert resp.headers["X-Sendfile"] == str((static / "p.stl").resolve())
+        assert "Content-Encoding" not in resp.headers
+
+    def test_checks_still_run_before_offload(self, client, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "STATIC_OFFLOAD", "x-accel")
+        assert client.get("/api/projects/test-project/download/stl/nonexistent.stl").status_code == 404
+        assert client.get("/static/missing.stl").status_code == 404
+        assert "X-Accel-Redirect" not in client.get("/static/missing.stl").headers
+
 class TestScadDownload:
     def test_returns_file_when_public_and_allowed(self, client):
         resp = client.get("/api/projects/test-project/download/scad/main.scad")
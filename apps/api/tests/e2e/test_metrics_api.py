@@ -0,0 +1,57 @@
+"""Tests for the Prometheus metrics endpoint."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def app():
+    from app import create_app
+    flask_app = create_app()
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class TestMetricsAPI:
+    def test_metrics_exposition_format(self, client):
+        from services.core.metrics import observe_render
+        observe_render("openscad", "metrics-test", "main", "miss", 1.2)
+
+        res = client.get("/api/metrics")
+        assert res.status_code == 200
+        assert res.content_type.startswith("text/plain")
+        body = res.get_data(as_text=True)
+        assert 'yantra4d_render_duration_seconds_bucket{cache="miss",engine="openscad"' in body
+        assert "yantra4d_render_cache_hit_ratio" in body
+        assert "yantra4d_render_queue_depth" in body
+        assert "yantra4d_mqtt_telemetry_queue_size" in body
+
+    def test_metrics_cache_hit_ratio(self, client):
+        from prometheus_client import REGISTRY
+
+        from services.core.metrics import observe_render
+        hits = REGISTRY.get_sample_value("yantra4d_render_cache_requests_total", {"result": "hit"}) or 0
+        misses = REGISTRY.get_sample_value("yantra4d_render_cache_requests_total", {"result": "miss"}) or 0
+        observe_render("openscad", "metrics-test", "main", "hit", 0.01)
+        observe_render("openscad", "metrics-test", "main", "static", 0.01)
+
+        body = client.get("/api/metrics").get_data(as_text=True)
+        ratio_line = next(line for line in body.splitlines() if line.startswith("yantra4d_render_cache_hit_ratio "))
+        expected = (hits + 1) / (hits + misses + 1)
+        assert float(ratio_line.split()[1]) == pytest.approx(expected)
+
+    def test_metrics_token_required(self, client, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "METRICS_TOKEN", "s3cret")
+        assert client.get("/api/metrics").status_code == 401
+        assert client.get("/api/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        res = client.get("/api/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert res.status_code == 200
@@ -100,6 +100,42 @@ class TestProjectsAPI:
         for project in data:
             assert "stats" not in project
 
+    def test_list_projects_etag(self, client):
+        res = client.get("/api/projects")
+        etag = res.headers["ETag"]
+        assert etag
+        res2 = client.get("/api/projects", headers={"If-None-Match": etag})
+        assert res2.status_code == 304
+        assert res2.headers["ETag"] == etag
+        assert client.get("/api/projects?stats=1", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_list_projects_stats_cached(self, client, monkeypatch):
+        from config import Config
+        from routes.projects import projects as projects_routes
+        queries = []
+        monkeypatch.setattr(projects_routes, "_stats_cache", None)
+        monkeypatch.setattr(projects_routes, "_get_project_stats",
+                            lambda: queries.append(1) or {"test-project": {"render": 3}})
+        monkeypatch.setattr(Config, "CATALOG_STATS_TTL_S", 3600)
+        first = client.get("/api/projects?stats=1")
+        assert first.get_json()[0]["stats"]["renders"] == 3
+        second = client.get("/api/projects?stats=1")
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert len(queries) == 1
+
+    def test_search_projects(self, client):
+        res = client.get("/api/projects/search?q=tes&tag=test")
+        assert res.status_code == 200
+        data = res.get_json()
+        assert data["total"] == 1
+        assert data["results"][0]["slug"] == "test-project"
+        assert data["facets"]["difficulty"] == [{"value": "beginner", "count": 1}]
+        assert client.get("/api/projects/search?q=missing").get_json()["total"] == 0
+
+    def test_search_projects_bad_paging(self, client):
+        assert client.get("/api/projects/search?limit=abc").status_code == 400
+        assert client.get("/api/projects/search?limit=1000").status_code == 400
+
     def test_serve_static_part_404(self, client):
         res = client.get("/api/projects/test-project/parts/missing.stl")
         assert res.status_code == 404
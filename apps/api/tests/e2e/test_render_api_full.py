@@ -1,4 +1,5 @@
 """Tests for render API routes — full render, streaming, and cancel."""
+import asyncio
 import json
 import sys
 from pathlib import Path
@@ -64,6 +65,46 @@ def _mock_validate_params(monkeypatch):
     })
 
 
+def _stream_events(*events):
+    """side_effect for a mocked engine astream_render yielding *events*."""
+    async def astream_render(*args, **kwargs):
+        for event in events:
+            yield event
+    return astream_render
+
+
+def _part_streams(delays):
+    """side_effect for a mocked engine astream_render; part ``p`` takes ``2 * delays[p]`` seconds."""
+    async def astream_render(cmd, part, part_base, part_weight, index, total, **kwargs):
+        yield {"event": "part_start", "part": part, "progress": part_base, "index": index, "total": total}
+        await asyncio.sleep(delays[part])
+        yield {"event": "output", "part": part, "line": "Rendering Polygon Mesh", "progress": part_base + part_weight / 2}
+        await asyncio.sleep(delays[part])
+        yield {"event": "part_done", "part": part, "progress": part_base + part_weight}
+    return astream_render
+
+
+def _sse_events(res):
+    return [json.loads(line[6:]) for line in res.get_data(as_text=True).splitlines() if line.startswith("data: ")]
+
+
+def _sse_ids(res):
+    return [line[4:] for line in res.get_data(as_text=True).splitlines() if line.startswith("id: ")]
+
+
+def _wait_job(job_id, timeout=5):
+    """Wait for a render job to finish in the background; return it."""
+    import time
+
+    from services.engine.render_jobs import render_jobs
+    job = render_jobs.get(job_id)
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.done
+    return job
+
+
 class TestRenderEndpoint:
     @patch("routes.engine.render.run_openscad_render")
     @patch("routes.engine.render.build_openscad_command")
@@ -98,6 +139,34 @@ class TestRenderEndpoint:
         data = res.get_json()
         assert data["status"] == "error"
 
+    @patch("routes.engine.render.run_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    @patch("routes.engine.render.render_cache")
+    def test_render_resource_exhausted(self, mock_cache, mock_cmd, mock_run, client):
+        from services.engine.render_engine import RenderResult
+        mock_cache.get.return_value = None
+        mock_cmd.return_value = ["openscad", "-o", "out.stl"]
+        mock_run.return_value = RenderResult(False, "Render exceeded the memory limit (2048 MB)", "memory")
+
+        res = client.post("/api/render", json={"mode": "single", "project": "test-project"})
+        assert res.status_code == 422
+        data = res.get_json()
+        assert data["error_type"] == "resource_exhausted"
+        assert data["resource"] == "memory"
+
+    @patch("routes.engine.render.run_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    @patch("routes.engine.render.render_cache")
+    def test_render_passes_tier_limits(self, mock_cache, mock_cmd, mock_run, client):
+        mock_cache.get.return_value = None
+        mock_cmd.return_value = ["openscad", "-o", "out.stl"]
+        mock_run.return_value = (True, "")
+
+        client.post("/api/render", json={"mode": "single", "project": "test-project"})
+        limits = mock_run.call_args.kwargs["limits"]
+        assert limits.memory_mb == 2048
+        assert limits.cpu_seconds == 120
+
     def test_render_invalid_scad(self, client):
         res = client.post("/api/render", json={"scad_file": "nonexistent.scad", "project": "test-project"})
         assert res.status_code == 400
@@ -118,6 +187,65 @@ class TestRenderEndpoint:
         assert res.status_code == 200
         assert res.headers.get("X-Cache") == "HIT"
 
+    @patch("routes.engine.render.run_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_repeat_render_served_from_cache(self, mock_cmd, mock_run, client, monkeypatch):
+        from config import Config
+        from services.engine.render_cache import RenderCache
+        monkeypatch.setattr("routes.engine.render.render_cache", RenderCache())
+        stl_path = Config.STATIC_DIR / "test-project_preview_main.stl"
+        mock_cmd.return_value = ["openscad"]
+
+        def _render(cmd, **kwargs):
+            stl_path.write_bytes(b"\x00" * 84)
+            return True, ""
+        mock_run.side_effect = _render
+
+        first = client.post("/api/render", json={"mode": "single", "project": "test-project"})
+        second = client.post("/api/render", json={"mode": "single", "project": "test-project"})
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert mock_run.call_count == 1
+        assert stl_path.is_file()
+
+    @patch("routes.engine.render.render_cache")
+    def test_render_cache_hit_recorded_in_metrics(self, mock_cache, client):
+        from prometheus_client import REGISTRY
+
+        from config import Config
+        stl_path = Config.STATIC_DIR / "test-project_preview_main.stl"
+        stl_path.write_bytes(b"\x00" * 50)
+        mock_cache.get.return_value = {"path": str(stl_path), "size_bytes": 50, "ts": 1000}
+        labels = {"engine": "openscad", "project": "test-project", "part": "main", "cache": "hit"}
+        before = REGISTRY.get_sample_value("yantra4d_render_duration_seconds_count", labels) or 0
+
+        client.post("/api/render", json={"mode": "single", "project": "test-project"})
+
+        assert REGISTRY.get_sample_value("yantra4d_render_duration_seconds_count", labels) == before + 1
+        assert REGISTRY.get_sample_value("yantra4d_render_queue_depth") == 0
+
+    @patch("routes.engine.render.run_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    @patch("routes.engine.render.render_cache")
+    def test_render_trace_spans(self, mock_cache, mock_cmd, mock_run, client):
+        from config import Config
+        from services.core.tracing import flush_spans
+        mock_cache.get.return_value = None
+        mock_cmd.return_value = ["openscad"]
+        mock_run.return_value = (True, "")
+        parent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+        res = client.post("/api/render", json={"mode": "single", "project": "test-project"},
+                          headers={"traceparent": parent})
+        assert res.headers["X-Trace-Id"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+
+        flush_spans()
+        spans = [json.loads(line) for line in Config.TRACE_FILE.read_text().splitlines()]
+        names = {s["name"] for s in spans}
+        assert {"render", "manifest.load", "validate_params", "cache.lookup", "telemetry.inject",
+                "render.subprocess", "artifact.store", "response.serialize"} <= names
+        assert {s["trace_id"] for s in spans} == {"4bf92f3577b34da6a3ce929d0e0e4736"}
+
     def test_render_export_format_3mf(self, client):
         with patch("routes.engine.render.run_openscad_render", return_value=(True, "")), \
              patch("routes.engine.render.build_openscad_command", return_value=["cmd"]), \
@@ -171,21 +299,441 @@ class TestRenderStreamEndpoint:
         res = client.post("/api/render-stream", content_type="application/json")
         assert res.status_code == 400
 
-    @patch("routes.engine.render.stream_openscad_render")
+    @patch("routes.engine.render.astream_openscad_render")
     @patch("routes.engine.render.build_openscad_command")
     @patch("routes.engine.render.render_cache")
     def test_stream_returns_sse(self, mock_cache, mock_cmd, mock_stream, client):
         mock_cache.get.return_value = None
         mock_cmd.return_value = ["cmd"]
-        mock_stream.return_value = [
-            json.dumps({"event": "progress", "progress": 50}),
-            json.dumps({"event": "part_done", "part": "main"}),
-        ]
+        mock_stream.side_effect = _stream_events(
+            {"event": "progress", "progress": 50},
+            {"event": "part_done", "part": "main"},
+        )
 
         res = client.post("/api/render-stream", json={"mode": "single", "project": "test-project"})
         assert res.status_code == 200
         assert "text/event-stream" in res.content_type
 
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    @patch("routes.engine.render.render_cache")
+    def test_stream_cache_calls_off_event_loop(self, mock_cache, mock_cmd, mock_stream, client):
+        """Cache lookups and puts may copy to/from the artifact store; they must not block the stream loop."""
+        import threading
+        threads = []
+        mock_cache.get.side_effect = lambda *a, **kw: threads.append(threading.current_thread().name)
+        mock_cache.put.side_effect = lambda *a, **kw: threads.append(threading.current_thread().name)
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _stream_events({"event": "part_done", "part": "main"})
+
+        events = _sse_events(client.post("/api/render-stream", json={"mode": "single", "project": "test-project"}))
+        assert events[-1]["event"] == "complete"
+        assert len(threads) == 2
+        assert "render-stream-loop" not in threads
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    @patch("routes.engine.render.render_cache")
+    def test_stream_reports_usage(self, mock_cache, mock_cmd, mock_stream, client):
+        usage = {"user_cpu_s": 1.5, "sys_cpu_s": 0.2, "max_rss_kb": 4096, "wall_s": 2.0}
+        mock_cache.get.return_value = None
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _stream_events({"event": "part_done", "part": "main", "usage": usage})
+
+        res = client.post("/api/render-stream", json={"mode": "single", "project": "test-project"})
+        events = [json.loads(line[6:]) for line in res.get_data(as_text=True).splitlines() if line.startswith("data: ")]
+        complete = events[-1]
+        assert complete["event"] == "complete"
+        assert complete["parts"][0]["usage"] == usage
+
+        from services.engine.render_usage import summarize_usage
+        groups = summarize_usage(days=1, project="test-project")
+        assert groups[0]["mode"] == "single"
+        assert groups[0]["count"] == 1
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_stream_trace_span_covers_stream(self, mock_cmd, mock_stream, client):
+        from config import Config
+        from services.core.tracing import flush_spans
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _stream_events({"event": "part_done", "part": "main"})
+
+        res = client.post("/api/render-stream", json={"mode": "single", "project": "test-project"})
+        trace_id = res.headers["X-Trace-Id"]
+        res.get_data()
+
+        flush_spans()
+        spans = {s["name"]: s for s in map(json.loads, Config.TRACE_FILE.read_text().splitlines())}
+        assert spans["render_stream"]["trace_id"] == trace_id
+        assert spans["artifact.store"]["parent_id"] == spans["render_stream"]["span_id"]
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_stream_counted_as_sse_connection(self, mock_cmd, mock_stream, client):
+        from prometheus_client import REGISTRY
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _stream_events({"event": "part_done", "part": "main"})
+
+        res = client.post("/api/render-stream", json={"mode": "single", "project": "test-project"})
+        chunks = res.response
+        next(iter(chunks))
+        assert REGISTRY.get_sample_value("yantra4d_sse_connections", {"endpoint": "render"}) == 1
+        res.close()
+        assert REGISTRY.get_sample_value("yantra4d_sse_connections", {"endpoint": "render"}) == 0
+        _wait_job(res.headers["X-Render-Job"])  # the render itself outlives the connection
+        assert REGISTRY.get_sample_value("yantra4d_render_queue_depth") == 0
+
+
+class TestParallelRenderStream:
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_parts_render_concurrently(self, mock_cmd, mock_stream, client):
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"grid_a": 0.2, "grid_b": 0.05})
+
+        events = _sse_events(client.post("/api/render-stream", json={"mode": "grid", "project": "test-project"}))
+        kinds = [(e["event"], e.get("part")) for e in events]
+        assert [e["event"] for e in events[:2]] == ["job", "plan"]
+        assert kinds.index(("part_start", "grid_b")) < kinds.index(("part_done", "grid_a"))
+        assert kinds.index(("part_done", "grid_b")) < kinds.index(("part_done", "grid_a"))
+        progress = [e["progress"] for e in events if "progress" in e]
+        assert progress == sorted(progress)
+        assert events[-1]["event"] == "complete"
+        assert [p["type"] for p in events[-1]["parts"]] == ["grid_a", "grid_b"]
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    @patch("routes.engine.render.render_cache")
+    def test_cached_parts_sent_first(self, mock_cache, mock_cmd, mock_stream, client):
+        mock_cache.get.side_effect = lambda project, scad, params, part, fmt: {"size_bytes": 7} if part == "grid_b" else None
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"grid_a": 0})
+
+        events = _sse_events(client.post("/api/render-stream", json={"mode": "grid", "project": "test-project"}))
+        assert events[2] == {"event": "part_done", "part": "grid_b", "cache": "hit", "progress": 0,
+                             "part_index": 1, "total_parts": 2}
+        assert mock_stream.call_count == 1
+        assert mock_cache.put.call_args[0][3] == "grid_a"
+        assert [p["size_bytes"] for p in events[-1]["parts"]][1] == 7
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_progress_weighted_by_predicted_cost(self, mock_cmd, mock_stream, client):
+        from services.engine.render_engine import RenderUsage
+        from services.engine.render_usage import record_usage
+        record_usage("test-project", "grid", "grid_a", "openscad", RenderUsage(1, 0, 1000, 9.0))
+        record_usage("test-project", "grid", "grid_b", "openscad", RenderUsage(0.1, 0, 1000, 1.0))
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"grid_a": 0.3, "grid_b": 0})
+
+        events = _sse_events(client.post("/api/render-stream", json={"mode": "grid", "project": "test-project"}))
+        assert {p["part"]: p["predicted_s"] for p in events[1]["parts"]} == {"grid_a": 9.0, "grid_b": 1.0}
+        done_b = next(e for e in events if e["event"] == "part_done" and e["part"] == "grid_b")
+        assert done_b["progress"] == 10
+        assert done_b["part_progress"] == 100
+        assert mock_stream.call_args_list[0][0][1] == "grid_a"  # most expensive part starts first
+
+
+def _writing_streams(sizes):
+    """side_effect for a mocked engine astream_render that writes a part file of ``sizes[part]`` bytes."""
+    async def astream_render(cmd, part, part_base, part_weight, index, total, **kwargs):
+        from config import Config
+        yield {"event": "part_start", "part": part, "progress": part_base, "index": index, "total": total}
+        (Config.STATIC_DIR / f"test-project_preview_{part}.stl").write_bytes(b"\x01" * sizes[part])
+        yield {"event": "part_done", "part": part, "progress": part_base + part_weight}
+    return astream_render
+
+
+class TestInlineMeshes:
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        # These renders write real files, which a shared cache would serve to later tests
+        from services.engine.render_cache import RenderCache
+        monkeypatch.setattr("routes.engine.render.render_cache", RenderCache())
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_small_meshes_sent_inline(self, mock_cmd, mock_stream, client, monkeypatch):
+        import base64
+
+        from config import Config
+        monkeypatch.setattr(Config, "RENDER_INLINE_MAX_BYTES", 100)
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _writing_streams({"grid_a": 10, "grid_b": 500})
+
+        events = _sse_events(client.post("/api/render-stream", json={
+            "mode": "grid", "project": "test-project", "inline_meshes": True}))
+        meshes = [e for e in events if e["event"] == "mesh"]
+        assert [m["part"] for m in meshes] == ["grid_a"]
+        assert meshes[0]["format"] == "stl"
+        assert base64.b64decode(meshes[0]["data"]) == b"\x01" * 10
+        kinds = [(e["event"], e.get("part")) for e in events]
+        assert kinds.index(("mesh", "grid_a")) == kinds.index(("part_done", "grid_a")) + 1
+        parts = {p["type"]: p for p in events[-1]["parts"]}
+        assert parts["grid_a"]["inline"] is True
+        assert "inline" not in parts["grid_b"]
+        assert parts["grid_b"]["url"] == "/static/test-project_preview_grid_b.stl"
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_not_inline_without_opt_in(self, mock_cmd, mock_stream, client):
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _writing_streams({"main": 10})
+
+        events = _sse_events(client.post("/api/render-stream", json={"mode": "single", "project": "test-project"}))
+        assert "mesh" not in [e["event"] for e in events]
+        assert "inline" not in events[-1]["parts"][0]
+
+
+class TestMeshLods:
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        from services.engine.render_cache import RenderCache
+        monkeypatch.setattr("routes.engine.render.render_cache", RenderCache())
+
+    @staticmethod
+    def _sphere_stream():
+        async def astream_render(cmd, part, part_base, part_weight, index, total, **kwargs):
+            import trimesh
+
+            from config import Config
+            trimesh.creation.icosphere(subdivisions=5).export(Config.STATIC_DIR / f"test-project_preview_{part}.stl")
+            yield {"event": "part_done", "part": part, "progress": part_base + part_weight}
+        return astream_render
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_lods_advertised_and_cached(self, mock_cmd, mock_stream, client, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "RENDER_LOD_MIN_FACES", 1000)
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = self._sphere_stream()
+        payload = {"mode": "single", "project": "test-project"}
+
+        events = _sse_events(client.post("/api/render-stream", json=payload))
+        done = next(e for e in events if e["event"] == "part_done")
+        assert [lod["url"] for lod in done["lods"]] == ["/static/test-project_preview_main.lod5.stl",
+                                                        "/static/test-project_preview_main.lod25.stl"]
+        assert events[-1]["parts"][0]["lods"] == done["lods"]
+        assert (Config.STATIC_DIR / "test-project_preview_main.lod5.stl").is_file()
+
+        # A cache hit advertises the same levels without rendering again
+        events = _sse_events(client.post("/api/render-stream", json=payload))
+        assert mock_stream.call_count == 1
+        assert events[-1]["parts"][0]["lods"] == done["lods"]
+
+
+
+class TestMeshPackaging:
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        from services.engine.render_cache import RenderCache
+        monkeypatch.setattr("routes.engine.render.render_cache", RenderCache())
+
+    @staticmethod
+    def _ascii_stream():
+        async def astream_render(cmd, part, part_base, part_weight, index, total, **kwargs):
+            import trimesh
+
+            from config import Config
+            # OpenSCAD writes ASCII STL
+            ascii_stl = trimesh.creation.icosphere(subdivisions=3).export(file_type="stl_ascii")
+            (Config.STATIC_DIR / f"test-project_preview_{part}.stl").write_text(ascii_stl)
+            yield {"event": "part_done", "part": part, "progress": part_base + part_weight}
+        return astream_render
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_binary_stl_glb_and_precompressed_variants(self, mock_cmd, mock_stream, client, monkeypatch):
+        import gzip
+        monkeypatch.setattr("routes.engine.render.resolve_tier", lambda claims: "pro")
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = self._ascii_stream()
+        payload = {"mode": "single", "project": "test-project"}
+
+        events = _sse_events(client.post("/api/render-stream", json=payload))
+        part = events[-1]["parts"][0]
+        assert part["size_bytes"] == 84 + 50 * 1280  # normalized to binary
+        assert part["cleanup"] == {"faces_before": 1280, "faces_after": 1280}
+        assert part["glb"]["url"] == "/static/test-project_preview_main.q.glb"
+        assert next(e for e in events if e["event"] == "part_done")["glb"] == part["glb"]
+
+        plain = client.get(part["url"])
+        assert "Content-Encoding" not in plain.headers
+        assert len(plain.data) == part["size_bytes"]
+        packed = client.get(part["url"], headers={"Accept-Encoding": "gzip, deflate"})
+        assert packed.headers["Content-Encoding"] == "gzip"
+        assert packed.headers["Content-Type"] == "model/stl"
+        assert "Accept-Encoding" in packed.headers["Vary"]
+        assert gzip.decompress(packed.data) == plain.data
+        glb = client.get(part["glb"]["url"], headers={"Accept-Encoding": "gzip"})
+        assert glb.headers["Content-Type"] == "model/gltf-binary"
+        assert gzip.decompress(glb.data)[:4] == b"glTF"
+
+        # A cache hit advertises the same GLB without rendering again
+        events = _sse_events(client.post("/api/render-stream", json=payload))
+        assert mock_stream.call_count == 1
+        assert events[-1]["parts"][0]["glb"] == part["glb"]
+
+        # ...but not to a tier without premium exports
+        monkeypatch.setattr("routes.engine.render.resolve_tier", lambda claims: "guest")
+        events = _sse_events(client.post("/api/render-stream", json=payload))
+        assert "glb" not in events[-1]["parts"][0]
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_no_glb_for_free_tier(self, mock_cmd, mock_stream, client):
+        from config import Config
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = self._ascii_stream()
+
+        events = _sse_events(client.post("/api/render-stream", json={"mode": "single", "project": "test-project"}))
+        assert "glb" not in next(e for e in events if e["event"] == "part_done")
+        assert "glb" not in events[-1]["parts"][0]
+        assert not (Config.STATIC_DIR / "test-project_preview_main.q.glb").exists()
+
+    def test_stale_variant_not_served(self, client):
+        import os
+
+        from config import Config
+        path = Config.STATIC_DIR / "p.stl"
+        (Config.STATIC_DIR / "p.stl.gz").write_bytes(b"old")
+        path.write_bytes(b"new")
+        os.utime(Config.STATIC_DIR / "p.stl.gz", ns=(0, 0))
+        res = client.get("/static/p.stl", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in res.headers
+        assert res.data == b"new"
+
+    def test_missing_and_traversal_404(self, client):
+        assert client.get("/static/missing.stl").status_code == 404
+        assert client.get("/static/../test-project/main.scad").status_code == 404
+
+class TestResumableRenderStream:
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_events_carry_job_ids(self, mock_cmd, mock_stream, client):
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"grid_a": 0, "grid_b": 0})
+
+        res = client.post("/api/render-stream", json={"mode": "grid", "project": "test-project"})
+        job_id = res.headers["X-Render-Job"]
+        ids = _sse_ids(res)
+        assert ids == [f"{job_id}:{seq}" for seq in range(1, len(_sse_events(res)) + 1)]
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_render_continues_after_disconnect_and_replays(self, mock_cmd, mock_stream, client):
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"grid_a": 0.05, "grid_b": 0.05})
+
+        res = client.post("/api/render-stream", json={"mode": "grid", "project": "test-project"})
+        job_id = res.headers["X-Render-Job"]
+        first = next(iter(res.response))
+        assert first.startswith(f"id: {job_id}:1\n".encode())
+        res.close()
+
+        # Its outputs are in use (kept by the disk GC) until the job finishes
+        from config import Config
+        from services.engine.render_jobs import render_jobs
+        outputs = {str(Config.STATIC_DIR / f"test-project_preview_{part}.stl") for part in ("grid_a", "grid_b")}
+        assert outputs <= render_jobs.in_flight_files()
+        _wait_job(job_id)
+        assert not outputs & render_jobs.in_flight_files()
+
+        resumed = client.get(f"/api/render-stream/{job_id}", headers={"Last-Event-ID": f"{job_id}:1"})
+        assert resumed.status_code == 200
+        assert _sse_ids(resumed)[0] == f"{job_id}:2"
+        events = _sse_events(resumed)
+        assert events[-1]["event"] == "complete"
+        assert [p["type"] for p in events[-1]["parts"]] == ["grid_a", "grid_b"]
+        assert mock_stream.call_count == 2  # nothing rendered twice
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_post_with_last_event_id_reattaches(self, mock_cmd, mock_stream, client):
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"main": 0})
+
+        payload = {"mode": "single", "project": "test-project"}
+        job_id = client.post("/api/render-stream", json=payload).headers["X-Render-Job"]
+        resumed = client.post("/api/render-stream", json=payload, headers={"Last-Event-ID": f"{job_id}:0"})
+        assert resumed.headers["X-Render-Job"] == job_id
+        assert _sse_events(resumed)[-1]["event"] == "complete"
+        assert mock_stream.call_count == 1
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_after_query_param(self, mock_cmd, mock_stream, client):
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"main": 0})
+
+        res = client.post("/api/render-stream", json={"mode": "single", "project": "test-project"})
+        job_id = res.headers["X-Render-Job"]
+        total = len(_sse_events(res))
+        resumed = client.get(f"/api/render-stream/{job_id}?after={total - 1}")
+        assert _sse_ids(resumed) == [f"{job_id}:{total}"]
+
+    def test_unknown_job_404(self, client):
+        res = client.get("/api/render-stream/nope")
+        assert res.status_code == 404
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_job_of_another_client_forbidden(self, mock_cmd, mock_stream, client):
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"main": 0})
+
+        payload = {"mode": "single", "project": "test-project"}
+        res = client.post("/api/render-stream", json=payload, environ_base={"REMOTE_ADDR": "10.0.0.7"})
+        job_id = res.headers["X-Render-Job"]
+        _sse_events(res)
+
+        assert client.get(f"/api/render-stream/{job_id}").status_code == 403
+        res = client.post("/api/render-stream", json=payload, headers={"Last-Event-ID": f"{job_id}:0"})
+        assert res.status_code == 403
+        assert client.get(f"/api/render-stream/{job_id}", environ_base={"REMOTE_ADDR": "10.0.0.7"}).status_code == 200
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_anonymous_client_resumes_from_another_address(self, mock_cmd, mock_stream, client):
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"main": 0})
+
+        payload = {"mode": "single", "project": "test-project"}
+        res = client.post("/api/render-stream", json=payload, environ_base={"REMOTE_ADDR": "10.0.0.7"})
+        job = _sse_events(res)[0]
+        assert job["event"] == "job"
+
+        # The mobile client came back on another network
+        other = {"REMOTE_ADDR": "10.9.9.9"}
+        res = client.get(f"/api/render-stream/{job['job_id']}?resume_token={job['resume_token']}", environ_base=other)
+        assert res.status_code == 200
+        assert _sse_events(res)[-1]["event"] == "complete"
+        res = client.post("/api/render-stream", json={**payload, "resume_token": job["resume_token"]},
+                          headers={"Last-Event-ID": f"{job['job_id']}:1"}, environ_base=other)
+        assert res.headers["X-Render-Job"] == job["job_id"]
+        res = client.get(f"/api/render-stream/{job['job_id']}?resume_token=wrong", environ_base=other)
+        assert res.status_code == 403
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_user_job_needs_same_user(self, mock_cmd, mock_stream, client):
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"main": 0})
+
+        auth = {"Authorization": "Bearer t"}
+        with patch("config.Config.AUTH_ENABLED", True), \
+                patch("middleware.auth.decode_token", return_value={"sub": "user1", "roles": ["user"]}):
+            res = client.post("/api/render-stream", json={"mode": "single", "project": "test-project"}, headers=auth)
+            job = _sse_events(res)[0]
+            assert client.get(f"/api/render-stream/{job['job_id']}", headers=auth).status_code == 200
+        with patch("config.Config.AUTH_ENABLED", True), \
+                patch("middleware.auth.decode_token", return_value={"sub": "user2", "roles": ["user"]}):
+            # The token doesn't stand in for the user
+            res = client.get(f"/api/render-stream/{job['job_id']}?resume_token={job['resume_token']}", headers=auth)
+        assert res.status_code == 403
+
 
 class TestCancelEndpoint:
     @patch("routes.engine.render.cancel_openscad_render", return_value=True)
@@ -207,6 +755,60 @@ class TestCancelEndpoint:
         assert data["status"] == "no_active_render"
 
 
+class TestCancelRenderJob:
+    def _start(self, client, **kwargs):
+        """Start a slow render job, detach from it, and return its id."""
+        res = client.post("/api/render-stream", json={"mode": "single", "project": "test-project"}, **kwargs)
+        job_id = res.headers["X-Render-Job"]
+        next(iter(res.response))
+        res.close()
+        return job_id
+
+    @patch("routes.engine.render.cancel_openscad_render")
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_cancels_only_that_job(self, mock_cmd, mock_stream, mock_cancel_all, client):
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"main": 0.3})
+        cancelled_id, other_id = self._start(client), self._start(client)
+
+        res = client.post("/api/render-cancel", headers={"X-Render-Job": cancelled_id})
+        assert res.status_code == 200
+        assert res.get_json()["cancelled"] is True
+        mock_cancel_all.assert_not_called()
+
+        resumed = client.get(f"/api/render-stream/{_wait_job(cancelled_id).id}")
+        assert _sse_events(resumed)[-1] == {"event": "error", "message": "Render job cancelled"}
+        resumed = client.get(f"/api/render-stream/{_wait_job(other_id).id}")
+        assert _sse_events(resumed)[-1]["event"] == "complete"
+
+    @patch("routes.engine.render.astream_openscad_render")
+    @patch("routes.engine.render.build_openscad_command")
+    def test_job_of_another_client_forbidden(self, mock_cmd, mock_stream, client):
+        mock_cmd.return_value = ["cmd"]
+        mock_stream.side_effect = _part_streams({"main": 0})
+        job_id = self._start(client, environ_base={"REMOTE_ADDR": "10.0.0.7"})
+
+        res = client.post("/api/render-cancel", json={"job_id": job_id})
+        assert res.status_code == 403
+        assert client.post("/api/render-cancel", json={"job_id": "nope"}).status_code == 404
+
+    @patch("routes.engine.render.cancel_openscad_render", return_value=True)
+    @patch("routes.engine.render.cancel_cadquery_render", return_value=False)
+    def test_cancel_all_requires_admin(self, mock_cancel_cq, mock_cancel_scad, client):
+        user = {"sub": "user1", "roles": ["user"]}
+        admin = {"sub": "root", "roles": ["admin"]}
+        with patch("config.Config.AUTH_ENABLED", True), patch("middleware.auth.decode_token", return_value=user):
+            res = client.post("/api/render-cancel", headers={"Authorization": "Bearer t"})
+        assert res.status_code == 403
+        mock_cancel_scad.assert_not_called()
+
+        with patch("config.Config.AUTH_ENABLED", True), patch("middleware.auth.decode_token", return_value=admin):
+            res = client.post("/api/render-cancel", headers={"Authorization": "Bearer t"})
+        assert res.status_code == 200
+        assert res.get_json()["cancelled"] is True
+
+
 class TestEstimateEdgeCases:
     def test_estimate_missing_mode(self, client):
         res = client.post("/api/estimate", json={"project": "test-project"})
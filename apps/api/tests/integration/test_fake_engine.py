@@ -0,0 +1,98 @@
+"""Integration tests for the fake OpenSCAD/CadQuery executables (scripts/qa/fake_engine.py)."""
+import os
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+from config import Config
+from services.engine import cadquery_engine, openscad
+from services.engine.render_engine import RenderLimits
+
+FAKE_ENGINE = Path(__file__).resolve().parents[4] / "scripts" / "qa" / "fake_engine.py"
+
+
+@pytest.fixture(autouse=True)
+def _fake_engine_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_ENGINE_LATENCY", "fixed:0")
+    monkeypatch.setenv("FAKE_ENGINE_FACES", "40")
+    monkeypatch.setenv("FAKE_ENGINE_MESH_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "OPENSCAD_PATH", str(FAKE_ENGINE))
+    monkeypatch.setattr(Config, "CADQUERY_RUNNER", f"{sys.executable} {FAKE_ENGINE} cadquery")
+
+
+def _stl_face_count(path):
+    with open(path, "rb") as f:
+        f.seek(80)
+        return struct.unpack("<I", f.read(4))[0]
+
+
+class TestFakeOpenSCAD:
+    def test_run_render_writes_canned_mesh(self, tmp_path):
+        output = tmp_path / "out.stl"
+        cmd = openscad.build_openscad_command(str(output), str(tmp_path / "model.scad"), {"size": 10})
+        success, log = openscad.run_render(cmd)
+        assert success, log
+        assert _stl_face_count(output) == 40
+        assert output.stat().st_size == 84 + 50 * 40
+
+    def test_stream_reports_every_phase(self, tmp_path):
+        output = tmp_path / "out.stl"
+        cmd = openscad.build_openscad_command(str(output), str(tmp_path / "model.scad"), {})
+        events = list(openscad.stream_render(cmd, "main", 0, 100, 0, 1))
+        phases = [openscad.get_phase_from_line(e["line"]) for e in events if e["event"] == "output"]
+        phases = [p for p in phases if p]
+        assert phases[0] == "compiling" and phases[-1] == "done"
+        assert {"geometry", "cgal", "rendering"} <= set(phases)
+        progress = [e["progress"] for e in events if "progress" in e]
+        assert progress == sorted(progress)
+        assert events[-1]["event"] == "part_done"
+
+    def test_injected_failure(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("FAKE_ENGINE_FAIL_RATE", "1")
+        output = tmp_path / "out.stl"
+        success, log = openscad.run_render(openscad.build_openscad_command(str(output), str(tmp_path / "m.scad"), {}))
+        assert not success
+        assert "Parser error" in log
+        assert not output.exists()
+
+    def test_injected_oom_is_classified_as_memory_exhaustion(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("FAKE_ENGINE_FAIL_RATE", "1")
+        monkeypatch.setenv("FAKE_ENGINE_FAILURE", "oom")
+        cmd = openscad.build_openscad_command(str(tmp_path / "out.stl"), str(tmp_path / "m.scad"), {})
+        result = openscad.run_render(cmd, limits=RenderLimits(memory_mb=4096))
+        assert not result[0]
+        assert result.exhausted == "memory"
+
+    def test_seed_makes_outcome_deterministic(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("FAKE_ENGINE_SEED", "7")
+        monkeypatch.setenv("FAKE_ENGINE_FAIL_RATE", "0.5")
+        outcomes = set()
+        for _ in range(3):
+            output = tmp_path / "out.stl"
+            output.unlink(missing_ok=True)
+            cmd = openscad.build_openscad_command(str(output), str(tmp_path / "m.scad"), {"size": 3})
+            outcomes.add(openscad.run_render(cmd)[0])
+        assert len(outcomes) == 1
+
+
+class TestFakeCadQuery:
+    def test_runner_config_replaces_cq_runner(self, tmp_path):
+        cmd = cadquery_engine.build_cadquery_command("out.stl", "part.py", {"a": 1}, "stl")
+        assert cmd[:3] == [sys.executable, str(FAKE_ENGINE), "cadquery"]
+        assert cmd[3:] == ["part.py", "out.stl", '{"a": 1}', "stl"]
+
+    def test_default_runner(self, monkeypatch):
+        monkeypatch.setattr(Config, "CADQUERY_RUNNER", "")
+        cmd = cadquery_engine.build_cadquery_command("out.stl", "part.py", {}, "stl")
+        assert cmd[0] == "python"
+        assert os.path.basename(cmd[1]) == "cq_runner.py"
+
+    def test_run_render_writes_glb(self, tmp_path):
+        output = tmp_path / "out.glb"
+        cmd = cadquery_engine.build_cadquery_command(str(output), str(tmp_path / "part.py"), {}, "glb")
+        success, log = cadquery_engine.run_render(cmd)
+        assert success, log
+        assert "Rendering complete." in log
+        assert output.read_bytes()[:4] == b"glTF"
@@ -1,8 +1,15 @@
 """Unit tests for openscad service pure functions."""
+import sys
+import time
+
 import pytest
 from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 
+from services.engine.render_engine import RenderUsage
+
+_USAGE = RenderUsage(user_cpu_s=0.1, sys_cpu_s=0.0, max_rss_kb=1024, wall_s=0.2)
+
 
 # ---------------------------------------------------------------------------
 # get_phase_from_line
@@ -170,8 +177,8 @@ class TestOpenscadEnv:
 
     def test_run_render_passes_env(self):
         from services.engine.openscad import run_render
-        with patch("services.engine.openscad.subprocess.run") as mock_run:
-            mock_run.return_value = MagicMock(stderr="")
+        with patch("services.engine.openscad.run_limited") as mock_run:
+            mock_run.return_value = MagicMock(returncode=0, stderr="", exhausted=None)
             run_render(["openscad", "-o", "/tmp/out.stl", "/tmp/in.scad"])
             mock_run.assert_called_once()
             call_kwargs = mock_run.call_args[1]
@@ -179,47 +186,38 @@ class TestOpenscadEnv:
 
     def test_stream_render_passes_env(self):
         from services.engine.openscad import stream_render
-        with patch("services.engine.openscad.subprocess.Popen") as mock_popen:
-            mock_proc = MagicMock()
-            mock_proc.stderr = iter([])
-            mock_proc.returncode = 0
-            mock_proc.wait.return_value = 0
-            mock_proc.poll.return_value = 0
-            mock_popen.return_value = mock_proc
-            # Consume the generator
-            list(stream_render(["openscad", "-o", "/tmp/out.stl", "/tmp/in.scad"],
-                               "main", 0.0, 100.0, 0, 1))
-            mock_popen.assert_called_once()
-            call_kwargs = mock_popen.call_args[1]
-            assert "OPENSCADPATH" in call_kwargs["env"]
+        cmd = [sys.executable, "-c", "import os, sys; sys.stderr.write(os.environ['OPENSCADPATH'])"]
+        events = list(stream_render(cmd, "main", 0.0, 100.0, 0, 1))
+        from config import Config
+        assert {"event": "output", "part": "main", "line": Config.OPENSCADPATH, "progress": 5} in events
+        assert events[-1]["event"] == "part_done"
 
 
 # ---------------------------------------------------------------------------
 # stream_render timeout
 # ---------------------------------------------------------------------------
 class TestStreamRenderTimeout:
-    """Tests for stream_render kill timer."""
+    """Tests for the stream_render wall-clock limit."""
 
-    def test_stream_render_starts_and_cancels_timer(self):
+    def test_stream_render_kills_on_wall_clock_limit(self):
+        from services.engine.openscad import stream_render
+        from services.engine.render_engine import RenderLimits
+        cmd = [sys.executable, "-c", "import time; time.sleep(30)"]
+        started = time.monotonic()
+        events = list(stream_render(cmd, "main", 0.0, 100.0, 0, 1, limits=RenderLimits(wall_seconds=1)))
+        assert time.monotonic() - started < 10
+        assert events[-1]["event"] == "error"
+        assert events[-1]["resource"] == "wall_clock"
+
+    def test_closing_stream_kills_process(self, tmp_path):
         from services.engine.openscad import stream_render
-        with patch("services.engine.openscad.subprocess.Popen") as mock_popen, \
-             patch("services.engine.openscad.threading.Timer") as mock_timer_cls:
-            mock_proc = MagicMock()
-            mock_proc.stderr = iter([])
-            mock_proc.returncode = 0
-            mock_proc.wait.return_value = 0
-            mock_proc.poll.return_value = 0
-            mock_popen.return_value = mock_proc
-
-            mock_timer = MagicMock()
-            mock_timer_cls.return_value = mock_timer
-
-            list(stream_render(["openscad", "-o", "/tmp/out.stl", "/tmp/in.scad"],
-                               "main", 0.0, 100.0, 0, 1))
-
-            # Timer should have been created with 300s and started
-            mock_timer_cls.assert_called_once()
-            assert mock_timer_cls.call_args[0][0] == 300
-            mock_timer.start.assert_called_once()
-            # Timer should be cancelled in the finally block
-            mock_timer.cancel.assert_called_once()
+        marker = tmp_path / "survived"
+        cmd = [sys.executable, "-c",
+               (f"import sys, time; sys.stderr.write('Compiling design\\n'); sys.stderr.flush(); "
+                f"time.sleep(3); open({str(marker)!r}, 'w')")]
+        stream = stream_render(cmd, "main", 0.0, 100.0, 0, 1)
+        assert next(stream)["event"] == "part_start"
+        assert next(stream)["event"] == "output"
+        stream.close()
+        time.sleep(3.5)
+        assert not marker.exists()
@@ -0,0 +1,192 @@
+"""Tests for the shared artifact store (local directory and S3-compatible backends)."""
+import io
+import json
+import os
+import time
+
+import pytest
+
+from config import Config
+from services.engine import artifact_store
+from services.engine.render_cache import RenderCache
+
+
+class FakeS3Error(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class FakeS3Client:
+    """In-memory stand-in for the parts of a boto3 S3 client the store uses."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def upload_file(self, filename, bucket, key):
+        with open(filename, "rb") as f:
+            self.objects[(bucket, key)] = f.read()
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = Body
+
+    def _get(self, bucket, key):
+        if (bucket, key) not in self.objects:
+            raise FakeS3Error("NoSuchKey")
+        return self.objects[(bucket, key)]
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self._get(Bucket, Key))}
+
+    def download_file(self, bucket, key, filename):
+        data = self._get(bucket, key)
+        with open(filename, "wb") as f:
+            f.write(data)
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://s3.test/{Params['Bucket']}/{Params['Key']}?expires={ExpiresIn}"
+
+
+@pytest.fixture(params=["local", "s3"])
+def store(request, tmp_path):
+    if request.param == "local":
+        return artifact_store.LocalArtifactStore(str(tmp_path / "pool"))
+    return artifact_store.S3ArtifactStore("bucket", "y4d/", client=FakeS3Client(), presign_ttl=60)
+
+
+class TestBackends:
+    def test_round_trip(self, store, tmp_path):
+        src = tmp_path / "a.stl"
+        src.write_bytes(b"solid a")
+        store.put_file("renders/k/a.stl", str(src))
+        store.put_bytes("renders/k.json", b"{}")
+        assert store.get_bytes("renders/k.json") == b"{}"
+        dest = tmp_path / "static" / "a.stl"
+        assert store.fetch("renders/k/a.stl", str(dest))
+        assert dest.read_bytes() == b"solid a"
+        assert oct(dest.stat().st_mode & 0o777) == oct(0o644)
+        store.delete("renders/k/a.stl")
+        assert not store.fetch("renders/k/a.stl", str(tmp_path / "b.stl"))
+        assert store.get_bytes("missing") is None
+        assert not (tmp_path / "b.stl").exists()
+
+    def test_presigned_url(self):
+        store = artifact_store.S3ArtifactStore("bucket", "y4d/", client=FakeS3Client(), presign_ttl=60)
+        assert store.url("renders/k/a.stl") == "https://s3.test/bucket/y4d/renders/k/a.stl?expires=60"
+        assert artifact_store.LocalArtifactStore("/tmp").url("renders/k/a.stl") is None
+
+    def test_incomplete_backend_rejected(self):
+        class NoDelete(artifact_store.ArtifactStore):
+            def put_file(self, key, path): ...
+            def put_bytes(self, key, data): ...
+            def get_bytes(self, key): ...
+            def fetch(self, key, dest): ...
+
+        with pytest.raises(TypeError, match="delete"):
+            NoDelete()
+
+    def test_other_s3_errors_raise(self):
+        client = FakeS3Client()
+        client.get_object = lambda **kwargs: (_ for _ in ()).throw(FakeS3Error("AccessDenied"))
+        with pytest.raises(FakeS3Error):
+            artifact_store.S3ArtifactStore("bucket", client=client).get_bytes("x")
+
+    def test_local_keys_stay_under_root(self, tmp_path):
+        with pytest.raises(ValueError):
+            artifact_store.LocalArtifactStore(str(tmp_path)).get_bytes("../secret")
+
+
+class TestConfiguredStore:
+    def test_built_from_config(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(Config, "ARTIFACT_STORE", "")
+        assert artifact_store.get_artifact_store() is None
+        monkeypatch.setattr(Config, "ARTIFACT_STORE", "local")
+        monkeypatch.setattr(Config, "ARTIFACT_LOCAL_DIR", str(tmp_path))
+        store = artifact_store.get_artifact_store()
+        assert isinstance(store, artifact_store.LocalArtifactStore)
+        assert artifact_store.get_artifact_store() is store
+
+    def test_s3_without_boto3_or_bucket_disabled(self, monkeypatch):
+        monkeypatch.setattr(Config, "ARTIFACT_STORE", "s3")
+        monkeypatch.setattr(Config, "ARTIFACT_S3_BUCKET", "")
+        assert artifact_store.get_artifact_store() is None
+
+
+class TestSharedRenderCache:
+    """Two replicas: separate static folders and caches, one pool."""
+
+    @pytest.fixture
+    def pool(self, store, monkeypatch):
+        monkeypatch.setattr(artifact_store, "get_artifact_store", lambda: store)
+        monkeypatch.setattr("services.engine.render_cache.get_artifact_store", lambda: store)
+        return store
+
+    def _render(self, static_dir):
+        static_dir.mkdir(exist_ok=True)
+        (static_dir / "p_preview_main.stl").write_bytes(b"mesh")
+        (static_dir / "p_preview_main.stl.gz").write_bytes(b"gz")
+        (static_dir / "p_preview_main.q.glb").write_bytes(b"glb")
+        return str(static_dir / "p_preview_main.stl")
+
+    def test_render_on_one_replica_is_a_hit_on_another(self, pool, tmp_path, monkeypatch):
+        path = self._render(tmp_path / "a")
+        glb = {"url": "/static/p_preview_main.q.glb", "size_bytes": 3}
+        RenderCache().put("p", "main.scad", {"w": 1}, "main", "stl", path, 4, glb=glb, cleanup={"faces_before": 2, "faces_after": 1})
+        shared = json.loads(pool.get_bytes(f"renders/{RenderCache().key('p', 'main.scad', {'w': 1}, 'main', 'stl')}.json"))
+        assert shared["files"] == ["p_preview_main.stl", "p_preview_main.stl.gz", "p_preview_main.q.glb"]
+
+        other = tmp_path / "b"
+        other.mkdir()
+        monkeypatch.setattr(Config, "STATIC_DIR", other)
+        cache = RenderCache()
+        assert cache.get("p", "main.scad", {"w": 2}, "main", "stl") is None
+        entry = cache.get("p", "main.scad", {"w": 1}, "main", "stl")
+        assert entry["path"] == str(other / "p_preview_main.stl")
+        assert (entry["size_bytes"], entry["glb"], entry["cleanup"]) == (4, glb, {"faces_before": 2, "faces_after": 1})
+        assert sorted(os.listdir(other)) == ["p_preview_main.q.glb", "p_preview_main.stl", "p_preview_main.stl.gz"]
+
+    def test_manifest_change_is_a_miss_after_restart(self, pool, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, "MANIFEST_CHECK_INTERVAL_S", 3600)
+        # conftest points CARTRIDGES_DIRS at tmp_path
+        project_dir = tmp_path / "p"
+        project_dir.mkdir()
+        (project_dir / "project.json").write_text('{"parts": [{"id": "main"}]}')
+        path = self._render(tmp_path / "a")
+        cache = RenderCache()
+        cache.put("p", "main.scad", {"w": 1}, "main", "stl", path, 4)
+
+        (project_dir / "project.json").write_text('{"parts": [{"id": "main", "render_mode": 1}]}')
+        from manifest import manifest_service
+        manifest_service.invalidate_cache("p")
+        other = tmp_path / "b"
+        other.mkdir()
+        monkeypatch.setattr(Config, "STATIC_DIR", other)
+        # This process sees the change right away, despite the check interval
+        assert cache.get("p", "main.scad", {"w": 1}, "main", "stl") is None
+        # A new process (or another replica) computes the new source version
+        assert RenderCache().get("p", "main.scad", {"w": 1}, "main", "stl") is None
+        assert os.listdir(other) == []
+
+    def test_render_older_than_ttl_not_restored(self, pool, tmp_path, monkeypatch):
+        path = self._render(tmp_path / "a")
+        RenderCache().put("p", "main.scad", {"w": 1}, "main", "stl", path, 4)
+        other = tmp_path / "b"
+        other.mkdir()
+        monkeypatch.setattr(Config, "STATIC_DIR", other)
+        later = time.time() + 7200
+        monkeypatch.setattr(time, "time", lambda: later)
+        assert RenderCache(ttl=3600).get("p", "main.scad", {"w": 1}, "main", "stl") is None
+        assert not artifact_store.restore_static(pool, "p_preview_main.stl", str(other), max_age=3600)
+        assert os.listdir(other) == []
+
+    def test_restore_static_follows_latest_render(self, pool, tmp_path):
+        path = self._render(tmp_path / "a")
+        RenderCache().put("p", "main.scad", {"w": 1}, "main", "stl", path, 4)
+        other = tmp_path / "b"
+        other.mkdir()
+        assert artifact_store.restore_static(pool, "p_preview_main.stl", str(other))
+        assert (other / "p_preview_main.stl").read_bytes() == b"mesh"
+        assert not artifact_store.restore_static(pool, "p_preview_other.stl", str(other))
@@ -0,0 +1,144 @@
+"""Tests for the ASGI adapter (asgi.py)."""
+import asyncio
+import threading
+
+import pytest
+from flask import Flask, Response, jsonify, request
+
+import asgi
+from services.engine.stream_engine import AsyncBody
+
+
+@pytest.fixture
+def flask_app(monkeypatch):
+    app = Flask(__name__)
+    app.state = {"closed": asyncio.Event(), "threads": []}
+
+    @app.route("/json", methods=["GET", "POST"])
+    def json_route():
+        app.state["threads"].append(threading.current_thread().name)
+        return jsonify({"method": request.method, "body": request.get_json(silent=True),
+                        "q": request.args.get("q")})
+
+    @app.route("/stream")
+    def stream_route():
+        async def events():
+            try:
+                yield "data: 1\n\n"
+                yield "data: 2\n\n"
+                if request_wait:
+                    await asyncio.sleep(30)
+                yield "data: 3\n\n"
+            finally:
+                app.state["closed"].set()
+
+        request_wait = request.args.get("wait") == "1"
+        return Response(AsyncBody(events()), mimetype="text/event-stream")
+
+    @app.route("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(asgi, "flask_app", app)
+    return app
+
+
+def _scope(path, method="GET", query=b"", headers=()):
+    return {"type": "http", "method": method, "path": path, "query_string": query, "root_path": "",
+            "headers": list(headers), "http_version": "1.1", "scheme": "http",
+            "server": ("testserver", 80), "client": ("127.0.0.1", 5555)}
+
+
+async def _call(scope, body=b"", disconnect_after=None):
+    """Run asgi.app; return (status, headers, body chunks)."""
+    sent = []
+    incoming = [{"type": "http.request", "body": body, "more_body": False}]
+    gone = asyncio.Event()
+
+    async def receive():
+        if incoming:
+            return incoming.pop(0)
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        chunks = [m for m in sent if m["type"] == "http.response.body" and m["body"]]
+        if disconnect_after is not None and len(chunks) >= disconnect_after:
+            gone.set()
+
+    await asgi.app(scope, receive, send)
+    start = sent[0]
+    chunks = [m["body"] for m in sent[1:] if m["body"]]
+    assert sent[-1]["more_body"] is False or disconnect_after is not None
+    return start["status"], dict(start["headers"]), chunks
+
+
+class TestAsgiAdapter:
+    def test_json_route_dispatches_on_pool(self, flask_app):
+        status, headers, chunks = asyncio.run(_call(_scope("/json", query=b"q=x")))
+        assert status == 200
+        assert headers[b"content-type"] == b"application/json"
+        assert b'"q":"x"' in b"".join(chunks)
+        assert flask_app.state["threads"][0].startswith("asgi-dispatch")
+
+    def test_request_body_and_headers(self, flask_app):
+        body = b'{"a": 1}'
+        scope = _scope("/json", method="POST", headers=[(b"content-type", b"application/json"),
+                                                        (b"content-length", str(len(body)).encode())])
+        status, _, chunks = asyncio.run(_call(scope, body=body))
+        assert status == 200
+        assert b'"body":{"a":1}' in b"".join(chunks)
+
+    def test_async_body_streams_from_event_loop(self, flask_app):
+        status, headers, chunks = asyncio.run(_call(_scope("/stream")))
+        assert status == 200
+        assert headers[b"content-type"].startswith(b"text/event-stream")
+        assert chunks == [b"data: 1\n\n", b"data: 2\n\n", b"data: 3\n\n"]
+
+    def test_disconnect_cancels_stream(self, flask_app):
+        async def run():
+            result = await asyncio.wait_for(_call(_scope("/stream", query=b"wait=1"), disconnect_after=2), 5)
+            return result, flask_app.state["closed"].is_set()
+
+        (status, _, chunks), closed = asyncio.run(run())
+        assert status == 200
+        assert chunks == [b"data: 1\n\n", b"data: 2\n\n"]
+        assert closed
+
+    def test_head_skips_async_body(self, flask_app):
+        status, _, chunks = asyncio.run(_call(_scope("/stream", method="HEAD")))
+        assert status == 200
+        assert chunks == []
+        assert not flask_app.state["closed"].is_set()
+
+    def test_unhandled_error_returns_500(self, flask_app):
+        status, _, _ = asyncio.run(_call(_scope("/boom")))
+        assert status == 500
+
+    def test_lifespan(self):
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        asyncio.run(asgi.app({"type": "lifespan"}, receive, send))
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+
+class TestBuildEnviron:
+    def test_headers_and_root_path(self):
+        scope = _scope("/api/x/health", query=b"a=1", headers=[(b"x-forwarded-for", b"1.2.3.4"),
+                                                             (b"accept", b"a"), (b"accept", b"b")])
+        scope["root_path"] = "/api/x"
+        environ = asgi.build_environ(scope, b"")
+        assert environ["SCRIPT_NAME"] == "/api/x"
+        assert environ["PATH_INFO"] == "/health"
+        assert environ["QUERY_STRING"] == "a=1"
+        assert environ["HTTP_X_FORWARDED_FOR"] == "1.2.3.4"
+        assert environ["HTTP_ACCEPT"] == "a,b"
+        assert environ["REMOTE_ADDR"] == "127.0.0.1"
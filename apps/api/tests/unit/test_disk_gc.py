@@ -0,0 +1,118 @@
+"""Tests for the disk quota garbage collector."""
+import os
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from config import Config
+from services.engine import disk_gc
+from services.engine.render_cache import RenderCache
+from services.engine.render_jobs import RenderJobRegistry
+
+HOUR = 3600
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    static_dir = tmp_path / "static"
+    static_dir.mkdir()
+    projects_dir = tmp_path / "projects"
+    (projects_dir / "demo" / "exports" / "models").mkdir(parents=True)
+    monkeypatch.setattr(Config, "STATIC_DIR", static_dir)
+    monkeypatch.setattr(Config, "PROJECTS_DIR", projects_dir)
+    monkeypatch.setattr(Config, "DISK_GC_BUDGET_BYTES", 1000)
+    monkeypatch.setattr(Config, "DISK_GC_HIGH_WATERMARK", 0.9)
+    monkeypatch.setattr(Config, "DISK_GC_LOW_WATERMARK", 0.5)
+    monkeypatch.setattr(Config, "DISK_GC_MIN_AGE_S", 60)
+    monkeypatch.setattr(disk_gc, "render_cache", RenderCache())
+    monkeypatch.setattr(disk_gc, "render_jobs", RenderJobRegistry())
+    return static_dir, projects_dir
+
+
+def _write(path, size, age_h):
+    path.write_bytes(b"x" * size)
+    stamp = time.time() - age_h * HOUR
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_artifact_key_groups_derived_files():
+    keys = {disk_gc.artifact_key(f"/s/{name}") for name in (
+        "p_preview_main.stl", "p_preview_main.stl.gz", "p_preview_main.lod5.stl.br", "p_preview_main.q.glb")}
+    assert keys == {"/s/p_preview_main"}
+
+
+class TestSweep:
+    def test_under_high_watermark_keeps_everything(self, dirs):
+        static_dir, _ = dirs
+        _write(static_dir / "a.stl", 800, 5)
+        stats = disk_gc.sweep()
+        assert (stats["usage_bytes"], stats["evicted_files"]) == (800, 0)
+        assert (static_dir / "a.stl").exists()
+
+    def test_evicts_least_recently_used_down_to_low_watermark(self, dirs):
+        static_dir, _ = dirs
+        _write(static_dir / "old.stl", 300, 5)
+        _write(static_dir / "old.stl.gz", 100, 5)
+        _write(static_dir / "mid.stl", 300, 4)
+        _write(static_dir / "new.stl", 300, 3)
+        stats = disk_gc.sweep()
+        assert sorted(os.listdir(static_dir)) == ["new.stl"]
+        assert (stats["evicted_files"], stats["evicted_bytes"], stats["usage_bytes"]) == (3, 700, 300)
+
+    def test_cache_hits_count_as_use(self, dirs):
+        static_dir, _ = dirs
+        hit = _write(static_dir / "hit.stl", 500, 5)
+        _write(static_dir / "other.stl", 500, 3)
+        disk_gc.render_cache.put("p", "main.scad", {}, "main", "stl", str(hit), 500)
+        assert disk_gc.render_cache.get("p", "main.scad", {}, "main", "stl")
+        disk_gc.sweep()
+        assert sorted(os.listdir(static_dir)) == ["hit.stl"]
+
+    def test_keeps_in_flight_and_recent_files(self, dirs):
+        static_dir, _ = dirs
+        _write(static_dir / "job.stl", 400, 5)
+        _write(static_dir / "job.q.glb", 100, 5)
+        _write(static_dir / "fresh.stl", 400, 0)
+        _write(static_dir / "old.stl", 100, 4)
+        with disk_gc.render_jobs.pinned([str(static_dir / "job.stl")]):
+            stats = disk_gc.sweep()
+        assert sorted(os.listdir(static_dir)) == ["fresh.stl", "job.q.glb", "job.stl"]
+        assert (stats["skipped_in_flight"], stats["skipped_recent"]) == (1, 1)
+
+    def test_parity_outputs_only_in_exports(self, dirs):
+        static_dir, projects_dir = dirs
+        exports = projects_dir / "demo" / "exports"
+        _write(exports / "single_scad.stl", 600, 5)
+        _write(exports / "single_cq.stl", 600, 5)
+        _write(exports / "models" / "published.stl", 500, 9)
+        _write(static_dir / ".keep", 500, 9)
+        disk_gc.sweep()
+        assert not (exports / "single_scad.stl").exists()
+        assert not (exports / "single_cq.stl").exists()
+        assert (exports / "models" / "published.stl").exists()
+        assert (static_dir / ".keep").exists()
+
+
+class TestCollector:
+    def test_run_once_records_metrics(self, dirs):
+        static_dir, _ = dirs
+        _write(static_dir / "a.stl", 950, 5)
+        before = REGISTRY.get_sample_value("yantra4d_disk_gc_evicted_bytes_total") or 0
+        stats = disk_gc.DiskGarbageCollector().run_once()
+        assert stats["evicted_bytes"] == 950
+        assert REGISTRY.get_sample_value("yantra4d_disk_gc_evicted_bytes_total") == before + 950
+        assert REGISTRY.get_sample_value("yantra4d_disk_gc_usage_bytes") == 0
+        assert REGISTRY.get_sample_value("yantra4d_disk_gc_budget_bytes") == 1000
+
+    def test_one_sweep_at_a_time(self, dirs):
+        with disk_gc._exclusive() as acquired:
+            assert acquired
+            assert disk_gc.DiskGarbageCollector().run_once() is None
+
+    def test_zero_budget_disables(self, dirs, monkeypatch):
+        monkeypatch.setattr(Config, "DISK_GC_BUDGET_BYTES", 0)
+        collector = disk_gc.DiskGarbageCollector()
+        collector.start()
+        assert collector._thread is None
@@ -224,3 +224,89 @@ class TestInvalidateCache:
         invalidate_cache("cached")
         m2 = load_manifest("cached")
         assert m1 is not m2
+
+
+# ---- hot reload ----
+
+def _edit(project_dir, name):
+    path = project_dir / "project.json"
+    data = json.loads(path.read_text())
+    data["project"]["name"] = name
+    path.write_text(json.dumps(data))
+
+
+class TestHotReload:
+    @pytest.fixture(autouse=True)
+    def check_every_load(self, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "MANIFEST_CHECK_INTERVAL_S", 0)
+
+    def test_changed_file_reloaded(self, tmp_path):
+        d = _write_manifest(tmp_path, "hot")
+        m1 = load_manifest("hot")
+        assert load_manifest("hot") is m1  # unchanged: not re-read
+        _edit(d, "Renamed project")
+        m2 = load_manifest("hot")
+        assert m2 is not m1
+        assert m2.project["name"] == "Renamed project"
+
+    def test_checked_at_most_every_interval(self, tmp_path, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "MANIFEST_CHECK_INTERVAL_S", 3600)
+        d = _write_manifest(tmp_path, "hot")
+        m1 = load_manifest("hot")
+        _edit(d, "Renamed project")
+        assert load_manifest("hot") is m1
+
+    def test_broken_edit_keeps_previous(self, tmp_path):
+        d = _write_manifest(tmp_path, "hot")
+        m1 = load_manifest("hot")
+        (d / "project.json").write_text("{half written")
+        assert load_manifest("hot") is m1
+        (d / "project.json").write_text(json.dumps(m1._data).replace('"Demo"', '"Fixed"'))
+        assert load_manifest("hot").project["name"] == "Fixed"
+
+    def test_removed_file_raises(self, tmp_path):
+        d = _write_manifest(tmp_path, "hot")
+        load_manifest("hot")
+        (d / "project.json").unlink()
+        with pytest.raises(RuntimeError, match="not found"):
+            load_manifest("hot")
+
+    def test_listeners_notified(self, tmp_path):
+        from manifest import ManifestService
+        service = ManifestService()
+        changes = []
+        service.on_change(lambda project_dir, manifest: changes.append((project_dir.name, manifest)))
+        d = _write_manifest(tmp_path, "hot")
+        service.load_manifest("hot")
+        assert changes == []
+        _edit(d, "Renamed project")
+        reloaded = service.load_manifest("hot")
+        service.invalidate_cache("hot")
+        assert changes == [("hot", reloaded), ("hot", None)]
+
+    def test_watch_events_reload(self, tmp_path):
+        from types import SimpleNamespace
+
+        from manifest import ManifestService, _ManifestEventHandler
+        service = ManifestService()
+        scheduled = []
+        handler = _ManifestEventHandler(service, SimpleNamespace(schedule=lambda *args, **kwargs: scheduled.append(args[1])))
+        d = _write_manifest(tmp_path, "hot")
+        m1 = service.load_manifest("hot")
+        _edit(d, "Renamed project")
+        handler.dispatch(SimpleNamespace(event_type="modified", is_directory=False, src_path=str(d / "main.scad")))
+        assert service._manifest_cache[str(d)].manifest is m1
+        handler.dispatch(SimpleNamespace(event_type="moved", is_directory=False, src_path=str(d / ".project.json.tmp"),
+                                         dest_path=str(d / "project.json")))
+        assert service._manifest_cache[str(d)].manifest.project["name"] == "Renamed project"
+
+        handler.dispatch(SimpleNamespace(event_type="created", is_directory=True, src_path=str(tmp_path / "new")))
+        handler.dispatch(SimpleNamespace(event_type="created", is_directory=True, src_path=str(d / "nested")))
+        assert scheduled == [str(tmp_path / "new")]
+
+    def test_no_watcher_without_watchdog(self, monkeypatch):
+        import manifest
+        monkeypatch.setattr(manifest, "HAS_WATCHDOG", False)
+        assert manifest.ManifestService().start_watcher() is False
@@ -0,0 +1,75 @@
+"""Tests for the post-render mesh cleanup stage."""
+import numpy as np
+import trimesh
+
+from config import Config
+from services.engine import mesh_cleanup
+
+
+def _soup(mesh: trimesh.Trimesh) -> trimesh.Trimesh:
+    """Return *mesh* as an STL-style triangle soup (three unshared corners per face)."""
+    return trimesh.Trimesh(vertices=mesh.triangles.reshape(-1, 3),
+                           faces=np.arange(len(mesh.faces) * 3).reshape(-1, 3), process=False)
+
+
+class TestCleanMesh:
+    def test_welds_soup(self):
+        cleaned = mesh_cleanup.clean_mesh(_soup(trimesh.creation.box()), coplanar=False)
+        assert (len(cleaned.vertices), len(cleaned.faces)) == (8, 12)
+        assert cleaned.is_watertight
+
+    def test_weld_tolerance(self):
+        vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1e-7, 0, 0], [1, 1e-7, 0], [0, 1, 1e-7]], dtype=float)
+        faces = np.array([[0, 1, 2], [3, 4, 5]])
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+        assert len(mesh_cleanup.clean_mesh(mesh, tolerance=1e-5, coplanar=False).faces) == 1
+        assert len(mesh_cleanup.clean_mesh(mesh, tolerance=1e-9, coplanar=False).faces) == 2
+
+    def test_degenerate_and_duplicate_faces_removed(self):
+        box = trimesh.creation.box()
+        # Vertex 9 lies on the edge between vertices 0 and 1
+        vertices = np.vstack([box.vertices, [[0.1, 0.2, 0.3]], (box.vertices[0] + box.vertices[1]) / 2])
+        faces = np.vstack([box.faces, [box.faces[0], box.faces[0][::-1], [0, 0, 1], [0, 1, 9], [0, 1, 8]]])
+        cleaned = mesh_cleanup.clean_mesh(trimesh.Trimesh(vertices=vertices, faces=faces, process=False),
+                                          coplanar=False)
+        # Only [0, 1, 8] survives besides the box; its vertex 8 is kept
+        assert len(cleaned.faces) == 13
+        assert len(cleaned.vertices) == 9
+
+    def test_coplanar_regions_merged(self):
+        box = trimesh.creation.box((10, 10, 10)).subdivide().subdivide().subdivide()
+        cleaned = mesh_cleanup.clean_mesh(_soup(box), coplanar=True)
+        assert len(cleaned.faces) == 12
+        assert cleaned.is_watertight
+        assert abs(cleaned.volume - 1000) < 1e-6
+
+    def test_coplanar_merge_keeps_curved_surfaces(self):
+        cylinder = trimesh.creation.cylinder(radius=5, height=20, sections=32).subdivide()
+        cleaned = mesh_cleanup.clean_mesh(cylinder, coplanar=True)
+        assert len(cleaned.faces) < len(cylinder.faces)
+        assert cleaned.is_watertight
+        assert abs(cleaned.volume - cylinder.volume) < 1e-6
+        assert np.allclose(cleaned.bounds, cylinder.bounds)
+        sphere = trimesh.creation.icosphere(subdivisions=2)
+        assert len(mesh_cleanup.clean_mesh(sphere, coplanar=True).faces) == len(sphere.faces)
+
+
+class TestCleanupFile:
+    def test_rewrites_and_reports(self, tmp_path):
+        path = tmp_path / "p_preview_main.stl"
+        box = trimesh.creation.box()
+        trimesh.Trimesh(vertices=box.vertices, faces=np.vstack([box.faces, box.faces[:2]]), process=False).export(path)
+        assert mesh_cleanup.cleanup_file(str(path)) == {"faces_before": 14, "faces_after": 12}
+        assert path.stat().st_size == 84 + 50 * 12
+
+    def test_disabled_unsupported_and_unreadable(self, tmp_path, monkeypatch):
+        path = tmp_path / "p_preview_main.stl"
+        trimesh.creation.box().export(path)
+        assert mesh_cleanup.cleanup_file(str(tmp_path / "p_preview_main.step")) is None
+        monkeypatch.setattr(Config, "RENDER_CLEANUP_ENABLED", False)
+        assert mesh_cleanup.cleanup_file(str(path)) is None
+        monkeypatch.setattr(Config, "RENDER_CLEANUP_ENABLED", True)
+        path.write_bytes(b"not a mesh")
+        assert mesh_cleanup.cleanup_file(str(path)) is None
+        assert path.read_bytes() == b"not a mesh"
+        assert mesh_cleanup.cleanup_file(str(tmp_path / "missing.stl")) is None
@@ -0,0 +1,95 @@
+"""Tests for decimated mesh levels of detail."""
+import pytest
+import trimesh
+
+from config import Config
+from services.engine import mesh_lod
+
+
+def _sphere(path, subdivisions=5):
+    mesh = trimesh.creation.icosphere(subdivisions=subdivisions)  # 20 * 4**n faces
+    mesh.export(path)
+    return mesh
+
+
+class TestLodLevels:
+    def test_parse(self, monkeypatch):
+        monkeypatch.setattr(Config, "RENDER_LOD_LEVELS", "0.25, x,0.05,1.5,0.25")
+        assert mesh_lod.lod_levels() == [0.05, 0.25]
+
+    def test_lod_path(self):
+        assert mesh_lod.lod_path("/s/p_preview_main.stl", 0.05) == "/s/p_preview_main.lod5.stl"
+        assert mesh_lod.lod_path("/s/p_preview_main.stl", 0.25) == "/s/p_preview_main.lod25.stl"
+
+
+class TestClusterVertices:
+    def test_reaches_target(self):
+        mesh = trimesh.creation.icosphere(subdivisions=5)
+        reduced = mesh_lod.cluster_vertices(mesh, 1000)
+        assert 500 < len(reduced.faces) < 2000
+        # Still a sphere of the same size
+        assert abs(reduced.bounding_box.extents.max() - mesh.bounding_box.extents.max()) < 0.1
+
+    def test_no_degenerate_or_duplicate_faces(self):
+        reduced = mesh_lod.cluster_vertices(trimesh.creation.icosphere(subdivisions=4), 300)
+        faces = reduced.faces
+        assert (faces[:, 0] != faces[:, 1]).all() and (faces[:, 1] != faces[:, 2]).all()
+        assert len({tuple(sorted(f)) for f in faces.tolist()}) == len(faces)
+
+
+class TestQuadricDecimation:
+    def test_quadric_path(self):
+        pytest.importorskip("fast_simplification")
+        assert mesh_lod.HAS_QUADRIC
+        mesh = trimesh.creation.icosphere(subdivisions=5)
+        reduced = mesh_lod.decimate(mesh, 1000)
+        assert 900 <= len(reduced.faces) <= 1100
+        assert abs(reduced.bounding_box.extents.max() - mesh.bounding_box.extents.max()) < 0.1
+
+    def test_falls_back_to_clustering(self, monkeypatch):
+        monkeypatch.setattr(mesh_lod, "HAS_QUADRIC", False)
+        mesh = trimesh.creation.icosphere(subdivisions=4)
+        assert len(mesh_lod.decimate(mesh, 300).faces) == len(mesh_lod.cluster_vertices(mesh, 300).faces)
+
+
+class TestGenerateLods:
+    def test_writes_levels(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, "RENDER_LOD_MIN_FACES", 100)
+        path = tmp_path / "p_preview_main.stl"
+        full = _sphere(path)
+        lods = mesh_lod.generate_lods(str(path))
+        assert [lod["ratio"] for lod in lods] == [0.05, 0.25]
+        assert lods[0]["url"] == "/static/p_preview_main.lod5.stl"
+        for lod in lods:
+            written = trimesh.load(tmp_path / lod["url"].rsplit("/", 1)[1])
+            assert len(written.faces) == lod["faces"] < len(full.faces)
+        assert lods[0]["size_bytes"] < lods[1]["size_bytes"] < path.stat().st_size
+
+    def test_small_mesh_skipped_and_stale_lods_removed(self, tmp_path, monkeypatch):
+        path = tmp_path / "p_preview_main.stl"
+        (tmp_path / "p_preview_main.lod5.stl").write_bytes(b"stale")
+        _sphere(path, subdivisions=2)
+        monkeypatch.setattr(Config, "RENDER_LOD_MIN_FACES", 50000)
+        assert mesh_lod.generate_lods(str(path)) == []
+        assert not (tmp_path / "p_preview_main.lod5.stl").exists()
+
+    def test_disabled_and_unsupported_format(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, "RENDER_LOD_MIN_FACES", 10)
+        path = tmp_path / "p_preview_main.stl"
+        _sphere(path, subdivisions=2)
+        monkeypatch.setattr(Config, "RENDER_LOD_ENABLED", False)
+        assert mesh_lod.generate_lods(str(path)) == []
+        monkeypatch.setattr(Config, "RENDER_LOD_ENABLED", True)
+        assert mesh_lod.generate_lods(str(tmp_path / "p_preview_main.step")) == []
+
+    def test_unreadable_mesh_yields_no_lods(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, "RENDER_LOD_MIN_FACES", 10)
+        path = tmp_path / "p_preview_main.stl"
+        path.write_bytes(b"not a mesh")
+        assert mesh_lod.generate_lods(str(path)) == []
+
+    def test_existing_lods(self, tmp_path):
+        (tmp_path / "a.lod5.stl").write_bytes(b"x")
+        lods = [{"url": "/static/a.lod5.stl"}, {"url": "/static/a.lod25.stl"}]
+        assert mesh_lod.existing_lods(lods, str(tmp_path)) == [{"url": "/static/a.lod5.stl"}]
+        assert mesh_lod.existing_lods(None, str(tmp_path)) == []
@@ -0,0 +1,123 @@
+"""Tests for post-render mesh packaging (binary STL, precompression, quantized GLB)."""
+import gzip
+import io
+import json
+import os
+import struct
+
+import numpy as np
+import trimesh
+
+from config import Config
+from services.engine import mesh_packaging
+
+
+def _glb_json(data: bytes) -> dict:
+    magic, version, length = struct.unpack_from("<4sII", data, 0)
+    assert (magic, version, length) == (b"glTF", 2, len(data))
+    chunk_length, chunk_type = struct.unpack_from("<I4s", data, 12)
+    assert chunk_type == b"JSON"
+    return json.loads(data[20:20 + chunk_length])
+
+
+class TestNormalizeStl:
+    def test_ascii_rewritten_as_binary(self, tmp_path):
+        path = tmp_path / "p_preview_main.stl"
+        path.write_bytes(trimesh.creation.box().export(file_type="stl_ascii").encode())
+        ascii_size = path.stat().st_size
+        assert mesh_packaging.normalize_stl(str(path))
+        assert path.stat().st_size == 84 + 50 * 12 < ascii_size
+        assert len(trimesh.load(path).faces) == 12
+
+    def test_binary_and_unparseable_left_alone(self, tmp_path):
+        binary = tmp_path / "a.stl"
+        trimesh.creation.box().export(binary)
+        assert not mesh_packaging.normalize_stl(str(binary))
+        junk = tmp_path / "b.stl"
+        junk.write_bytes(b"solid nothing here")
+        assert not mesh_packaging.normalize_stl(str(junk))
+        assert junk.read_bytes() == b"solid nothing here"
+
+
+class TestPrecompress:
+    def test_writes_gzip_sibling(self, tmp_path):
+        path = tmp_path / "a.stl"
+        path.write_bytes(b"facet " * 1000)
+        assert "gzip" in mesh_packaging.precompress(str(path))
+        assert gzip.decompress((tmp_path / "a.stl.gz").read_bytes()) == path.read_bytes()
+
+    def test_incompressible_skipped(self, tmp_path):
+        path = tmp_path / "a.stl"
+        path.write_bytes(os.urandom(4096))
+        assert mesh_packaging.precompress(str(path)) == []
+        assert not (tmp_path / "a.stl.gz").exists()
+
+
+class TestQuantizedGlb:
+    def test_round_trips_within_quantization_error(self):
+        mesh = trimesh.creation.icosphere(subdivisions=3)
+        mesh.apply_scale(40)
+        mesh.apply_translation([100, 0, -5])
+        data = mesh_packaging.encode_quantized_glb(mesh)
+        gltf = _glb_json(data)
+        assert gltf["extensionsRequired"] == ["KHR_mesh_quantization"]
+        assert gltf["accessors"][0]["componentType"] == 5122
+
+        loaded = trimesh.load(io.BytesIO(data), file_type="glb").to_mesh()
+        assert len(loaded.faces) == len(mesh.faces)
+        assert np.allclose(loaded.bounds, mesh.bounds, atol=80 / 32767)
+
+    def test_flat_faces_share_vertices(self):
+        gltf = _glb_json(mesh_packaging.encode_quantized_glb(trimesh.creation.box()))
+        # 6 sides x 4 corners, not 12 triangles x 3
+        assert gltf["accessors"][0]["count"] == 24
+
+
+class TestPackageMesh:
+    def test_packages_ascii_stl(self, tmp_path):
+        path = tmp_path / "p_preview_main.stl"
+        path.write_bytes(trimesh.creation.icosphere(subdivisions=3).export(file_type="stl_ascii").encode())
+        packaged = mesh_packaging.package_mesh(str(path))
+        assert packaged["size_bytes"] == path.stat().st_size == 84 + 50 * 1280
+        assert packaged["lods"] == []
+        assert packaged["glb"]["url"] == "/static/p_preview_main.q.glb"
+        assert packaged["glb"]["size_bytes"] < packaged["size_bytes"]
+        assert (tmp_path / "p_preview_main.stl.gz").is_file()
+        assert (tmp_path / "p_preview_main.q.glb").is_file()
+
+    def test_mesh_parsed_once(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, "RENDER_LOD_MIN_FACES", 0)
+        loads = []
+        load = trimesh.load
+        monkeypatch.setattr(trimesh, "load", lambda *args, **kwargs: loads.append(args) or load(*args, **kwargs))
+        path = tmp_path / "p_preview_main.stl"
+        path.write_bytes(trimesh.creation.icosphere(subdivisions=3).export(file_type="stl_ascii").encode())
+        packaged = mesh_packaging.package_mesh(str(path))
+        assert len(loads) == 1
+        assert len(packaged["lods"]) == 2 and packaged["glb"] is not None
+        assert packaged["size_bytes"] == 84 + 50 * 1280
+
+    def test_disabled_leaves_file_as_is(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, "RENDER_PACKAGE_ENABLED", False)
+        monkeypatch.setattr(Config, "RENDER_CLEANUP_ENABLED", False)
+        path = tmp_path / "p_preview_main.stl"
+        ascii_stl = trimesh.creation.box().export(file_type="stl_ascii").encode()
+        path.write_bytes(ascii_stl)
+        assert mesh_packaging.package_mesh(str(path)) == {"size_bytes": len(ascii_stl), "lods": [], "glb": None,
+                                                          "cleanup": None}
+        assert path.read_bytes() == ascii_stl
+        assert sorted(os.listdir(tmp_path)) == ["p_preview_main.stl"]
+
+    def test_stale_outputs_removed(self, tmp_path):
+        path = tmp_path / "p_preview_main.stl"
+        for name in ("p_preview_main.stl.gz", "p_preview_main.q.glb", "p_preview_main.lod5.stl.gz"):
+            (tmp_path / name).write_bytes(b"stale")
+        path.write_bytes(b"not a mesh")
+        assert mesh_packaging.package_mesh(str(path))["glb"] is None
+        assert sorted(os.listdir(tmp_path)) == ["p_preview_main.stl"]
+
+    def test_existing_glb(self, tmp_path):
+        glb = {"url": "/static/a.q.glb", "size_bytes": 1}
+        assert mesh_packaging.existing_glb(glb, str(tmp_path)) is None
+        (tmp_path / "a.q.glb").write_bytes(b"x")
+        assert mesh_packaging.existing_glb(glb, str(tmp_path)) == glb
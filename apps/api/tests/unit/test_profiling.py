@@ -0,0 +1,82 @@
+"""Tests for the sampling profiler, memory profiler and slow-request watchdog."""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.core.profiling import (
+    MemoryProfiler,
+    SamplingProfiler,
+    SlowRequestWatchdog,
+    get_profile_path,
+    list_profiles,
+    save_profile,
+)
+
+
+def _busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+class TestSamplingProfiler:
+    def test_folded_stacks_contain_hot_function(self):
+        profiler = SamplingProfiler(interval_s=0.001).start()
+        _busy_loop(0.1)
+        profiler.stop()
+        assert profiler.samples > 10
+        folded = profiler.folded()
+        assert "_busy_loop (test_profiling.py" in folded
+        stack, count = folded.splitlines()[0].rsplit(" ", 1)
+        assert int(count) > 0
+        assert stack.split(";")[-1].startswith("_busy_loop")
+
+
+class TestMemoryProfiler:
+    def test_records_allocation(self):
+        profiler = MemoryProfiler()
+        assert profiler.start()
+        assert MemoryProfiler().start() is False  # one tracemalloc profile at a time
+        data = [bytearray(1024) for _ in range(1000)]
+        profiler.stop()
+        assert profiler.summary()["allocated_bytes"] >= 1024 * 1000
+        assert "test_profiling.py" in profiler.folded()
+        del data
+
+
+class TestSavedProfiles:
+    def test_save_and_list(self):
+        profile_id = save_profile("cpu", "a;b 3\n", {"samples": 3}, {"method": "GET", "path": "/x"})
+        assert get_profile_path(profile_id).read_text() == "a;b 3\n"
+        assert list_profiles()[0]["id"] == profile_id
+        assert get_profile_path("../secret") is None
+
+
+class TestSlowRequestWatchdog:
+    def test_slow_request_logged_with_stacks(self, monkeypatch, caplog):
+        from config import Config
+        monkeypatch.setattr(Config, "SLOW_REQUEST_THRESHOLD_S", 0.05)
+        watchdog = SlowRequestWatchdog()
+        watchdog.begin("POST", "/api/render")
+        _busy_loop(0.2)
+        record = watchdog.end(200)
+        assert record["duration_ms"] >= 200
+        assert any("_busy_loop" in s["stack"] for s in record["stacks"])
+        assert "Slow request POST /api/render" in caplog.text
+
+    def test_fast_request_not_logged(self, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "SLOW_REQUEST_THRESHOLD_S", 5)
+        watchdog = SlowRequestWatchdog()
+        watchdog.begin("GET", "/api/health")
+        assert watchdog.end(200) is None
+        assert not watchdog.recent
+
+    def test_disabled(self, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "SLOW_REQUEST_THRESHOLD_S", 0)
+        watchdog = SlowRequestWatchdog()
+        watchdog.begin("GET", "/api/health")
+        assert watchdog.end(200) is None
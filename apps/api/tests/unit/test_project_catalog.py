@@ -0,0 +1,148 @@
+"""Tests for services/core/project_catalog.py — the persisted project index behind the listings."""
+import hashlib
+import json
+
+import pytest
+
+from manifest import discover_projects, invalidate_cache, manifest_service
+from services.core.project_catalog import ProjectCatalog
+
+
+def _write_manifest(tmp_path, slug="demo", extra=None):
+    """Helper: write a minimal valid project.json and return its dir."""
+    project_dir = tmp_path / slug
+    project_dir.mkdir(parents=True, exist_ok=True)
+    data = {
+        "project": {"thumbnail": "thumb.png", "tags": ["test"], "difficulty": "beginner", "name": "Demo", "slug": slug, "version": "1.0.0", "description": "A demo project"},
+        "modes": [{"id": "single", "scad_file": "main.scad", "label": "Single", "parts": ["body"], "estimate": {"base_units": 1}}],
+        "parts": [{"id": "body", "render_mode": 0, "label": "Body", "default_color": "#cccccc"}],
+        "parameters": [{"id": "width", "type": "slider", "default": 10, "min": 1, "max": 100, "label": "Width"}],
+        "estimate_constants": {"base_time": 2, "per_unit": 1, "per_part": 0.5},
+    }
+    if extra:
+        data.update(extra)
+    (project_dir / "project.json").write_text(json.dumps(data))
+    (project_dir / "main.scad").write_text("cube([10,10,10]);")
+    return project_dir
+
+
+def _edit(project_dir, name):
+    path = project_dir / "project.json"
+    data = json.loads(path.read_text())
+    data["project"]["name"] = name
+    path.write_text(json.dumps(data))
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Count the manifests the catalog parses."""
+    seen = []
+    validate = manifest_service.validate_manifest_strictness
+
+    def counting(data, manifest_path):
+        seen.append(manifest_path.parent.name)
+        return validate(data, manifest_path)
+
+    monkeypatch.setattr(manifest_service, "validate_manifest_strictness", counting)
+    return seen
+
+
+@pytest.fixture(autouse=True)
+def check_every_access(monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, "CATALOG_CHECK_INTERVAL_S", 0)
+
+
+class TestProjectCatalog:
+    def test_listing_matches_discovery(self, tmp_path):
+        _write_manifest(tmp_path, "beta")
+        _write_manifest(tmp_path, "alpha")
+        body, etag = ProjectCatalog().listing()
+        assert json.loads(body) == discover_projects()
+        assert etag == hashlib.md5(body).hexdigest()
+
+    def test_admin_fields(self, tmp_path):
+        d = _write_manifest(tmp_path, "alpha", extra={"project": {
+            "thumbnail": "t.png", "tags": [], "difficulty": "beginner", "slug": "alpha", "is_demo": True,
+        }})
+        (d / "extra.scad").write_text("sphere(1);")
+        (d / "exports").mkdir()
+        (d / "exports" / "alpha.stl").write_bytes(b"\0")
+        entry = ProjectCatalog().get("alpha")
+        assert entry["name"] == "alpha"
+        assert entry["scad_file_count"] == 2
+        assert entry["has_exports"] is True
+        assert (entry["mode_count"], entry["parameter_count"]) == (1, 1)
+        assert entry["estimate_constants"]["base_time"] == 2
+        assert (entry["is_demo"], entry["is_hyperobject"]) == (True, False)
+        assert ProjectCatalog().get("missing") is None
+
+    def test_unchanged_projects_not_reread(self, tmp_path, reads):
+        _write_manifest(tmp_path, "alpha")
+        d = _write_manifest(tmp_path, "beta")
+        catalog = ProjectCatalog()
+        catalog.listing()
+        assert sorted(reads) == ["alpha", "beta"]
+        catalog.listing()
+        assert len(reads) == 2
+
+        _edit(d, "Renamed beta")
+        body, _ = catalog.listing()
+        assert reads[2:] == ["beta"]
+        assert json.loads(body)[1]["name"] == "Renamed beta"
+
+    def test_checked_at_most_every_interval(self, tmp_path, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "CATALOG_CHECK_INTERVAL_S", 3600)
+        catalog = ProjectCatalog()
+        assert catalog.projects() == []
+        _write_manifest(tmp_path, "alpha")
+        assert catalog.projects() == []
+        # Writers invalidate the manifest, which re-validates the catalog
+        invalidate_cache("alpha")
+        assert [p["slug"] for p in catalog.projects()] == ["alpha"]
+
+    def test_persisted_index_reused(self, tmp_path, reads):
+        from config import Config
+        _write_manifest(tmp_path, "alpha")
+        _, etag = ProjectCatalog().listing()
+        assert Config.CATALOG_INDEX_FILE.is_file()
+        reads.clear()
+        # A new process starts from the persisted index
+        assert ProjectCatalog().listing()[1] == etag
+        assert reads == []
+
+    def test_persisted_index_for_other_roots_ignored(self, tmp_path, reads):
+        from config import Config
+        Config.CATALOG_INDEX_FILE.write_text(json.dumps({"version": 1, "roots": ["/elsewhere"], "projects": {}}))
+        _write_manifest(tmp_path, "alpha")
+        assert [p["slug"] for p in ProjectCatalog().projects()] == ["alpha"]
+        assert reads == ["alpha"]
+
+    def test_invalid_project_skipped_once(self, tmp_path, caplog):
+        bad = tmp_path / "bad"
+        bad.mkdir()
+        (bad / "project.json").write_text("{invalid json")
+        catalog = ProjectCatalog()
+        assert catalog.projects() == []
+        assert catalog.projects() == []
+        assert caplog.text.count("Skipping invalid project") == 1
+
+    def test_removed_project_dropped(self, tmp_path):
+        d = _write_manifest(tmp_path, "alpha")
+        catalog = ProjectCatalog()
+        assert catalog.get("alpha") is not None
+        version = catalog.version
+        (d / "project.json").unlink()
+        assert catalog.get("alpha") is None
+        assert catalog.version == version + 1
+
+    def test_scad_dir_fallback(self, tmp_path, monkeypatch):
+        from config import Config
+        scad_dir = _write_manifest(tmp_path, "single")
+        data = json.loads((scad_dir / "project.json").read_text())
+        del data["project"]["slug"]
+        (scad_dir / "project.json").write_text(json.dumps(data))
+        monkeypatch.setattr(Config, "CARTRIDGES_DIRS", [tmp_path / "none"])
+        monkeypatch.setattr(Config, "SCAD_DIR", scad_dir)
+        assert [p["slug"] for p in ProjectCatalog().projects()] == ["default"]
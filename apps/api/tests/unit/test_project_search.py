@@ -0,0 +1,112 @@
+"""Tests for services/core/project_search.py — the inverted index behind /api/projects/search."""
+import json
+
+import pytest
+
+from services.core.project_catalog import ProjectCatalog
+from services.core.project_search import ProjectSearchIndex, document_terms, tokenize
+
+
+def _write_project(tmp_path, slug, name, description=None, tags=("test",), difficulty="beginner",
+                   engine=None, labels=()):
+    project_dir = tmp_path / slug
+    project_dir.mkdir(exist_ok=True)
+    project = {"thumbnail": "thumb.png", "tags": list(tags), "difficulty": difficulty, "name": name, "slug": slug,
+               "version": "1.0.0", "description": description or {"en": "", "es": ""}}
+    if engine:
+        project["engine"] = engine
+    data = {
+        "project": project,
+        "modes": [],
+        "parts": [],
+        "parameters": [{"id": f"p{i}", "type": "slider", "default": 1, "label": label} for i, label in enumerate(labels)],
+        "estimate_constants": {},
+    }
+    (project_dir / "project.json").write_text(json.dumps(data))
+    return project_dir
+
+
+@pytest.fixture(autouse=True)
+def check_every_access(monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, "CATALOG_CHECK_INTERVAL_S", 0)
+
+
+@pytest.fixture
+def index(tmp_path):
+    _write_project(tmp_path, "gears", "Gears", {"en": "Involute spur gears", "es": "Engranajes rectos"},
+                   tags=["mechanical", "gear"], difficulty="intermediate", labels=[{"en": "Teeth", "es": "Dientes"}])
+    _write_project(tmp_path, "vase", "Julia Vase", {"en": "Twisted vase", "es": "Jarrón torcido"},
+                   tags=["art", "decorative"], labels=[{"en": "Diameter", "es": "Diámetro"}])
+    _write_project(tmp_path, "box", "Rugged Box", {"en": "Hinged case with a gear latch"},
+                   tags=["case", "mechanical"], difficulty="intermediate", engine="cadquery")
+    return ProjectSearchIndex(ProjectCatalog())
+
+
+def _slugs(result):
+    return [r["slug"] for r in result["results"]]
+
+
+class TestTokenize:
+    def test_folds_case_and_accents(self):
+        assert tokenize("Diámetro (mm), NEMA-17") == ["diametro", "mm", "nema", "17"]
+
+    def test_field_weights_add_up(self):
+        weights = document_terms({"name": "Gear", "tags": ["gear"], "description": {"en": "A gear", "es": "Un engranaje"}})
+        assert weights["gear"] == 8 + 4 + 2
+        assert weights["engranaje"] == 2
+
+
+class TestProjectSearch:
+    def test_ranks_name_over_description(self, index):
+        result = index.search("gear")
+        assert _slugs(result) == ["gears", "box"]
+        assert result["results"][0]["score"] > result["results"][1]["score"]
+
+    def test_prefix_and_spanish(self, index):
+        assert _slugs(index.search("jarr")) == ["vase"]
+        assert _slugs(index.search("diametro")) == ["vase"]
+        assert _slugs(index.search("dient")) == ["gears"]
+
+    def test_all_terms_must_match(self, index):
+        assert _slugs(index.search("gear case")) == ["box"]
+        assert index.search("gear unicorn")["total"] == 0
+
+    def test_engine_and_difficulty_searchable(self, index):
+        assert _slugs(index.search("cadquery")) == ["box"]
+        assert sorted(_slugs(index.search("intermediate"))) == ["box", "gears"]
+
+    def test_empty_query_lists_catalog_order(self, index):
+        result = index.search("")
+        assert _slugs(result) == ["box", "gears", "vase"]
+        assert result["results"][0]["score"] is None
+
+    def test_filters_and_facets(self, index):
+        result = index.search("", {"tags": ["mechanical"], "difficulty": [], "engine": ["OpenSCAD"]})
+        assert _slugs(result) == ["gears"]
+        result = index.search("", {"tags": ["mechanical", "case"]})
+        assert _slugs(result) == ["box"]
+        facets = index.search("")["facets"]
+        assert facets["difficulty"] == [{"value": "intermediate", "count": 2}, {"value": "beginner", "count": 1}]
+        assert facets["engine"] == [{"value": "openscad", "count": 2}, {"value": "cadquery", "count": 1}]
+        assert facets["tags"][0] == {"value": "mechanical", "count": 2}
+
+    def test_pagination(self, index):
+        result = index.search("", limit=2, offset=1)
+        assert result["total"] == 3
+        assert _slugs(result) == ["gears", "vase"]
+
+    def test_incremental_sync(self, index, tmp_path):
+        assert index.sync() == {"box", "gears", "vase"}
+        assert index.sync() == set()
+        _write_project(tmp_path, "vase", "Julia Vase", {"en": "Sinusoidal planter"}, tags=["garden"])
+        assert index.sync() == {"vase"}
+        assert _slugs(index.search("planter")) == ["vase"]
+        assert index.search("twisted")["total"] == 0
+        assert index.search("art")["total"] == 0
+
+        (tmp_path / "gears" / "project.json").unlink()
+        assert index.sync() == {"gears"}
+        assert _slugs(index.search("gear")) == ["box"]
+        # Terms of removed documents leave the vocabulary
+        assert "dientes" not in index._vocabulary
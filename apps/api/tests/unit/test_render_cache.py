@@ -46,6 +46,17 @@ class TestRenderCache:
         f.unlink()
         assert cache.get("proj", "main.scad", {}, "main", "stl") is None
 
+    def test_overwritten_file_invalidates(self, tmp_path):
+        import os
+        cache = RenderCache()
+        f = tmp_path / "test.stl"
+        f.write_bytes(b"\x00")
+        cache.put("proj", "main.scad", {"size": 1}, "main", "stl", str(f), 1)
+        # A render with other parameters rewrites the same per-part file
+        f.write_bytes(b"\x01\x02")
+        os.utime(f, ns=(0, f.stat().st_mtime_ns + 1_000_000))
+        assert cache.get("proj", "main.scad", {"size": 1}, "main", "stl") is None
+
     def test_max_entries_eviction(self, tmp_path):
         cache = RenderCache(max_entries=2)
         for i in range(3):
@@ -65,3 +76,30 @@ class TestRenderCache:
         key1 = RenderCache._make_key("p", "f.scad", {}, "main", "stl")
         key2 = RenderCache._make_key("p", "f.scad", {}, "main", "3mf")
         assert key1 != key2
+
+    def test_manifest_change_drops_project_entries(self, tmp_path):
+        from manifest import manifest_service
+        cache = RenderCache()
+        for project in ("alpha", "beta"):
+            # conftest points CARTRIDGES_DIRS at tmp_path
+            (tmp_path / project).mkdir()
+            (tmp_path / project / "project.json").write_text("{}")
+            f = tmp_path / f"{project}.stl"
+            f.write_bytes(b"\x00")
+            cache.put(project, "main.scad", {}, "main", "stl", str(f), 1)
+        manifest_service.invalidate_cache("alpha")
+        assert cache.get("alpha", "main.scad", {}, "main", "stl") is None
+        assert cache.get("beta", "main.scad", {}, "main", "stl") is not None
+
+    def test_source_change_changes_key(self, tmp_path, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "MANIFEST_CHECK_INTERVAL_S", 0)
+        project_dir = tmp_path / "alpha"
+        project_dir.mkdir()
+        (project_dir / "project.json").write_text("{}")
+        (project_dir / "main.scad").write_text("cube(1);")
+        key = RenderCache().key("alpha", "main.scad", {}, "main", "stl")
+        # The same in every process for the same sources
+        assert RenderCache().key("alpha", "main.scad", {}, "main", "stl") == key
+        (project_dir / "main.scad").write_text("cube(2);")
+        assert RenderCache().key("alpha", "main.scad", {}, "main", "stl") != key
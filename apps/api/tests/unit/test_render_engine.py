@@ -0,0 +1,194 @@
+"""Tests for render subprocess resource limits."""
+import resource
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.engine.render_engine import (
+    CPU_HARD_LIMIT_GRACE_S,
+    RESOURCE_CPU,
+    RESOURCE_MEMORY,
+    RESOURCE_WALL_CLOCK,
+    ProcessManager,
+    RenderCgroup,
+    RenderLimits,
+    RenderResult,
+    RenderUsage,
+    _parse_cpu_list,
+    classify_exhaustion,
+    get_render_limits,
+    reap_process,
+)
+
+
+class TestGetRenderLimits:
+    def test_tier_values(self):
+        limits = get_render_limits("pro")
+        assert limits.memory_mb == 4096
+        assert limits.cpu_seconds == 300
+        assert limits.nice == 5
+
+    def test_tier_wall_clock_honored(self):
+        # Not capped at RENDER_TIMEOUT_S, which is only the default
+        assert get_render_limits("madfam").wall_seconds == 600
+
+    def test_unknown_tier_falls_back_to_guest(self):
+        assert get_render_limits("nonexistent") == get_render_limits("guest")
+
+    def test_disabled(self, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "RENDER_LIMITS_ENABLED", False)
+        limits = get_render_limits("guest")
+        assert limits.memory_mb is None
+        assert limits.cpu_seconds is None
+
+    def test_cpu_affinity_from_config(self, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "RENDER_CPU_AFFINITY", "0-2,5")
+        assert get_render_limits("guest").cpu_affinity == (0, 1, 2, 5)
+
+    def test_parse_cpu_list_ignores_garbage(self):
+        assert _parse_cpu_list("1,x,3") == (1, 3)
+        assert _parse_cpu_list("") is None
+
+
+class TestClassifyExhaustion:
+    def test_cpu_signal(self):
+        limits = RenderLimits(cpu_seconds=10)
+        assert classify_exhaustion(-signal.SIGXCPU, "", limits) == RESOURCE_CPU
+
+    def test_memory_marker(self):
+        limits = RenderLimits(memory_mb=512)
+        assert classify_exhaustion(1, "terminate called after throwing 'std::bad_alloc'", limits) == RESOURCE_MEMORY
+
+    def test_ordinary_error(self):
+        limits = RenderLimits(memory_mb=512, cpu_seconds=10)
+        assert classify_exhaustion(1, "ERROR: Parser error in line 3", limits) is None
+
+    def test_cgroup_oom(self, tmp_path):
+        (tmp_path / "memory.events").write_text("low 0\nhigh 0\nmax 3\noom 1\noom_kill 1\n")
+        assert classify_exhaustion(-9, "", RenderLimits(), RenderCgroup(tmp_path)) == RESOURCE_MEMORY
+
+    def test_killed_process_not_cpu(self):
+        # Cancels and wall-clock timeouts SIGKILL too
+        limits = RenderLimits(cpu_seconds=10)
+        assert classify_exhaustion(-signal.SIGKILL, "", limits) is None
+        usage = RenderUsage(user_cpu_s=2.0, sys_cpu_s=0.5, max_rss_kb=1024, wall_s=3.0)
+        assert classify_exhaustion(-signal.SIGKILL, "", limits, usage=usage) is None
+
+    def test_sigkill_at_hard_cpu_limit(self):
+        limits = RenderLimits(cpu_seconds=10)
+        usage = RenderUsage(user_cpu_s=14.5, sys_cpu_s=0.5, max_rss_kb=1024, wall_s=16.0)
+        assert classify_exhaustion(-signal.SIGKILL, "", limits, usage=usage) == RESOURCE_CPU
+
+
+class TestRenderLimitsApply:
+    @pytest.mark.skipif(sys.platform != "linux", reason="prlimit is Linux-only")
+    def test_applied_from_parent(self):
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+        try:
+            RenderLimits(memory_mb=512, cpu_seconds=10).apply(process.pid)
+            assert resource.prlimit(process.pid, resource.RLIMIT_AS) == (512 * 1024 * 1024,) * 2
+            assert resource.prlimit(process.pid, resource.RLIMIT_CPU) == (10, 10 + CPU_HARD_LIMIT_GRACE_S)
+        finally:
+            process.kill()
+            process.wait()
+
+    def test_exited_process_ignored(self):
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        RenderLimits(memory_mb=512).apply(process.pid)
+
+    def test_render_result_unpacks(self):
+        result = RenderResult(False, "boom", RESOURCE_WALL_CLOCK)
+        success, log = result
+        assert (success, log) == (False, "boom")
+        assert result.exhausted == RESOURCE_WALL_CLOCK
+
+    def test_cgroup_disabled_without_root(self, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "RENDER_CGROUP_ROOT", "")
+        assert RenderCgroup.create(RenderLimits(memory_mb=128)) is None
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="rlimits are exercised on Linux only")
+class TestLimitsEnforced:
+    def test_memory_limit_reported(self):
+        from services.engine.openscad import run_render
+        cmd = [sys.executable, "-c", "x = bytearray(2 * 1024 ** 3)"]
+        result = run_render(cmd, limits=RenderLimits(memory_mb=256))
+        assert result[0] is False
+        assert result.exhausted == RESOURCE_MEMORY
+
+    def test_cpu_limit_reported(self):
+        from services.engine.cadquery_engine import run_render
+        cmd = [sys.executable, "-c", "while True: pass"]
+        result = run_render(cmd, limits=RenderLimits(cpu_seconds=1, wall_seconds=30))
+        assert result[0] is False
+        assert result.exhausted == RESOURCE_CPU
+
+    def test_wall_clock_limit_reported(self):
+        from services.engine.openscad import run_render
+        cmd = [sys.executable, "-c", "import time; time.sleep(5)"]
+        result = run_render(cmd, limits=RenderLimits(wall_seconds=1))
+        assert result.exhausted == RESOURCE_WALL_CLOCK
+
+
+class TestRunLimitedUsage:
+    def test_collects_rusage(self):
+        from services.engine.render_engine import run_limited
+        cmd = [sys.executable, "-c", "import sys; x = bytearray(64 * 1024 ** 2); sys.stderr.write('done')"]
+        outcome = run_limited(cmd, env=None, limits=RenderLimits())
+        assert outcome.returncode == 0
+        assert outcome.stderr == "done"
+        assert outcome.usage.max_rss_kb > 64 * 1024
+        assert outcome.usage.wall_s > 0
+
+    def test_propagates_trace_context(self):
+        from services.core.tracing import span
+        from services.engine.render_engine import run_limited
+        cmd = [sys.executable, "-c", "import os; print(os.environ['TRACEPARENT'])"]
+        with span("render") as parent:
+            outcome = run_limited(cmd, env=None, limits=RenderLimits())
+        traceparent = outcome.stdout.strip()
+        assert traceparent.startswith(f"00-{parent.trace_id}-")
+        assert traceparent != parent.traceparent()  # child of the subprocess.spawn span
+
+    def test_reap_after_cancel_reaped(self):
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        process.kill()
+        process.wait()  # what a concurrent ProcessManager.cancel does
+        usage = reap_process(process, 0.0)
+        assert process.returncode == -signal.SIGKILL
+        assert (usage.user_cpu_s, usage.sys_cpu_s, usage.max_rss_kb) == (0.0, 0.0, 0)
+
+    def test_run_render_attaches_usage(self):
+        from services.engine.cadquery_engine import run_render
+        result = run_render([sys.executable, "-c", "print('ok')"], limits=RenderLimits())
+        assert result[0] is True
+        assert "ok" in result[1]
+        assert result.usage.user_cpu_s >= 0
+
+
+class TestProcessManager:
+    def test_cancel_terminates_every_active_process(self):
+        pm = ProcessManager()
+        procs = [pm.start(subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"]))
+                 for _ in range(2)]
+        assert pm.cancel() is True
+        assert all(p.poll() is not None for p in procs)
+        assert pm.cancel() is False
+
+    def test_clear_one_keeps_the_others(self):
+        pm = ProcessManager()
+        done = pm.start(subprocess.Popen([sys.executable, "-c", "pass"]))
+        running = pm.start(subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"]))
+        done.wait()
+        pm.clear(done)
+        assert pm.cancel() is True
+        assert running.poll() is not None
@@ -0,0 +1,154 @@
+"""Tests for resumable render jobs."""
+import asyncio
+from contextlib import aclosing
+
+import pytest
+
+from config import Config
+from services.engine.render_jobs import RenderJob, RenderJobRegistry, parse_event_id
+
+
+async def _events(n, delay=0.0, fail=False):
+    for i in range(n):
+        if delay:
+            await asyncio.sleep(delay)
+        yield {"event": "output", "i": i}
+    if fail:
+        raise RuntimeError("engine exploded")
+
+
+async def _take(job, after=0, limit=None):
+    items = []
+    async with aclosing(job.subscribe(after)) as events:
+        async for item in events:
+            items.append(item)
+            if limit is not None and len(items) >= limit:
+                break
+    return items
+
+
+class TestRenderJob:
+    def test_subscriber_gets_numbered_events(self):
+        job = RenderJob(_events(3), buffer_size=10)
+        items = asyncio.run(_take(job))
+        assert items[0] == (1, {"event": "job", "job_id": job.id, "resume_token": job.resume_token})
+        assert [seq for seq, _ in items[1:]] == [2, 3, 4]
+        assert [event["i"] for _, event in items[1:]] == [0, 1, 2]
+        assert job.done
+
+    def test_job_continues_after_subscriber_leaves(self):
+        async def run():
+            job = RenderJob(_events(5, delay=0.01), buffer_size=10)
+            first = await _take(job, limit=1)
+            assert job.subscribers == 0
+            assert job.detached_at is not None
+            rest = await _take(job, after=first[0][0])
+            return first, rest
+
+        first, rest = asyncio.run(run())
+        assert [seq for seq, _ in first + rest] == [1, 2, 3, 4, 5, 6]
+
+    def test_concurrent_subscribers_share_one_run(self):
+        async def run():
+            job = RenderJob(_events(4, delay=0.01), buffer_size=10)
+            return await asyncio.gather(_take(job), _take(job))
+
+        a, b = asyncio.run(run())
+        assert a == b
+        assert len(a) == 5
+
+    def test_replay_gap_when_buffer_overflowed(self):
+        async def run():
+            job = RenderJob(_events(6), buffer_size=2)
+            await _take(job)
+            return await _take(job, after=2)
+
+        items = asyncio.run(run())
+        assert items[0] == (5, {"event": "replay_gap", "missed": 3})
+        assert [seq for seq, _ in items[1:]] == [6, 7]
+
+    def test_output_burst_keeps_result_events(self):
+        async def events():
+            yield {"event": "part_done", "part": "a"}
+            for i in range(5):
+                yield {"event": "output", "i": i}
+            yield {"event": "mesh", "part": "a"}
+            for i in range(5, 10):
+                yield {"event": "output", "i": i}
+            yield {"event": "complete"}
+
+        async def run():
+            job = RenderJob(events(), buffer_size=2)
+            await _take(job)
+            return await _take(job)
+
+        items = asyncio.run(run())
+        assert items[0] == (0, {"event": "replay_gap", "missed": 8})
+        assert [(seq, event["event"]) for seq, event in items[1:]] == [
+            (1, "job"), (2, "part_done"), (8, "mesh"), (12, "output"), (13, "output"), (14, "complete"),
+        ]
+
+    def test_resume_token(self):
+        job = RenderJob(_events(1), buffer_size=10)
+        assert job.check_token(job.resume_token)
+        assert not job.check_token("guess")
+        assert not job.check_token(None)
+
+    def test_engine_error_becomes_error_event(self):
+        job = RenderJob(_events(1, fail=True), buffer_size=10)
+        items = asyncio.run(_take(job))
+        assert items[-1][1] == {"event": "error", "message": "engine exploded"}
+
+    def test_cancel(self):
+        async def run():
+            job = RenderJob(_events(100, delay=0.05), buffer_size=10)
+            await _take(job, limit=1)
+            job.cancel()
+            return await _take(job, after=1)
+
+        items = asyncio.run(run())
+        assert items[-1][1]["event"] == "error"
+
+
+class TestRenderJobRegistry:
+    def test_get_and_prune_finished(self, monkeypatch):
+        registry = RenderJobRegistry()
+        job = registry.create(_events(1))
+        assert registry.get(job.id) is job
+        asyncio.run(_take(job))
+
+        monkeypatch.setattr(Config, "RENDER_JOB_TTL_S", 0)
+        assert registry.get(job.id) is None
+        assert len(registry) == 0
+
+    def test_abandoned_job_is_cancelled(self, monkeypatch):
+        async def run():
+            registry = RenderJobRegistry()
+            job = registry.create(_events(100, delay=0.05))
+            await _take(job, limit=1)
+            monkeypatch.setattr(Config, "RENDER_JOB_TTL_S", 0)
+            assert registry.get(job.id) is None
+            await asyncio.sleep(0.01)
+            return job
+
+        assert asyncio.run(run()).done
+
+    def test_in_flight_files(self):
+        registry = RenderJobRegistry()
+        job = registry.create(_events(1), files=["/s/a.stl"])
+        with registry.pinned(["/s/b.stl"]):
+            assert registry.in_flight_files() == {"/s/a.stl", "/s/b.stl"}
+        assert registry.in_flight_files() == {"/s/a.stl"}
+        asyncio.run(_take(job))
+        assert registry.in_flight_files() == set()
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("abc:7", ("abc", 7)),
+    ("abc:x", (None, 0)),
+    ("abc", (None, 0)),
+    (":3", (None, 3)),
+    (None, (None, 0)),
+])
+def test_parse_event_id(value, expected):
+    assert parse_event_id(value) == expected
@@ -0,0 +1,73 @@
+"""Tests for render usage accounting."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.engine.render_engine import RenderUsage
+from services.engine.render_usage import (
+    DEFAULT_PART_COST_S,
+    percentile,
+    predict_part_costs,
+    record_usage,
+    summarize_usage,
+)
+
+
+def _usage(wall, rss=1000):
+    return RenderUsage(user_cpu_s=wall / 2, sys_cpu_s=0.1, max_rss_kb=rss, wall_s=wall)
+
+
+class TestPercentile:
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+
+    def test_small_sample(self):
+        assert percentile([3.0], 99) == 3.0
+        assert percentile([], 50) is None
+
+
+class TestSummarizeUsage:
+    def test_groups_by_project_and_mode(self):
+        for wall in (1.0, 2.0, 3.0, 4.0):
+            record_usage("alpha", "single", "main", "openscad", _usage(wall))
+        record_usage("alpha", "grid", "main", "openscad", _usage(10.0, rss=5000))
+        record_usage("beta", "single", "main", "cadquery", _usage(5.0))
+
+        groups = summarize_usage(days=1)
+        keys = [(g["project"], g["mode"]) for g in groups]
+        assert keys == [("alpha", "grid"), ("alpha", "single"), ("beta", "single")]
+
+        single = groups[1]
+        assert single["count"] == 4
+        assert single["wall_s"]["p50"] == 2.0
+        assert single["wall_s"]["p99"] == 4.0
+        assert single["wall_s"]["max"] == 4.0
+        assert single["cpu_s"]["max"] == 2.1
+
+    def test_filter_by_project(self):
+        record_usage("alpha", "single", "main", "openscad", _usage(1.0))
+        record_usage("beta", "single", "main", "openscad", _usage(1.0))
+        groups = summarize_usage(days=1, project="beta")
+        assert [g["project"] for g in groups] == ["beta"]
+
+
+class TestPredictPartCosts:
+    def test_median_wall_time_per_part(self):
+        for wall in (1.0, 2.0, 9.0):
+            record_usage("alpha", "grid", "a", "openscad", _usage(wall))
+        record_usage("alpha", "grid", "b", "openscad", _usage(4.0))
+        record_usage("alpha", "single", "b", "openscad", _usage(100.0))
+        assert predict_part_costs("alpha", "grid", ["a", "b"]) == {"a": 2.0, "b": 4.0}
+
+    def test_unknown_parts_get_mean_of_known(self):
+        record_usage("alpha", "grid", "a", "openscad", _usage(2.0))
+        record_usage("alpha", "grid", "b", "openscad", _usage(4.0))
+        assert predict_part_costs("alpha", "grid", ["a", "b", "c"])["c"] == 3.0
+
+    def test_no_history(self):
+        assert predict_part_costs("alpha", None, ["a"]) == {"a": DEFAULT_PART_COST_S}
+        assert predict_part_costs("alpha", None, []) == {}
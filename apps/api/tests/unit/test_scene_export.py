@@ -0,0 +1,84 @@
+"""Tests for assembled scene export (multi-node GLB, multi-object 3MF)."""
+import io
+import json
+import struct
+import xml.etree.ElementTree as ET
+import zipfile
+
+import numpy as np
+import trimesh
+
+from services.engine import scene_export
+
+
+def _parts():
+    return [
+        {"name": "base", "mesh": trimesh.creation.box(), "color": "#ff0000"},
+        {"name": "lid", "mesh": trimesh.creation.box(), "color": "#00f",
+         "transform": {"translate": [0, 0, 10], "rotate": [0, 0, 90]}},
+    ]
+
+
+class TestPartMatrix:
+    def test_rotate_then_translate(self):
+        matrix = scene_export.part_matrix({"translate": [1, 2, 3], "rotate": [0, 0, 90]})
+        assert np.allclose(matrix @ [1, 0, 0, 1], [1, 3, 3, 1])
+        assert np.allclose(scene_export.part_matrix(None), np.eye(4))
+
+    def test_parse_color(self):
+        assert scene_export.parse_color("#0a0B0c") == (10, 11, 12)
+        assert scene_export.parse_color("#fff") == (255, 255, 255)
+        assert scene_export.parse_color("red") == scene_export.parse_color(scene_export.DEFAULT_COLOR)
+
+
+class TestSceneGlb:
+    def test_nodes_colors_and_transforms(self):
+        data = scene_export.encode_scene_glb(_parts())
+        (length,) = struct.unpack_from("<I", data, 12)
+        gltf = json.loads(data[20:20 + length])
+        root = gltf["nodes"][gltf["scenes"][0]["nodes"][0]]
+        assert root["name"] == "assembly"
+        assert [gltf["nodes"][i]["name"] for i in root["children"]] == ["base", "lid"]
+        assert [m["pbrMetallicRoughness"]["baseColorFactor"] for m in gltf["materials"]] == [[1, 0, 0, 1], [0, 0, 1, 1]]
+        lid = gltf["nodes"][root["children"][1]]
+        assert lid["matrix"][12:15] == [0, 0, 10]
+
+        scene = trimesh.load(io.BytesIO(data), file_type="glb")
+        assert len(scene.geometry) == 2
+        # Z-up lid at z=10 ends up at y=10 in glTF's Y-up frame
+        assert np.allclose(scene.bounds, [[-0.5, -0.5, -0.5], [0.5, 10.5, 0.5]], atol=1e-3)
+
+
+class TestScene3mf:
+    def test_objects_materials_and_build_items(self):
+        buf = io.BytesIO()
+        scene_export.encode_3mf(_parts(), buf)
+        package = zipfile.ZipFile(buf)
+        assert {"[Content_Types].xml", "_rels/.rels", "3D/3dmodel.model"} <= set(package.namelist())
+        ns = {"m": scene_export._3MF_CORE}
+        model = ET.fromstring(package.read("3D/3dmodel.model"))
+        assert [b.get("displaycolor") for b in model.iterfind(".//m:base", ns)] == ["#FF0000FF", "#0000FFFF"]
+        objects = model.findall(".//m:object", ns)
+        assert [o.get("name") for o in objects] == ["base", "lid"]
+        assert len(objects[0].findall(".//m:vertex", ns)) == 8
+        assert len(objects[0].findall(".//m:triangle", ns)) == 12
+        transforms = [i.get("transform").split() for i in model.iterfind(".//m:item", ns)]
+        assert transforms[0] == ["1", "0", "0", "0", "1", "0", "0", "0", "1", "0", "0", "0"]
+        assert transforms[1][-3:] == ["0", "0", "10"]
+        # Rows are the images of the axes: X maps to Y under rotate([0, 0, 90])
+        assert np.allclose([float(v) for v in transforms[1][:3]], [0, 1, 0])
+
+
+class TestWriteScene:
+    def test_writes_atomically_and_keys_change_with_parts(self, tmp_path):
+        trimesh.creation.box().export(tmp_path / "a.stl")
+        parts = [{"name": "a", "path": str(tmp_path / "a.stl"), "key": "k1@1"}]
+        out = tmp_path / "p_scene_single_x.glb"
+        assert scene_export.write_scene(parts, "glb", str(out)) == out.stat().st_size
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a.stl", "p_scene_single_x.glb", "p_scene_single_x.glb.gz"]
+
+        assert scene_export.scene_key("glb", parts) != scene_export.scene_key("3mf", parts)
+        assert scene_export.scene_key("glb", parts) != scene_export.scene_key("glb", [{**parts[0], "key": "k1@2"}])
+
+        scene_export.remove_scenes(str(tmp_path), "p_scene_single_", "glb")
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a.stl"]
@@ -0,0 +1,145 @@
+"""Tests for the shared SSE framing layer (utils/sse.py)."""
+import asyncio
+import json
+
+import pytest
+
+from config import Config
+from utils.sse import (
+    HEARTBEAT,
+    SLOW_DISCONNECT,
+    SLOW_DROP,
+    encode_sse,
+    format_event,
+    merge_events,
+)
+
+
+async def _source(*items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+def _writes(events, **options):
+    async def run():
+        return [chunk async for chunk in encode_sse(events, **options)]
+    return asyncio.run(run())
+
+
+def _parse(writes):
+    """Return ``[(id, event)]`` for every message in *writes*."""
+    messages = []
+    for block in "".join(writes).split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "data" in fields:
+            messages.append((fields.get("id"), json.loads(fields["data"])))
+    return messages
+
+
+class TestFormat:
+    def test_compact_with_id(self):
+        assert format_event({"event": "done", "n": 1}, "job:3") == 'id: job:3\ndata: {"event":"done","n":1}\n\n'
+
+    def test_without_id(self):
+        assert format_event({"event": "done"}) == 'data: {"event":"done"}\n\n'
+
+
+class TestMergeEvents:
+    def test_chunks_join(self):
+        assert merge_events({"event": "chunk", "text": "ab"}, {"event": "chunk", "text": "c"}) == \
+            {"event": "chunk", "text": "abc"}
+
+    def test_output_lines_collect(self):
+        merged = merge_events({"event": "output", "part": "a", "line": "x", "progress": 1},
+                              {"event": "output", "part": "a", "line": "y", "progress": 2})
+        assert merged == {"event": "output", "part": "a", "line": "y", "lines": ["x", "y"], "progress": 2}
+
+    def test_other_part_or_event_does_not_merge(self):
+        assert merge_events({"event": "output", "part": "a", "line": "x"},
+                            {"event": "output", "part": "b", "line": "y"}) is None
+        assert merge_events({"event": "part_done"}, {"event": "part_done"}) is None
+
+
+class TestEncodeSse:
+    def test_burst_is_one_write(self):
+        writes = _writes(_source(*({"event": "chunk", "text": t} for t in "hello"), {"event": "done"}))
+        assert _parse(writes) == [(None, {"event": "chunk", "text": "hello"}), (None, {"event": "done"})]
+        assert len(writes) == 1
+
+    def test_merged_event_keeps_last_id(self):
+        writes = _writes(_source(("j:1", {"event": "output", "part": "a", "line": "1"}),
+                                 ("j:2", {"event": "output", "part": "a", "line": "2"})))
+        assert [event_id for event_id, _ in _parse(writes)] == ["j:2"]
+
+    def test_control_events_flush_immediately(self, monkeypatch):
+        monkeypatch.setattr(Config, "SSE_COALESCE_MS", 10_000)
+        writes = _writes(_source({"event": "part_start"}, {"event": "part_done"}, delay=0.01))
+        assert len(writes) == 2
+
+    def test_byte_budget_splits_writes(self, monkeypatch):
+        monkeypatch.setattr(Config, "SSE_COALESCE_BYTES", 100)
+        writes = _writes(_source(*({"event": "chunk", "text": "x" * 80} for _ in range(3))))
+        assert len(writes) == 3
+
+    def test_heartbeat_when_idle(self, monkeypatch):
+        monkeypatch.setattr(Config, "SSE_HEARTBEAT_S", 0.02)
+        writes = _writes(_source({"event": "done"}, delay=0.1))
+        assert HEARTBEAT in writes
+        assert _parse(writes) == [(None, {"event": "done"})]
+
+    def test_error_raised_after_earlier_events(self):
+        async def failing():
+            yield {"event": "chunk", "text": "a"}
+            raise RuntimeError("provider down")
+
+        async def run():
+            seen = []
+            with pytest.raises(RuntimeError, match="provider down"):
+                async for chunk in encode_sse(failing()):
+                    seen.append(chunk)
+            return seen
+
+        assert _parse(asyncio.run(run())) == [(None, {"event": "chunk", "text": "a"})]
+
+    def test_drop_policy_drops_log_lines(self, monkeypatch):
+        monkeypatch.setattr(Config, "SSE_BUFFER_EVENTS", 2)
+        lines = [{"event": "output", "part": "a", "line": str(i)} for i in range(10)]
+        events = [event for _, event in _parse(_writes(_source(*lines, {"event": "complete"}),
+                                                       slow_consumer=SLOW_DROP))]
+        assert {"event": "dropped", "count": 8} in events
+        assert events[-1] == {"event": "complete"}
+
+    def test_disconnect_policy_ends_stream(self, monkeypatch):
+        monkeypatch.setattr(Config, "SSE_BUFFER_EVENTS", 2)
+        closed = []
+
+        async def endless():
+            try:
+                while True:
+                    yield {"event": "chunk", "text": "x"}
+            finally:
+                closed.append(True)
+
+        events = [event for _, event in _parse(_writes(endless(), slow_consumer=SLOW_DISCONNECT))]
+        assert events[-1]["event"] == "error"
+        assert closed
+
+    def test_close_closes_source(self):
+        closed = []
+
+        async def slow():
+            try:
+                yield {"event": "part_start"}
+                await asyncio.sleep(30)
+            finally:
+                closed.append(True)
+
+        async def run():
+            stream = encode_sse(slow())
+            await stream.__anext__()
+            await stream.aclose()
+
+        asyncio.run(run())
+        assert closed
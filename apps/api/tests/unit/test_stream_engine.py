@@ -0,0 +1,125 @@
+"""Tests for the asyncio streaming render engine."""
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.engine.render_engine import RenderLimits
+from services.engine.stream_engine import StreamedProcess, iterate, merge
+
+
+async def _collect(cmd, limits=None, merge_stderr=False, keepalive_s=10.0):
+    stream = await StreamedProcess.spawn(cmd, env=None, limits=limits or RenderLimits(), merge_stderr=merge_stderr)
+    lines = [line async for line in stream.lines(keepalive_s=keepalive_s)]
+    yield {"lines": lines, "returncode": stream.returncode, "usage": stream.usage, "exhausted": stream.exhausted}
+
+
+def _run(cmd, **kwargs):
+    [result] = iterate(_collect(cmd, **kwargs))
+    return result
+
+
+class TestStreamedProcess:
+    def test_reads_stderr_lines_and_usage(self):
+        result = _run([sys.executable, "-c", "import sys; sys.stderr.write('a\\n\\nb\\n'); print('ignored')"])
+        assert result["lines"] == ["a", "b"]
+        assert result["returncode"] == 0
+        assert result["usage"].wall_s > 0
+
+    def test_merge_stderr_reads_stdout(self):
+        result = _run([sys.executable, "-c", "import sys; print('out'); sys.stderr.write('err\\n')"],
+                      merge_stderr=True)
+        assert sorted(result["lines"]) == ["err", "out"]
+
+    def test_keepalive_while_silent(self):
+        result = _run([sys.executable, "-c", "import time; time.sleep(0.5)"], keepalive_s=0.1)
+        assert None in result["lines"]
+
+    def test_nonzero_exit(self):
+        result = _run([sys.executable, "-c", "import sys; sys.exit(3)"])
+        assert result["returncode"] == 3
+        assert result["exhausted"] is None
+
+    def test_wall_clock_limit(self):
+        result = _run([sys.executable, "-c", "import time; time.sleep(30)"], limits=RenderLimits(wall_seconds=1))
+        assert result["exhausted"] == "wall_clock"
+
+
+class TestIterate:
+    def test_propagates_exceptions(self):
+        async def failing():
+            yield 1
+            raise RuntimeError("boom")
+
+        stream = iterate(failing())
+        assert next(stream) == 1
+        with pytest.raises(RuntimeError, match="boom"):
+            next(stream)
+
+    def test_concurrent_streams_run_in_parallel(self):
+        cmd = [sys.executable, "-c", "import sys, time; time.sleep(0.5); sys.stderr.write('done\\n')"]
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda _: _run(cmd), range(16)))
+        assert all(r["lines"] == ["done"] for r in results)
+        assert time.monotonic() - started < 8 * 0.5  # well under the sequential 16 * 0.5 s
+
+    def test_streams_run_on_one_loop_thread(self):
+        async def thread_name():
+            yield threading.current_thread().name
+
+        names = {next(iterate(thread_name())) for _ in range(3)}
+        assert names == {"render-stream-loop"}
+
+
+def _ticker(name, delay, count, log=None):
+    async def ticks():
+        try:
+            for i in range(count):
+                await asyncio.sleep(delay)
+                yield f"{name}{i}"
+        finally:
+            if log is not None:
+                log.append(f"{name} closed")
+    return ticks
+
+
+class TestMerge:
+    def test_interleaves_streams(self):
+        items = list(iterate(merge([_ticker("a", 0.05, 3), _ticker("b", 0.02, 3)], concurrency=2)))
+        assert sorted(items) == ["a0", "a1", "a2", "b0", "b1", "b2"]
+        assert items.index("b2") < items.index("a2")
+
+    def test_concurrency_bounds_running_streams(self):
+        running, peak = 0, 0
+
+        def counted():
+            async def stream():
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.02)
+                yield 1
+                running -= 1
+            return stream()
+
+        assert len(list(iterate(merge([counted] * 5, concurrency=2)))) == 5
+        assert peak == 2
+
+    def test_propagates_exceptions(self):
+        async def failing():
+            yield "x"
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            list(iterate(merge([failing, _ticker("a", 0.01, 1)], concurrency=2)))
+
+    def test_close_closes_running_streams(self):
+        log = []
+        stream = iterate(merge([_ticker("a", 0.01, 100, log), _ticker("b", 0.01, 100, log)], concurrency=2))
+        next(stream)
+        stream.close()
+        assert sorted(log) == ["a closed", "b closed"]
@@ -0,0 +1,126 @@
+"""Tests for request tracing spans and exporters."""
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.core.tracing import (
+    TRACEPARENT_ENV,
+    JsonlExporter,
+    current_span,
+    flush_spans,
+    iterate_in_span,
+    otlp_payload,
+    parse_traceparent,
+    propagation_env,
+    span,
+    start_span,
+)
+
+
+def _read_spans():
+    from config import Config
+    flush_spans()
+    path = Path(Config.TRACE_FILE)
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestTraceparent:
+    def test_parse_valid(self):
+        value = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+        assert parse_traceparent(value) == ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+
+    @pytest.mark.parametrize("value", [None, "", "garbage", "00-" + "0" * 32 + "-00f067aa0ba902b7-01"])
+    def test_parse_invalid(self, value):
+        assert parse_traceparent(value) is None
+
+    def test_remote_parent(self):
+        s = start_span("root", traceparent="00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")
+        assert s.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert s.parent_id == "00f067aa0ba902b7"
+
+
+class TestSpans:
+    def test_nested_spans_exported_as_jsonl(self):
+        with span("outer", project="demo") as outer:
+            with span("inner") as inner:
+                assert current_span() is inner
+            assert current_span() is outer
+        assert current_span() is None
+
+        spans = {s["name"]: s for s in _read_spans()}
+        assert spans["inner"]["parent_id"] == spans["outer"]["span_id"]
+        assert spans["inner"]["trace_id"] == spans["outer"]["trace_id"]
+        assert spans["outer"]["attributes"] == {"project": "demo"}
+        assert spans["outer"]["duration_ms"] >= spans["inner"]["duration_ms"]
+
+    def test_error_recorded(self):
+        with pytest.raises(ValueError), span("failing"):
+            raise ValueError("boom")
+        assert _read_spans()[0]["error"] == "ValueError: boom"
+
+    def test_jsonl_written_off_the_caller(self, monkeypatch):
+        from config import Config
+        release = threading.Event()
+        write = JsonlExporter._write
+        monkeypatch.setattr(JsonlExporter, "_write", lambda self, data: (release.wait(5), write(self, data)))
+        with span("queued"):
+            pass
+        assert not Path(Config.TRACE_FILE).exists()
+        release.set()
+        assert [s["name"] for s in _read_spans()] == ["queued"]
+
+    def test_disabled_exporter(self, monkeypatch):
+        from config import Config
+        monkeypatch.setattr(Config, "TRACE_EXPORTER", "none")
+        with span("ignored") as s:
+            assert s is None
+        assert _read_spans() == []
+
+    def test_iterate_in_span_restores_context(self):
+        root = start_span("stream")
+        seen = []
+
+        def gen():
+            for i in range(2):
+                seen.append(current_span())
+                yield i
+
+        assert list(iterate_in_span(root, gen())) == [0, 1]
+        assert seen == [root, root]
+        assert current_span() is None
+
+
+class TestPropagation:
+    def test_env_receives_traceparent(self):
+        with span("render") as s:
+            env = propagation_env({})
+        assert env[TRACEPARENT_ENV] == s.traceparent()
+
+    def test_no_span_leaves_env_untouched(self):
+        assert propagation_env(None) is None
+        assert propagation_env({"A": "1"}) == {"A": "1"}
+
+
+class TestOtlpPayload:
+    def test_encodes_spans(self):
+        root = start_span("root", part="main", cached=True)
+        child = start_span("child", parent=root)
+        root.end_ns = child.end_ns = root.start_ns + 1000
+        child.error = "RuntimeError: x"
+
+        payload = otlp_payload([root, child])
+        spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert spans[0]["attributes"] == [
+            {"key": "part", "value": {"stringValue": "main"}},
+            {"key": "cached", "value": {"boolValue": True}},
+        ]
+        assert "parentSpanId" not in spans[0]
+        assert spans[1]["parentSpanId"] == root.span_id
+        assert spans[1]["status"]["code"] == 2
@@ -0,0 +1,32 @@
+"""Tests for ZIP archives streamed while they are built."""
+import io
+import os
+import zipfile
+
+from utils import zip_stream
+
+
+class TestStreamZip:
+    def test_files_and_bytes_round_trip(self, tmp_path):
+        path = tmp_path / "part.stl"
+        path.write_bytes(b"facet normal 0 0 1\n" * 20000)
+        with open(path, "rb") as f:
+            chunks = list(zip_stream.stream_zip([("part.stl", f), ("bom.csv", b"id,quantity\n")]))
+        assert all(chunks)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+        assert archive.testzip() is None
+        assert archive.read("part.stl") == path.read_bytes()
+        assert archive.read("bom.csv") == b"id,quantity\n"
+        assert archive.getinfo("part.stl").compress_size < path.stat().st_size // 10
+
+    def test_compressed_formats_stored(self, tmp_path):
+        path = tmp_path / "part.3mf"
+        path.write_bytes(os.urandom(1000))
+        with open(path, "rb") as f:
+            data = b"".join(zip_stream.stream_zip([("part.3mf", f), ("datasheet.pdf", b"%PDF")]))
+        infos = zipfile.ZipFile(io.BytesIO(data)).infolist()
+        assert [info.compress_type for info in infos] == [zipfile.ZIP_STORED, zipfile.ZIP_STORED]
+        assert zip_stream.compress_type("part.STL") == zipfile.ZIP_DEFLATED
+
+    def test_empty_archive(self):
+        assert zipfile.ZipFile(io.BytesIO(b"".join(zip_stream.stream_zip([])))).namelist() == []
@@ -1,15 +1,25 @@
 """
-Shared route helpers for consistent error handling, STL cleanup, and path safety.
+Shared route helpers for consistent error handling, STL cleanup, path safety,
+and serving precompressed files.
 """
 import functools
 import logging
+import mimetypes
 import os
 from pathlib import Path
 from typing import Optional
+from urllib.parse import quote
 
-from flask import jsonify, request
+from flask import Response, jsonify, redirect, request, send_file
 
 from config import Config
+from services.engine.artifact_store import (
+    STORE_ERRORS,
+    get_artifact_store,
+    restore_static,
+    static_url,
+)
+from services.engine.render_cache import DEFAULT_TTL as RENDER_CACHE_TTL
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +46,99 @@ def safe_join_path(base_dir: str, filename: str) -> Optional[Path]:
     return resolved
 
 
+# Precompressed siblings written by mesh packaging, in order of preference
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# STATIC_OFFLOAD modes
+OFFLOAD_X_ACCEL = "x-accel"
+OFFLOAD_X_SENDFILE = "x-sendfile"
+
+
+def _offload_response(path: Path, header: str, value: str, mimetype: str,
+                      as_attachment: bool = False, download_name: str | None = None) -> Response:
+    """Return an empty response telling the front server to send *path* itself.
+
+    The front server replaces the empty body and answers conditional and
+    range requests, so no ETag or Last-Modified is set here.
+    """
+    resp = Response(mimetype=mimetype)
+    resp.headers[header] = value
+    if as_attachment:
+        resp.headers.set("Content-Disposition", "attachment", filename=download_name or path.name)
+    return resp
+
+
+def send_precompressed(path: Path, **kwargs):
+    """``send_file`` *path*, or its precompressed sibling if the client accepts that encoding.
+
+    A sibling (``<file>.br`` / ``<file>.gz``) older than *path* is stale and
+    ignored. The response keeps *path*'s content type and varies on
+    ``Accept-Encoding``; *kwargs* go to ``send_file``.
+
+    With ``STATIC_OFFLOAD`` set, only the headers are produced and the front
+    server transfers the file: nginx gets ``X-Accel-Redirect`` to *path* and
+    picks a sibling itself (``gzip_static``), ``x-sendfile`` servers get the
+    chosen sibling's path.
+    """
+    path = Path(path)
+    mimetype = kwargs.pop("mimetype", None) or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if Config.STATIC_OFFLOAD == OFFLOAD_X_ACCEL:
+        uri = Config.STATIC_OFFLOAD_PREFIX.rstrip("/") + quote(str(path.resolve()))
+        resp = _offload_response(path, "X-Accel-Redirect", uri, mimetype, kwargs.get("as_attachment", False),
+                                 kwargs.get("download_name"))
+        resp.vary.add("Accept-Encoding")
+        return resp
+
+    mtime_ns = path.stat().st_mtime_ns
+    chosen, content_encoding = path, None
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if not request.accept_encodings[encoding]:
+            continue
+        variant = path.with_name(path.name + suffix)
+        try:
+            if variant.stat().st_mtime_ns < mtime_ns:
+                continue
+        except OSError:
+            continue
+        chosen, content_encoding = variant, encoding
+        break
+    if Config.STATIC_OFFLOAD == OFFLOAD_X_SENDFILE:
+        resp = _offload_response(path, "X-Sendfile", str(chosen.resolve()), mimetype,
+                                 kwargs.get("as_attachment", False), kwargs.get("download_name"))
+    else:
+        resp = send_file(chosen, mimetype=mimetype, **kwargs)
+    if content_encoding:
+        resp.headers["Content-Encoding"] = content_encoding
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
+def send_shared_artifact(filename: str, **kwargs):
+    """Serve a static-folder file this pod doesn't have from the artifact store.
+
+    With ``ARTIFACT_REDIRECT`` the client is redirected to a presigned URL
+    (when the backend has them); otherwise the render that wrote *filename*
+    is copied into the static folder and served with
+    :func:`send_precompressed` (*kwargs* go there). Returns None when no
+    store is configured or it doesn't have the file from within the render
+    cache TTL.
+    """
+    store = get_artifact_store()
+    if store is None or "/" in filename:
+        return None
+    try:
+        if Config.ARTIFACT_REDIRECT:
+            download_name = kwargs.get("download_name") if kwargs.get("as_attachment") else None
+            url = static_url(store, filename, download_name, max_age=RENDER_CACHE_TTL)
+            if url:
+                return redirect(url)
+        if restore_static(store, filename, str(Config.STATIC_DIR), max_age=RENDER_CACHE_TTL):
+            return send_precompressed(Config.STATIC_DIR / filename, **kwargs)
+    except STORE_ERRORS as e:
+        logger.warning("Artifact store read failed for %s: %s", filename, e)
+    return None
+
+
 def error_response(message: str, status_code: int = 500):
     """Return a standardized JSON error response."""
     logger.error(f"[{status_code}] {message}")
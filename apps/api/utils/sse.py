@@ -0,0 +1,163 @@
+"""
+Server-Sent Events framing shared by the streaming endpoints.
+
+Routes produce async generators of event dicts (or ``(event_id, event)``
+tuples) and return :func:`sse_response`. Between the generator and the
+socket, :func:`encode_sse`:
+
+- coalesces bursts: consecutive ``chunk`` events (LLM tokens) are joined
+  into one, consecutive ``output`` events of a part (OpenSCAD lines) become
+  one event with a ``lines`` list, and everything that arrives within
+  ``SSE_COALESCE_MS`` (or ``SSE_COALESCE_BYTES``) goes out as one write;
+- sends a ``: keep-alive`` comment after ``SSE_HEARTBEAT_S`` of silence;
+- reads the generator ahead into a bounded buffer (``SSE_BUFFER_EVENTS``)
+  and applies a slow-consumer policy once it is full.
+
+Frames use compact JSON and a fixed ``id:``/``data:`` layout, so batched
+writes compress well behind a gzip-ing proxy.
+"""
+import asyncio
+import json
+from contextlib import aclosing
+
+from flask import Response
+
+from config import Config
+from services.core.metrics import SSE_EVENTS, SSE_EVENTS_DROPPED, SSE_WRITES, track_sse
+from services.engine.stream_engine import AsyncBody
+
+HEARTBEAT = ": keep-alive\n\n"
+
+# Slow-consumer policies, applied when a connection's buffer is full:
+SLOW_BLOCK = "block"            # stop reading the generator until the client catches up
+SLOW_DROP = "drop"              # drop droppable events (e.g. log lines); block on the rest
+SLOW_DISCONNECT = "disconnect"  # send an error event and end the stream
+
+# Events that may be merged with their predecessor and never force a flush
+COALESCED_EVENTS = frozenset({"chunk", "output", "ping"})
+
+
+def format_event(event: dict, event_id: str | None = None) -> str:
+    """Serialize *event* as one SSE message (with an ``id:`` line if given)."""
+    prefix = f"id: {event_id}\n" if event_id else ""
+    return f"{prefix}data: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+def merge_events(prev: dict, event: dict) -> dict | None:
+    """Return *prev* and *event* combined into one event, or None if they don't combine."""
+    kind = event.get("event")
+    if kind != prev.get("event"):
+        return None
+    if kind == "chunk":
+        return {**event, "text": prev.get("text", "") + event.get("text", "")}
+    if kind == "output" and prev.get("part") == event.get("part"):
+        # "line" stays the latest line for clients that only read one
+        return {**event, "lines": prev.get("lines", [prev.get("line")]) + [event.get("line")]}
+    if kind == "ping":
+        return event
+    return None
+
+
+async def encode_sse(events, endpoint: str = "", slow_consumer: str = SLOW_BLOCK,
+                     droppable: frozenset = frozenset({"output", "ping"})):
+    """Yield SSE text for the async generator *events*, coalesced and heartbeated.
+
+    Items are event dicts or ``(event_id, event)`` tuples; a coalesced event
+    carries the id of the last event merged into it. An exception from
+    *events* is raised here after the events before it are sent. Closing
+    this generator closes *events*.
+    """
+    buffer: asyncio.Queue = asyncio.Queue(maxsize=max(1, Config.SSE_BUFFER_EVENTS))
+    window_s = Config.SSE_COALESCE_MS / 1000
+    overflowed = False
+    dropped = 0
+
+    async def pump():
+        nonlocal overflowed, dropped
+        try:
+            async with aclosing(events) as source:
+                async for item in source:
+                    event_id, event = item if isinstance(item, tuple) else (None, item)
+                    if buffer.full() and slow_consumer != SLOW_BLOCK:
+                        if slow_consumer == SLOW_DISCONNECT:
+                            overflowed = True
+                            return
+                        if event.get("event") in droppable:
+                            dropped += 1
+                            SSE_EVENTS_DROPPED.labels(endpoint=endpoint).inc()
+                            continue
+                    await buffer.put(("event", event_id, event))
+        finally:
+            # The outcome is read from the task; once it is cancelled nobody reads the buffer
+            if not asyncio.current_task().cancelling():
+                await buffer.put(("end", None, None))
+
+    def add(batch: list, event_id, event):
+        if batch:
+            merged = merge_events(batch[-1][1], event)
+            if merged is not None:
+                batch[-1] = (event_id or batch[-1][0], merged)
+                return
+        batch.append((event_id, event))
+
+    task = asyncio.ensure_future(pump())
+    try:
+        finished = False
+        while not finished:
+            try:
+                kind, event_id, event = await asyncio.wait_for(buffer.get(), Config.SSE_HEARTBEAT_S)
+            except TimeoutError:
+                yield HEARTBEAT
+                continue
+
+            # Gather what arrives within the window; anything but a
+            # coalescable event is sent without waiting for the window
+            batch, size = [], 0
+            deadline = asyncio.get_running_loop().time() + window_s
+            while True:
+                if kind == "end":
+                    finished = True
+                    break
+                add(batch, event_id, event)
+                SSE_EVENTS.labels(endpoint=endpoint).inc()
+                size += len(event.get("text") or event.get("line") or "") + 32
+                if event.get("event") not in COALESCED_EVENTS or size >= Config.SSE_COALESCE_BYTES:
+                    break
+                remaining = deadline - asyncio.get_running_loop().time()
+                try:
+                    if remaining > 0:
+                        kind, event_id, event = await asyncio.wait_for(buffer.get(), remaining)
+                    else:
+                        kind, event_id, event = buffer.get_nowait()
+                except (TimeoutError, asyncio.QueueEmpty):
+                    break
+
+            if dropped:
+                batch.insert(0, (None, {"event": "dropped", "count": dropped}))
+                dropped = 0
+            if batch:
+                SSE_WRITES.labels(endpoint=endpoint).inc()
+                yield "".join(format_event(e, i) for i, e in batch)
+            if finished:
+                await task  # re-raises the exception from *events*
+            if overflowed:
+                break
+
+        if overflowed:
+            yield format_event({"event": "error", "message": "Client is reading too slowly; stream closed"})
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+def sse_response(endpoint: str, events, **options) -> Response:
+    """Return a streaming ``text/event-stream`` response for the async generator *events*.
+
+    *endpoint* labels the stream's metrics; *options* go to :func:`encode_sse`.
+    """
+    body = AsyncBody(track_sse(endpoint, encode_sse(events, endpoint=endpoint, **options)))
+    resp = Response(body, mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    # Batching happens here; a buffering proxy would only add latency
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
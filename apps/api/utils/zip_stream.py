@@ -0,0 +1,82 @@
+"""
+ZIP archives streamed while they are built.
+
+:func:`stream_zip` writes entries through :mod:`zipfile` into an in-memory
+sink that is drained after every chunk, so a response can send an archive
+of large files without a temp file and holding only one chunk at a time.
+The sink isn't seekable, so entries carry their sizes and CRC in data
+descriptors after their data (which every unzip tool reads).
+"""
+import io
+import os
+import time
+import zipfile
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO
+
+# Bytes read from a file per archive write
+CHUNK_SIZE = 64 * 1024
+# Entry extensions that are already compressed and are stored as is
+STORED_EXTENSIONS = {".3mf", ".pdf", ".zip", ".gz", ".br", ".png", ".jpg"}
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable buffer the archive writes into; drained by the generator."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def compress_type(name: str) -> int:
+    """Return the ZIP compression for an entry called *name*."""
+    if os.path.splitext(name)[1].lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _file_info(name: str, f: BinaryIO) -> zipfile.ZipInfo:
+    st = os.fstat(f.fileno())
+    info = zipfile.ZipInfo(name, time.localtime(st.st_mtime)[:6])
+    info.external_attr = 0o644 << 16
+    info.compress_type = compress_type(name)
+    # Lets zipfile switch to ZIP64 up front for entries over 2 GiB
+    info.file_size = st.st_size
+    return info
+
+
+def stream_zip(entries: Iterable[tuple[str, BinaryIO | bytes]]) -> Iterator[bytes]:
+    """Yield a ZIP archive of *entries* (``(name, open binary file or bytes)``) chunk by chunk.
+
+    Files are read in ``CHUNK_SIZE`` pieces and are not closed here.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for name, source in entries:
+            if isinstance(source, bytes):
+                info = zipfile.ZipInfo(name, time.localtime()[:6])
+                info.external_attr = 0o644 << 16
+                archive.writestr(info, source, compress_type=compress_type(name))
+            else:
+                with archive.open(_file_info(name, source), "w") as dest:
+                    while chunk := source.read(CHUNK_SIZE):
+                        dest.write(chunk)
+                        if data := sink.drain():
+                            yield data
+            if data := sink.drain():
+                yield data
+    # Central directory
+    if data := sink.drain():
+        yield data
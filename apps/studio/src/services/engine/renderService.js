@@ -15,6 +15,8 @@ const API_BASE = getApiBase()
 let _hardwareMode = null // Cached hardware capability check
 let _worker = null
 let _initPromise = null
+let _renderJob = null // X-Render-Job of the running backend stream, for cancelRender
+let _resumeToken = null // resume_token from that stream's `job` event
 
 /**
  * Detect hardware capabilities
@@ -88,10 +90,15 @@ function initWorker(manifest) {
 }
 
 /**
- * Parse a raw SSE chunk string into individual JSON data objects.
+ * Parse complete SSE messages into JSON data objects.
+ * Returns { events, rest } where rest is an incomplete trailing message
+ * to prepend to the next chunk (messages can span network reads).
  */
 function parseSSEChunk(chunk) {
-  const lines = chunk.split('\n').filter(line => line.startsWith('data: '))
+  const boundary = chunk.lastIndexOf('\n\n')
+  const complete = boundary === -1 ? '' : chunk.slice(0, boundary)
+  const rest = boundary === -1 ? chunk : chunk.slice(boundary + 2)
+  const lines = complete.split('\n').filter(line => line.startsWith('data: '))
   const results = []
   for (const rawLine of lines) {
     try {
@@ -100,7 +107,7 @@ function parseSSEChunk(chunk) {
       console.warn('Malformed SSE data:', e)
     }
   }
-  return results
+  return { events: results, rest }
 }
 
 /**
@@ -192,12 +199,26 @@ async function renderWasm(mode, params, manifest, onProgress, abortSignal) {
   return parts
 }
 
+const MESH_MIME_TYPES = { stl: 'model/stl', glb: 'model/gltf-binary' }
+
+/**
+ * Turn an inline `mesh` stream event into an object URL.
+ * The fragment keeps the extension the viewer picks its loader by.
+ */
+function meshObjectUrl({ data, format }) {
+  const bytes = Uint8Array.from(atob(data), c => c.charCodeAt(0))
+  const blob = new Blob([bytes], { type: MESH_MIME_TYPES[format] || 'application/octet-stream' })
+  const url = URL.createObjectURL(blob)
+  return format === 'stl' ? url : `${url}#mesh.${format}`
+}
+
 /**
  * Render parts via backend SSE stream.
  * Returns array of { type, url } for each part.
  */
 async function renderBackend(mode, params, manifest, onProgress, abortSignal, project) {
-  const payload = { ...params, mode }
+  // Small meshes come back inline in the stream instead of as a follow-up fetch
+  const payload = { ...params, mode, inline_meshes: true }
   if (project) payload.project = project
 
   if (manifest && manifest.engine === 'cadquery') {
@@ -215,46 +236,58 @@ async function renderBackend(mode, params, manifest, onProgress, abortSignal, pr
     const text = await response.text().catch(() => '')
     throw new Error(`Render request failed (HTTP ${response.status}): ${text}`)
   }
+  _renderJob = response.headers?.get?.('X-Render-Job') ?? null
+  _resumeToken = null
 
   const reader = response.body.getReader()
   const decoder = new TextDecoder()
   let finalParts = []
+  let buffer = ''
+  const inlineUrls = {}
 
   while (true) {
     const { done, value } = await reader.read()
-    if (done) break
-
-    const chunk = decoder.decode(value, { stream: true })
-    const events = parseSSEChunk(chunk)
+    // A last message without its blank line still counts once the stream ends
+    buffer += done ? '\n\n' : decoder.decode(value, { stream: true })
+    const { events, rest } = parseSSEChunk(buffer)
+    buffer = rest
 
     for (const data of events) {
       if (data.progress !== undefined) {
         onProgress?.({ percent: data.progress })
       }
 
-      if (data.event === 'part_start') {
+      if (data.event === 'job') {
+        // Proves the job is ours even if the client's address changes
+        _resumeToken = data.resume_token
+      } else if (data.event === 'part_start') {
         onProgress?.({
           part: data.part,
           log: `[${data.part}] Starting... (${data.index + 1}/${data.total})`
         })
       } else if (data.event === 'output') {
-        const line = data.line
-        const phase = detectPhase(line)
-        if (phase) onProgress?.({ phase })
-        if (isLogWorthy(line)) {
-          onProgress?.({ log: `  ${line}` })
+        // Bursts of output lines arrive coalesced into one event
+        for (const line of data.lines ?? [data.line]) {
+          const phase = detectPhase(line)
+          if (phase) onProgress?.({ phase })
+          if (isLogWorthy(line)) {
+            onProgress?.({ log: `  ${line}` })
+          }
         }
       } else if (data.event === 'part_done') {
         onProgress?.({
           part: data.part,
           log: `[${data.part}] Done (${data.progress}%)`
         })
+      } else if (data.event === 'mesh') {
+        inlineUrls[data.part] = meshObjectUrl(data)
       } else if (data.event === 'complete') {
         finalParts = data.parts
       } else if (data.event === 'error') {
         onProgress?.({ log: `[ERROR] ${data.part}: ${data.message}` })
       }
     }
+    if (done) break
   }
 
   if (finalParts.length === 0) {
@@ -264,7 +297,7 @@ async function renderBackend(mode, params, manifest, onProgress, abortSignal, pr
   const timestamp = Date.now()
   return finalParts.map(p => ({
     ...p,
-    url: p.url + '?t=' + timestamp
+    url: inlineUrls[p.type] ?? p.url + '?t=' + timestamp
   }))
 }
 
@@ -284,9 +317,16 @@ export async function renderParts(mode, params, manifest, { onProgress, abortSig
  * Cancel the current render.
  */
 export async function cancelRender() {
-  try {
-    await apiFetch(`${API_BASE}/api/render-cancel`, { method: 'POST' })
-  } catch { /* best-effort cancel */ }
+  // The backend only cancels the caller's own render job
+  if (_renderJob) {
+    try {
+      const headers = { 'X-Render-Job': _renderJob }
+      if (_resumeToken) headers['X-Render-Resume-Token'] = _resumeToken
+      await apiFetch(`${API_BASE}/api/render-cancel`, { method: 'POST', headers })
+    } catch { /* best-effort cancel */ }
+    _renderJob = null
+    _resumeToken = null
+  }
 
   if (_worker) {
     _worker.terminate()
@@ -76,15 +76,39 @@ describe('getRenderMode', () => {
 })
 
 describe('cancelRender', () => {
-  it('calls /api/render-cancel proactively without a mode health check', async () => {
+  it('cancels the running backend render job by id', async () => {
     const fetchMock = vi.spyOn(globalThis, 'fetch')
+    fetchMock.mockResolvedValueOnce({ ok: true }) // health → backend
+    fetchMock.mockResolvedValueOnce({
+      ok: true,
+      headers: new Headers({ 'X-Render-Job': 'job-1' }),
+      body: createSSEStream([
+        'data: {"event":"job","job_id":"job-1","resume_token":"tok"}',
+        '',
+        'data: {"event":"complete","parts":[{"type":"main","url":"http://x/a.stl"}],"progress":100}',
+        '',
+        ''
+      ])
+    })
+    await renderService.renderParts('unit', {}, manifest, {})
     fetchMock.mockResolvedValueOnce({ ok: true }) // cancel call
 
     await renderService.cancelRender()
 
-    expect(fetchMock).toHaveBeenCalledTimes(1)
-    expect(fetchMock.mock.calls[0][0]).toContain('/api/render-cancel')
-    expect(fetchMock.mock.calls[0][1]).toMatchObject({ method: 'POST' })
+    expect(fetchMock).toHaveBeenCalledTimes(3)
+    expect(fetchMock.mock.calls[2][0]).toContain('/api/render-cancel')
+    expect(fetchMock.mock.calls[2][1]).toMatchObject({
+      method: 'POST',
+      headers: { 'X-Render-Job': 'job-1', 'X-Render-Resume-Token': 'tok' }
+    })
+  })
+
+  it('does not call the backend without a render job', async () => {
+    const fetchMock = vi.spyOn(globalThis, 'fetch')
+
+    await renderService.cancelRender()
+
+    expect(fetchMock).not.toHaveBeenCalled()
   })
 })
 
@@ -23,6 +23,11 @@ export interface YantraPart {
     render_mode?: number;
     default_color?: string;
     static_stl?: string;
+    /** Placement in assembled scene exports: rotate (degrees about X, Y, Z), then translate */
+    transform?: {
+        translate?: [number, number, number];
+        rotate?: [number, number, number];
+    };
 }
 
 export interface YantraMode {
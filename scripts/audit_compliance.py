@@ -94,7 +94,7 @@ def check_rule_4_standardization(project_dir: Path) -> list:
     errors = []
     if manifest_service:
         try:
-            manifest_service._validate_manifest_strictness(
+            manifest_service.validate_manifest_strictness(
                 json.loads(open(project_dir / "project.json").read()), 
                 project_dir / "project.json"
             )
@@ -2,23 +2,45 @@
 """Benchmark render times for all projects against a running backend.
 
 Requires a running backend at the specified URL (default http://localhost:5000).
-Renders each project's first mode with default parameters and records timing.
+Every project, mode and preset (plus the default parameters) becomes one
+benchmark case. For each case the suite records:
+
+- cold: the first render, normally a cache MISS
+- warm: ``--repeats`` further renders of the same request, normally cache HITs
+
+Samples are classified by the ``X-Cache`` response header, not by order, so a
+case whose cache was already warm reports no cold samples rather than a
+misleading number. The warm workload is then replayed at each
+``--concurrency`` level to measure throughput and tail latency under load.
+
+Results are printed as Markdown and can be written as JSON. ``--baseline``
+compares against a previous JSON run and exits with status 1 when any metric
+regresses by more than ``--threshold``.
 
 Usage:
-    python scripts/benchmark-renders.py                    # all projects
-    python scripts/benchmark-renders.py --project gridfinity  # single project
-    python scripts/benchmark-renders.py --url http://api:5000 --output docs/benchmarks.md
+    python scripts/qa/benchmark-renders.py                           # all projects
+    python scripts/qa/benchmark-renders.py --project gridfinity      # single project
+    python scripts/qa/benchmark-renders.py --engine cadquery --no-presets
+    python scripts/qa/benchmark-renders.py --concurrency 1,4,8 --json bench.json
+    python scripts/qa/benchmark-renders.py --baseline bench.json --threshold 0.15
+    python scripts/qa/benchmark-renders.py --url http://api:5000 --output docs/benchmarks.md
 """
 import argparse
 import json
+import math
 import sys
+import threading
 import time
 import urllib.error
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+PERCENTILES = (50, 95, 99)
+DEFAULT_THRESHOLD = 0.15  # 15% slower than baseline counts as a regression
 
 
 def fetch_json(url, data=None, timeout=300):
-    """Make an HTTP request and return parsed JSON."""
+    """Make an HTTP request and return ``(parsed JSON, status, headers)``."""
     req = urllib.request.Request(
         url,
         data=json.dumps(data).encode() if data else None,
@@ -26,17 +48,17 @@ def fetch_json(url, data=None, timeout=300):
     )
     try:
         with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return json.loads(resp.read().decode()), resp.status
+            return json.loads(resp.read().decode()), resp.status, dict(resp.headers)
     except urllib.error.HTTPError as e:
         body = e.read().decode() if e.fp else ""
-        return {"error": body}, e.code
+        return {"error": body}, e.code, dict(e.headers or {})
     except urllib.error.URLError as e:
-        return {"error": str(e.reason)}, 0
+        return {"error": str(e.reason)}, 0, {}
 
 
 def check_backend(base_url):
     """Verify backend is reachable."""
-    data, status = fetch_json(f"{base_url}/api/health")
+    data, status, _ = fetch_json(f"{base_url}/api/health")
     if status != 200:
         print(f"ERROR: Backend not reachable at {base_url} (status={status})")
         sys.exit(1)
@@ -47,7 +69,7 @@ def check_backend(base_url):
 
 def get_projects(base_url):
     """Fetch list of available projects."""
-    data, status = fetch_json(f"{base_url}/api/projects")
+    data, status, _ = fetch_json(f"{base_url}/api/projects")
     if status != 200:
         print(f"ERROR: Failed to fetch projects (status={status})")
         sys.exit(1)
@@ -56,130 +78,323 @@ def get_projects(base_url):
 
 def get_manifest(base_url, slug):
     """Fetch manifest for a project."""
-    data, status = fetch_json(f"{base_url}/api/projects/{slug}/manifest")
+    data, status, _ = fetch_json(f"{base_url}/api/projects/{slug}/manifest")
     if status != 200:
         return None
     return data
 
 
-def benchmark_render(base_url, slug, mode, scad_file, parameters, timeout=300):
-    """Render a project and return timing info."""
-    payload = {
-        "project": slug,
-        "mode": mode,
-        "scad_file": scad_file,
-        "parameters": parameters,
-    }
+def build_default_params(manifest):
+    """Extract default parameter values from manifest."""
+    params = {}
+    for p in manifest.get("parameters", []):
+        params[p["id"]] = p.get("default", 0)
+    return params
+
+
+def build_cases(manifest, slug, include_presets=True):
+    """Return one case per mode × (defaults + each preset)."""
+    defaults = build_default_params(manifest)
+    engine = manifest.get("project", {}).get("engine", "openscad")
+    variants = [("default", defaults)]
+    if include_presets:
+        for preset in manifest.get("presets", []):
+            variants.append((preset["id"], {**defaults, **preset.get("values", {})}))
+
+    cases = []
+    for mode in manifest.get("modes", []):
+        for preset_id, params in variants:
+            cases.append({
+                "id": f"{slug}/{mode['id']}/{preset_id}",
+                "project": slug,
+                "mode": mode["id"],
+                "preset": preset_id,
+                "engine": engine,
+                "payload": {"project": slug, "mode": mode["id"], "parameters": params},
+            })
+    return cases
+
+
+def render_once(base_url, payload, timeout=300):
+    """Render once; return a sample dict with latency and cache state."""
     start = time.monotonic()
-    data, status = fetch_json(f"{base_url}/api/render", data=payload, timeout=timeout)
+    data, status, headers = fetch_json(f"{base_url}/api/render", data=payload, timeout=timeout)
     elapsed = time.monotonic() - start
     return {
-        "elapsed_s": round(elapsed, 2),
+        "elapsed_s": elapsed,
         "status": status,
         "success": status == 200,
+        "cache": headers.get("X-Cache", "UNKNOWN"),
         "error": data.get("error") if status != 200 else None,
     }
 
 
-def build_default_params(manifest):
-    """Extract default parameter values from manifest."""
-    params = {}
-    for p in manifest.get("parameters", []):
-        params[p["id"]] = p.get("default", 0)
-    return params
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(len(sorted_values) * pct / 100))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies):
+    """Return ``{n, mean, p50, p95, p99, max}`` in seconds (None when empty)."""
+    values = sorted(latencies)
+    summary = {"n": len(values)}
+    summary["mean"] = round(sum(values) / len(values), 4) if values else None
+    for p in PERCENTILES:
+        value = percentile(values, p)
+        summary[f"p{p}"] = round(value, 4) if value is not None else None
+    summary["max"] = round(values[-1], 4) if values else None
+    return summary
+
+
+def benchmark_case(base_url, case, repeats, timeout):
+    """Run one cold render followed by *repeats* warm renders of *case*."""
+    samples = [render_once(base_url, case["payload"], timeout) for _ in range(1 + repeats)]
+    ok = [s for s in samples if s["success"]]
+    errors = [s for s in samples if not s["success"]]
+    return {
+        **{k: case[k] for k in ("id", "project", "mode", "preset", "engine")},
+        "cold": summarize([s["elapsed_s"] for s in ok if s["cache"] == "MISS"]),
+        "warm": summarize([s["elapsed_s"] for s in ok if s["cache"] == "HIT"]),
+        "errors": len(errors),
+        "last_error": errors[-1]["error"] if errors else None,
+    }
+
+
+def benchmark_concurrency(base_url, cases, level, requests_per_worker, timeout):
+    """Replay *cases* round-robin from *level* threads; report latency and throughput."""
+    total = level * requests_per_worker
+    latencies, failures = [], 0
+    lock = threading.Lock()
 
+    def worker(i):
+        nonlocal failures
+        sample = render_once(base_url, cases[i % len(cases)]["payload"], timeout)
+        with lock:
+            if sample["success"]:
+                latencies.append(sample["elapsed_s"])
+            else:
+                failures += 1
 
-def run_benchmarks(base_url, project_filter=None, timeout=300):
-    """Run benchmarks for all (or filtered) projects."""
-    health = check_backend(base_url)
-    print(f"Backend: {base_url} — OpenSCAD: {'yes' if health.get('openscad_available') else 'NO'}\n")
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=level) as pool:
+        list(pool.map(worker, range(total)))
+    wall = time.monotonic() - start
+    return {
+        "concurrency": level,
+        "requests": total,
+        "errors": failures,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall > 0 else None,
+        "latency": summarize(latencies),
+    }
 
-    projects = get_projects(base_url)
-    if project_filter:
-        projects = [p for p in projects if p["slug"] == project_filter]
+
+def run_benchmarks(args):
+    """Run the full suite and return the JSON-serializable report."""
+    health = check_backend(args.url)
+    print(f"Backend: {args.url} — OpenSCAD: {'yes' if health.get('openscad_available') else 'NO'}\n")
+
+    projects = get_projects(args.url)
+    if args.project:
+        projects = [p for p in projects if p["slug"] == args.project]
         if not projects:
-            print(f"ERROR: Project '{project_filter}' not found")
+            print(f"ERROR: Project '{args.project}' not found")
             sys.exit(1)
 
-    results = []
+    cases = []
     for proj in sorted(projects, key=lambda p: p["slug"]):
         slug = proj["slug"]
-        manifest = get_manifest(base_url, slug)
+        manifest = get_manifest(args.url, slug)
         if not manifest or not manifest.get("modes"):
             print(f"  SKIP {slug} — no manifest or modes")
             continue
+        cases.extend(build_cases(manifest, slug, include_presets=not args.no_presets))
+    if args.engine:
+        cases = [c for c in cases if c["engine"] == args.engine]
+
+    results = []
+    for case in cases:
+        print(f"  Rendering {case['id']} ({case['engine']}) ...", end=" ", flush=True)
+        result = benchmark_case(args.url, case, args.repeats, args.timeout)
+        cold, warm = result["cold"]["p50"], result["warm"]["p50"]
+        print(f"cold={_fmt(cold)} warm={_fmt(warm)}" + (f" errors={result['errors']}" if result["errors"] else ""))
+        results.append(result)
+
+    concurrency = []
+    if cases:
+        for level in args.concurrency:
+            print(f"  Concurrency {level} ...", end=" ", flush=True)
+            run = benchmark_concurrency(args.url, cases, level, args.requests_per_worker, args.timeout)
+            print(f"{run['throughput_rps']} req/s, p95={_fmt(run['latency']['p95'])}")
+            concurrency.append(run)
+
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "url": args.url,
+        "config": {
+            "repeats": args.repeats,
+            "concurrency": args.concurrency,
+            "requests_per_worker": args.requests_per_worker,
+            "engine": args.engine,
+            "presets": not args.no_presets,
+        },
+        "cases": results,
+        "concurrency": concurrency,
+    }
+
+
+# ── Baseline comparison ────────────────────────────────────
+
+
+def _regression(metric, base, new, threshold, higher_is_better=False):
+    if base is None or new is None or base == 0:
+        return None
+    change = (new - base) / base
+    regressed = change < -threshold if higher_is_better else change > threshold
+    return {"metric": metric, "baseline": base, "current": new,
+            "change_pct": round(change * 100, 1), "regressed": regressed}
+
+
+def compare_to_baseline(report, baseline, threshold):
+    """Return the per-metric comparison rows; each has ``regressed``."""
+    rows = []
+    base_cases = {c["id"]: c for c in baseline.get("cases", [])}
+    for case in report["cases"]:
+        base = base_cases.get(case["id"])
+        if base is None:
+            continue
+        for phase in ("cold", "warm"):
+            for stat in ("p50", "p95"):
+                row = _regression(f"{case['id']} {phase} {stat}", base[phase][stat], case[phase][stat], threshold)
+                if row:
+                    rows.append(row)
+
+    base_levels = {c["concurrency"]: c for c in baseline.get("concurrency", [])}
+    for run in report["concurrency"]:
+        base = base_levels.get(run["concurrency"])
+        if base is None:
+            continue
+        level = run["concurrency"]
+        for row in (
+            _regression(f"concurrency={level} throughput_rps", base["throughput_rps"], run["throughput_rps"],
+                        threshold, higher_is_better=True),
+            _regression(f"concurrency={level} p95", base["latency"]["p95"], run["latency"]["p95"], threshold),
+            _regression(f"concurrency={level} p99", base["latency"]["p99"], run["latency"]["p99"], threshold),
+        ):
+            if row:
+                rows.append(row)
+    return rows
 
-        mode = manifest["modes"][0]
-        mode_id = mode["id"]
-        scad_file = mode["scad_file"]
-        defaults = build_default_params(manifest)
 
-        print(f"  Rendering {slug}/{mode_id} ...", end=" ", flush=True)
-        result = benchmark_render(base_url, slug, mode_id, scad_file, defaults, timeout)
-        status_str = f"{result['elapsed_s']}s" if result["success"] else f"FAIL ({result['status']})"
-        print(status_str)
+# ── Output ─────────────────────────────────────────────────
 
-        results.append({
-            "project": slug,
-            "mode": mode_id,
-            "scad_file": scad_file,
-            **result,
-        })
 
-    return results
+def _fmt(seconds):
+    return f"{seconds:.3f}s" if seconds is not None else "—"
 
 
-def format_markdown(results):
-    """Format results as a Markdown table."""
+def format_markdown(report, comparison=None, threshold=DEFAULT_THRESHOLD):
+    """Format results as Markdown tables."""
     lines = [
         "# Render Benchmarks\n",
-        "Render times for each project's first mode with default parameters.\n",
-        f"Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}\n",
-        "| Project | Mode | SCAD File | Time (s) | Status |",
-        "|---------|------|-----------|----------|--------|",
+        "Cold (cache MISS) and warm (cache HIT) render latency per project, mode and preset.\n",
+        f"Generated: {report['generated_at']}\n",
+        "| Case | Engine | Cold p50 | Warm p50 | Warm p95 | Warm p99 | Errors |",
+        "|------|--------|----------|----------|----------|----------|--------|",
     ]
-    for r in results:
-        status = "OK" if r["success"] else f"FAIL {r['status']}"
+    for r in report["cases"]:
         lines.append(
-            f"| {r['project']} | {r['mode']} | {r['scad_file']} | {r['elapsed_s']} | {status} |"
+            f"| {r['id']} | {r['engine']} | {_fmt(r['cold']['p50'])} | {_fmt(r['warm']['p50'])} "
+            f"| {_fmt(r['warm']['p95'])} | {_fmt(r['warm']['p99'])} | {r['errors']} |"
         )
 
-    # Summary
-    successful = [r for r in results if r["success"]]
-    if successful:
-        times = [r["elapsed_s"] for r in successful]
+    if report["concurrency"]:
         lines.extend([
             "",
-            "## Summary",
+            "## Concurrency",
             "",
-            f"- **Projects rendered**: {len(successful)}/{len(results)}",
-            f"- **Fastest**: {min(times)}s",
-            f"- **Slowest**: {max(times)}s",
-            f"- **Average**: {sum(times) / len(times):.2f}s",
-            f"- **Total**: {sum(times):.2f}s",
+            "| Concurrency | Requests | Errors | Throughput (req/s) | p50 | p95 | p99 |",
+            "|-------------|----------|--------|--------------------|-----|-----|-----|",
         ])
+        for run in report["concurrency"]:
+            lat = run["latency"]
+            lines.append(
+                f"| {run['concurrency']} | {run['requests']} | {run['errors']} | {run['throughput_rps']} "
+                f"| {_fmt(lat['p50'])} | {_fmt(lat['p95'])} | {_fmt(lat['p99'])} |"
+            )
+
+    if comparison is not None:
+        regressions = [row for row in comparison if row["regressed"]]
+        lines.extend(["", f"## Baseline comparison (threshold {threshold:.0%})", ""])
+        if not regressions:
+            lines.append(f"No regressions across {len(comparison)} compared metrics.")
+        else:
+            lines.extend([
+                "| Metric | Baseline | Current | Change |",
+                "|--------|----------|---------|--------|",
+            ])
+            for row in regressions:
+                lines.append(f"| {row['metric']} | {row['baseline']} | {row['current']} | {row['change_pct']:+}% |")
 
     return "\n".join(lines) + "\n"
 
 
+def _int_list(value):
+    try:
+        levels = [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected a comma-separated list of integers")
+    if not levels or min(levels) < 1:
+        raise argparse.ArgumentTypeError("concurrency levels must be >= 1")
+    return levels
+
+
 def main():
     parser = argparse.ArgumentParser(description="Benchmark Yantra4D project render times")
     parser.add_argument("--url", default="http://localhost:5000", help="Backend base URL")
     parser.add_argument("--project", help="Benchmark a single project by slug")
+    parser.add_argument("--engine", choices=["openscad", "cadquery"], help="Only benchmark projects using this engine")
+    parser.add_argument("--no-presets", action="store_true", help="Only render default parameters for each mode")
+    parser.add_argument("--repeats", type=int, default=3, help="Warm renders per case after the cold render")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4],
+                        help="Comma-separated concurrency levels for the load phase (default 1,4)")
+    parser.add_argument("--requests-per-worker", type=int, default=5,
+                        help="Requests issued per concurrent worker in the load phase")
     parser.add_argument("--output", help="Write results to a Markdown file (e.g. docs/benchmarks.md)")
+    parser.add_argument("--json", dest="json_output", help="Write machine-readable results to a JSON file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown that counts as a regression (default 0.15)")
     parser.add_argument("--timeout", type=int, default=300, help="Per-render timeout in seconds")
     args = parser.parse_args()
 
     print(f"Yantra4D Render Benchmarks\n{'=' * 40}")
-    results = run_benchmarks(args.url, args.project, args.timeout)
+    report = run_benchmarks(args)
 
-    md = format_markdown(results)
+    comparison = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare_to_baseline(report, json.load(f), args.threshold)
+        report["baseline_comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "rows": comparison}
+
+    md = format_markdown(report, comparison, args.threshold)
     print(f"\n{md}")
 
     if args.output:
         with open(args.output, "w") as f:
             f.write(md)
         print(f"Results saved to {args.output}")
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"JSON results saved to {args.json_output}")
+
+    if comparison and any(row["regressed"] for row in comparison):
+        print(f"FAIL: render performance regressed beyond {args.threshold:.0%} of baseline")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
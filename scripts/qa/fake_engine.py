@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Stand-in OpenSCAD / CadQuery executable for API load testing.
+
+Replays the externally visible behaviour of a render without a geometry
+kernel, so load tests measure the API (scheduling, cache, SSE) instead of
+CGAL or OCCT:
+
+- sleeps for a latency drawn from a configurable distribution
+- prints realistic progress lines (OpenSCAD phases on stderr, CadQuery
+  runner messages on stdout) spread over that latency
+- writes a canned, watertight mesh with a chosen number of faces
+- optionally fails like a broken model, an allocation failure or a crash
+
+OpenSCAD mode is the default and accepts the API's OpenSCAD command line
+(``-o <output> [-D name=value ...] <file.scad>``)::
+
+    OPENSCAD_PATH=scripts/qa/fake_engine.py
+
+CadQuery mode takes the ``cq_runner.py`` arguments after a ``cadquery``
+marker::
+
+    CADQUERY_RUNNER="python scripts/qa/fake_engine.py cadquery"
+
+Behaviour is configured with environment variables (inherited from the API
+process):
+
+    FAKE_ENGINE_LATENCY   fixed:S | uniform:LO,HI | normal:MEAN,SD |
+                          lognormal:MEDIAN,SIGMA | exp:MEAN   (seconds,
+                          default uniform:0.05,0.25)
+    FAKE_ENGINE_FACES     triangles in the output mesh, rounded down to a
+                          multiple of 4 (default 1000)
+    FAKE_ENGINE_FAIL_RATE probability of failing, 0..1 (default 0)
+    FAKE_ENGINE_FAILURE   error | oom | crash (default error)
+    FAKE_ENGINE_SEED      makes latency and failures a deterministic
+                          function of the command line
+    FAKE_ENGINE_MESH_DIR  where generated meshes are cached (default: temp dir)
+
+``.glb`` outputs get a binary glTF of the mesh; every other extension gets
+a binary STL.
+"""
+import json
+import math
+import os
+import random
+import shutil
+import signal
+import struct
+import sys
+import tempfile
+import time
+
+DEFAULT_LATENCY = "uniform:0.05,0.25"
+DEFAULT_FACES = 1000
+FAILURE_KINDS = ("error", "oom", "crash")
+
+# Share of the render spent before each OpenSCAD progress block, roughly the
+# API's PHASE_WEIGHTS so streamed progress advances the way it does for real.
+OPENSCAD_PHASES = (
+    (0.05, ["Parsing design (AST generation)...", "Compiling design (CSG Tree generation)..."]),
+    (0.15, ["Compiling design (CSG Products generation)...", "Geometries in cache: {geometries}",
+            "Geometry cache size in bytes: {cache_bytes}"]),
+    (0.25, ["Rendering Polygon Mesh using CGAL...", "CGAL Polyhedrons in cache: 1",
+            "CGAL cache size in bytes: {cgal_bytes}"]),
+    (0.35, ["Total rendering time: {elapsed}"]),
+    (0.15, ["Top level object is a 3D object:", "Simple:        yes", "Vertices:   {vertices}",
+            "Halfedges:  {halfedges}", "Edges:      {edges}", "Halffacets: {halffacets}",
+            "Facets:     {faces}", "Volumes:       2"]),
+)
+
+
+def parse_latency(spec: str):
+    """Return a ``rng -> seconds`` sampler for a FAKE_ENGINE_LATENCY spec."""
+    kind, _, raw = spec.partition(":")
+    try:
+        args = [float(v) for v in raw.split(",") if v.strip()]
+    except ValueError:
+        raise ValueError(f"invalid FAKE_ENGINE_LATENCY: {spec!r}")
+    samplers = {
+        "fixed": (1, lambda rng: args[0]),
+        "uniform": (2, lambda rng: rng.uniform(args[0], args[1])),
+        "normal": (2, lambda rng: rng.gauss(args[0], args[1])),
+        "lognormal": (2, lambda rng: rng.lognormvariate(math.log(args[0]), args[1])),
+        "exp": (1, lambda rng: rng.expovariate(1 / args[0]) if args[0] > 0 else 0.0),
+    }
+    if kind not in samplers or len(args) != samplers[kind][0]:
+        raise ValueError(f"invalid FAKE_ENGINE_LATENCY: {spec!r}")
+    sample = samplers[kind][1]
+    return lambda rng: max(0.0, sample(rng))
+
+
+# ── Canned mesh ────────────────────────────────────────────
+
+
+def prism_triangles(faces: int):
+    """Triangles of a closed n-gon prism with about *faces* faces (4 per side)."""
+    sides = max(3, faces // 4)
+    radius, height = 20.0, 10.0
+    ring = [(radius * math.cos(2 * math.pi * i / sides), radius * math.sin(2 * math.pi * i / sides))
+            for i in range(sides)]
+    triangles = []
+    for i in range(sides):
+        (x0, y0), (x1, y1) = ring[i], ring[(i + 1) % sides]
+        bottom0, bottom1 = (x0, y0, 0.0), (x1, y1, 0.0)
+        top0, top1 = (x0, y0, height), (x1, y1, height)
+        triangles.append(((0.0, 0.0, 0.0), bottom1, bottom0))
+        triangles.append(((0.0, 0.0, height), top0, top1))
+        triangles.append((bottom0, bottom1, top1))
+        triangles.append((bottom0, top1, top0))
+    return triangles
+
+
+def _normal(a, b, c):
+    u = (b[0] - a[0], b[1] - a[1], b[2] - a[2])
+    v = (c[0] - a[0], c[1] - a[1], c[2] - a[2])
+    n = (u[1] * v[2] - u[2] * v[1], u[2] * v[0] - u[0] * v[2], u[0] * v[1] - u[1] * v[0])
+    length = math.sqrt(n[0] ** 2 + n[1] ** 2 + n[2] ** 2) or 1.0
+    return (n[0] / length, n[1] / length, n[2] / length)
+
+
+def stl_bytes(triangles) -> bytes:
+    """Binary STL encoding of *triangles*."""
+    facet = struct.Struct("<12fH")
+    body = b"".join(facet.pack(*_normal(*t), *t[0], *t[1], *t[2], 0) for t in triangles)
+    return b"fake_engine".ljust(80, b" ") + struct.pack("<I", len(triangles)) + body
+
+
+def glb_bytes(triangles) -> bytes:
+    """Binary glTF 2.0 with one non-indexed triangle mesh."""
+    positions = [coord for t in triangles for vertex in t for coord in vertex]
+    binary = struct.pack(f"<{len(positions)}f", *positions)
+    gltf = {
+        "asset": {"version": "2.0", "generator": "yantra4d fake_engine"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}}]}],
+        "buffers": [{"byteLength": len(binary)}],
+        "bufferViews": [{"buffer": 0, "byteOffset": 0, "byteLength": len(binary), "target": 34962}],
+        "accessors": [{
+            "bufferView": 0, "componentType": 5126, "count": len(positions) // 3, "type": "VEC3",
+            "min": [min(positions[i::3]) for i in range(3)],
+            "max": [max(positions[i::3]) for i in range(3)],
+        }],
+    }
+    json_chunk = json.dumps(gltf, separators=(",", ":")).encode()
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    binary += b"\0" * (-len(binary) % 4)
+    length = 12 + 8 + len(json_chunk) + 8 + len(binary)
+    return b"".join([
+        struct.pack("<4sII", b"glTF", 2, length),
+        struct.pack("<I4s", len(json_chunk), b"JSON"), json_chunk,
+        struct.pack("<I4s", len(binary), b"BIN\0"), binary,
+    ])
+
+
+def write_mesh(output_path: str, faces: int) -> None:
+    """Copy the cached mesh for (*faces*, format) to *output_path*, generating it once."""
+    fmt = "glb" if output_path.lower().endswith(".glb") else "stl"
+    cache_dir = os.environ.get("FAKE_ENGINE_MESH_DIR") or tempfile.gettempdir()
+    cached = os.path.join(cache_dir, f"yantra4d-fake-mesh-{faces}.{fmt}")
+    if not os.path.exists(cached):
+        triangles = prism_triangles(faces)
+        data = glb_bytes(triangles) if fmt == "glb" else stl_bytes(triangles)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=f".{fmt}")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, cached)
+    shutil.copyfile(cached, output_path)
+
+
+# ── Engines ────────────────────────────────────────────────
+
+
+def _fail(kind: str, stream) -> None:
+    if kind == "oom":
+        print("terminate called after throwing an instance of 'std::bad_alloc'", file=stream, flush=True)
+        print("  what():  std::bad_alloc", file=stream, flush=True)
+        os.kill(os.getpid(), signal.SIGABRT)
+    elif kind == "crash":
+        os.kill(os.getpid(), signal.SIGSEGV)
+    print("ERROR: Parser error: syntax error (injected by fake_engine)", file=stream, flush=True)
+    print("Execution aborted", file=stream, flush=True)
+    sys.exit(1)
+
+
+def _play(phases, latency: float, stream, values: dict | None, fail_kind: str | None) -> None:
+    """Print each phase's lines after its share of *latency*; fail midway when asked.
+
+    With *values*, lines are ``str.format`` templates (``{elapsed}`` is filled in here).
+    """
+    started = time.monotonic()
+    for i, (share, lines) in enumerate(phases):
+        time.sleep(latency * share)
+        if fail_kind and i == len(phases) // 2:
+            _fail(fail_kind, stream)
+        if values is not None:
+            elapsed = time.monotonic() - started
+            values["elapsed"] = f"{int(elapsed // 3600)}:{int(elapsed % 3600 // 60):02d}:{elapsed % 60:06.3f}"
+        for line in lines:
+            print(line.format(**values) if values is not None else line, file=stream, flush=True)
+
+
+def run_openscad(argv: list, latency: float, faces: int, fail_kind: str | None) -> None:
+    if "-o" not in argv or argv.index("-o") + 1 >= len(argv):
+        print("fake_engine: missing -o <output>", file=sys.stderr)
+        sys.exit(2)
+    output_path = argv[argv.index("-o") + 1]
+    sides = max(3, faces // 4)
+    vertices, mesh_faces = 2 * sides + 2, 4 * sides
+    edges = vertices + mesh_faces - 2
+    values = {
+        "geometries": 3, "cache_bytes": 1024 * faces, "cgal_bytes": 4096 * faces,
+        "vertices": vertices, "faces": mesh_faces, "edges": edges,
+        "halfedges": 2 * edges, "halffacets": 2 * mesh_faces,
+    }
+    _play(OPENSCAD_PHASES, latency, sys.stderr, values, fail_kind)
+    write_mesh(output_path, faces)
+
+
+def run_cadquery(argv: list, latency: float, faces: int, fail_kind: str | None) -> None:
+    if len(argv) < 4:
+        print("Usage: fake_engine.py cadquery <script_path> <output_path> <params_json> <export_format>")
+        sys.exit(1)
+    script_path, output_path, params_json, export_format = argv[:4]
+    phases = (
+        (0.0, [f"Loading parameters: {params_json}", f"Executing CadQuery script: {script_path}"]),
+        (0.8, [f"Exporting to {export_format}: {output_path}"]),
+        (0.2, ["Rendering complete."]),
+    )
+    _play(phases, latency, sys.stdout, None, fail_kind)
+    write_mesh(output_path, faces)
+
+
+def main(argv: list) -> None:
+    cadquery = bool(argv) and argv[0] == "cadquery"
+    args = argv[1:] if cadquery else argv
+
+    seed = os.environ.get("FAKE_ENGINE_SEED")
+    rng = random.Random(f"{seed}|{' '.join(argv)}") if seed else random.Random()
+    try:
+        latency = parse_latency(os.environ.get("FAKE_ENGINE_LATENCY", DEFAULT_LATENCY))(rng)
+        faces = max(12, int(os.environ.get("FAKE_ENGINE_FACES", DEFAULT_FACES)))
+        fail_rate = float(os.environ.get("FAKE_ENGINE_FAIL_RATE", "0"))
+    except ValueError as e:
+        print(f"fake_engine: {e}", file=sys.stderr)
+        sys.exit(2)
+    fail_kind = os.environ.get("FAKE_ENGINE_FAILURE", "error")
+    if fail_kind not in FAILURE_KINDS:
+        print(f"fake_engine: FAKE_ENGINE_FAILURE must be one of {', '.join(FAILURE_KINDS)}", file=sys.stderr)
+        sys.exit(2)
+    failing = fail_kind if rng.random() < fail_rate else None
+
+    (run_cadquery if cadquery else run_openscad)(args, latency, faces, failing)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""Concurrent load driver for /api/render and /api/render-stream.
+
+Replays a mix of render requests against a running backend from a pool of
+worker threads and reports throughput and latency percentiles per endpoint.
+For /api/render-stream it also records time to first event (TTFB), the
+number of SSE events and streams that ended in an ``error`` event.
+
+Pair it with the fake engines to measure scheduling, cache and SSE overhead
+without OpenSCAD or CadQuery installed::
+
+    OPENSCAD_PATH=$PWD/scripts/qa/fake_engine.py \\
+    CADQUERY_RUNNER="python $PWD/scripts/qa/fake_engine.py cadquery" \\
+    FAKE_ENGINE_LATENCY=lognormal:0.2,0.5 RATE_LIMIT_ENABLED=false \\
+    python apps/api/app.py
+
+    python scripts/qa/load-test-render.py --concurrency 16 --requests 500
+
+Requests cycle through every project × mode with default parameters.
+``--miss-ratio`` jitters a slider parameter on that fraction of requests so
+they miss the render cache; otherwise repeated requests are cache hits after
+the first round. Rate limiting should be disabled on the target
+(``RATE_LIMIT_ENABLED=false``) or 429s are counted as errors.
+
+Usage:
+    python scripts/qa/load-test-render.py                                # both endpoints
+    python scripts/qa/load-test-render.py --endpoint render-stream --duration 60
+    python scripts/qa/load-test-render.py --project gridfinity --miss-ratio 0.5
+    python scripts/qa/load-test-render.py --json load.json --output load.md
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+PERCENTILES = (50, 95, 99)
+ENDPOINTS = ("render", "render-stream")
+
+
+def fetch_json(url, timeout=30):
+    """GET *url* and return ``(parsed JSON, status)``."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return json.loads(resp.read().decode()), resp.status
+    except urllib.error.HTTPError as e:
+        return {"error": e.read().decode() if e.fp else ""}, e.code
+    except urllib.error.URLError as e:
+        return {"error": str(e.reason)}, 0
+
+
+def _post(url, payload, timeout):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                 headers={"Content-Type": "application/json"})
+    return urllib.request.urlopen(req, timeout=timeout)
+
+
+def build_cases(base_url, project=None, engine=None):
+    """Return one case per project × mode with the manifest's default parameters."""
+    projects, status = fetch_json(f"{base_url}/api/projects")
+    if status != 200:
+        print(f"ERROR: Failed to fetch projects from {base_url} (status={status})")
+        sys.exit(1)
+    if project:
+        projects = [p for p in projects if p["slug"] == project]
+
+    cases = []
+    for proj in sorted(projects, key=lambda p: p["slug"]):
+        manifest, status = fetch_json(f"{base_url}/api/projects/{proj['slug']}/manifest")
+        if status != 200:
+            continue
+        project_engine = manifest.get("project", {}).get("engine", "openscad")
+        if engine and project_engine != engine:
+            continue
+        params = {p["id"]: p.get("default", 0) for p in manifest.get("parameters", [])}
+        sliders = [p for p in manifest.get("parameters", [])
+                   if p.get("type") == "slider" and p.get("min") is not None and p.get("max") is not None]
+        for mode in manifest.get("modes", []):
+            cases.append({
+                "id": f"{proj['slug']}/{mode['id']}",
+                "engine": project_engine,
+                "payload": {"project": proj["slug"], "mode": mode["id"], "parameters": params},
+                "slider": sliders[0] if sliders else None,
+            })
+    return cases
+
+
+def make_payload(case, rng, miss_ratio):
+    """Return ``(payload, jittered)``; jittered payloads are meant to miss the cache."""
+    slider = case["slider"]
+    if slider is None or rng.random() >= miss_ratio:
+        return case["payload"], False
+    params = dict(case["payload"]["parameters"])
+    params[slider["id"]] = round(rng.uniform(float(slider["min"]), float(slider["max"])), 6)
+    return {**case["payload"], "parameters": params}, True
+
+
+def render_request(base_url, payload, timeout):
+    """POST /api/render and return a sample dict."""
+    start = time.monotonic()
+    try:
+        with _post(f"{base_url}/api/render", payload, timeout) as resp:
+            resp.read()
+            status, cache = resp.status, resp.headers.get("X-Cache", "UNKNOWN")
+    except urllib.error.HTTPError as e:
+        status, cache = e.code, None
+    except (urllib.error.URLError, OSError) as e:
+        return {"elapsed_s": time.monotonic() - start, "ok": False, "status": 0, "error": str(e)}
+    return {"elapsed_s": time.monotonic() - start, "ok": status == 200, "status": status, "cache": cache}
+
+
+def stream_request(base_url, payload, timeout):
+    """POST /api/render-stream, read the SSE stream to the end and return a sample dict."""
+    start = time.monotonic()
+    ttfb, events, error_events, completed = None, 0, 0, False
+    try:
+        with _post(f"{base_url}/api/render-stream", payload, timeout) as resp:
+            status = resp.status
+            for raw in resp:
+                line = raw.decode().strip()
+                if not line.startswith("data:"):
+                    continue
+                if ttfb is None:
+                    ttfb = time.monotonic() - start
+                events += 1
+                try:
+                    event = json.loads(line[5:])
+                except json.JSONDecodeError:
+                    continue
+                if event.get("event") == "error":
+                    error_events += 1
+                elif event.get("event") == "complete":
+                    completed = True
+    except urllib.error.HTTPError as e:
+        return {"elapsed_s": time.monotonic() - start, "ok": False, "status": e.code}
+    except (urllib.error.URLError, OSError) as e:
+        return {"elapsed_s": time.monotonic() - start, "ok": False, "status": 0, "error": str(e)}
+    return {
+        "elapsed_s": time.monotonic() - start,
+        "ok": status == 200 and completed and not error_events,
+        "status": status,
+        "ttfb_s": ttfb,
+        "events": events,
+        "error_events": error_events,
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(len(sorted_values) * pct / 100))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies):
+    """Return ``{n, mean, p50, p95, p99, max}`` in seconds (None when empty)."""
+    values = sorted(latencies)
+    summary = {"n": len(values)}
+    summary["mean"] = round(sum(values) / len(values), 4) if values else None
+    for p in PERCENTILES:
+        value = percentile(values, p)
+        summary[f"p{p}"] = round(value, 4) if value is not None else None
+    summary["max"] = round(values[-1], 4) if values else None
+    return summary
+
+
+def run_load(base_url, endpoint, cases, args):
+    """Drive *endpoint* with ``args.concurrency`` workers; return its report section."""
+    request_fn = render_request if endpoint == "render" else stream_request
+    samples = []
+    lock = threading.Lock()
+    counter = iter(range(sys.maxsize))
+    deadline = time.monotonic() + args.duration if args.duration else None
+
+    def worker(worker_id):
+        rng = random.Random(f"{args.seed}|{endpoint}|{worker_id}")
+        while True:
+            with lock:
+                i = next(counter)
+            if deadline is None and i >= args.requests:
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            payload, jittered = make_payload(cases[i % len(cases)], rng, args.miss_ratio)
+            sample = request_fn(base_url, payload, args.timeout)
+            sample["jittered"] = jittered
+            with lock:
+                samples.append(sample)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(worker, range(args.concurrency)))
+    wall = time.monotonic() - start
+
+    ok = [s for s in samples if s["ok"]]
+    statuses = {}
+    for s in samples:
+        if not s["ok"]:
+            statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+    section = {
+        "endpoint": endpoint,
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "error_statuses": statuses,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(ok) / wall, 3) if wall > 0 else None,
+        "latency": summarize([s["elapsed_s"] for s in ok]),
+    }
+    if endpoint == "render":
+        section["cache"] = {
+            "hit": sum(1 for s in ok if s.get("cache") == "HIT"),
+            "miss": sum(1 for s in ok if s.get("cache") == "MISS"),
+        }
+    else:
+        section["ttfb"] = summarize([s["ttfb_s"] for s in ok if s.get("ttfb_s") is not None])
+        section["events_per_stream"] = round(sum(s["events"] for s in ok) / len(ok), 1) if ok else None
+        section["error_events"] = sum(s.get("error_events", 0) for s in samples)
+    return section
+
+
+# ── Output ─────────────────────────────────────────────────
+
+
+def _fmt(seconds):
+    return f"{seconds:.3f}s" if seconds is not None else "—"
+
+
+def format_markdown(report):
+    """Format the load test report as Markdown."""
+    cfg = report["config"]
+    lines = [
+        "# Render Load Test\n",
+        f"Generated: {report['generated_at']} — {report['url']}, {len(report['cases'])} cases, "
+        f"concurrency {cfg['concurrency']}, miss ratio {cfg['miss_ratio']}\n",
+        "| Endpoint | Requests | Errors | Throughput (req/s) | p50 | p95 | p99 | Max |",
+        "|----------|----------|--------|--------------------|-----|-----|-----|-----|",
+    ]
+    for section in report["endpoints"]:
+        lat = section["latency"]
+        lines.append(
+            f"| {section['endpoint']} | {section['requests']} | {section['errors']} | {section['throughput_rps']} "
+            f"| {_fmt(lat['p50'])} | {_fmt(lat['p95'])} | {_fmt(lat['p99'])} | {_fmt(lat['max'])} |"
+        )
+    for section in report["endpoints"]:
+        if "cache" in section:
+            lines.append(f"\n`render` cache: {section['cache']['hit']} HIT / {section['cache']['miss']} MISS")
+        if "ttfb" in section:
+            ttfb = section["ttfb"]
+            lines.append(
+                f"\n`render-stream` time to first event: p50 {_fmt(ttfb['p50'])}, p95 {_fmt(ttfb['p95'])}, "
+                f"p99 {_fmt(ttfb['p99'])}; {section['events_per_stream']} events per stream, "
+                f"{section['error_events']} error events"
+            )
+        if section["error_statuses"]:
+            codes = ", ".join(f"{code}: {n}" for code, n in sorted(section["error_statuses"].items()))
+            lines.append(f"\n`{section['endpoint']}` failures by status: {codes}")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test Yantra4D render endpoints")
+    parser.add_argument("--url", default="http://localhost:5000", help="Backend base URL")
+    parser.add_argument("--endpoint", choices=[*ENDPOINTS, "both"], default="both", help="Endpoint(s) to drive")
+    parser.add_argument("--project", help="Only use this project")
+    parser.add_argument("--engine", choices=["openscad", "cadquery"], help="Only use projects with this engine")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent workers (default 8)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint (default 200)")
+    parser.add_argument("--duration", type=float, help="Run each endpoint for this many seconds instead")
+    parser.add_argument("--miss-ratio", type=float, default=0.0,
+                        help="Fraction of requests with jittered parameters that miss the cache (default 0)")
+    parser.add_argument("--seed", default="0", help="Seed for parameter jitter")
+    parser.add_argument("--timeout", type=int, default=300, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Write results to a Markdown file")
+    parser.add_argument("--json", dest="json_output", help="Write machine-readable results to a JSON file")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be >= 1")
+    if not 0 <= args.miss_ratio <= 1:
+        parser.error("--miss-ratio must be between 0 and 1")
+
+    cases = build_cases(args.url, args.project, args.engine)
+    if not cases:
+        print("ERROR: no render cases (check --project/--engine)")
+        sys.exit(1)
+    print(f"Yantra4D Render Load Test\n{'=' * 40}\n{len(cases)} cases against {args.url}")
+
+    endpoints = ENDPOINTS if args.endpoint == "both" else (args.endpoint,)
+    sections = []
+    for endpoint in endpoints:
+        print(f"  /api/{endpoint} ...", end=" ", flush=True)
+        section = run_load(args.url, endpoint, cases, args)
+        print(f"{section['throughput_rps']} req/s, p95={_fmt(section['latency']['p95'])}, errors={section['errors']}")
+        sections.append(section)
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "url": args.url,
+        "config": {k: getattr(args, k) for k in ("concurrency", "requests", "duration", "miss_ratio", "seed")},
+        "cases": [c["id"] for c in cases],
+        "endpoints": sections,
+    }
+    md = format_markdown(report)
+    print(f"\n{md}")
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(md)
+        print(f"Results saved to {args.output}")
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"JSON results saved to {args.json_output}")
+
+
+if __name__ == "__main__":
+    main()
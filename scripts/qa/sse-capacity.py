@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Concurrent SSE stream capacity benchmark for /api/render-stream.
+
+Opens N render streams that stay open (a slow fake engine keeps every render
+busy), then probes /api/health while they are held and reports how many
+streams got a response and whether the worker still answers health checks.
+N is stepped through ``--levels``, so the table shows where a serving mode
+stops accepting streams or starts failing health checks.
+
+Start the backend with a slow fake engine and one worker, in either mode::
+
+    cd apps/api
+    export OPENSCAD_PATH=$PWD/../../scripts/qa/fake_engine.py \\
+           FAKE_ENGINE_LATENCY=fixed:600 RATE_LIMIT_ENABLED=false
+    gunicorn -c gunicorn.conf.py -w 1 -b 127.0.0.1:5000 --timeout 300             # sync
+    SERVER_MODE=asgi gunicorn -c gunicorn.conf.py -w 1 -b 127.0.0.1:5000         # ASGI
+
+    python scripts/qa/sse-capacity.py --project gridfinity --levels 1,2,8,64,256
+
+Every stream jitters a slider parameter so it misses the render cache and
+starts its own render. Streams are closed after each level and their renders
+(which would otherwise run on as resumable jobs) are stopped with
+/api/render-cancel. Cancelling every render needs the admin role, so run the
+server with AUTH_ENABLED=false.
+
+Usage:
+    python scripts/qa/sse-capacity.py --project gridfinity
+    python scripts/qa/sse-capacity.py --levels 16,128,512 --hold 10 --json capacity.json
+"""
+import argparse
+import http.client
+import json
+import math
+import random
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+PERCENTILES = (50, 95)
+
+
+def fetch_json(url, timeout=30):
+    """GET *url* and return ``(parsed JSON, status)``."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return json.loads(resp.read().decode()), resp.status
+    except urllib.error.HTTPError as e:
+        return {"error": e.read().decode() if e.fp else ""}, e.code
+    except urllib.error.URLError as e:
+        return {"error": str(e.reason)}, 0
+
+
+def build_case(base_url, project):
+    """Return ``(payload, slider)`` for the first mode of *project* (or the first project with a slider)."""
+    projects, status = fetch_json(f"{base_url}/api/projects")
+    if status != 200:
+        print(f"ERROR: Failed to fetch projects from {base_url} (status={status})")
+        sys.exit(1)
+    slugs = [project] if project else sorted(p["slug"] for p in projects)
+    for slug in slugs:
+        manifest, status = fetch_json(f"{base_url}/api/projects/{slug}/manifest")
+        if status != 200 or not manifest.get("modes"):
+            continue
+        sliders = [p for p in manifest.get("parameters", [])
+                   if p.get("type") == "slider" and p.get("min") is not None and p.get("max") is not None]
+        if not sliders:
+            continue
+        params = {p["id"]: p.get("default", 0) for p in manifest.get("parameters", [])}
+        return {"project": slug, "mode": manifest["modes"][0]["id"], "parameters": params}, sliders[0]
+    print("ERROR: no project with a slider parameter (check --project)")
+    sys.exit(1)
+
+
+class Stream(threading.Thread):
+    """One /api/render-stream connection, held open until :meth:`close`."""
+
+    def __init__(self, base_url, payload, open_timeout):
+        super().__init__(daemon=True)
+        url = urllib.parse.urlsplit(base_url)
+        self.conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=open_timeout)
+        self.payload = payload
+        self.started = time.monotonic()
+        self.opened_s = None
+        self.status = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.conn.request("POST", "/api/render-stream", body=json.dumps(self.payload),
+                              headers={"Content-Type": "application/json"})
+            resp = self.conn.getresponse()
+            self.status = resp.status
+            self.opened_s = time.monotonic() - self.started
+            self.conn.sock.settimeout(None)
+            while resp.readline():
+                pass
+        except (OSError, http.client.HTTPException) as e:
+            self.error = str(e)
+
+    def close(self):
+        sock = self.conn.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.conn.close()
+
+
+def probe_health(base_url, hold, interval, timeout):
+    """Poll /api/health for *hold* seconds; return latencies of successes and the failure count."""
+    latencies, failures = [], 0
+    deadline = time.monotonic() + hold
+    while time.monotonic() < deadline:
+        start = time.monotonic()
+        try:
+            with urllib.request.urlopen(f"{base_url}/api/health", timeout=timeout) as resp:
+                resp.read()
+                ok = resp.status == 200
+        except (urllib.error.URLError, OSError):
+            ok = False
+        elapsed = time.monotonic() - start
+        if ok:
+            latencies.append(elapsed)
+        else:
+            failures += 1
+        time.sleep(max(0.0, interval - elapsed))
+    return latencies, failures
+
+
+def cancel_renders(base_url):
+    """Stop renders left running by closed streams (render jobs outlive their connection)."""
+    req = urllib.request.Request(f"{base_url}/api/render-cancel", data=b"", method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            resp.read()
+    except (urllib.error.URLError, OSError):
+        pass
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(len(sorted_values) * pct / 100))
+    return sorted_values[rank - 1]
+
+
+def _summary(values):
+    values = sorted(values)
+    return {f"p{p}": round(percentile(values, p), 4) if values else None for p in PERCENTILES}
+
+
+def run_level(base_url, payload, slider, n, args, rng):
+    """Hold *n* streams open, probe health, close them; return the level's results."""
+    streams = []
+    for _ in range(n):
+        params = dict(payload["parameters"])
+        params[slider["id"]] = round(rng.uniform(float(slider["min"]), float(slider["max"])), 6)
+        stream = Stream(base_url, {**payload, "parameters": params}, args.open_timeout)
+        stream.start()
+        streams.append(stream)
+
+    deadline = time.monotonic() + args.open_timeout
+    while time.monotonic() < deadline and any(s.opened_s is None and s.error is None for s in streams):
+        time.sleep(0.05)
+    health, failures = probe_health(base_url, args.hold, args.interval, args.health_timeout)
+
+    for stream in streams:
+        stream.close()
+    for stream in streams:
+        stream.join(timeout=5)
+    cancel_renders(base_url)
+    time.sleep(args.settle)
+
+    opened = [s for s in streams if s.status == 200]
+    return {
+        "streams": n,
+        "opened": len(opened),
+        "open_time": _summary([s.opened_s for s in opened]),
+        "health_ok": len(health),
+        "health_failed": failures,
+        "health_latency": _summary(health),
+    }
+
+
+# ── Output ─────────────────────────────────────────────────
+
+
+def _fmt(seconds):
+    return f"{seconds * 1000:.0f} ms" if seconds is not None else "—"
+
+
+def format_markdown(report):
+    """Format the capacity report as Markdown."""
+    lines = [
+        "# SSE Stream Capacity\n",
+        f"Generated: {report['generated_at']} — {report['url']}, project {report['case']}, "
+        f"hold {report['config']['hold']}s per level\n",
+        "| Streams | Opened | Open p50 | Open p95 | Health OK | Health failed | Health p50 | Health p95 |",
+        "|---------|--------|----------|----------|-----------|---------------|------------|------------|",
+    ]
+    for level in report["levels"]:
+        lines.append(
+            f"| {level['streams']} | {level['opened']} | {_fmt(level['open_time']['p50'])} "
+            f"| {_fmt(level['open_time']['p95'])} | {level['health_ok']} | {level['health_failed']} "
+            f"| {_fmt(level['health_latency']['p50'])} | {_fmt(level['health_latency']['p95'])} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure concurrent SSE streams per Yantra4D API worker")
+    parser.add_argument("--url", default="http://localhost:5000", help="Backend base URL")
+    parser.add_argument("--project", help="Project to render (default: first with a slider parameter)")
+    parser.add_argument("--levels", default="1,2,4,8,16,32,64,128,256",
+                        help="Comma-separated stream counts to hold open")
+    parser.add_argument("--hold", type=float, default=5.0, help="Seconds to probe health per level (default 5)")
+    parser.add_argument("--interval", type=float, default=0.25, help="Seconds between health probes")
+    parser.add_argument("--open-timeout", type=float, default=10.0,
+                        help="Seconds a stream may take to get a response (default 10)")
+    parser.add_argument("--health-timeout", type=float, default=2.0, help="Health probe timeout in seconds")
+    parser.add_argument("--settle", type=float, default=2.0, help="Pause after closing a level's streams")
+    parser.add_argument("--seed", default="0", help="Seed for parameter jitter")
+    parser.add_argument("--output", help="Write results to a Markdown file")
+    parser.add_argument("--json", dest="json_output", help="Write machine-readable results to a JSON file")
+    args = parser.parse_args()
+    try:
+        levels = [int(n) for n in args.levels.split(",") if n.strip()]
+    except ValueError:
+        parser.error("--levels must be comma-separated integers")
+    if not levels or min(levels) < 1:
+        parser.error("--levels must be positive")
+
+    payload, slider = build_case(args.url, args.project)
+    rng = random.Random(args.seed)
+    print(f"Yantra4D SSE Capacity\n{'=' * 40}\n{payload['project']}/{payload['mode']} against {args.url}")
+
+    results = []
+    for n in levels:
+        print(f"  {n} streams ...", end=" ", flush=True)
+        level = run_level(args.url, payload, slider, n, args, rng)
+        print(f"{level['opened']} opened, health {level['health_ok']} ok / {level['health_failed']} failed")
+        results.append(level)
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "url": args.url,
+        "case": f"{payload['project']}/{payload['mode']}",
+        "config": {k: getattr(args, k) for k in ("hold", "interval", "open_timeout", "health_timeout", "seed")},
+        "levels": results,
+    }
+    md = format_markdown(report)
+    print(f"\n{md}")
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(md)
+        print(f"Results saved to {args.output}")
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"JSON results saved to {args.json_output}")
+
+
+if __name__ == "__main__":
+    main()